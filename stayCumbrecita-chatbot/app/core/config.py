@@ -1,6 +1,7 @@
 import os
 from pydantic_settings import BaseSettings
 from typing import Optional
+from urllib.parse import urlparse
 
 class Settings(BaseSettings):
     # Base de datos - usando variables individuales como en el env.example
@@ -15,6 +16,19 @@ class Settings(BaseSettings):
     def database_url(self) -> str:
         return f"postgresql://{self.db_username}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_database}"
     
+    # Aplicar migraciones pendientes al arrancar (false = solo con tools/migrate.py, ej: paso de release)
+    migrations_on_startup: bool = os.getenv("MIGRATIONS_ON_STARTUP", "true").lower() == "true"
+    
+    # Servidor (python -m app.serve): perfil default (uvicorn auto, JSON de FastAPI) o
+    # performance (uvloop + httptools, respuestas con orjson, sin access log de uvicorn)
+    serving_profile: str = os.getenv("SERVING_PROFILE", "default")
+    server_host: str = os.getenv("SERVER_HOST", "0.0.0.0")
+    server_port: int = int(os.getenv("SERVER_PORT", "8000"))
+    web_concurrency: int = int(os.getenv("WEB_CONCURRENCY", "1"))  # workers de uvicorn
+    # Historial comprimido con gzip a partir de este tamaño en bytes (0 = sin compresión)
+    history_gzip_min_size: int = int(os.getenv("HISTORY_GZIP_MIN_SIZE", "1024"))
+    gzip_level: int = int(os.getenv("GZIP_LEVEL", "5"))
+    
     # Credenciales de encriptación (del env.example)
     encryption_key: str = os.getenv("ENCRYPTION_KEY", "")
     encryption_iv: str = os.getenv("ENCRYPTION_IV", "")
@@ -24,6 +38,8 @@ class Settings(BaseSettings):
     # OpenAI
     openai_api_key: str = os.getenv("OPENAI_API_KEY", "")
     embedding_model: str = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+    # URL de un servidor compatible con OpenAI (ej: stub local http://localhost:8100/v1)
+    openai_base_url: Optional[str] = os.getenv("OPENAI_BASE_URL") or None
     
     # Backend API
     backend_url: str = os.getenv("BACKEND_URL", "http://backend:5001")
@@ -39,17 +55,86 @@ class Settings(BaseSettings):
     # Configuración del chatbot
     max_tokens: int = int(os.getenv("MAX_TOKENS", "500"))
     temperature: float = float(os.getenv("TEMPERATURE", "0.3"))
-    max_context_length: int = int(os.getenv("MAX_CONTEXT_LENGTH", "4000"))
+    max_context_length: int = int(os.getenv("MAX_CONTEXT_LENGTH", "4000"))  # tokens del contexto
+    context_section_max_tokens: int = int(os.getenv("CONTEXT_SECTION_MAX_TOKENS", "1200"))
+    deterministic_responses: bool = os.getenv("DETERMINISTIC_RESPONSES", "true").lower() == "true"
+    
+    # Gateway del LLM (concurrencia, cola y timeouts)
+    llm_max_in_flight: int = int(os.getenv("LLM_MAX_IN_FLIGHT", "8"))
+    llm_max_queue: int = int(os.getenv("LLM_MAX_QUEUE", "50"))
+    llm_timeout: float = float(os.getenv("LLM_TIMEOUT", "20"))
+    llm_queue_timeout: float = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+    
+    # Cache de embeddings (LRU en memoria + tabla embedding_cache)
+    embedding_cache_max_entries: int = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "5000"))
+    embedding_cache_persistent: bool = os.getenv("EMBEDDING_CACHE_PERSISTENT", "true").lower() == "true"
+    embedding_cache_retention_days: int = int(os.getenv("EMBEDDING_CACHE_RETENTION_DAYS", "90"))
+    embedding_cache_max_rows: int = int(os.getenv("EMBEDDING_CACHE_MAX_ROWS", "200000"))
+    embedding_cache_purge_interval: float = float(os.getenv("EMBEDDING_CACHE_PURGE_INTERVAL", "3600"))
+    
+    # Ingesta de documentos (embeddings en lotes y documentos en paralelo)
+    embedding_batch_size: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "96"))
+    embedding_max_concurrency: int = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+    ingestion_max_concurrent_documents: int = int(os.getenv("INGESTION_MAX_CONCURRENT_DOCUMENTS", "3"))
+    ingestion_workers: int = int(os.getenv("INGESTION_WORKERS", "1"))
+    
+    # Extracción de texto de PDFs en procesos separados (0 = hilos del event loop)
+    pdf_extraction_workers: int = int(os.getenv("PDF_EXTRACTION_WORKERS", "2"))
+    pdf_pages_per_task: int = int(os.getenv("PDF_PAGES_PER_TASK", "8"))
+    pdf_extraction_timeout: float = float(os.getenv("PDF_EXTRACTION_TIMEOUT", "120"))
+    pdf_max_pages: int = int(os.getenv("PDF_MAX_PAGES", "500"))
+    pdf_max_download_mb: int = int(os.getenv("PDF_MAX_DOWNLOAD_MB", "50"))
+    
+    # Chunking de documentos por tokens
+    chunk_max_tokens: int = int(os.getenv("CHUNK_MAX_TOKENS", "350"))
+    chunk_overlap_sentences: int = int(os.getenv("CHUNK_OVERLAP_SENTENCES", "1"))
     
     # Configuración de la aplicación
     environment: str = os.getenv("ENVIRONMENT", "development")
     debug: bool = environment == "development"
     
+    # Logging: nivel, formato (text | json) y escritura en un hilo aparte
+    log_level: str = os.getenv("LOG_LEVEL", "INFO")
+    log_format: str = os.getenv("LOG_FORMAT", "text")
+    log_async: bool = os.getenv("LOG_ASYNC", "true").lower() == "true"
+    log_queue_size: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    # Categorías de depuración (chat, classifier, dates, context, rooms, reserva, guests, prompt o *)
+    log_debug_categories: str = os.getenv("LOG_DEBUG_CATEGORIES", "")
+    log_debug_hospedajes: str = os.getenv("LOG_DEBUG_HOSPEDAJES", "")  # id1,id2:classifier|rooms
+    log_debug_header: bool = os.getenv("LOG_DEBUG_HEADER", "true" if environment == "development" else "false").lower() == "true"
+    
+    # Plantillas de prompts (recarga en caliente solo en desarrollo)
+    prompt_hot_reload: bool = os.getenv("PROMPT_HOT_RELOAD", str(environment == "development")).lower() == "true"
+    prompt_reload_interval: float = float(os.getenv("PROMPT_RELOAD_INTERVAL", "2"))
+    
     # Configuración de vectores
-    vector_dimensions: int = 1536  # Para text-embedding-3-small
+    # Almacenamiento de embeddings: full (vector float32), halfvec (float16) o reduced (menos dimensiones)
+    embedding_storage: str = os.getenv("EMBEDDING_STORAGE", "full")
+    # Dimensiones pedidas a la API (text-embedding-3 admite menos que las 1536 nativas de -small)
+    vector_dimensions: int = int(os.getenv("EMBEDDING_DIMENSIONS", "1536"))
     similarity_threshold: float = 0.3
     max_chunks_per_query: int = 4
     
+    # Recuperación de conocimiento: hybrid (texto completo + vectores), vector o lexical
+    retrieval_mode: str = os.getenv("RETRIEVAL_MODE", "hybrid")
+    # Rank léxico (ts_rank_cd normalizado, 0-1) a partir del cual no se genera embedding
+    lexical_fast_threshold: float = float(os.getenv("LEXICAL_FAST_THRESHOLD", "0.5"))
+    
+    # Índice vectorial en memoria por hospedaje (requiere numpy)
+    vector_index_enabled: bool = os.getenv("VECTOR_INDEX_ENABLED", "false").lower() == "true"
+    vector_index_max_mb: int = int(os.getenv("VECTOR_INDEX_MAX_MB", "256"))
+    vector_index_ttl: float = float(os.getenv("VECTOR_INDEX_TTL", "300"))
+    
+    # Clasificador de consultas: regex (patrones) o model (modelo entrenado, con los patrones de respaldo)
+    query_classifier_backend: str = os.getenv("QUERY_CLASSIFIER_BACKEND", "regex")
+    intent_model_path: str = os.getenv("INTENT_MODEL_PATH", "")  # vacío = app/intent_models/intent_model.npz
+    intent_model_min_confidence: float = float(os.getenv("INTENT_MODEL_MIN_CONFIDENCE", "0.6"))
+    classifier_cache_size: int = int(os.getenv("CLASSIFIER_CACHE_SIZE", "2048"))  # 0 = sin cache
+    
+    # Combinaciones de habitaciones para grupos: opciones a devolver y tiempo máximo de búsqueda
+    room_allocator_top_k: int = int(os.getenv("ROOM_ALLOCATOR_TOP_K", "5"))
+    room_allocator_time_budget_ms: float = float(os.getenv("ROOM_ALLOCATOR_TIME_BUDGET_MS", "20"))
+    
     # Configuración de historial
     max_history_months: int = 6
     max_history_results: int = 3
@@ -61,12 +146,22 @@ class Settings(BaseSettings):
 # Instancia global de configuración
 settings = Settings()
 
+LOCAL_HOSTS = ("localhost", "127.0.0.1", "::1")
+
+
+def openai_uses_local_stub() -> bool:
+    """True si OPENAI_BASE_URL apunta a un servidor local (el stub de tools/openai_stub.py), que no pide API key"""
+    if not settings.openai_base_url:
+        return False
+    return urlparse(settings.openai_base_url).hostname in LOCAL_HOSTS
+
+
 # Validación de configuración crítica
 def validate_settings():
     """Valida que las configuraciones críticas estén presentes"""
     errors = []
     
-    if not settings.openai_api_key or settings.openai_api_key == "sk-tu-openai-api-key-aqui":
+    if not openai_uses_local_stub() and (not settings.openai_api_key or settings.openai_api_key == "sk-tu-openai-api-key-aqui"):
         errors.append("OPENAI_API_KEY es requerida y debe ser válida")
     
     if not settings.database_url:
@@ -87,9 +182,3 @@ def validate_settings():
     
     print("✅ Configuración validada correctamente")
     return True
-
-# Validar al importar (solo mostrar errores, no fallar)
-try:
-    validate_settings()
-except Exception as e:
-    print(f"⚠️  Advertencia de configuración: {e}") 
\ No newline at end of file
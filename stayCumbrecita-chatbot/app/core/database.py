@@ -1,36 +1,67 @@
 import asyncio
-from typing import Optional, List, Any
-from sqlalchemy import create_engine, text
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.ext.asyncio import async_sessionmaker
-from sqlalchemy.pool import NullPool
+from typing import TYPE_CHECKING, Optional, List, Any, Tuple
 import psycopg2
+from psycopg2.extras import execute_values
 from .config import settings
+from .migrations import run_migrations
 
-# Motor de base de datos asíncrono
-async_engine = create_async_engine(
-    settings.database_url.replace("postgresql://", "postgresql+asyncpg://"),
-    poolclass=NullPool,
-    echo=settings.debug
-)
-
-# Sesión asíncrona
-AsyncSessionLocal = async_sessionmaker(
-    bind=async_engine, 
-    class_=AsyncSession, 
-    expire_on_commit=False
-)
-
-# Motor síncrono para operaciones específicas
-sync_engine = create_engine(
-    settings.database_url,
-    poolclass=NullPool,
-    echo=settings.debug
-)
+if TYPE_CHECKING:
+    from sqlalchemy.engine import Engine
+    from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+# Los motores de SQLAlchemy se crean en el primer uso (importar SQLAlchemy y asyncpg
+# lleva cientos de ms y no hace falta para importar la aplicación)
+_async_engine: Optional["AsyncEngine"] = None
+_session_factory: Optional["async_sessionmaker"] = None
+_sync_engine: Optional["Engine"] = None
+
+
+def get_async_engine() -> "AsyncEngine":
+    """Motor de base de datos asíncrono"""
+    global _async_engine
+    if _async_engine is None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+        from sqlalchemy.pool import NullPool
+
+        _async_engine = create_async_engine(
+            settings.database_url.replace("postgresql://", "postgresql+asyncpg://"),
+            poolclass=NullPool,
+            echo=settings.debug
+        )
+    return _async_engine
+
+
+def get_session_factory() -> "async_sessionmaker":
+    """Fábrica de sesiones asíncronas"""
+    global _session_factory
+    if _session_factory is None:
+        from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+        _session_factory = async_sessionmaker(
+            bind=get_async_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False
+        )
+    return _session_factory
+
+
+def get_sync_engine() -> "Engine":
+    """Motor síncrono para operaciones específicas"""
+    global _sync_engine
+    if _sync_engine is None:
+        from sqlalchemy import create_engine
+        from sqlalchemy.pool import NullPool
+
+        _sync_engine = create_engine(
+            settings.database_url,
+            poolclass=NullPool,
+            echo=settings.debug
+        )
+    return _sync_engine
 
 # Dependencia para obtener sesión de base de datos
 async def get_db():
-    async with AsyncSessionLocal() as session:
+    async with get_session_factory()() as session:
         try:
             yield session
         finally:
@@ -43,16 +74,70 @@ async def execute_vector_query(query: str, params: Optional[List[Any]] = None):
     try:
         with conn.cursor() as cursor:
             cursor.execute(query, params or [])
-            # Solo hacer fetchall() para consultas SELECT
-            if query.strip().upper().startswith('SELECT'):
-                return cursor.fetchall()
-            else:
-                # Para INSERT, UPDATE, DELETE - commit y retornar None
+            # Solo hacer fetchall() para consultas SELECT o con RETURNING
+            rows = cursor.fetchall() if cursor.description is not None else None
+            if not query.strip().upper().startswith('SELECT'):
+                # Para INSERT, UPDATE, DELETE - commit
                 conn.commit()
-                return None
+            return rows
     finally:
         conn.close()
 
+async def execute_vector_values(
+    query: str,
+    rows: List[Any],
+    template: Optional[str] = None,
+    page_size: int = 200
+):
+    """Ejecuta un INSERT ... VALUES %s con muchas filas en una sola conexión"""
+    if not rows:
+        return None
+
+    def _run():
+        conn = psycopg2.connect(settings.database_url)
+        try:
+            with conn.cursor() as cursor:
+                result = execute_values(
+                    cursor, query, rows,
+                    template=template,
+                    page_size=page_size,
+                    fetch='RETURNING' in query.upper()
+                )
+                conn.commit()
+                return result
+        finally:
+            conn.close()
+
+    # Los inserts masivos corren en un hilo para no bloquear el event loop
+    return await asyncio.to_thread(_run)
+
+async def execute_vector_transaction(steps: List[Tuple]):
+    """Ejecuta varias sentencias en una única transacción (todo o nada).
+
+    Cada paso es (query, params) o (query, rows, template) para un
+    INSERT ... VALUES %s multi-fila.
+    """
+    def _run():
+        conn = psycopg2.connect(settings.database_url)
+        try:
+            with conn.cursor() as cursor:
+                for step in steps:
+                    if len(step) == 3:
+                        query, rows, template = step
+                        if rows:
+                            execute_values(cursor, query, rows, template=template, page_size=500)
+                    else:
+                        query, params = step
+                        cursor.execute(query, params or [])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    await asyncio.to_thread(_run)
+
 async def execute_vector_query_one(query: str, params: Optional[List[Any]] = None):
     """Ejecuta consulta vectorial y retorna un solo resultado"""
     conn = psycopg2.connect(settings.database_url)
@@ -65,22 +150,12 @@ async def execute_vector_query_one(query: str, params: Optional[List[Any]] = Non
 
 # Inicialización de la base de datos
 async def init_database():
-    """Inicializa la base de datos ejecutando los scripts SQL"""
+    """Aplica las migraciones pendientes de sql/migrations (no hace nada si el esquema está al día)"""
     try:
-        # Leer script de inicialización
-        with open("sql/init.sql", "r") as f:
-            init_script = f.read()
-        
-        # Ejecutar script
-        conn = psycopg2.connect(settings.database_url)
-        try:
-            with conn.cursor() as cursor:
-                cursor.execute(init_script)
-                conn.commit()
-                print("✅ Base de datos inicializada correctamente")
-        finally:
-            conn.close()
-            
+        status = await run_migrations()
+        if status["applied"]:
+            print(f"✅ Base de datos migrada a la versión {status['current_version']}: {', '.join(status['applied'])}")
+        return status
     except Exception as e:
         print(f"❌ Error inicializando base de datos: {e}")
         raise
@@ -89,7 +164,9 @@ async def init_database():
 async def check_database_connection():
     """Verifica que la conexión a la base de datos funcione"""
     try:
-        async with AsyncSessionLocal() as session:
+        from sqlalchemy import text
+
+        async with get_session_factory()() as session:
             result = await session.execute(text("SELECT 1"))
             result.fetchone()
             print("✅ Conexión a base de datos verificada")
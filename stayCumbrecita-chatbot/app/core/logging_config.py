@@ -0,0 +1,280 @@
+"""
+Configuración de logging del servicio.
+
+- Salida no bloqueante: los handlers de la aplicación solo encolan el registro
+  (QueueHandler) y un hilo en segundo plano (QueueListener) lo formatea y lo
+  escribe en stdout. Si la cola se llena, los registros se descartan y se
+  cuentan en lugar de frenar el request.
+- Registros por request: cada request HTTP lleva un request_id (header
+  X-Request-ID o generado) y, una vez conocidos, el hospedaje y la
+  conversación; se agregan a todos sus registros, en texto o en JSON
+  (LOG_FORMAT=json).
+- Categorías de depuración: el detalle del pipeline de chat (puntajes del
+  clasificador, comparación de habitaciones, prompts, query_params) se emite
+  con log_debug solo si la categoría está activa: globalmente
+  (LOG_DEBUG_CATEGORIES), para ciertos hospedajes (LOG_DEBUG_HOSPEDAJES) o
+  para un request con el header X-Debug-Log (si LOG_DEBUG_HEADER lo permite).
+  Si no está activa, el mensaje ni siquiera se formatea.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import queue
+import re
+import sys
+import time
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, FrozenSet, Optional
+
+from .config import settings
+
+# Categorías usadas en el pipeline de chat ("*" activa todas)
+DEBUG_CATEGORIES = ("chat", "classifier", "dates", "context", "rooms", "reserva", "guests", "prompt")
+REQUEST_ID_HEADER = "X-Request-ID"
+DEBUG_HEADER = "X-Debug-Log"
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+
+# Bibliotecas que loguean cada request HTTP a nivel INFO
+NOISY_LOGGERS = ("httpx", "httpcore", "openai")
+
+logger = logging.getLogger(__name__)
+
+
+class RequestLogContext:
+    """Datos del request en curso que se agregan a cada registro"""
+
+    __slots__ = ("request_id", "hospedaje_id", "conversation_id", "categories", "started")
+
+    def __init__(self, request_id: str, categories: FrozenSet[str] = frozenset()):
+        self.request_id = request_id
+        self.hospedaje_id: Optional[str] = None
+        self.conversation_id: Optional[str] = None
+        self.categories = categories
+        self.started = time.perf_counter()
+
+
+_request: ContextVar[Optional[RequestLogContext]] = ContextVar("log_request", default=None)
+_global_categories: FrozenSet[str] = frozenset()
+_hospedaje_categories: Dict[str, FrozenSet[str]] = {}
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["DroppingQueueHandler"] = None
+
+
+def parse_categories(value: Optional[str]) -> FrozenSet[str]:
+    """'classifier, rooms' -> {'classifier', 'rooms'}; 'all' equivale a '*'"""
+    if not value:
+        return frozenset()
+    categories = {part.strip().lower() for part in value.replace("|", ",").split(",") if part.strip()}
+    if "all" in categories:
+        categories.add("*")
+    return frozenset(categories)
+
+
+def parse_hospedaje_categories(value: Optional[str]) -> Dict[str, FrozenSet[str]]:
+    """'id1,id2:classifier|rooms' -> {id1: {'*'}, id2: {'classifier', 'rooms'}}"""
+    result: Dict[str, FrozenSet[str]] = {}
+    for entry in (value or "").split(","):
+        hospedaje_id, _, categories = entry.strip().partition(":")
+        if hospedaje_id:
+            result[hospedaje_id] = parse_categories(categories) or frozenset({"*"})
+    return result
+
+
+def debug_enabled(category: str) -> bool:
+    """Si el detalle de la categoría se debe loguear en el contexto actual"""
+    if category in _global_categories or "*" in _global_categories:
+        return True
+    request = _request.get()
+    return request is not None and (category in request.categories or "*" in request.categories)
+
+
+def log_debug(target: logging.Logger, category: str, msg: str, *args: Any) -> None:
+    """Registro de depuración por categoría (formato diferido: msg % args solo si se emite)"""
+    if debug_enabled(category):
+        target.info(msg, *args, extra={"debug_category": category}, stacklevel=2)
+
+
+def start_request(request_id: Optional[str] = None, debug_header: Optional[str] = None):
+    """Abre el contexto de logging de un request; devuelve el token para end_request"""
+    categories = parse_categories(debug_header) if debug_header and settings.log_debug_header else frozenset()
+    # El id recibido vuelve en la respuesta: solo caracteres seguros para un header
+    request_id = re.sub(r"[^\w.:-]", "", request_id or "")[:64] or uuid.uuid4().hex[:12]
+    return _request.set(RequestLogContext(request_id, categories))
+
+
+def bind_request(hospedaje_id: Optional[str] = None, conversation_id: Optional[str] = None) -> None:
+    """Agrega hospedaje/conversación al request en curso (y las categorías configuradas para el hospedaje)"""
+    request = _request.get()
+    if request is None:
+        return
+    if hospedaje_id:
+        request.hospedaje_id = hospedaje_id
+        if hospedaje_id in _hospedaje_categories:
+            request.categories = request.categories | _hospedaje_categories[hospedaje_id]
+    if conversation_id:
+        request.conversation_id = conversation_id
+
+
+def end_request(token) -> None:
+    _request.reset(token)
+
+
+def current_request_id() -> Optional[str]:
+    request = _request.get()
+    return request.request_id if request else None
+
+
+class RequestContextFilter(logging.Filter):
+    """Copia el contexto del request al registro (corre en el hilo que loguea, antes de encolar)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request = _request.get()
+        if request is None:
+            record.request_id = "-"
+            record.hospedaje_id = None
+            record.conversation_id = None
+            record.elapsed_ms = None
+        else:
+            record.request_id = request.request_id
+            record.hospedaje_id = request.hospedaje_id
+            record.conversation_id = request.conversation_id
+            record.elapsed_ms = round((time.perf_counter() - request.started) * 1000, 1)
+        if not hasattr(record, "debug_category"):
+            record.debug_category = None
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Un objeto JSON por línea"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        for key in ("hospedaje_id", "conversation_id", "elapsed_ms", "debug_category"):
+            value = getattr(record, key, None)
+            if value is not None:
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler que descarta (y cuenta) registros si la cola está llena en lugar de bloquear"""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Copia sin formatear: msg % args y el traceback los arma el formatter del hilo de escritura.
+
+        QueueHandler.prepare formatea en el hilo del request y borra exc_info
+        (pensado para colas entre procesos); acá la cola es del mismo proceso.
+        """
+        return copy.copy(record)
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def setup_logging() -> None:
+    """Configura el logger raíz según LOG_LEVEL, LOG_FORMAT y LOG_ASYNC (idempotente)"""
+    global _global_categories, _hospedaje_categories, _listener, _queue_handler
+
+    stop_logging()
+    level = logging.getLevelName(settings.log_level.upper())
+    if not isinstance(level, int):
+        level = logging.INFO
+
+    _global_categories = parse_categories(settings.log_debug_categories)
+    if level <= logging.DEBUG:
+        _global_categories = _global_categories | {"*"}
+    _hospedaje_categories = parse_hospedaje_categories(settings.log_debug_hospedajes)
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if settings.log_format == "json" else logging.Formatter(TEXT_FORMAT))
+
+    handler: logging.Handler = stream
+    if settings.log_async:
+        _queue_handler = DroppingQueueHandler(queue.Queue(maxsize=settings.log_queue_size))
+        _listener = QueueListener(_queue_handler.queue, stream)
+        _listener.start()
+        handler = _queue_handler
+    handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level)
+    for name in NOISY_LOGGERS:
+        logging.getLogger(name).setLevel(max(level, logging.WARNING))
+
+    logger.info(
+        f"🪵 Logging: nivel={logging.getLevelName(level)}, formato={settings.log_format}, "
+        f"async={settings.log_async}, categorías={sorted(_global_categories) or '-'}"
+    )
+
+
+def stop_logging() -> None:
+    """Vacía la cola y detiene el hilo de escritura"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_metrics() -> Dict[str, Any]:
+    return {
+        "async": _queue_handler is not None and _listener is not None,
+        "queued": _queue_handler.queue.qsize() if _queue_handler is not None else 0,
+        "dropped": _queue_handler.dropped if _queue_handler is not None else 0,
+        "debug_categories": sorted(_global_categories),
+        "debug_hospedajes": len(_hospedaje_categories),
+    }
+
+
+class RequestLogMiddleware:
+    """Middleware ASGI: abre el contexto de logging por request y devuelve el X-Request-ID"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or ())
+        request_id = headers.get(REQUEST_ID_HEADER.lower().encode(), b"").decode("latin-1").strip()
+        debug_header = headers.get(DEBUG_HEADER.lower().encode(), b"").decode("latin-1")
+        token = start_request(request_id or None, debug_header or None)
+        response_id = current_request_id().encode("latin-1")
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", ()), (b"x-request-id", response_id)]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            end_request(token)
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,163 @@
+"""
+Migraciones de esquema versionadas.
+
+Cada archivo sql/migrations/NNN_nombre.sql es una migración; las aplicadas se
+registran en schema_migrations (versión, nombre, checksum y fecha). Al
+arrancar solo se leen las versiones aplicadas: si no hay pendientes no se
+ejecuta nada más, así que levantar otro worker o pod no vuelve a correr el
+esquema completo.
+
+Si hay pendientes se toma un advisory lock de Postgres (varios workers que
+arrancan juntos no aplican lo mismo dos veces), se vuelve a leer qué falta y
+cada migración se aplica en su propia transacción junto con su registro.
+
+Una migración aplicada no se edita: si su checksum cambió se avisa en el log
+y el cambio va en un archivo nuevo.
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import psycopg2
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_DIR = Path(__file__).resolve().parents[2] / "sql" / "migrations"
+MIGRATION_FILE = re.compile(r"^(\d+)_([\w-]+)\.sql$")
+# Clave del advisory lock (cualquier entero fijo, compartido por todos los workers)
+ADVISORY_LOCK_KEY = 8_151_001
+
+SCHEMA_TABLE = """
+CREATE TABLE IF NOT EXISTS schema_migrations (
+    version INTEGER PRIMARY KEY,
+    name VARCHAR(255) NOT NULL,
+    checksum CHAR(64) NOT NULL,
+    duration_ms FLOAT DEFAULT 0,
+    applied_at TIMESTAMPTZ DEFAULT now()
+)
+"""
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    path: Path
+    checksum: str
+
+
+def discover(directory: Path = MIGRATIONS_DIR) -> List[Migration]:
+    """Migraciones del directorio ordenadas por versión"""
+    migrations: Dict[int, Migration] = {}
+    for path in sorted(directory.glob("*.sql")):
+        match = MIGRATION_FILE.match(path.name)
+        if not match:
+            logger.warning("⚠️ Archivo ignorado en %s: %s (se espera NNN_nombre.sql)", directory, path.name)
+            continue
+        version = int(match.group(1))
+        if version in migrations:
+            raise ValueError(f"Versión de migración duplicada {version}: {migrations[version].path.name} y {path.name}")
+        checksum = hashlib.sha256(path.read_bytes()).hexdigest()
+        migrations[version] = Migration(version, match.group(2), path, checksum)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+def applied_migrations(cursor) -> Dict[int, str]:
+    """{versión: checksum} de las migraciones aplicadas ({} si la tabla todavía no existe)"""
+    cursor.execute("SELECT to_regclass('schema_migrations') IS NOT NULL")
+    if not cursor.fetchone()[0]:
+        return {}
+    cursor.execute("SELECT version, checksum FROM schema_migrations")
+    return {version: checksum.strip() for version, checksum in cursor.fetchall()}
+
+
+def _pending(migrations: List[Migration], applied: Dict[int, str], target: Optional[int]) -> List[Migration]:
+    for migration in migrations:
+        if migration.version in applied and applied[migration.version] != migration.checksum:
+            logger.warning("⚠️ La migración %03d_%s cambió después de aplicarse (el cambio no se aplica)",
+                           migration.version, migration.name)
+    return [
+        migration for migration in migrations
+        if migration.version not in applied and (target is None or migration.version <= target)
+    ]
+
+
+def migrate(
+    database_url: Optional[str] = None,
+    target: Optional[int] = None,
+    dry_run: bool = False,
+    directory: Path = MIGRATIONS_DIR
+) -> Dict[str, Any]:
+    """Aplica las migraciones pendientes (hasta `target`, si se indica) y devuelve el estado"""
+    started = time.perf_counter()
+    migrations = discover(directory)
+    conn = psycopg2.connect(database_url or settings.database_url)
+    try:
+        with conn.cursor() as cursor:
+            # Camino rápido: sin pendientes no se toma el lock ni se ejecuta DDL
+            applied = applied_migrations(cursor)
+            conn.commit()
+            pending = _pending(migrations, applied, target)
+            if not pending or dry_run:
+                return _status(migrations, applied, [], pending, started)
+
+            cursor.execute("SELECT pg_advisory_lock(%s)", [ADVISORY_LOCK_KEY])
+            try:
+                cursor.execute(SCHEMA_TABLE)
+                conn.commit()
+                # Otro worker pudo haberlas aplicado mientras se esperaba el lock
+                applied = applied_migrations(cursor)
+                pending = _pending(migrations, applied, target)
+
+                done: List[Migration] = []
+                for migration in pending:
+                    migration_started = time.perf_counter()
+                    try:
+                        cursor.execute(migration.path.read_text(encoding="utf-8"))
+                        duration_ms = round((time.perf_counter() - migration_started) * 1000, 1)
+                        cursor.execute(
+                            "INSERT INTO schema_migrations (version, name, checksum, duration_ms) VALUES (%s, %s, %s, %s)",
+                            [migration.version, migration.name, migration.checksum, duration_ms]
+                        )
+                        conn.commit()
+                    except Exception:
+                        conn.rollback()
+                        logger.error("❌ Falló la migración %03d_%s", migration.version, migration.name)
+                        raise
+                    done.append(migration)
+                    applied[migration.version] = migration.checksum
+                    logger.info("🗄️ Migración %03d_%s aplicada en %.1f ms", migration.version, migration.name, duration_ms)
+            finally:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", [ADVISORY_LOCK_KEY])
+                conn.commit()
+
+            return _status(migrations, applied, done, [], started)
+    finally:
+        conn.close()
+
+
+def _status(
+    migrations: List[Migration],
+    applied: Dict[int, str],
+    done: List[Migration],
+    pending: List[Migration],
+    started: float
+) -> Dict[str, Any]:
+    return {
+        "current_version": max(applied) if applied else 0,
+        "latest_version": migrations[-1].version if migrations else 0,
+        "applied": [f"{migration.version:03d}_{migration.name}" for migration in done],
+        "pending": [f"{migration.version:03d}_{migration.name}" for migration in pending],
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+
+
+async def run_migrations() -> Dict[str, Any]:
+    """migrate() fuera del event loop"""
+    return await asyncio.to_thread(migrate)
@@ -0,0 +1,38 @@
+from typing import TYPE_CHECKING, Any, Optional
+from .config import openai_uses_local_stub, settings
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+
+class LazyOpenAIClient:
+    """Cliente de OpenAI que importa el SDK y se crea en el primer uso (o en warm_up)
+
+    Importar el SDK lleva varios cientos de ms; así no forma parte del arranque de
+    cada worker y se carga en segundo plano una vez que el servidor ya atiende.
+    """
+
+    def __init__(self):
+        self._client: Optional["AsyncOpenAI"] = None
+
+    def warm_up(self) -> "AsyncOpenAI":
+        if self._client is None:
+            api_key = settings.openai_api_key
+            if not api_key:
+                # Solo el stub local funciona sin credencial; contra OpenAI se falla acá y no en cada llamada
+                if not openai_uses_local_stub():
+                    raise RuntimeError("OPENAI_API_KEY no está configurada (solo se omite con OPENAI_BASE_URL local)")
+                api_key = "sk-stub"
+
+            from openai import AsyncOpenAI
+
+            self._client = AsyncOpenAI(api_key=api_key, base_url=settings.openai_base_url or None)
+        return self._client
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.warm_up(), name)
+
+
+def create_openai_client() -> LazyOpenAIClient:
+    """Crea el cliente de OpenAI (o de un servidor compatible si OPENAI_BASE_URL está configurada)"""
+    return LazyOpenAIClient()
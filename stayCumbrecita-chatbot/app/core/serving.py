@@ -0,0 +1,91 @@
+"""
+Perfil de servicio HTTP: cómo se serializan y comprimen las respuestas de las
+rutas de chat e historial y con qué loop/parser corre uvicorn (ver app/serve.py).
+
+- default: las rutas devuelven el modelo y FastAPI lo codifica como siempre
+  (validación del response_model + jsonable_encoder + json.dumps).
+- performance: las rutas devuelven una ORJSONResponse armada directamente desde
+  el modelo (una sola pasada, en C) y uvicorn corre con uvloop y httptools.
+
+En los dos perfiles el historial se comprime con gzip si el cuerpo supera
+HISTORY_GZIP_MIN_SIZE y el cliente lo acepta; la respuesta del chat, que es
+chica y sensible a la latencia, nunca se comprime.
+"""
+
+import gzip
+import json
+import logging
+from typing import Any, Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+PROFILES = ("default", "performance")
+
+
+def current_profile() -> str:
+    profile = (settings.serving_profile or "default").lower()
+    if profile not in PROFILES:
+        logger.warning("⚠️ SERVING_PROFILE desconocido: %s (se usa default)", profile)
+        return "default"
+    return profile
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Tipo no serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """JSON en bytes: orjson si está instalado, json de la stdlib si no"""
+    if isinstance(content, BaseModel):
+        content = content.model_dump()
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=str, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse que serializa con orjson (datetime, enums y modelos sin jsonable_encoder)"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def _accepts_gzip(request: Optional[Request]) -> bool:
+    return request is not None and "gzip" in request.headers.get("accept-encoding", "").lower()
+
+
+def model_response(
+    model: BaseModel,
+    request: Optional[Request] = None,
+    gzip_min_size: int = 0
+) -> Any:
+    """Respuesta de una ruta según el perfil: el modelo tal cual o el JSON ya renderizado (y comprimido)"""
+    performance = current_profile() == "performance"
+    if not performance and gzip_min_size <= 0:
+        return model
+
+    if performance:
+        response: Response = ORJSONResponse(content=model)
+    else:
+        response = JSONResponse(content=model.model_dump(mode="json"))
+
+    if gzip_min_size > 0:
+        response.headers["Vary"] = "Accept-Encoding"
+        if len(response.body) >= gzip_min_size and _accepts_gzip(request):
+            response.body = gzip.compress(response.body, compresslevel=settings.gzip_level)
+            response.headers["Content-Encoding"] = "gzip"
+            response.headers["Content-Length"] = str(len(response.body))
+    return response
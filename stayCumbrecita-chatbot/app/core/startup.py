@@ -0,0 +1,48 @@
+"""
+Tiempos del arranque por fase (imports, configuración, base de datos,
+migraciones, prompts, workers) para ver qué hace lento levantar un worker.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+
+    def record(self, name: str, milliseconds: float) -> None:
+        self.phases[name] = round(milliseconds, 1)
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000)
+
+    def finish(self) -> float:
+        """Cierra la medición y loguea el resumen; devuelve el total en ms"""
+        self.finished = time.perf_counter()
+        total = self.total_ms()
+        detail = ", ".join(f"{name}={ms:.0f}ms" for name, ms in self.phases.items())
+        logger.info("⏱️ Arranque en %.0f ms (pid %s): %s", total, os.getpid(), detail)
+        return total
+
+    def total_ms(self) -> float:
+        return round(((self.finished or time.perf_counter()) - self.started) * 1000, 1)
+
+    def metrics(self) -> Dict[str, Any]:
+        return {"pid": os.getpid(), "total_ms": self.total_ms(), "ready": self.finished is not None, "phases": dict(self.phases)}
+
+
+# Instancia global (el reloj arranca al importar, antes que el resto de la app)
+startup_timer = StartupTimer()
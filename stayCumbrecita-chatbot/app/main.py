@@ -1,39 +1,96 @@
+import time
+
+_import_started = time.perf_counter()
+
+import asyncio
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 import logging
-from .core.config import settings
+from .core.config import settings, validate_settings
 from .core.database import check_database_connection, init_database
+from .core.logging_config import RequestLogMiddleware, setup_logging, stop_logging
+from .core.startup import startup_timer
 from .routers import chat, health
 from .services.backend_service import backend_service
+from .services.prompt_registry import prompt_registry
+from .services.embedding_cache import embedding_cache
+from .services.ingestion_jobs import ingestion_jobs
+from .services.pdf_extraction import pdf_extraction_pool
+from .services.vector_storage import vector_storage
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+# Configurar logging (cola + hilo de escritura, contexto por request)
+setup_logging()
 logger = logging.getLogger(__name__)
+startup_timer.record("import", (time.perf_counter() - _import_started) * 1000)
+
+
+def _warm_up_clients():
+    """Importa el SDK de OpenAI y crea los clientes (en un hilo, con el servidor ya atendiendo)"""
+    try:
+        chat.chat_service.openai_client.warm_up()
+        chat.chat_service.knowledge_service.openai_client.warm_up()
+    except Exception as e:
+        logger.warning(f"No se pudo precargar el cliente de OpenAI: {e}")
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     logger.info("🚀 Iniciando Stay Chatbot...")
     
+    # Validar configuración (solo muestra errores, no frena el arranque)
+    with startup_timer.phase("config"):
+        validate_settings()
+    
     # Verificar conexión a base de datos
-    if not await check_database_connection():
-        raise Exception("No se pudo conectar a la base de datos")
+    with startup_timer.phase("database"):
+        if not await check_database_connection():
+            raise Exception("No se pudo conectar a la base de datos")
     
     # Inicializar base de datos
     try:
-        await init_database()
+        # Migraciones versionadas: si el esquema está al día es una sola consulta
+        if settings.migrations_on_startup:
+            with startup_timer.phase("migrations"):
+                await init_database()
+        # Aplicar retención del cache de embeddings
+        with startup_timer.phase("embedding_cache"):
+            await embedding_cache.purge()
+        # Tipo de la columna de embeddings y operador según el índice existente
+        with startup_timer.phase("vector_storage"):
+            await vector_storage.verify_schema()
     except Exception as e:
         logger.warning(f"Error inicializando base de datos: {e}")
     
+    # Cargar y validar plantillas de prompts en memoria
+    with startup_timer.phase("prompts"):
+        prompt_errors = prompt_registry.load()
+    if prompt_errors:
+        logger.warning(f"⚠️ {len(prompt_errors)} problemas en las plantillas de prompts")
+    
+    # Workers de ingesta para re-entrenamientos en segundo plano
+    with startup_timer.phase("ingestion"):
+        await ingestion_jobs.recover_stale_jobs()
+        ingestion_jobs.start(runner=chat.chat_service.retrain_hospedaje)
+    
+    startup_timer.finish()
     logger.info("✅ Stay Chatbot iniciado correctamente")
     
+    # El SDK de OpenAI se carga en segundo plano: no demora que el worker quede listo
+    warm_up = asyncio.create_task(asyncio.to_thread(_warm_up_clients))
+    
     yield
     
     # Shutdown
     logger.info("🔄 Cerrando Stay Chatbot...")
+    if not warm_up.done():
+        warm_up.cancel()
+    await ingestion_jobs.stop()
+    pdf_extraction_pool.shutdown()
     await backend_service.close()
     logger.info("✅ Stay Chatbot cerrado correctamente")
+    stop_logging()
 
 # Crear aplicación FastAPI
 app = FastAPI(
@@ -52,6 +109,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Contexto de logging por request (X-Request-ID, X-Debug-Log)
+app.add_middleware(RequestLogMiddleware)
+
 # Incluir routers
 app.include_router(chat.router, prefix="/chat", tags=["chat"])
 app.include_router(health.router, tags=["health"])
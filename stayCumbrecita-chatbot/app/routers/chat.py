@@ -1,7 +1,11 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from typing import Optional
 from ..models.chat import ChatRequest, ChatResponse, ChatHistoryResponse
 from ..services.chat_service import ChatService
+from ..services.ingestion_jobs import ingestion_jobs
+from ..core.config import settings
+from ..core.logging_config import bind_request, log_debug
+from ..core.serving import model_response
 import logging
 
 logger = logging.getLogger(__name__)
@@ -20,11 +24,13 @@ async def chat_with_hospedaje(
     🆕 Ahora soporta contexto conversacional del frontend
     """
     try:
+        bind_request(hospedaje_id=hospedaje_id)
+        
         # 🆕 Convertir contexto del frontend a dict si existe
         frontend_context = None
         if request.context:
             frontend_context = request.context.dict()
-            logger.info(f"🆕 Contexto recibido del frontend: {len(frontend_context.get('conversationHistory', []))} mensajes")
+            log_debug(logger, "chat", "🆕 Contexto recibido del frontend: %s mensajes", len(frontend_context.get('conversationHistory', [])))
         
         response = await chat_service.process_message(
             hospedaje_id=hospedaje_id,
@@ -35,7 +41,7 @@ async def chat_with_hospedaje(
             context=frontend_context,  # 🆕 Pasar contexto del frontend
             save_to_history=request.saveToHistory or True  # 🆕 Control de guardado
         )
-        return response
+        return model_response(response)
     except Exception as e:
         logger.error(f"Error procesando mensaje: {e}")
         raise HTTPException(
@@ -45,6 +51,7 @@ async def chat_with_hospedaje(
 
 @router.get("/{hospedaje_id}/history/{user_id}", response_model=ChatHistoryResponse)
 async def get_user_chat_history(
+    http_request: Request,
     hospedaje_id: str,
     user_id: str,
     page: int = 1,
@@ -60,7 +67,8 @@ async def get_user_chat_history(
             page=page,
             limit=limit
         )
-        return history
+        # Páginas grandes comprimidas con gzip (HISTORY_GZIP_MIN_SIZE)
+        return model_response(history, http_request, gzip_min_size=settings.history_gzip_min_size)
     except Exception as e:
         logger.error(f"Error obteniendo historial: {e}")
         raise HTTPException(
@@ -75,23 +83,39 @@ async def upload_pdf():
     """
     return {"message": "Upload PDF functionality to be implemented"}
 
-@router.post("/retrain/{hospedaje_id}")
+@router.post("/retrain/{hospedaje_id}", status_code=202)
 async def retrain_hospedaje(hospedaje_id: str):
     """
-    Re-entrenar el chatbot de un hospedaje específico
+    Re-entrenar el chatbot de un hospedaje específico.
+    Encola un job en segundo plano; el avance se consulta en /chat/jobs/{job_id}
     """
     try:
-        success = await chat_service.retrain_hospedaje(hospedaje_id)
-        if success:
-            return {"message": "Chatbot re-entrenado exitosamente"}
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail="Error re-entrenando el chatbot"
-            )
+        job = await ingestion_jobs.enqueue(hospedaje_id)
+        return {
+            "message": "Re-entrenamiento encolado",
+            "job_id": job["id"],
+            "status": job["status"]
+        }
     except Exception as e:
         logger.error(f"Error re-entrenando: {e}")
         raise HTTPException(
             status_code=500,
             detail="Error interno re-entrenando el chatbot"
-        ) 
\ No newline at end of file
+        )
+
+@router.get("/jobs/{job_id}")
+async def get_ingestion_job(job_id: str):
+    """
+    Estado y progreso de un job de re-entrenamiento
+    """
+    job = await ingestion_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job no encontrado")
+    return job
+
+@router.get("/metrics")
+async def get_chat_metrics():
+    """
+    Métricas internas del servicio de chat (gateway del LLM, cachés, etc.)
+    """
+    return chat_service.get_metrics()
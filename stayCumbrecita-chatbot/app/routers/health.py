@@ -1,9 +1,27 @@
 from fastapi import APIRouter
 from ..models.chat import HealthCheckResponse
+from ..core.startup import startup_timer
+from ..services.prompt_registry import prompt_registry
 
 router = APIRouter()
 
 @router.get("/health", response_model=HealthCheckResponse)
 async def health_check():
     """Endpoint de verificación de salud del servicio"""
-    return HealthCheckResponse() 
\ No newline at end of file
+    return HealthCheckResponse() 
+
+@router.get("/health/prompts")
+async def prompts_health():
+    """Estado de las plantillas de prompts cargadas en memoria"""
+    token_counts = prompt_registry.token_counts()
+    return {
+        "templates": len(token_counts),
+        "token_counts": token_counts,
+        "errors": prompt_registry.errors,
+        "hot_reload": prompt_registry.hot_reload
+    }
+
+@router.get("/health/startup")
+async def startup_health():
+    """Duración del arranque de este worker, por fase"""
+    return startup_timer.metrics()
@@ -0,0 +1,74 @@
+"""
+Arranque del servidor con el perfil de SERVING_PROFILE (ver app/core/serving.py).
+
+    python -m app.serve                       # host, puerto y workers de la configuración
+    python -m app.serve --workers 4 --profile performance
+
+Es el comando del Dockerfile: la cantidad de workers sale de WEB_CONCURRENCY.
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+from typing import Any, Dict, Optional
+
+import uvicorn
+
+from .core.config import settings
+from .core.serving import current_profile
+
+logger = logging.getLogger(__name__)
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def uvicorn_options(profile: Optional[str] = None) -> Dict[str, Any]:
+    """Opciones de uvicorn según el perfil; sin uvloop/httptools se usa lo que haya disponible"""
+    profile = profile or current_profile()
+    if profile != "performance":
+        return {"loop": "auto", "http": "auto"}
+
+    options: Dict[str, Any] = {"loop": "uvloop", "http": "httptools", "access_log": False}
+    for key, module in (("loop", "uvloop"), ("http", "httptools")):
+        if not _installed(module):
+            logger.warning("⚠️ %s no está instalado: el perfil performance usa %s=auto", module, key)
+            options[key] = "auto"
+    return options
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Levantar el chatbot con uvicorn")
+    parser.add_argument("--app", default="app.main:app", help="Aplicación ASGI (módulo:atributo)")
+    parser.add_argument("--factory", action="store_true", help="--app es una función que crea la aplicación")
+    parser.add_argument("--host", default=settings.server_host)
+    parser.add_argument("--port", type=int, default=settings.server_port)
+    parser.add_argument("--workers", type=int, default=settings.web_concurrency, help="Por defecto WEB_CONCURRENCY")
+    parser.add_argument("--profile", choices=["default", "performance"], help="Por defecto SERVING_PROFILE")
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    if args.profile:
+        # Los workers leen el perfil de la configuración al importarla
+        os.environ["SERVING_PROFILE"] = args.profile
+        settings.serving_profile = args.profile
+    options = uvicorn_options(args.profile)
+    logging.basicConfig(level=logging.INFO)
+    logger.info("🚀 Sirviendo %s en %s:%s con %s worker(s), perfil %s (loop=%s, http=%s)",
+                args.app, args.host, args.port, args.workers, current_profile(), options["loop"], options["http"])
+    uvicorn.run(
+        args.app,
+        host=args.host,
+        port=args.port,
+        workers=max(1, args.workers),
+        factory=args.factory,
+        **options
+    )
+
+
+if __name__ == "__main__":
+    main()
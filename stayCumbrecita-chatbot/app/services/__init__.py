@@ -1,14 +1,20 @@
 # Services module
-from .chat_service import ChatService
-from .backend_service import BackendService
-from .knowledge_service import KnowledgeService
-from .pdf_processor import PDFProcessor
-from .query_classifier import QueryClassifier
-
-__all__ = [
-    "ChatService",
-    "BackendService",
-    "KnowledgeService",
-    "PDFProcessor",
-    "QueryClassifier"
-] 
\ No newline at end of file
+# Importación diferida: importar un servicio (ej: app.services.query_classifier) no carga
+# todos los demás ni sus dependencias pesadas (cloudinary, PyPDF2, OpenAI)
+from importlib import import_module
+
+_EXPORTS = {
+    "ChatService": ".chat_service",
+    "BackendService": ".backend_service",
+    "KnowledgeService": ".knowledge_service",
+    "PDFProcessor": ".pdf_processor",
+    "QueryClassifier": ".query_classifier",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(_EXPORTS[name], __name__), name)
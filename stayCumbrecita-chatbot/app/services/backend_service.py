@@ -1,12 +1,15 @@
-import httpx
-from typing import Dict, List, Optional, Any
+from typing import TYPE_CHECKING, Dict, List, Optional, Any
 from ..core.config import settings
 from ..models.knowledge import (
     ChatbotConfig, HospedajeInfo, HabitacionInfo, 
     ServicioInfo, DisponibilidadInfo, PrecioInfo
 )
+from ..utils.room_allocator import allocate_rooms
 import logging
 
+if TYPE_CHECKING:
+    import httpx
+
 logger = logging.getLogger(__name__)
 
 def formatear_precio_argentino(precio: float) -> str:
@@ -22,11 +25,21 @@ def formatear_precio_argentino(precio: float) -> str:
 class BackendService:
     def __init__(self):
         self.backend_url = settings.backend_url
-        self.client = httpx.AsyncClient(timeout=30.0)
+        self._client: Optional["httpx.AsyncClient"] = None
+    
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        """Cliente HTTP creado en la primera consulta (httpx y su contexto SSL no se cargan al importar)"""
+        if self._client is None:
+            import httpx
+
+            self._client = httpx.AsyncClient(timeout=30.0)
+        return self._client
     
     async def close(self):
         """Cerrar cliente HTTP"""
-        await self.client.aclose()
+        if self._client is not None:
+            await self._client.aclose()
     
     # ========== CONFIGURACIÓN DEL CHATBOT ==========
     
@@ -378,49 +391,27 @@ class BackendService:
             return {"error": str(e)}
     
     def _generar_combinaciones_detalladas(self, habitaciones: List[Dict], huespedes: int) -> List[Dict]:
-        """Genera combinaciones detalladas de habitaciones"""
-        from itertools import combinations
-        
+        """Genera las mejores combinaciones de habitaciones (menos habitaciones, menos camas libres, menor precio)"""
         combinaciones_validas = []
+        tipos = {1: "individual", 2: "doble"}
         
-        # Intentar con 1 habitación (si alguna tiene capacidad suficiente)
-        for habitacion in habitaciones:
-            if habitacion.get("capacidad", 2) >= huespedes:
-                combinaciones_validas.append({
-                    "numero_habitaciones": 1,
-                    "habitaciones": [habitacion.get("nombre")],
-                    "ids": [habitacion.get("id")],
-                    "capacidad_total": habitacion.get("capacidad", 2),
-                    "tipo": "individual",
-                    "descripcion": f"{habitacion.get('nombre')} (capacidad: {habitacion.get('capacidad', 2)} personas)"
-                })
-        
-        # Intentar con 2 habitaciones
-        if len(habitaciones) >= 2:
-            for combo in combinations(habitaciones, 2):
-                capacidad_total = sum(hab.get("capacidad", 2) for hab in combo)
-                if capacidad_total >= huespedes:
-                    combinaciones_validas.append({
-                        "numero_habitaciones": 2,
-                        "habitaciones": [hab.get("nombre") for hab in combo],
-                        "ids": [hab.get("id") for hab in combo],
-                        "capacidad_total": capacidad_total,
-                        "tipo": "doble",
-                        "descripcion": f"{combo[0].get('nombre')} + {combo[1].get('nombre')} (capacidad total: {capacidad_total} personas)"
-                    })
-        
-        # Si no hay combinaciones válidas, intentar con todas las habitaciones
-        if not combinaciones_validas and len(habitaciones) >= 3:
-            capacidad_total = sum(hab.get("capacidad", 2) for hab in habitaciones)
-            if capacidad_total >= huespedes:
-                combinaciones_validas.append({
-                    "numero_habitaciones": len(habitaciones),
-                    "habitaciones": [hab.get("nombre") for hab in habitaciones],
-                    "ids": [hab.get("id") for hab in habitaciones],
-                    "capacidad_total": capacidad_total,
-                    "tipo": "multiple",
-                    "descripcion": f"Todas las habitaciones disponibles (capacidad total: {capacidad_total} personas)"
-                })
+        for allocation in allocate_rooms(habitaciones, huespedes):
+            numero_habitaciones = allocation["numero_habitaciones"]
+            capacidad_total = allocation["capacidad_total"]
+            if numero_habitaciones == 1:
+                descripcion = f"{allocation['habitaciones'][0]} (capacidad: {capacidad_total} personas)"
+            else:
+                descripcion = f"{' + '.join(allocation['habitaciones'])} (capacidad total: {capacidad_total} personas)"
+            combinaciones_validas.append({
+                "numero_habitaciones": numero_habitaciones,
+                "habitaciones": allocation["habitaciones"],
+                "ids": allocation["ids"],
+                "capacidad_total": capacidad_total,
+                "sobrante": allocation["sobrante"],
+                "precio_por_noche": allocation["precio_total"],
+                "tipo": tipos.get(numero_habitaciones, "multiple"),
+                "descripcion": descripcion
+            })
         
         return combinaciones_validas
 
@@ -3,23 +3,38 @@ import uuid
 import re
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any, Tuple
-from openai import AsyncOpenAI
 from ..core.config import settings
+from ..core.openai_client import create_openai_client
 from ..models.chat import ChatRequest, ChatResponse, ChatHistoryResponse, ChatMessage
 from ..models.knowledge import ChatbotConfig
 from ..services.backend_service import backend_service
 from ..services.knowledge_service import KnowledgeService
 from ..services.query_classifier import QueryClassifier
+from ..services.prompt_registry import prompt_registry
+from ..services.context_serializer import context_serializer
+from ..services.response_renderer import response_renderer
+from ..services.llm_gateway import LLMGateway
+from ..services.embedding_cache import embedding_cache
+from ..services.ingestion_jobs import ingestion_jobs
+from ..services.vector_index import vector_index
+from ..services.vector_storage import vector_storage
 from ..utils.date_extractor import DateExtractor
+from ..utils.room_allocator import allocate_rooms, allocator_metrics, nights_between, room_capacity
+from ..utils.tokens import count_tokens
 from ..core.database import get_db, execute_vector_query, execute_vector_query_one
+from ..core.logging_config import bind_request, debug_enabled, log_debug, logging_metrics
 import json
 import time
 
 logger = logging.getLogger(__name__)
 
+# Habitación mencionada en una respuesta con disponibilidad confirmada (se evalúa al guardar)
+HABITACION_RE = re.compile(r'Suite\s+\w+|habitación\s+\w+', re.IGNORECASE)
+
 class ChatService:
     def __init__(self):
-        self.openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
+        self.openai_client = create_openai_client()
+        self.llm_gateway = LLMGateway(self.openai_client)
         self.knowledge_service = KnowledgeService()
         self.query_classifier = QueryClassifier()
         self.date_extractor = DateExtractor()
@@ -61,17 +76,20 @@ class ChatService:
                 session_id = token
             elif not session_id:
                 session_id = str(uuid.uuid4())
+            
+            # Registros de este turno con hospedaje y conversación (el token se recorta como en el resto de los logs)
+            bind_request(hospedaje_id=hospedaje_id, conversation_id=conversation_id[:20])
                 
-            logger.info(f"🔍 DEBUG - Token: {token[:20] if token else 'None'}...")
-            logger.info(f"🔍 DEBUG - Conversation ID: {conversation_id[:20] if conversation_id else 'None'}...")
-            logger.info(f"🔍 DEBUG - Session ID: {session_id[:20] if session_id else 'None'}...")
-            logger.info(f"🆕 DEBUG - Contexto del frontend: {'Presente' if context else 'Ausente'}")
-            logger.info(f"🆕 DEBUG - Guardar en historial: {save_to_history}")
+            log_debug(logger, "chat", "🔍 DEBUG - Token: %s...", token[:20] if token else 'None')
+            log_debug(logger, "chat", "🔍 DEBUG - Conversation ID: %s...", conversation_id[:20] if conversation_id else 'None')
+            log_debug(logger, "chat", "🔍 DEBUG - Session ID: %s...", session_id[:20] if session_id else 'None')
+            log_debug(logger, "chat", "🆕 DEBUG - Contexto del frontend: %s", 'Presente' if context else 'Ausente')
+            log_debug(logger, "chat", "🆕 DEBUG - Guardar en historial: %s", save_to_history)
             
             # Obtener configuración del chatbot
             config = await backend_service.get_chatbot_config(hospedaje_id)
             if not config:
-                logger.error(f"No se encontró configuración para hospedaje {hospedaje_id}")
+                logger.error("No se encontró configuración para hospedaje %s", hospedaje_id)
                 response_time = time.time() - start_time
                 return ChatResponse(
                     response="Lo siento, no puedo procesar tu consulta en este momento.",
@@ -89,7 +107,7 @@ class ChatService:
                         hospedaje_id, user_id, conversation_id, message, "user"
                     )
                 except Exception as e:
-                    logger.warning(f"Error guardando mensaje del usuario: {e}")
+                    logger.warning("Error guardando mensaje del usuario: %s", e)
             
             # 🧯 IDEMPOTENCIA (ventana 2s): evitar reprocesar el mismo mensaje
             normalized_message = (message or "").strip().lower()
@@ -132,16 +150,16 @@ class ChatService:
             if full_context.get("query_type_override"):
                 original_query_type = query_type
                 query_type = full_context["query_type_override"]
-                logger.info(f"🔄 OVERRIDE APLICADO TEMPRANO - Cambiando query_type de '{original_query_type}' a '{query_type}'")
+                logger.info("🔄 OVERRIDE APLICADO TEMPRANO - Cambiando query_type de '%s' a '%s'", original_query_type, query_type)
                 # Limpiar el contexto de proceso_reserva para evitar conflictos
                 if "proceso_reserva_caso" in full_context:
-                    logger.info(f"🧹 LIMPIANDO contexto proceso_reserva para evitar conflictos con override")
+                    logger.info("🧹 LIMPIANDO contexto proceso_reserva para evitar conflictos con override")
                     del full_context["proceso_reserva_caso"]
             
             # 🔍 PASO 3: DETECTAR Y MANEJAR CAPACIDAD EXCEDIDA
             capacity_analysis = await self._analyze_capacity_requirements(message, full_context, query_type)
             if capacity_analysis.get("capacity_exceeded"):
-                logger.info(f"🚨 CAPACIDAD EXCEDIDA DETECTADA - Redirigiendo a manejo especial")
+                logger.info("🚨 CAPACIDAD EXCEDIDA DETECTADA - Redirigiendo a manejo especial")
                 query_type = capacity_analysis["new_query_type"]
                 full_context.update(capacity_analysis["enhanced_context"])
             
@@ -154,7 +172,8 @@ class ChatService:
             if save_to_history and not self._is_anonymous_user(user_id):
                 try:
                     await self._save_message(
-                        hospedaje_id, user_id, conversation_id, response_text, "assistant"
+                        hospedaje_id, user_id, conversation_id, response_text, "assistant", query_type,
+                        availability=full_context.get("availability_real", {}).get("hospedaje_disponibilidad")
                     )
                     
                     # 🎯 GUARDAR CONTEXTO DE RESERVA PENDIENTE para memoria conversacional
@@ -164,7 +183,7 @@ class ChatService:
                         )
                         
                 except Exception as e:
-                    logger.warning(f"Error guardando respuesta del bot: {e}")
+                    logger.warning("Error guardando respuesta del bot: %s", e)
             
             # Guardar huella para idempotencia
             try:
@@ -188,7 +207,7 @@ class ChatService:
             )
             
         except Exception as e:
-            logger.error(f"Error procesando mensaje: {e}")
+            logger.error("Error procesando mensaje: %s", e)
             response_time = time.time() - start_time
             return ChatResponse(
                 response="Lo siento, ocurrió un error procesando tu consulta.",
@@ -214,7 +233,7 @@ class ChatService:
                     return True
             return False
         except Exception as e:
-            logger.warning(f"DEBUG _is_multi_reservation_confirm - error evaluando patrón: {e}")
+            logger.warning("DEBUG _is_multi_reservation_confirm - error evaluando patrón: %s", e)
             return False
 
     async def _generate_response(
@@ -242,47 +261,43 @@ class ChatService:
                 logger.info("🎯 SHORT-CIRCUIT - Usando response_text preconstruido desde el handler")
                 return prebuilt_response
 
+            # ⚡ RESPUESTA DETERMINÍSTICA: datos estructurados del backend sin pasar por el LLM
+            rendered_response = response_renderer.render(query_type, context, config.tono)
+            if rendered_response:
+                logger.info("⚡ RENDER - Respuesta '%s' generada desde plantilla (sin LLM)", query_type)
+                return rendered_response
+
             # 🔧 Ya no necesitamos obtener contexto - viene como parámetro
             # Construir prompt directamente
             prompt = await self._build_prompt(message, context, query_type, config)
             
-            # 🔍 DEBUG: Mostrar el prompt completo que se envía a OpenAI
-            logger.info("=" * 80)
-            logger.info("🤖 DEBUG: PROMPT ENVIADO A OPENAI")
-            logger.info("=" * 80)
-            logger.info(f"🔧 Modelo: gpt-3.5-turbo")
-            logger.info(f"🔧 Max tokens: {settings.max_tokens}")
-            logger.info(f"🔧 Temperature: {settings.temperature}")
-            logger.info(f"🔧 Query type: {query_type}")
-            logger.info("-" * 40)
-            logger.info("📋 SYSTEM PROMPT:")
-            logger.info("-" * 40)
-            logger.info(_redact_checkout_urls(prompt["system"]))
-            logger.info("-" * 40)
-            logger.info("👤 USER MESSAGE:")
-            logger.info("-" * 40)
-            logger.info(_redact_checkout_urls(prompt["user"]))
-            logger.info("=" * 80)
-            
-            # Generar respuesta con OpenAI
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            # 🔍 DEBUG: Mostrar el prompt completo que se envía a OpenAI (categoría "prompt")
+            if debug_enabled("prompt"):
+                log_debug(
+                    logger, "prompt",
+                    "🤖 DEBUG: PROMPT ENVIADO A OPENAI (modelo=gpt-3.5-turbo, max_tokens=%s, temperature=%s, query_type=%s)\n"
+                    "📋 SYSTEM PROMPT:\n%s\n👤 USER MESSAGE:\n%s",
+                    settings.max_tokens, settings.temperature, query_type,
+                    _redact_checkout_urls(prompt["system"]), _redact_checkout_urls(prompt["user"])
+                )
+            
+            # Generar respuesta con OpenAI (a través del gateway con límite de concurrencia)
+            openai_response = await self.llm_gateway.chat_completion(
                 messages=[
                     {"role": "system", "content": prompt["system"]},
                     {"role": "user", "content": prompt["user"]}
                 ],
+                query_type=query_type,
+                model="gpt-3.5-turbo",
                 max_tokens=settings.max_tokens,
                 temperature=settings.temperature
             )
+            if openai_response == self.llm_gateway.fallback_message:
+                # Sin respuesta del modelo: no post-procesar
+                return openai_response
             
             # 🔍 DEBUG: Mostrar la respuesta recibida de OpenAI
-            logger.info("=" * 80)
-            logger.info("🤖 DEBUG: RESPUESTA DE OPENAI")
-            logger.info("=" * 80)
-            openai_response = response.choices[0].message.content or "No se pudo generar una respuesta."
-            logger.info(f"📤 Respuesta generada:")
-            logger.info(openai_response)
-            logger.info("=" * 80)
+            log_debug(logger, "prompt", "🤖 DEBUG: RESPUESTA DE OPENAI\n📤 Respuesta generada:\n%s", openai_response)
 
             # 🔧 POST-PROCESO: "proceso_reserva" CASO1 → anexar ÚNICO checkout_url del contexto
             try:
@@ -319,12 +334,12 @@ class ChatService:
                         return final_response
             except Exception as _e:
                 # En caso de cualquier error en el post-procesado, devolver la respuesta original del LLM
-                logger.warning(f"POST-PROCESO caso1 - Error al post-procesar: {_e}")
+                logger.warning("POST-PROCESO caso1 - Error al post-procesar: %s", _e)
 
             return openai_response
             
         except Exception as e:
-            logger.error(f"Error generando respuesta: {e}")
+            logger.error("Error generando respuesta: %s", e)
             return "Lo siento, no pude generar una respuesta adecuada."
     
     async def _get_basic_context_for_classification(
@@ -352,7 +367,7 @@ class ChatService:
             if guest_interception_result:
                 # Si interceptamos respuesta de huéspedes, usar esos parámetros limpios
                 query_params = guest_interception_result
-                logger.info(f"🎯 CLASIFICACIÓN - Interceptación de huéspedes detectada: {guest_interception_result}")
+                logger.info("🎯 CLASIFICACIÓN - Interceptación de huéspedes detectada: %s", guest_interception_result)
             else:
                 # Solo si NO es respuesta de huéspedes, extraer fechas normalmente
                 query_params = self.date_extractor.get_query_params(message)
@@ -361,13 +376,13 @@ class ChatService:
             
             # 🆕 2.5. USAR CONTEXTO DEL FRONTEND si está disponible
             if frontend_context and not query_params.get('has_dates'):
-                logger.info(f"🔍 DEBUG - Usando contexto del frontend para clasificación")
+                log_debug(logger, "chat", "🔍 DEBUG - Usando contexto del frontend para clasificación")
                 
                 # Extraer fechas del contexto del frontend
                 current_query = frontend_context.get('currentQuery', {})
                 if current_query.get('dates'):
                     dates_from_context = current_query['dates']
-                    logger.info(f"🔍 DEBUG - Fechas del contexto frontend para clasificación: {dates_from_context}")
+                    log_debug(logger, "chat", "🔍 DEBUG - Fechas del contexto frontend para clasificación: %s", dates_from_context)
                     
                     # Mapear fechas del frontend al formato esperado
                     if dates_from_context.get('checkIn') and dates_from_context.get('checkOut'):
@@ -392,7 +407,7 @@ class ChatService:
                 if current_query.get('habitacion'):
                     habitacion_frontend = current_query['habitacion']
                     query_params['previous_habitacion'] = habitacion_frontend
-                    logger.info(f"🔍 DEBUG MAPEO CLASIFICACIÓN - Habitación del frontend mapeada: '{habitacion_frontend}' → query_params['previous_habitacion']")
+                    log_debug(logger, "chat", "🔍 DEBUG MAPEO CLASIFICACIÓN - Habitación del frontend mapeada: '%s' → query_params['previous_habitacion']", habitacion_frontend)
                 
                 # Agregar historial de conversación del frontend
                 conversation_history = frontend_context.get('conversationHistory', [])
@@ -401,30 +416,30 @@ class ChatService:
                         "messages_count": len(conversation_history),
                         "recent_messages": conversation_history[-3:] if len(conversation_history) > 3 else conversation_history
                     }
-                    logger.info(f"🔍 DEBUG - Historial del frontend para clasificación: {len(conversation_history)} mensajes")
+                    log_debug(logger, "chat", "🔍 DEBUG - Historial del frontend para clasificación: %s mensajes", len(conversation_history))
             
             # 2.6. FALLBACK: Buscar contexto en BD solo si no hay contexto del frontend y no hay fechas
             elif not query_params.get('has_dates') and conversation_id:
-                logger.info(f"🔍 DEBUG - Fallback: buscando contexto en BD para clasificación")
+                log_debug(logger, "chat", "🔍 DEBUG - Fallback: buscando contexto en BD para clasificación")
                 session_context = await self._get_session_context(hospedaje_id, user_id, conversation_id)
                 if session_context:
                     basic_context["session_context"] = session_context
                     # Si encontramos fechas en mensajes anteriores, usarlas
                     if session_context.get('last_dates'):
-                        logger.info(f"🔍 DEBUG - Usando fechas del contexto de BD para clasificación: {session_context['last_dates']}")
+                        log_debug(logger, "chat", "🔍 DEBUG - Usando fechas del contexto de BD para clasificación: %s", session_context['last_dates'])
                         query_params.update(session_context['last_dates'])
                         query_params['inferred_from_session'] = True
             
             basic_context["query_params"] = query_params
             
             # DEBUG: Log de parámetros extraídos para clasificación
-            logger.info(f"🔍 DEBUG - Mensaje para clasificación: '{message}'")
-            logger.info(f"🔍 DEBUG - Parámetros extraídos para clasificación: {query_params}")
-            logger.info(f"🔍 DEBUG - has_dates para clasificación: {query_params.get('has_dates', False)}")
-            logger.info(f"🔍 DEBUG - check_in para clasificación: {query_params.get('check_in')}")
-            logger.info(f"🔍 DEBUG - check_out para clasificación: {query_params.get('check_out')}")
-            logger.info(f"🔍 DEBUG - single_date para clasificación: {query_params.get('single_date')}")
-            logger.info(f"🆕 DEBUG - inferred_from_frontend para clasificación: {query_params.get('inferred_from_frontend', False)}")
+            log_debug(logger, "chat", "🔍 DEBUG - Mensaje para clasificación: '%s'", message)
+            log_debug(logger, "chat", "🔍 DEBUG - Parámetros extraídos para clasificación: %s", query_params)
+            log_debug(logger, "chat", "🔍 DEBUG - has_dates para clasificación: %s", query_params.get('has_dates', False))
+            log_debug(logger, "chat", "🔍 DEBUG - check_in para clasificación: %s", query_params.get('check_in'))
+            log_debug(logger, "chat", "🔍 DEBUG - check_out para clasificación: %s", query_params.get('check_out'))
+            log_debug(logger, "chat", "🔍 DEBUG - single_date para clasificación: %s", query_params.get('single_date'))
+            log_debug(logger, "chat", "🆕 DEBUG - inferred_from_frontend para clasificación: %s", query_params.get('inferred_from_frontend', False))
             
             # 2.1. VALIDAR FECHAS - NO PERMITIR FECHAS PASADAS
             fecha_invalida = self._validar_fechas_futuras(query_params)
@@ -439,7 +454,7 @@ class ChatService:
             return basic_context
                 
         except Exception as e:
-            logger.error(f"Error obteniendo contexto básico para clasificación: {e}")
+            logger.error("Error obteniendo contexto básico para clasificación: %s", e)
         return basic_context
     
     async def _intercept_guest_response(
@@ -463,17 +478,17 @@ class ChatService:
             # Priorizar contexto del frontend (más actualizado)
             if frontend_context and frontend_context.get('conversationHistory'):
                 conversation_history = frontend_context['conversationHistory'][-3:]  # Últimos 3 mensajes
-                logger.info(f"🎯 INTERCEPTACIÓN - Usando historial frontend: {len(conversation_history)} mensajes")
+                log_debug(logger, "guests", "🎯 INTERCEPTACIÓN - Usando historial frontend: %s mensajes", len(conversation_history))
             
             # Fallback: historial de BD
             elif conversation_id:
                 session_context = await self._get_session_context(hospedaje_id, user_id, conversation_id)
                 if session_context and session_context.get("recent_messages"):
                     conversation_history = session_context["recent_messages"][-3:]
-                    logger.info(f"🎯 INTERCEPTACIÓN - Usando historial BD: {len(conversation_history)} mensajes")
+                    log_debug(logger, "guests", "🎯 INTERCEPTACIÓN - Usando historial BD: %s mensajes", len(conversation_history))
             
             if not conversation_history:
-                logger.info(f"🎯 INTERCEPTACIÓN - Sin historial conversacional, no interceptando")
+                log_debug(logger, "guests", "🎯 INTERCEPTACIÓN - Sin historial conversacional, no interceptando")
                 return None
             
             # 2. DETECTAR SI EL BOT PREGUNTÓ POR HUÉSPEDES EN EL MENSAJE ANTERIOR
@@ -484,7 +499,7 @@ class ChatService:
                     break
             
             if not last_bot_message:
-                logger.info(f"🎯 INTERCEPTACIÓN - Sin mensaje previo del bot, no interceptando")
+                log_debug(logger, "guests", "🎯 INTERCEPTACIÓN - Sin mensaje previo del bot, no interceptando")
                 return None
             
             # Palabras clave que indican que el bot preguntó por huéspedes
@@ -498,11 +513,11 @@ class ChatService:
             bot_asked_guests = any(keyword in last_bot_message for keyword in huespedes_keywords)
             
             if not bot_asked_guests:
-                logger.info(f"🎯 INTERCEPTACIÓN - Bot no preguntó por huéspedes, no interceptando")
+                log_debug(logger, "guests", "🎯 INTERCEPTACIÓN - Bot no preguntó por huéspedes, no interceptando")
                 return None
             
-            logger.info(f"🎯 INTERCEPTACIÓN DETECTADA - Bot preguntó huéspedes: '{last_bot_message[:100]}...'")
-            logger.info(f"🎯 INTERCEPTACIÓN DETECTADA - Respuesta usuario: '{message}'")
+            log_debug(logger, "guests", "🎯 INTERCEPTACIÓN DETECTADA - Bot preguntó huéspedes: '%s...'", last_bot_message[:100])
+            log_debug(logger, "guests", "🎯 INTERCEPTACIÓN DETECTADA - Respuesta usuario: '%s'", message)
             
             # 3. DETECTAR SI EL USUARIO RESPONDE CON UN NÚMERO DE HUÉSPEDES
             import re
@@ -520,13 +535,13 @@ class ChatService:
                 if match:
                     try:
                         guest_number = int(match.group(1))
-                        logger.info(f"🎯 INTERCEPTACIÓN - Patrón '{pattern}' detectó: {guest_number} huéspedes")
+                        log_debug(logger, "guests", "🎯 INTERCEPTACIÓN - Patrón '%s' detectó: %s huéspedes", pattern, guest_number)
                         break
                     except (ValueError, IndexError):
                         continue
             
             if not guest_number or guest_number < 1 or guest_number > 20:
-                logger.info(f"🎯 INTERCEPTACIÓN - Número de huéspedes no válido: {guest_number}")
+                log_debug(logger, "guests", "🎯 INTERCEPTACIÓN - Número de huéspedes no válido: %s", guest_number)
                 return None
             
             # 4. CREAR PARÁMETROS LIMPIOS PRESERVANDO CONTEXTO DEL FRONTEND
@@ -566,7 +581,7 @@ class ChatService:
                 # ✅ PRESERVAR HABITACIÓN SELECCIONADA
                 if current_query.get('habitacion'):
                     clean_params['previous_habitacion'] = current_query['habitacion']
-                    logger.info(f"🎯 INTERCEPTACIÓN - Habitación preservada: {current_query['habitacion']}")
+                    log_debug(logger, "guests", "🎯 INTERCEPTACIÓN - Habitación preservada: %s", current_query['habitacion'])
                 
                 # ✅ PRESERVAR FECHAS DEL FRONTEND
                 if current_query.get('dates'):
@@ -578,25 +593,25 @@ class ChatService:
                             'has_dates': True,
                             'inferred_from_frontend': True
                         })
-                        logger.info(f"🎯 INTERCEPTACIÓN - Fechas preservadas: {dates_from_context['checkIn']} a {dates_from_context['checkOut']}")
+                        log_debug(logger, "guests", "🎯 INTERCEPTACIÓN - Fechas preservadas: %s a %s", dates_from_context['checkIn'], dates_from_context['checkOut'])
                     elif dates_from_context.get('singleDate'):
                         clean_params.update({
                             'single_date': dates_from_context['singleDate'],
                             'has_dates': True,
                             'inferred_from_frontend': True
                         })
-                        logger.info(f"🎯 INTERCEPTACIÓN - Fecha única preservada: {dates_from_context['singleDate']}")
+                        log_debug(logger, "guests", "🎯 INTERCEPTACIÓN - Fecha única preservada: %s", dates_from_context['singleDate'])
                 
                 # ✅ PRESERVAR DISPONIBILIDAD PREVIA
                 if current_query.get('lastAvailability'):
                     clean_params['previous_availability'] = True
-                    logger.info(f"🎯 INTERCEPTACIÓN - Disponibilidad previa preservada")
+                    log_debug(logger, "guests", "🎯 INTERCEPTACIÓN - Disponibilidad previa preservada")
             
-            logger.info(f"🎯 INTERCEPTACIÓN EXITOSA - Parámetros limpios creados: {clean_params}")
+            log_debug(logger, "guests", "🎯 INTERCEPTACIÓN EXITOSA - Parámetros limpios creados: %s", clean_params)
             return clean_params
             
         except Exception as e:
-            logger.error(f"Error interceptando respuesta de huéspedes: {e}")
+            logger.error("Error interceptando respuesta de huéspedes: %s", e)
             return None
 
     async def _get_relevant_context(
@@ -622,7 +637,7 @@ class ChatService:
             # Los parámetros ya vienen procesados desde el contexto básico de clasificación
             if basic_context and basic_context.get("query_params"):
                 query_params = basic_context["query_params"]
-                logger.info(f"🎯 CONTEXTO COMPLETO - Usando parámetros del contexto básico: {query_params}")
+                log_debug(logger, "context", "🎯 CONTEXTO COMPLETO - Usando parámetros del contexto básico: %s", query_params)
             else:
                 query_params = self.date_extractor.get_query_params(message)
                 
@@ -631,7 +646,7 @@ class ChatService:
             # Verificar si ya fue interceptada respuesta de huéspedes
             was_intercepted = query_params.get('intercepted_guest_response', False)
             if was_intercepted:
-                logger.info(f"🎯 CONTEXTO COMPLETO - Respuesta de huéspedes ya interceptada en clasificación")
+                logger.info("🎯 CONTEXTO COMPLETO - Respuesta de huéspedes ya interceptada en clasificación")
             
             # 🆕 2.5. USAR CONTEXTO DEL FRONTEND si está disponible
             # 🎯 USAR CONTEXTO DEL FRONTEND - incluso si fue interceptada respuesta de huéspedes
@@ -643,14 +658,14 @@ class ChatService:
                 was_intercepted = query_params.get('intercepted_guest_response', False)
                 
                 if was_intercepted:
-                    logger.info(f"🎯 INTERCEPTACIÓN - Preservando contexto del frontend tras interceptar huéspedes")
+                    logger.info("🎯 INTERCEPTACIÓN - Preservando contexto del frontend tras interceptar huéspedes")
                 else:
-                    logger.info(f"🔍 DEBUG - Usando contexto del frontend")
+                    log_debug(logger, "context", "🔍 DEBUG - Usando contexto del frontend")
                 
                 # ✅ PRESERVAR FECHAS DEL CONTEXTO - incluso si fue interceptado
                 if current_query.get('dates') and not query_params.get('has_dates'):
                     dates_from_context = current_query['dates']
-                    logger.info(f"🔍 DEBUG - Fechas del contexto frontend: {dates_from_context}")
+                    log_debug(logger, "context", "🔍 DEBUG - Fechas del contexto frontend: %s", dates_from_context)
                     
                     # Mapear fechas del frontend al formato esperado
                     if dates_from_context.get('checkIn') and dates_from_context.get('checkOut'):
@@ -661,7 +676,7 @@ class ChatService:
                             'inferred_from_frontend': True
                         })
                         if was_intercepted:
-                            logger.info(f"🎯 INTERCEPTACIÓN - Fechas preservadas: {dates_from_context['checkIn']} a {dates_from_context['checkOut']}")
+                            logger.info("🎯 INTERCEPTACIÓN - Fechas preservadas: %s a %s", dates_from_context['checkIn'], dates_from_context['checkOut'])
                     elif dates_from_context.get('singleDate'):
                         query_params.update({
                             'single_date': dates_from_context['singleDate'],
@@ -669,21 +684,21 @@ class ChatService:
                             'inferred_from_frontend': True
                         })
                         if was_intercepted:
-                            logger.info(f"🎯 INTERCEPTACIÓN - Fecha única preservada: {dates_from_context['singleDate']}")
+                            logger.info("🎯 INTERCEPTACIÓN - Fecha única preservada: %s", dates_from_context['singleDate'])
                 
                 # ✅ PRESERVAR DISPONIBILIDAD PREVIA - siempre
                 if current_query.get('lastAvailability'):
                     query_params['previous_availability'] = True
                     if was_intercepted:
-                        logger.info(f"🎯 INTERCEPTACIÓN - Disponibilidad previa preservada")
+                        logger.info("🎯 INTERCEPTACIÓN - Disponibilidad previa preservada")
                 
                 # ✅ PRESERVAR HABITACIÓN SELECCIONADA - siempre (🎯 CRÍTICO - CONTEXTO COMPLETO)
                 if current_query.get('habitacion'):
                     habitacion_frontend = current_query['habitacion']
                     query_params['previous_habitacion'] = habitacion_frontend
-                    logger.info(f"🔍 DEBUG MAPEO CONTEXTO - Habitación del frontend mapeada: '{habitacion_frontend}' → query_params['previous_habitacion']")
+                    log_debug(logger, "context", "🔍 DEBUG MAPEO CONTEXTO - Habitación del frontend mapeada: '%s' → query_params['previous_habitacion']", habitacion_frontend)
                     if was_intercepted:
-                        logger.info(f"🎯 INTERCEPTACIÓN - Habitación preservada: {habitacion_frontend}")
+                        logger.info("🎯 INTERCEPTACIÓN - Habitación preservada: %s", habitacion_frontend)
                 
                 # ✅ PRESERVAR HISTORIAL DE CONVERSACIÓN - siempre
                 conversation_history = frontend_context.get('conversationHistory', [])
@@ -692,33 +707,33 @@ class ChatService:
                         "messages_count": len(conversation_history),
                         "recent_messages": conversation_history[-3:] if len(conversation_history) > 3 else conversation_history
                     }
-                    logger.info(f"🔍 DEBUG - Historial del frontend: {len(conversation_history)} mensajes")
+                    log_debug(logger, "context", "🔍 DEBUG - Historial del frontend: %s mensajes", len(conversation_history))
                     if was_intercepted:
-                        logger.info(f"🎯 INTERCEPTACIÓN - Historial conversacional preservado: {len(conversation_history)} mensajes")
+                        logger.info("🎯 INTERCEPTACIÓN - Historial conversacional preservado: %s mensajes", len(conversation_history))
             
             # 2.6. FALLBACK: Buscar contexto en BD solo si no hay contexto del frontend y no hay fechas
             elif not frontend_context and not query_params.get('has_dates') and conversation_id:
-                logger.info(f"🔍 DEBUG - Fallback: buscando contexto en BD")
+                log_debug(logger, "context", "🔍 DEBUG - Fallback: buscando contexto en BD")
                 session_context = await self._get_session_context(hospedaje_id, user_id, conversation_id)
                 if session_context:
                     context["session_context"] = session_context
                     # Si encontramos fechas en mensajes anteriores, usarlas
                     if session_context.get('last_dates'):
-                        logger.info(f"🔍 DEBUG - Usando fechas del contexto de BD: {session_context['last_dates']}")
+                        log_debug(logger, "context", "🔍 DEBUG - Usando fechas del contexto de BD: %s", session_context['last_dates'])
                         query_params.update(session_context['last_dates'])
                         query_params['inferred_from_session'] = True
             
             context["query_params"] = query_params
             
             # DEBUG: Log de parámetros extraídos
-            logger.info(f"🔍 DEBUG - Mensaje: '{message}'")
-            logger.info(f"🔍 DEBUG - Parámetros extraídos: {query_params}")
-            logger.info(f"🔍 DEBUG - has_dates: {query_params.get('has_dates', False)}")
-            logger.info(f"🔍 DEBUG - check_in: {query_params.get('check_in')}")
-            logger.info(f"🔍 DEBUG - check_out: {query_params.get('check_out')}")
-            logger.info(f"🔍 DEBUG - single_date: {query_params.get('single_date')}")
-            logger.info(f"🔍 DEBUG - is_monthly_query: {query_params.get('is_monthly_query', False)}")
-            logger.info(f"🆕 DEBUG - inferred_from_frontend: {query_params.get('inferred_from_frontend', False)}")
+            log_debug(logger, "context", "🔍 DEBUG - Mensaje: '%s'", message)
+            log_debug(logger, "context", "🔍 DEBUG - Parámetros extraídos: %s", query_params)
+            log_debug(logger, "context", "🔍 DEBUG - has_dates: %s", query_params.get('has_dates', False))
+            log_debug(logger, "context", "🔍 DEBUG - check_in: %s", query_params.get('check_in'))
+            log_debug(logger, "context", "🔍 DEBUG - check_out: %s", query_params.get('check_out'))
+            log_debug(logger, "context", "🔍 DEBUG - single_date: %s", query_params.get('single_date'))
+            log_debug(logger, "context", "🔍 DEBUG - is_monthly_query: %s", query_params.get('is_monthly_query', False))
+            log_debug(logger, "context", "🆕 DEBUG - inferred_from_frontend: %s", query_params.get('inferred_from_frontend', False))
             
             # 2.1. VALIDAR FECHAS - NO PERMITIR FECHAS PASADAS
             fecha_invalida = self._validar_fechas_futuras(query_params)
@@ -737,7 +752,7 @@ class ChatService:
             # 4. CONSULTAR DISPONIBILIDAD REAL si hay fechas (SIEMPRE FRESCO - NO reutilizar cache)
             if query_params.get('has_dates') and habitaciones:
                 # 🔥 SIEMPRE consultar disponibilidad fresca del backend para datos actualizados
-                logger.info(f"🔥 DISPONIBILIDAD FRESCA - Forzando consulta al backend para fechas: {query_params}")
+                log_debug(logger, "context", "🔥 DISPONIBILIDAD FRESCA - Forzando consulta al backend para fechas: %s", query_params)
                 await self._add_availability_context(context, hospedaje_id, query_params, context["habitaciones"])
             
             # 5. CONSULTAR PRECIOS ESPECÍFICOS SOLO si la consulta es de tipo "precios"
@@ -765,7 +780,7 @@ class ChatService:
             return context
                 
         except Exception as e:
-            logger.error(f"Error obteniendo contexto relevante: {e}")
+            logger.error("Error obteniendo contexto relevante: %s", e)
         return context
     
     async def _build_prompt(
@@ -778,18 +793,16 @@ class ChatService:
         """Construye el prompt para OpenAI"""
         try:
             # 🔍 DEBUG: Log del query_type recibido
-            logger.info(f"🔍 DEBUG _build_prompt - query_type recibido: '{query_type}'")
-            logger.info(f"🔍 DEBUG _build_prompt - context keys: {list(context.keys())}")
+            log_debug(logger, "prompt", "🔍 DEBUG _build_prompt - query_type recibido: '%s'", query_type)
+            log_debug(logger, "prompt", "🔍 DEBUG _build_prompt - context keys: %s", list(context.keys()))
             if "query_type_override" in context:
-                logger.info(f"🔍 DEBUG _build_prompt - query_type_override en context: '{context['query_type_override']}'")
+                log_debug(logger, "prompt", "🔍 DEBUG _build_prompt - query_type_override en context: '%s'", context['query_type_override'])
             if "proceso_reserva_caso" in context:
-                logger.info(f"🔍 DEBUG _build_prompt - proceso_reserva_caso en context: '{context['proceso_reserva_caso']}'")
+                log_debug(logger, "prompt", "🔍 DEBUG _build_prompt - proceso_reserva_caso en context: '%s'", context['proceso_reserva_caso'])
                 
-            prompt_file_used = None  # Para trackear qué archivo se usa
             # MANEJO ESPECIAL: FECHA PASADA (máxima prioridad)
             if "error_fecha_pasada" in context:
-                with open("app/prompts/error_fecha_pasada.txt", "r", encoding="utf-8") as f:
-                    error_prompt = f.read()
+                error_prompt = prompt_registry.get("error_fecha_pasada")
                 
                 # Prompt mínimo para error de fecha pasada
                 system_prompt = f"""Eres un asistente de reservas profesional. 
@@ -807,105 +820,6 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                     "user": message
                 }
             
-            # Cargar prompt base (temporal - será reemplazado después)
-            with open("app/prompts/system_base.txt", "r", encoding="utf-8") as f:
-                system_prompt = f.read()
-            
-            # 🆕 MANEJO ESPECIAL PARA PROCESO_RESERVA - Usar caso específico
-            if query_type == "proceso_reserva":
-                caso_especifico = context.get("proceso_reserva_caso", "caso6")  # Fallback a caso6
-                rules_file = f"app/prompts/proceso_reserva_{caso_especifico}.txt"
-                prompt_file_used = rules_file
-                logger.info(f"🎯 PROCESO_RESERVA - Usando archivo específico: {rules_file}")
-                logger.info(f"🔍 DEBUG - Entrando a rama PROCESO_RESERVA con caso: {caso_especifico}")
-                try:
-                    with open(rules_file, "r", encoding="utf-8") as f:
-                        specific_rules = f.read()
-                    system_prompt += f"\n\n{specific_rules}"
-                    logger.info(f"✅ DEBUG - Archivo {rules_file} cargado exitosamente")
-                except FileNotFoundError:
-                    logger.error(f"🎯 PROCESO_RESERVA - Archivo {rules_file} no encontrado, usando caso6")
-                    try:
-                        with open("app/prompts/proceso_reserva_caso6.txt", "r", encoding="utf-8") as f:
-                            specific_rules = f.read()
-                        system_prompt += f"\n\n{specific_rules}"
-                        prompt_file_used = "app/prompts/proceso_reserva_caso6.txt"
-                    except FileNotFoundError:
-                        logger.error("🎯 PROCESO_RESERVA - Ni siquiera caso6 existe, usando fallback")
-                        with open("app/prompts/fallback.txt", "r", encoding="utf-8") as f:
-                            fallback_rules = f.read()
-                        system_prompt += f"\n\n{fallback_rules}"
-                        prompt_file_used = "app/prompts/fallback.txt"
-            else:
-                # LÓGICA NORMAL PARA OTROS TIPOS DE CONSULTA
-                logger.info(f"🔍 DEBUG - Entrando a rama ELSE (NO proceso_reserva) con query_type: '{query_type}'")
-                rules_file = f"app/prompts/{query_type}_rules.txt"
-                try:
-                    with open(rules_file, "r", encoding="utf-8") as f:
-                        specific_rules = f.read()
-                    system_prompt += f"\n\n{specific_rules}"
-                    prompt_file_used = rules_file
-                    logger.info(f"✅ DEBUG - Archivo directo {rules_file} cargado exitosamente")
-                except FileNotFoundError:
-                    logger.info(f"🔍 DEBUG - Archivo directo {rules_file} no encontrado, buscando en mapping")
-                    # Mapear tipos de consulta específicos a archivos de reglas
-                    rules_mapping = {
-                        "disponibilidad": "availability_rules.txt",
-                        "precios": "price_rules.txt",
-                        "hospedaje_servicios": "hospedaje_services_rules.txt",
-                        "habitacion_servicios": "habitacion_services_rules.txt",
-                        "servicio_especifico": "servicio_especifico_rules.txt",
-                        "metodos_pago": "metodos_pago_rules.txt",
-                        "servicios_multiples_habitaciones": "servicios_multiples_habitaciones_rules.txt",
-                        "capacidad_excedida_especifica": "capacidad_excedida_caso1.txt",
-                        "capacidad_excedida_general": "capacidad_excedida_caso2.txt",
-                        "capacidad_excedida_con_habitacion": "capacidad_excedida_con_habitacion_elegida.txt"
-                        # proceso_reserva NO en mapping - tiene lógica específica completa arriba
-                    }
-                
-                mapped_file = rules_mapping.get(query_type)
-                logger.info(f"🔍 DEBUG - Mapping lookup para '{query_type}': {mapped_file}")
-                if mapped_file:
-                    try:
-                        with open(f"app/prompts/{mapped_file}", "r", encoding="utf-8") as f:
-                            specific_rules = f.read()
-                        system_prompt += f"\n\n{specific_rules}"
-                        prompt_file_used = f"app/prompts/{mapped_file}"
-                        logger.info(f"✅ DEBUG - Archivo mapeado {mapped_file} cargado exitosamente")
-                    except FileNotFoundError:
-                        logger.error(f"❌ DEBUG - Archivo mapeado {mapped_file} no encontrado, usando fallback")
-                        # Si tampoco existe el archivo mapeado, usar fallback
-                        with open("app/prompts/fallback.txt", "r", encoding="utf-8") as f:
-                            fallback_rules = f.read()
-                        system_prompt += f"\n\n{fallback_rules}"
-                        prompt_file_used = "app/prompts/fallback.txt"
-                else:
-                    logger.info(f"🔍 DEBUG - No hay mapping para '{query_type}', usando fallback")
-                    # Si no hay reglas específicas ni mapeo, usar fallback
-                    with open("app/prompts/fallback.txt", "r", encoding="utf-8") as f:
-                        fallback_rules = f.read()
-                    system_prompt += f"\n\n{fallback_rules}"
-                    prompt_file_used = "app/prompts/fallback.txt"
-            
-            # Agregar reglas de fusión de datos si hay múltiples fuentes
-            sources_summary = context.get("sources_summary", {})
-            has_backend_data = (sources_summary.get("has_availability_real") or 
-                              sources_summary.get("has_pricing_real") or 
-                              sources_summary.get("has_servicios_hospedaje"))
-            has_pdf_data = sources_summary.get("has_pdf_info")
-            
-            if has_backend_data and has_pdf_data:
-                try:
-                    with open("app/prompts/data_fusion_rules.txt", "r", encoding="utf-8") as f:
-                        fusion_rules = f.read()
-                    system_prompt += f"\n\n{fusion_rules}"
-                except FileNotFoundError:
-                    logger.warning("Archivo de reglas de fusión no encontrado")
-            elif has_backend_data:
-                system_prompt += "\n\n⚡ DATOS EN TIEMPO REAL: Tienes acceso a información actualizada del sistema. Úsala como fuente principal."
-            elif has_pdf_data:
-                system_prompt += "\n\n📄 INFORMACIÓN DOCUMENTAL: Responde basándote en la información de los documentos del hospedaje."
-            
             # Personalizar con configuración del hospedaje
             hospedaje_data = context.get("hospedaje", {})
             
@@ -929,6 +843,36 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             # Si hay precios o disponibilidad, no mostrar datos de contacto
             mostrar_datos_positivos = hay_disponibilidad or hay_precios
             
+            # 🎯 PROMPT PRE-ARMADO: base (positivo o normal) + reglas del tipo de consulta
+            # proceso_reserva usa su lógica específica de casos (siempre con el prompt base)
+            usar_prompt_positivo = mostrar_datos_positivos and query_type != "proceso_reserva"
+            system_prompt, prompt_file_used = prompt_registry.system_prompt(
+                query_type,
+                caso=context.get("proceso_reserva_caso"),
+                positive=usar_prompt_positivo
+            )
+            
+            if usar_prompt_positivo:
+                logger.info("🔧 Usando prompt POSITIVO (sin contacto) - Disponibilidad: %s, Precios: %s", hay_disponibilidad, hay_precios)
+            else:
+                logger.info("🔧 Usando prompt NORMAL (con contacto)")
+                
+                # Agregar reglas de fusión de datos si hay múltiples fuentes
+                sources_summary = context.get("sources_summary", {})
+                has_backend_data = (sources_summary.get("has_availability_real") or 
+                                  sources_summary.get("has_pricing_real") or 
+                                  sources_summary.get("has_servicios_hospedaje"))
+                has_pdf_data = sources_summary.get("has_pdf_info")
+                
+                if has_backend_data and has_pdf_data:
+                    fusion_rules = prompt_registry.get("data_fusion_rules")
+                    if fusion_rules:
+                        system_prompt += f"\n\n{fusion_rules}"
+                elif has_backend_data:
+                    system_prompt += "\n\n⚡ DATOS EN TIEMPO REAL: Tienes acceso a información actualizada del sistema. Úsala como fuente principal."
+                elif has_pdf_data:
+                    system_prompt += "\n\n📄 INFORMACIÓN DOCUMENTAL: Responde basándote en la información de los documentos del hospedaje."
+            
             # 📋 DATOS BÁSICOS DEL HOSPEDAJE (siempre incluir)
             replacements = {
                 "{TONO}": config.tono,
@@ -940,80 +884,37 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             
             # 📞 DATOS DE CONTACTO (solo incluir si NO hay disponibilidad NI precios)
             if not mostrar_datos_positivos:
-                logger.info(f"🔧 SIN disponibilidad ni precios - Incluyendo datos de contacto")
+                logger.info("🔧 SIN disponibilidad ni precios - Incluyendo datos de contacto")
                 replacements.update({
                     "{telefono_contacto}": hospedaje_data.get("telefonoContacto", "teléfono de contacto"),
                     "{mail_contacto}": hospedaje_data.get("mailContacto", "email de contacto"), 
                     "{responsable}": hospedaje_data.get("responsable", "responsable"),
                 })
             else:
-                logger.info(f"🔧 CON disponibilidad o precios - NO incluyendo datos de contacto")
+                logger.info("🔧 CON disponibilidad o precios - NO incluyendo datos de contacto")
                 # Para respuestas positivas, dejar las variables vacías para que no se muestren
                 replacements.update({
                     "{telefono_contacto}": "",
                     "{mail_contacto}": "", 
                     "{responsable}": "",
-                                 })
-            
-            # 🎯 RECARGAR PROMPT CORRECTO SEGÚN DISPONIBILIDAD O PRECIOS (NO proceso_reserva - tiene lógica propia)
-            if mostrar_datos_positivos and query_type != "proceso_reserva":
-                # Prompt SIN datos de contacto
-                with open("app/prompts/system_base_positive.txt", "r", encoding="utf-8") as f:
-                    system_prompt = f.read()
-                logger.info(f"🔧 Usando prompt POSITIVO (sin contacto) - Disponibilidad: {hay_disponibilidad}, Precios: {hay_precios}")
-                
-                # Volver a agregar reglas específicas
-                rules_file = f"app/prompts/{query_type}_rules.txt"
-                try:
-                    with open(rules_file, "r", encoding="utf-8") as f:
-                        specific_rules = f.read()
-                    system_prompt += f"\n\n{specific_rules}"
-                except FileNotFoundError:
-                    # Mapear tipos de consulta específicos a archivos de reglas
-                    rules_mapping = {
-                        "disponibilidad": "availability_rules.txt",
-                        "precios": "price_rules.txt",
-                        "hospedaje_servicios": "hospedaje_services_rules.txt",
-                        "habitacion_servicios": "habitacion_services_rules.txt",
-                        "servicio_especifico": "servicio_especifico_rules.txt",
-                        "metodos_pago": "metodos_pago_rules.txt",
-                        "servicios_multiples_habitaciones": "servicios_multiples_habitaciones_rules.txt",
-                        "capacidad_excedida_especifica": "capacidad_excedida_caso1.txt",
-                        "capacidad_excedida_general": "capacidad_excedida_caso2.txt",
-                        "capacidad_excedida_con_habitacion": "capacidad_excedida_con_habitacion_elegida.txt"
-                    }
-                    
-                    mapped_file = rules_mapping.get(query_type)
-                    if mapped_file:
-                        try:
-                            with open(f"app/prompts/{mapped_file}", "r", encoding="utf-8") as f:
-                                specific_rules = f.read()
-                            system_prompt += f"\n\n{specific_rules}"
-                        except FileNotFoundError:
-                            # Si tampoco existe el archivo mapeado, usar fallback
-                            with open("app/prompts/fallback.txt", "r", encoding="utf-8") as f:
-                                fallback_rules = f.read()
-                            system_prompt += f"\n\n{fallback_rules}"
-                    else:
-                        # Si no hay reglas específicas ni mapeo, usar fallback
-                        with open("app/prompts/fallback.txt", "r", encoding="utf-8") as f:
-                            fallback_rules = f.read()
-                        system_prompt += f"\n\n{fallback_rules}"
-            elif query_type != "proceso_reserva":
-                logger.info(f"🔧 Usando prompt NORMAL (con contacto)")
-            # proceso_reserva usa su lógica específica de casos, no llega aquí
+                })
             
             # Aplicar todos los reemplazos
             for placeholder, value in replacements.items():
                 system_prompt = system_prompt.replace(placeholder, str(value))
             
-            # Agregar contexto
-            context_str = self._format_context(context)
+            # Agregar contexto (compacto y con presupuesto de tokens por sección)
+            context_str, context_breakdown = context_serializer.serialize_with_breakdown(context, query_type)
+            if debug_enabled("prompt"):
+                log_debug(
+                    logger, "prompt", "📏 PROMPT - tokens: sistema=%s, contexto=%s, usuario=%s",
+                    count_tokens(system_prompt), sum(context_breakdown.values()), count_tokens(message)
+                )
             system_prompt += f"\n\nCONTEXTO DISPONIBLE:\n{context_str}"
             
             # 🔍 DEBUG FINAL: Confirmar qué archivo se usó
-            logger.info(f"🎯 DEBUG FINAL - Prompt construido usando archivo: {prompt_file_used}")
-            logger.info(f"🎯 DEBUG FINAL - query_type final: '{query_type}'")
+            log_debug(logger, "prompt", "🎯 DEBUG FINAL - Prompt construido usando archivo: %s", prompt_file_used)
+            log_debug(logger, "prompt", "🎯 DEBUG FINAL - query_type final: '%s'", query_type)
             
             return {
                 "system": system_prompt,
@@ -1021,264 +922,15 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             }
             
         except Exception as e:
-            logger.error(f"Error construyendo prompt: {e}")
+            logger.error("Error construyendo prompt: %s", e)
             return {
                 "system": "Eres un asistente útil para un hospedaje.",
                 "user": message
             }
     
-    def _format_context(self, context: Dict[str, Any]) -> str:
-        """Formatea el contexto para el prompt combinando todas las fuentes"""
-        formatted = []
-        
-        # 1. INFORMACIÓN BÁSICA DEL HOSPEDAJE (filtrada según disponibilidad)
-        if "hospedaje" in context:
-            hospedaje_data = context['hospedaje'].copy()
-            
-            # 🔧 FILTRAR datos de contacto si hay disponibilidad positiva o precios
-            availability_real = context.get("availability_real", {})
-            hospedaje_disp = availability_real.get("hospedaje_disponibilidad", {})
-            hay_disponibilidad = hospedaje_disp.get("disponible", False)
-            hay_precios = context.get("pricing_real") is not None
-            mostrar_datos_positivos = hay_disponibilidad or hay_precios
-            
-            if mostrar_datos_positivos:
-                # Eliminar datos de contacto del contexto para OpenAI
-                hospedaje_data.pop("telefonoContacto", None)
-                hospedaje_data.pop("mailContacto", None) 
-                hospedaje_data.pop("responsable", None)
-                logger.info(f"🔧 FILTRADO - Datos de contacto eliminados del contexto JSON (Disponibilidad: {hay_disponibilidad}, Precios: {hay_precios})")
-            
-            formatted.append(f"HOSPEDAJE: {json.dumps(hospedaje_data, ensure_ascii=False, indent=2)}")
-        
-        # 2. PARÁMETROS EXTRAÍDOS DE LA CONSULTA
-        if "query_params" in context:
-            params = context["query_params"]
-            if params.get('has_dates') or params.get('guests') or params.get('nights'):
-                formatted.append(f"PARÁMETROS DE LA CONSULTA: {json.dumps(params, ensure_ascii=False, indent=2)}")
-        
-        # 2.1. ERROR DE FECHA PASADA (TIENE PRIORIDAD ABSOLUTA)
-        if "error_fecha_pasada" in context:
-            formatted.append(f"⚠️ ERROR: FECHA PASADA - {json.dumps(context['error_fecha_pasada'], ensure_ascii=False, indent=2)}")
-            # Si hay error de fecha pasada, no agregar más información de disponibilidad/precios
-            return "\n\n".join(formatted)
-        
-        # 3. HABITACIONES DEL HOSPEDAJE (FORMATO SIMPLIFICADO)
-        if "habitaciones" in context:
-            habitaciones_text = self._format_habitaciones_simple(context["habitaciones"])
-            formatted.append(habitaciones_text)
-        
-        # 4. DISPONIBILIDAD REAL (FORMATO SIMPLIFICADO Y FILTRADO)
-        # 🚨 CRITICAL: Solo agregar disponibilidad si NO hay información de reserva
-        if "availability_real" in context and "reserva_info" not in context:
-            availability_data = context["availability_real"].copy()
-            
-            # 🔧 FILTRAR datos de contacto del hospedaje en las habitaciones si hay disponibilidad o precios
-            hospedaje_disp = availability_data.get("hospedaje_disponibilidad", {})
-            hay_disponibilidad = hospedaje_disp.get("disponible", False)
-            hay_precios = context.get("pricing_real") is not None
-            mostrar_datos_positivos = hay_disponibilidad or hay_precios
-            
-            if mostrar_datos_positivos:
-                detalle_habitaciones = hospedaje_disp.get("detalle_habitaciones", [])
-                for habitacion in detalle_habitaciones:
-                    if "hospedaje" in habitacion:
-                        # Eliminar datos de contacto del hospedaje en cada habitación
-                        habitacion["hospedaje"].pop("telefonoContacto", None)
-                        habitacion["hospedaje"].pop("mailContacto", None)
-                        habitacion["hospedaje"].pop("responsable", None)
-                logger.info(f"🔧 FILTRADO - Datos de contacto eliminados de habitaciones también")
-            
-            availability_text = self._format_availability_simple(availability_data)
-            formatted.append(availability_text)
-        elif "availability_real" in context and "reserva_info" in context:
-            logger.info(f"🚨 CONTEXTO LIMPIO - Omitiendo disponibilidad porque hay información de reserva")
-        
-        # 5. PRECIOS ESPECÍFICOS (TIEMPO REAL DEL BACKEND)
-        if "pricing_real" in context:
-            formatted.append(f"💰 PRECIOS ESPECÍFICOS (BACKEND): {json.dumps(context['pricing_real'], ensure_ascii=False, indent=2)}")
-        
-        # 5.1. DISPONIBILIDAD MENSUAL (TIEMPO REAL DEL BACKEND)
-        if "monthly_availability" in context:
-            formatted.append(f"📅 DISPONIBILIDAD MENSUAL (BACKEND): {json.dumps(context['monthly_availability'], ensure_ascii=False, indent=2)}")
-        
-        # 6. SERVICIOS DEL HOSPEDAJE (TIEMPO REAL DEL BACKEND)
-        if "servicios_hospedaje" in context:
-            formatted.append(f"🏨 SERVICIOS DEL HOSPEDAJE (BACKEND): {json.dumps(context['servicios_hospedaje'], ensure_ascii=False, indent=2)}")
-        
-        # 7. SERVICIOS DE HABITACIONES (TIEMPO REAL DEL BACKEND)
-        if "servicios_habitaciones" in context:
-            formatted.append(f"🛏️ SERVICIOS POR HABITACIÓN (BACKEND): {json.dumps(context['servicios_habitaciones'], ensure_ascii=False, indent=2)}")
-        
-        # 8. CONTEXTO DE SESIÓN (CONVERSACIÓN PREVIA)
-        if "session_context" in context:
-            session_data = context["session_context"]
-            session_formatted = "💬 CONTEXTO DE LA CONVERSACIÓN:\n"
-            
-            if session_data.get("last_dates"):
-                session_formatted += f"• Fechas de consulta anterior: {json.dumps(session_data['last_dates'], ensure_ascii=False)}\n"
-            
-            if session_data.get("last_habitacion"):
-                session_formatted += f"• Habitación mencionada: {session_data['last_habitacion']}\n"
-            
-            if session_data.get("last_availability"):
-                session_formatted += f"• Disponibilidad confirmada previamente: Sí\n"
-            
-            # Agregar últimos 2 mensajes para contexto
-            if session_data.get("previous_messages"):
-                session_formatted += "• Mensajes recientes:\n"
-                for i, msg in enumerate(session_data["previous_messages"][:2]):
-                    session_formatted += f"  {i+1}. Usuario: '{msg['user']}' → Bot: '{msg['bot'][:100]}...'\n"
-            
-            formatted.append(session_formatted)
-        
-        # 9. BÚSQUEDA DE SERVICIO ESPECÍFICO (NUEVA FUNCIONALIDAD)
-        if "busqueda_servicio_especifico" in context:
-            busqueda_data = context["busqueda_servicio_especifico"]
-            busqueda_formatted = f"🔍 BÚSQUEDA DE SERVICIO ESPECÍFICO:\n"
-            busqueda_formatted += f"• Término buscado: '{busqueda_data['termino_buscado']}'\n"
-            busqueda_formatted += f"• Habitación consultada: {busqueda_data['habitacion_actual']['nombre']}\n"
-            busqueda_formatted += f"• Escenario: {busqueda_data['escenario']}\n"
-            
-            # Servicios encontrados en habitación actual
-            if busqueda_data['habitacion_actual']['servicios_encontrados']:
-                busqueda_formatted += f"• 🛏️ SERVICIOS EN HABITACIÓN ACTUAL: {json.dumps(busqueda_data['habitacion_actual']['servicios_encontrados'], ensure_ascii=False, indent=2)}\n"
-            
-            # Servicios encontrados en otras habitaciones
-            if busqueda_data['otras_habitaciones']:
-                busqueda_formatted += f"• 🏠 SERVICIOS EN OTRAS HABITACIONES:\n"
-                for habitacion in busqueda_data['otras_habitaciones']:
-                    busqueda_formatted += f"  - {habitacion['habitacion_nombre']}: {json.dumps(habitacion['servicios_encontrados'], ensure_ascii=False)}\n"
-            
-            # Servicios encontrados en hospedaje
-            if busqueda_data['hospedaje']['servicios_encontrados']:
-                busqueda_formatted += f"• 🏨 SERVICIOS EN HOSPEDAJE: {json.dumps(busqueda_data['hospedaje']['servicios_encontrados'], ensure_ascii=False, indent=2)}\n"
-            
-            formatted.append(busqueda_formatted)
-
-        # 10. INFORMACIÓN DE DOCUMENTOS PDF
-        if "pdf_info" in context:
-            formatted.append(f"📄 INFORMACIÓN DE DOCUMENTOS PDF: {context['pdf_info']}")
-        
-        # 11. CONSULTAS SIMILARES PREVIAS
-        if "similar_queries" in context:
-            formatted.append(f"🔍 CONSULTAS SIMILARES PREVIAS: {json.dumps(context['similar_queries'], ensure_ascii=False, indent=2)}")
-        
-        # 12. 🆕 INFORMACIÓN DE RESERVA (CRÍTICO PARA PROCESO_RESERVA)
-        if "reserva_info" in context:
-            formatted.append(f"🎯 RESERVA_INFO: {json.dumps(context['reserva_info'], ensure_ascii=False, indent=2)}")
-        
-        if "reserva_error" in context:
-            formatted.append(f"❌ RESERVA_ERROR: {context['reserva_error']}")
-        
-        # 13. RESUMEN DE FUENTES DISPONIBLES
-        if "sources_summary" in context:
-            sources = context["sources_summary"]
-            active_sources = [key.replace("has_", "") for key, value in sources.items() if value]
-            formatted.append(f"📊 FUENTES DISPONIBLES: {', '.join(active_sources)}")
-        
-        return "\n\n".join(formatted)
-    
-    def _format_availability_simple(self, availability_data: Dict[str, Any]) -> str:
-        """Formatea la información de disponibilidad de forma simple y clara"""
-        try:
-            hospedaje_disp = availability_data.get("hospedaje_disponibilidad", {})
-            
-            if not hospedaje_disp:
-                return "❌ NO HAY INFORMACIÓN DE DISPONIBILIDAD"
-            
-            disponible = hospedaje_disp.get("disponible", False)
-            fecha_inicio = hospedaje_disp.get("fecha_inicio")
-            fecha_fin = hospedaje_disp.get("fecha_fin")
-            habitaciones_count = hospedaje_disp.get("habitaciones_disponibles", 0)
-            detalle_habitaciones = hospedaje_disp.get("detalle_habitaciones", [])
-            
-            if not disponible:
-                motivo = hospedaje_disp.get("motivo", "No especificado")
-                return f"❌ NO HAY DISPONIBILIDAD para {fecha_inicio} al {fecha_fin}\nMotivo: {motivo}"
-            
-            # Formatear fechas en formato legible
-            fecha_texto = ""
-            if fecha_inicio == fecha_fin:
-                fecha_texto = f"para el {self._format_date_readable(fecha_inicio)}"
-            else:
-                fecha_texto = f"del {self._format_date_readable(fecha_inicio)} al {self._format_date_readable(fecha_fin)}"
-            
-            # Construir respuesta positiva
-            result = f"✅ DISPONIBILIDAD CONFIRMADA {fecha_texto}\n"
-            result += f"• {habitaciones_count} habitación(es) disponible(s)\n"
-            
-            # Agregar detalles de habitaciones disponibles
-            if detalle_habitaciones:
-                result += "\nHABITACIONES DISPONIBLES:\n"
-                for i, hab in enumerate(detalle_habitaciones, 1):
-                    nombre = hab.get("nombre", "Habitación sin nombre")
-                    descripcion = hab.get("descripcionCorta", "")
-                    capacidad = hab.get("capacidad", "")
-                    
-                    result += f"{i}. {nombre}"
-                    if capacidad:
-                        result += f" (capacidad: {capacidad} personas)"
-                    if descripcion:
-                        # Resumir descripción si es muy larga
-                        desc_short = descripcion[:100] + "..." if len(descripcion) > 100 else descripcion
-                        result += f"\n   • {desc_short}"
-                    result += "\n"
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error formateando disponibilidad: {e}")
-            return "❌ ERROR AL PROCESAR INFORMACIÓN DE DISPONIBILIDAD"
-    
-    def _format_date_readable(self, date_str: str) -> str:
-        """Convierte fecha YYYY-MM-DD a formato legible DD/MM/YYYY"""
-        try:
-            if not date_str:
-                return "fecha no especificada"
-            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
-            return date_obj.strftime("%d/%m/%Y")
-        except:
-            return date_str
-    
-    def _format_habitaciones_simple(self, habitaciones: List[Dict[str, Any]]) -> str:
-        """Formatea la información de habitaciones de forma simple"""
-        try:
-            if not habitaciones:
-                return "❌ NO HAY HABITACIONES REGISTRADAS"
-            
-            result = f"🏨 HABITACIONES DEL HOSPEDAJE ({len(habitaciones)} habitación(es)):\n"
-            
-            for i, hab in enumerate(habitaciones, 1):
-                nombre = hab.get("nombre", f"Habitación {i}")
-                descripcion = hab.get("descripcionCorta", "")
-                capacidad = hab.get("capacidad", "")
-                precio_base = hab.get("precioBase", "")
-                
-                result += f"\n{i}. {nombre}"
-                if capacidad:
-                    result += f" (capacidad: {capacidad} personas)"
-                if precio_base:
-                    # Formatear precio base
-                    try:
-                        precio_num = float(precio_base)
-                        from ..services.backend_service import formatear_precio_argentino
-                        precio_formateado = formatear_precio_argentino(precio_num)
-                        result += f" - Precio base: {precio_formateado},00"
-                    except:
-                        result += f" - Precio base: {precio_base}"
-                
-                if descripcion:
-                    # Resumir descripción
-                    desc_short = descripcion[:150] + "..." if len(descripcion) > 150 else descripcion
-                    result += f"\n   • {desc_short}"
-                result += "\n"
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error formateando habitaciones: {e}")
-            return "❌ ERROR AL PROCESAR INFORMACIÓN DE HABITACIONES"
+    def _format_context(self, context: Dict[str, Any], query_type: str = "general") -> str:
+        """Formatea el contexto para el prompt combinando todas las fuentes (con presupuesto de tokens)"""
+        return context_serializer.serialize(context, query_type)
     
     async def _save_message(
         self, 
@@ -1286,38 +938,75 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
         user_id: str, 
         conversation_id: str, 
         message: str, 
-        role: str
+        role: str,
+        query_type: Optional[str] = None,
+        availability: Optional[Dict[str, Any]] = None
     ):
-        """Guarda un mensaje en el historial"""
+        """Guarda un mensaje en el historial junto con sus entidades extraídas
+        (en las respuestas, el resultado de la consulta de disponibilidad del turno si la hubo)"""
         try:
             current_time = datetime.now()
+            entities = json.dumps(self._message_entities(message, role, query_type, availability))
             
             if role == "user":
                 # Insertar mensaje del usuario
                 query = """
                 INSERT INTO chat_history 
-                (hospedaje_id, user_id, session_id, user_message, bot_response, sources_used, response_time, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                (hospedaje_id, user_id, session_id, user_message, bot_response, sources_used, response_time, entities, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
                 """
-                params = [hospedaje_id, user_id, conversation_id, message, '', '[]', 0, current_time]
+                params = [hospedaje_id, user_id, conversation_id, message, '', '[]', 0, entities, current_time]
                 await execute_vector_query(query, params)
-                logger.info(f"💾 DEBUG - Mensaje de usuario guardado correctamente")
+                log_debug(logger, "chat", "💾 DEBUG - Mensaje de usuario guardado correctamente")
             else:
                 # Insertar respuesta del bot
                 query = """
                 INSERT INTO chat_history 
-                (hospedaje_id, user_id, session_id, user_message, bot_response, sources_used, response_time, created_at)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                (hospedaje_id, user_id, session_id, user_message, bot_response, sources_used, response_time, entities, created_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
                 """
-                params = [hospedaje_id, user_id, conversation_id, '', message, '[]', 0, current_time]
+                params = [hospedaje_id, user_id, conversation_id, '', message, '[]', 0, entities, current_time]
                 await execute_vector_query(query, params)
-                logger.info(f"💾 DEBUG - Respuesta del bot guardada correctamente")
+                log_debug(logger, "chat", "💾 DEBUG - Respuesta del bot guardada correctamente")
                 
         except Exception as e:
-            logger.error(f"Error guardando mensaje: {e}")
+            logger.error("Error guardando mensaje: %s", e)
             # No propagar el error para que el chatbot siga funcionando
             pass
     
+    def _message_entities(
+        self,
+        message: str,
+        role: str,
+        query_type: Optional[str] = None,
+        availability: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Entidades de un mensaje (se guardan con la fila para no re-analizar el historial en cada turno)"""
+        entities: Dict[str, Any] = {}
+        if role == "user":
+            params = self.date_extractor.get_query_params(message or "")
+            if params.get('has_dates'):
+                entities["dates"] = {
+                    "check_in": params.get('check_in'),
+                    "check_out": params.get('check_out'),
+                    "single_date": params.get('single_date'),
+                    "has_dates": True
+                }
+            if params.get('guests'):
+                entities["guests"] = params['guests']
+            return entities
+
+        if query_type:
+            entities["query_type"] = query_type
+        # Solo se guarda disponibilidad si en el turno se consultó (True o False, nunca deducida del texto)
+        if availability and "disponible" in availability:
+            entities["availability"] = bool(availability["disponible"])
+        if entities.get("availability") and message:
+            habitacion_match = HABITACION_RE.search(message)
+            if habitacion_match:
+                entities["habitacion"] = habitacion_match.group()
+        return entities
+
     async def _get_similar_history(
         self, 
         hospedaje_id: str, 
@@ -1360,7 +1049,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             ]
             
         except Exception as e:
-            logger.error(f"Error obteniendo historial similar: {e}")
+            logger.error("Error obteniendo historial similar: %s", e)
             return []
     
     async def get_user_history(
@@ -1423,7 +1112,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             )
             
         except Exception as e:
-            logger.error(f"Error obteniendo historial: {e}")
+            logger.error("Error obteniendo historial: %s", e)
             return ChatHistoryResponse(
                 messages=[],
                 total=0,
@@ -1457,14 +1146,14 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             ]
             
         except Exception as e:
-            logger.error(f"Error obteniendo historial completo: {e}")
+            logger.error("Error obteniendo historial completo: %s", e)
             return []
     
-    async def retrain_hospedaje(self, hospedaje_id: str) -> bool:
-        """Re-entrena el chatbot de un hospedaje"""
+    async def retrain_hospedaje(self, hospedaje_id: str, progress=None) -> bool:
+        """Re-entrena el chatbot de un hospedaje (lo ejecutan los workers de ingesta)"""
         try:
             # Re-procesar documentos PDF
-            success = await self.knowledge_service.retrain_hospedaje_knowledge(hospedaje_id)
+            success = await self.knowledge_service.retrain_hospedaje_knowledge(hospedaje_id, progress=progress)
             
             if success:
                 # Marcar como entrenado en el backend
@@ -1473,7 +1162,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             return success
             
         except Exception as e:
-            logger.error(f"Error re-entrenando hospedaje: {e}")
+            logger.error("Error re-entrenando hospedaje: %s", e)
             return False
 
     async def _add_availability_context(
@@ -1484,10 +1173,10 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
         habitaciones: List[Any]
     ):
         """Agrega información de disponibilidad real del backend"""
-        logger.info(f"🆕 CONSULTAR BACKEND - Iniciando consulta fresca de disponibilidad...")
-        logger.info(f"🆕 CONSULTAR BACKEND - hospedaje_id: {hospedaje_id}")
-        logger.info(f"🆕 CONSULTAR BACKEND - query_params: {query_params}")
-        logger.info(f"🆕 CONSULTAR BACKEND - habitaciones count: {len(habitaciones) if habitaciones else 0}")
+        log_debug(logger, "context", "🆕 CONSULTAR BACKEND - Iniciando consulta fresca de disponibilidad...")
+        log_debug(logger, "context", "🆕 CONSULTAR BACKEND - hospedaje_id: %s", hospedaje_id)
+        log_debug(logger, "context", "🆕 CONSULTAR BACKEND - query_params: %s", query_params)
+        log_debug(logger, "context", "🆕 CONSULTAR BACKEND - habitaciones count: %s", len(habitaciones) if habitaciones else 0)
         try:
             availability_info = {}
             
@@ -1498,18 +1187,18 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             
                         # Si tenemos rango de fechas, consultar disponibilidad del hospedaje
             if check_in and check_out:
-                logger.info(f"🔍 DEBUG - Consultando disponibilidad para rango: {check_in} - {check_out}")
+                log_debug(logger, "context", "🔍 DEBUG - Consultando disponibilidad para rango: %s - %s", check_in, check_out)
                 hospedaje_availability = await backend_service.check_disponibilidad_hospedaje(
                     hospedaje_id, check_in, check_out
                 )
-                logger.info(f"🆕 CONSULTAR BACKEND - Resultado disponibilidad: {hospedaje_availability}")
+                log_debug(logger, "context", "🆕 CONSULTAR BACKEND - Resultado disponibilidad: %s", hospedaje_availability)
                 if hospedaje_availability:
                     availability_info["hospedaje_disponibilidad"] = hospedaje_availability.dict()
-                    logger.info(f"🆕 CONSULTAR BACKEND - Disponibilidad fresca agregada al contexto")
+                    log_debug(logger, "context", "🆕 CONSULTAR BACKEND - Disponibilidad fresca agregada al contexto")
 
             # Si solo tenemos una fecha, consultar disponibilidad general
             elif single_date:
-                logger.info(f"🔍 DEBUG - Consultando disponibilidad para fecha única: {single_date}")
+                log_debug(logger, "context", "🔍 DEBUG - Consultando disponibilidad para fecha única: %s", single_date)
                 # Para una sola fecha, consultar como check-in y siguiente día como check-out
                 next_day = datetime.strptime(single_date, "%Y-%m-%d") + timedelta(days=1)
                 check_out_single = next_day.strftime("%Y-%m-%d")
@@ -1517,16 +1206,16 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 hospedaje_availability = await backend_service.check_disponibilidad_hospedaje(
                     hospedaje_id, single_date, check_out_single
                 )
-                logger.info(f"🆕 CONSULTAR BACKEND - Resultado disponibilidad single: {hospedaje_availability}")
+                log_debug(logger, "context", "🆕 CONSULTAR BACKEND - Resultado disponibilidad single: %s", hospedaje_availability)
                 if hospedaje_availability:
                     availability_info["hospedaje_disponibilidad"] = hospedaje_availability.dict()
-                    logger.info(f"🆕 CONSULTAR BACKEND - Disponibilidad single fresca agregada al contexto")
+                    log_debug(logger, "context", "🆕 CONSULTAR BACKEND - Disponibilidad single fresca agregada al contexto")
             
             if availability_info:
                 context["availability_real"] = availability_info
                 
         except Exception as e:
-            logger.error(f"Error obteniendo disponibilidad: {e}")
+            logger.error("Error obteniendo disponibilidad: %s", e)
 
     async def _add_pricing_context(
         self, 
@@ -1545,12 +1234,12 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             has_dates = query_params.get('has_dates', False)
             inferred_from_session = query_params.get('inferred_from_session', False)
             
-            logger.info(f"🔧 DEBUG PRECIOS - Iniciando consulta de precios")
-            logger.info(f"🔧 DEBUG PRECIOS - has_dates: {has_dates}")
-            logger.info(f"🔧 DEBUG PRECIOS - check_in: {check_in}")
-            logger.info(f"🔧 DEBUG PRECIOS - check_out: {check_out}")
-            logger.info(f"🔧 DEBUG PRECIOS - single_date: {single_date}")
-            logger.info(f"🔧 DEBUG PRECIOS - inferred_from_session: {inferred_from_session}")
+            log_debug(logger, "context", "🔧 DEBUG PRECIOS - Iniciando consulta de precios")
+            log_debug(logger, "context", "🔧 DEBUG PRECIOS - has_dates: %s", has_dates)
+            log_debug(logger, "context", "🔧 DEBUG PRECIOS - check_in: %s", check_in)
+            log_debug(logger, "context", "🔧 DEBUG PRECIOS - check_out: %s", check_out)
+            log_debug(logger, "context", "🔧 DEBUG PRECIOS - single_date: %s", single_date)
+            log_debug(logger, "context", "🔧 DEBUG PRECIOS - inferred_from_session: %s", inferred_from_session)
             
             # 🔧 FILTRAR HABITACIONES: Solo obtener precios de habitaciones disponibles
             habitaciones_para_precios = habitaciones
@@ -1569,9 +1258,9 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                         hab for hab in habitaciones 
                         if hab.get("id") in habitaciones_disponibles_ids
                     ]
-                    logger.info(f"🔧 DEBUG PRECIOS - Filtrando por disponibilidad: {len(habitaciones_para_precios)} de {len(habitaciones)} habitaciones")
+                    log_debug(logger, "context", "🔧 DEBUG PRECIOS - Filtrando por disponibilidad: %s de %s habitaciones", len(habitaciones_para_precios), len(habitaciones))
                     for hab in habitaciones_para_precios:
-                        logger.info(f"🔧 DEBUG PRECIOS - Habitación filtrada: {hab.get('nombre')} (ID: {hab.get('id')})")
+                        log_debug(logger, "context", "🔧 DEBUG PRECIOS - Habitación filtrada: %s (ID: %s)", hab.get('nombre'), hab.get('id'))
             
             # Consultar precios para cada habitación disponible
             for hab in habitaciones_para_precios:
@@ -1586,18 +1275,18 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                     "precios": {}
                 }
                 
-                logger.info(f"🔧 DEBUG PRECIOS - Consultando precios para habitación: {hab_nombre} (ID: {hab_id})")
+                log_debug(logger, "context", "🔧 DEBUG PRECIOS - Consultando precios para habitación: %s (ID: %s)", hab_nombre, hab_id)
                 
                 # LÓGICA PRINCIPAL: SIEMPRE consultar endpoints reales
                 if check_in and check_out:
                     # Rango de fechas
-                    logger.info(f"🔧 DEBUG PRECIOS - Consultando rango: {check_in} a {check_out}")
+                    log_debug(logger, "context", "🔧 DEBUG PRECIOS - Consultando rango: %s a %s", check_in, check_out)
                     precio_rango = await backend_service.get_precios_habitacion(
                         hab_id, check_in, check_out
                     )
                     if precio_rango:
                         pricing_info[hab_id]["precios"]["rango"] = precio_rango.dict()
-                        logger.info(f"✅ DEBUG PRECIOS - Rango obtenido para {hab_nombre}")
+                        log_debug(logger, "context", "✅ DEBUG PRECIOS - Rango obtenido para %s", hab_nombre)
                 
                 elif single_date:
                     # Fecha única: convertir a rango de 1 noche (fecha → fecha+1)
@@ -1607,15 +1296,15 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                         fecha_fin = fecha_inicio + timedelta(days=1)
                         fecha_fin_str = fecha_fin.strftime('%Y-%m-%d')
                         
-                        logger.info(f"🔧 DEBUG PRECIOS - Fecha única convertida a rango: {single_date} a {fecha_fin_str}")
+                        log_debug(logger, "context", "🔧 DEBUG PRECIOS - Fecha única convertida a rango: %s a %s", single_date, fecha_fin_str)
                         precio_especifico = await backend_service.get_precios_habitacion(
                             hab_id, single_date, fecha_fin_str
                         )
                         if precio_especifico:
                             pricing_info[hab_id]["precios"]["fecha_especifica"] = precio_especifico.dict()
-                            logger.info(f"✅ DEBUG PRECIOS - Precio específico obtenido para {hab_nombre}")
+                            log_debug(logger, "context", "✅ DEBUG PRECIOS - Precio específico obtenido para %s", hab_nombre)
                     except Exception as e:
-                        logger.error(f"Error convirtiendo fecha única a rango: {e}")
+                        logger.error("Error convirtiendo fecha única a rango: %s", e)
                 
                 elif check_in:
                     # Solo check_in: tratar como fecha única
@@ -1625,21 +1314,21 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                         fecha_fin = fecha_inicio + timedelta(days=1)
                         fecha_fin_str = fecha_fin.strftime('%Y-%m-%d')
                         
-                        logger.info(f"🔧 DEBUG PRECIOS - Check-in único convertido a rango: {check_in} a {fecha_fin_str}")
+                        log_debug(logger, "context", "🔧 DEBUG PRECIOS - Check-in único convertido a rango: %s a %s", check_in, fecha_fin_str)
                         precio_checkin = await backend_service.get_precios_habitacion(
                             hab_id, check_in, fecha_fin_str
                         )
                         if precio_checkin:
                             pricing_info[hab_id]["precios"]["check_in"] = precio_checkin.dict()
-                            logger.info(f"✅ DEBUG PRECIOS - Precio check-in obtenido para {hab_nombre}")
+                            log_debug(logger, "context", "✅ DEBUG PRECIOS - Precio check-in obtenido para %s", hab_nombre)
                     except Exception as e:
-                        logger.error(f"Error convirtiendo check-in a rango: {e}")
+                        logger.error("Error convirtiendo check-in a rango: %s", e)
                 
                 else:
                     # NO hay fechas: usar precio base como último recurso
                     precio_base = hab.get("precioBase")
                     if precio_base:
-                        logger.info(f"🔧 DEBUG PRECIOS - Sin fechas, usando precio base: {precio_base}")
+                        log_debug(logger, "context", "🔧 DEBUG PRECIOS - Sin fechas, usando precio base: %s", precio_base)
                         try:
                             precio_base_float = float(precio_base)
                             from ..services.backend_service import formatear_precio_argentino
@@ -1649,16 +1338,16 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                                 "precio_formateado": precio_formateado,
                                 "tipo": "precio_base_sin_fechas"
                             }
-                            logger.info(f"✅ DEBUG PRECIOS - Precio base formateado para {hab_nombre}: {precio_formateado}")
+                            log_debug(logger, "context", "✅ DEBUG PRECIOS - Precio base formateado para %s: %s", hab_nombre, precio_formateado)
                         except (ValueError, TypeError) as e:
-                            logger.error(f"Error formateando precio base: {e}")
+                            logger.error("Error formateando precio base: %s", e)
             
             if pricing_info:
                 context["pricing_real"] = pricing_info
-                logger.info(f"🔧 DEBUG PRECIOS - Contexto de precios agregado: {len(pricing_info)} habitaciones")
+                log_debug(logger, "context", "🔧 DEBUG PRECIOS - Contexto de precios agregado: %s habitaciones", len(pricing_info))
                 
         except Exception as e:
-            logger.error(f"Error obteniendo precios: {e}")
+            logger.error("Error obteniendo precios: %s", e)
 
     async def _add_monthly_availability_context(
         self, 
@@ -1696,7 +1385,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 context["monthly_availability"] = monthly_info
                 
         except Exception as e:
-            logger.error(f"Error obteniendo disponibilidad mensual: {e}")
+            logger.error("Error obteniendo disponibilidad mensual: %s", e)
 
     def _create_sources_summary(self, context: Dict[str, Any]) -> Dict[str, bool]:
         """Crea un resumen de qué fuentes están disponibles"""
@@ -1777,7 +1466,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 # Si hay historial del frontend, asumir que ya se consultó disponibilidad
                 messages_count = frontend_conversation.get("messages_count", 0)
                 if messages_count > 0:
-                    logger.info(f"🔄 REUTILIZAR - Hay historial del frontend ({messages_count} mensajes), reutilizando disponibilidad")
+                    logger.info("🔄 REUTILIZAR - Hay historial del frontend (%s mensajes), reutilizando disponibilidad", messages_count)
                     return True
             
             # 2. Verificar en contexto de sesión 
@@ -1794,24 +1483,24 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                     
                     # Mismo rango de fechas
                     if (check_in_actual == last_check_in and check_out_actual == last_check_out):
-                        logger.info(f"🔄 REUTILIZAR - Mismas fechas de rango: {check_in_actual} - {check_out_actual}")
+                        logger.info("🔄 REUTILIZAR - Mismas fechas de rango: %s - %s", check_in_actual, check_out_actual)
                         return True
                     
                     # Misma fecha única
                     if (single_date_actual == last_single_date):
-                        logger.info(f"🔄 REUTILIZAR - Misma fecha única: {single_date_actual}")
+                        logger.info("🔄 REUTILIZAR - Misma fecha única: %s", single_date_actual)
                         return True
             
             # 3. Verificar si query_params indica que viene del frontend (más confiable)
             if query_params.get('inferred_from_frontend') or query_params.get('previous_availability'):
-                logger.info(f"🔄 REUTILIZAR - Fechas inferidas del frontend o disponibilidad previa confirmada")
+                logger.info("🔄 REUTILIZAR - Fechas inferidas del frontend o disponibilidad previa confirmada")
                 return True
             
-            logger.info(f"🆕 CONSULTAR - No hay disponibilidad previa para estas fechas")
+            logger.info("🆕 CONSULTAR - No hay disponibilidad previa para estas fechas")
             return False
             
         except Exception as e:
-            logger.error(f"Error verificando disponibilidad previa: {e}")
+            logger.error("Error verificando disponibilidad previa: %s", e)
             return False
     
     def _usar_disponibilidad_previa(self, context: Dict[str, Any]):
@@ -1858,10 +1547,10 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 availability_info["hospedaje_disponibilidad"]["fecha_fin"] = fecha_fin.strftime('%Y-%m-%d')
             
             context["availability_real"] = availability_info
-            logger.info(f"🔄 REUTILIZADO - Disponibilidad previa aplicada al contexto")
+            logger.info("🔄 REUTILIZADO - Disponibilidad previa aplicada al contexto")
             
         except Exception as e:
-            logger.error(f"Error usando disponibilidad previa: {e}") 
+            logger.error("Error usando disponibilidad previa: %s", e) 
 
     async def _get_session_context(
         self, 
@@ -1871,11 +1560,11 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
     ) -> Optional[Dict[str, Any]]:
         """Obtiene contexto de mensajes anteriores en la misma conversación (usando token/conversation_id)"""
         try:
-            logger.info(f"🔍 DEBUG SESSION - Buscando contexto para conversation_id: {conversation_id[:20]}...")
+            log_debug(logger, "chat", "🔍 DEBUG SESSION - Buscando contexto para conversation_id: %s...", conversation_id[:20])
             
             # Buscar los últimos 5 mensajes de la conversación (usando conversation_id como session_id)
             query = """
-            SELECT user_message, bot_response, created_at
+            SELECT user_message, bot_response, created_at, entities
             FROM chat_history 
             WHERE hospedaje_id = %s AND user_id = %s AND session_id = %s
             ORDER BY created_at DESC
@@ -1885,10 +1574,10 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             results = await execute_vector_query(query, [hospedaje_id, user_id, conversation_id])
             
             if not results:
-                logger.info(f"🔍 DEBUG SESSION - No se encontraron mensajes previos")
+                log_debug(logger, "chat", "🔍 DEBUG SESSION - No se encontraron mensajes previos")
                 return None
             
-            logger.info(f"🔍 DEBUG SESSION - Encontrados {len(results)} mensajes previos")
+            log_debug(logger, "chat", "🔍 DEBUG SESSION - Encontrados %s mensajes previos", len(results))
             
             session_context = {
                 "previous_messages": [],
@@ -1920,24 +1609,25 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                     # Agregar datos de reserva pendiente al contexto
                     if session_data.get("last_reserva_habitacion"):
                         session_context["last_reserva_habitacion"] = session_data["last_reserva_habitacion"]
-                        logger.info(f"🎯 MEMORIA RECUPERADA - Habitación: {session_data['last_reserva_habitacion']}")
+                        logger.info("🎯 MEMORIA RECUPERADA - Habitación: %s", session_data['last_reserva_habitacion'])
                     
                     if session_data.get("last_reserva_fechas"):
                         session_context["last_reserva_fechas"] = session_data["last_reserva_fechas"]
-                        logger.info(f"🎯 MEMORIA RECUPERADA - Fechas: {session_data['last_reserva_fechas']}")
+                        logger.info("🎯 MEMORIA RECUPERADA - Fechas: %s", session_data['last_reserva_fechas'])
                     
                     if session_data.get("last_guests"):
                         session_context["last_guests"] = session_data["last_guests"]
-                        logger.info(f"🎯 MEMORIA RECUPERADA - Huéspedes: {session_data['last_guests']}")
+                        logger.info("🎯 MEMORIA RECUPERADA - Huéspedes: %s", session_data['last_guests'])
                         
             except Exception as e:
-                logger.warning(f"Error recuperando contexto de reserva: {e}")
+                logger.warning("Error recuperando contexto de reserva: %s", e)
             
-            # Procesar mensajes para extraer información útil
+            # Procesar mensajes con las entidades guardadas (solo las filas anteriores a la columna se analizan)
             for row in results:
                 user_message = row[0]
                 bot_response = row[1]
                 created_at = row[2]
+                entities = self._row_entities(user_message, bot_response, row[3])
                 
                 if user_message:
                     session_context["previous_messages"].append({
@@ -1946,38 +1636,34 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                         "timestamp": created_at.isoformat() if created_at else ""
                     })
                     
-                    # Intentar extraer fechas del mensaje del usuario
-                    if not session_context["last_dates"]:
-                        message_params = self.date_extractor.get_query_params(user_message)
-                        if message_params.get('has_dates'):
-                            session_context["last_dates"] = {
-                                "check_in": message_params.get('check_in'),
-                                "check_out": message_params.get('check_out'),
-                                "single_date": message_params.get('single_date'),
-                                "has_dates": True
-                            }
-                            logger.info(f"🔍 DEBUG SESSION - Fechas extraídas del mensaje: {user_message}")
-                    
-                    # Buscar disponibilidad confirmada
-                    if not session_context["last_availability"] and bot_response:
-                        if any(word in bot_response.lower() for word in ["disponible", "excelente", "tenemos"]):
-                            session_context["last_availability"] = True
-                            
-                            # Intentar extraer nombre de habitación
-                            import re
-                            habitacion_match = re.search(r'Suite\s+\w+|habitación\s+\w+', bot_response, re.IGNORECASE)
-                            if habitacion_match:
-                                session_context["last_habitacion"] = habitacion_match.group()
-                                logger.info(f"🔍 DEBUG SESSION - Habitación extraída: {session_context['last_habitacion']}")
-            
-            logger.info(f"🔍 DEBUG SESSION - Contexto final: {session_context}")
+                if not session_context["last_dates"] and entities.get("dates"):
+                    session_context["last_dates"] = entities["dates"]
+                    log_debug(logger, "chat", "🔍 DEBUG SESSION - Fechas del mensaje: %s", user_message)
+                
+                # Resultado de la consulta de disponibilidad más reciente (False si no había lugar)
+                if session_context["last_availability"] is None and "availability" in entities:
+                    session_context["last_availability"] = bool(entities["availability"])
+                    if entities["availability"] and entities.get("habitacion"):
+                        session_context["last_habitacion"] = entities["habitacion"]
+                        log_debug(logger, "chat", "🔍 DEBUG SESSION - Habitación extraída: %s", session_context['last_habitacion'])
+            
+            log_debug(logger, "chat", "🔍 DEBUG SESSION - Contexto final: %s", session_context)
             return session_context
             
         except Exception as e:
-            logger.error(f"Error obteniendo contexto de sesión: {e}")
+            logger.error("Error obteniendo contexto de sesión: %s", e)
             return None
 
 
+    def _row_entities(self, user_message: Optional[str], bot_response: Optional[str], stored: Any) -> Dict[str, Any]:
+        """Entidades de una fila del historial: las guardadas o, en filas anteriores a la columna, extraídas del texto"""
+        if stored is not None:
+            return json.loads(stored) if isinstance(stored, str) else stored
+        # La disponibilidad no se deduce del texto de la respuesta: sin entidades guardadas queda sin dato
+        if user_message:
+            return self._message_entities(user_message, "user")
+        return {}
+
     def _extraer_habitacion_del_mensaje(self, message: str, habitaciones: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Extrae la habitación específica mencionada en el mensaje"""
         try:
@@ -1987,7 +1673,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             for habitacion in habitaciones:
                 nombre = habitacion.get("nombre", "").lower()
                 if nombre in message_lower:
-                    logger.info(f"🎯 DEBUG HABITACIÓN - Encontrada por nombre: {nombre}")
+                    log_debug(logger, "rooms", "🎯 DEBUG HABITACIÓN - Encontrada por nombre: %s", nombre)
                     return habitacion
             
             # Buscar por palabras clave (ej: "suite taina")
@@ -1997,14 +1683,14 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 
                 # Si todas las palabras de la habitación están en el mensaje
                 if all(palabra in message_lower for palabra in palabras_habitacion if len(palabra) > 2):
-                    logger.info(f"🎯 DEBUG HABITACIÓN - Encontrada por palabras clave: {nombre_completo}")
+                    log_debug(logger, "rooms", "🎯 DEBUG HABITACIÓN - Encontrada por palabras clave: %s", nombre_completo)
                     return habitacion
             
-            logger.info(f"🎯 DEBUG HABITACIÓN - No se encontró habitación específica en el mensaje")
+            log_debug(logger, "rooms", "🎯 DEBUG HABITACIÓN - No se encontró habitación específica en el mensaje")
             return None
             
         except Exception as e:
-            logger.error(f"Error extrayendo habitación del mensaje: {e}")
+            logger.error("Error extrayendo habitación del mensaje: %s", e)
             return None
     
 
@@ -2018,7 +1704,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
     ):
         """Agrega información de servicios según el tipo de consulta"""
         try:
-            logger.info(f"🔧 DEBUG - Tipo de consulta: {query_type}")
+            log_debug(logger, "context", "🔧 DEBUG - Tipo de consulta: %s", query_type)
             
             # Para consultas de servicios específicos - NUEVA FUNCIONALIDAD
             if query_type == "servicio_especifico":
@@ -2042,14 +1728,14 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             
             # Para consultas de servicios del hospedaje
             elif query_type == "hospedaje_servicios":
-                logger.info(f"🔧 DEBUG - Obteniendo servicios del hospedaje")
+                log_debug(logger, "context", "🔧 DEBUG - Obteniendo servicios del hospedaje")
                 servicios_hospedaje = await backend_service.get_servicios_hospedaje(hospedaje_id)
                 context["servicios_hospedaje"] = [serv.dict() for serv in servicios_hospedaje]
-                logger.info(f"🔧 DEBUG - Servicios del hospedaje: {len(servicios_hospedaje)} encontrados")
+                log_debug(logger, "context", "🔧 DEBUG - Servicios del hospedaje: %s encontrados", len(servicios_hospedaje))
             
             # Para consultas de servicios de habitaciones
             elif query_type == "habitacion_servicios":
-                logger.info(f"🔧 DEBUG - Obteniendo servicios de habitaciones")
+                log_debug(logger, "context", "🔧 DEBUG - Obteniendo servicios de habitaciones")
                 habitaciones = context.get("habitaciones", [])
                 
                 if habitaciones:
@@ -2060,7 +1746,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                         # Consultar servicios solo para la habitación específica
                         hab_id = habitacion_especifica.get("id")
                         hab_nombre = habitacion_especifica.get("nombre", hab_id)
-                        logger.info(f"🔧 DEBUG - Habitación específica identificada: {hab_nombre} (ID: {hab_id})")
+                        log_debug(logger, "context", "🔧 DEBUG - Habitación específica identificada: %s (ID: %s)", hab_nombre, hab_id)
                         
                         servicios_hab = await backend_service.get_servicios_habitacion(hab_id)
                         context["servicios_habitaciones"] = {
@@ -2070,32 +1756,32 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                             "id": hab_id,
                             "nombre": hab_nombre
                         }
-                        logger.info(f"🔧 DEBUG - Servicios habitación específica {hab_nombre}: {len(servicios_hab)} encontrados")
+                        log_debug(logger, "context", "🔧 DEBUG - Servicios habitación específica %s: %s encontrados", hab_nombre, len(servicios_hab))
                     else:
                         # Si no hay habitación específica, obtener para todas
-                        logger.info(f"🔧 DEBUG - No hay habitación específica, obteniendo servicios para todas")
+                        log_debug(logger, "context", "🔧 DEBUG - No hay habitación específica, obteniendo servicios para todas")
                         context["servicios_habitaciones"] = {}
                         for hab in habitaciones:
                             hab_id = hab.get("id")
                             if hab_id:
                                 servicios_hab = await backend_service.get_servicios_habitacion(hab_id)
                                 context["servicios_habitaciones"][hab_id] = [serv.dict() for serv in servicios_hab]
-                                logger.info(f"🔧 DEBUG - Servicios habitación {hab.get('nombre', hab_id)}: {len(servicios_hab)} encontrados")
+                                log_debug(logger, "context", "🔧 DEBUG - Servicios habitación %s: %s encontrados", hab.get('nombre', hab_id), len(servicios_hab))
             
             # 🔧 CORREGIDO: Para consultas de disponibilidad y PRECIOS, NO incluir servicios
             elif query_type in ["disponibilidad", "precios"]:
-                logger.info(f"🔧 DEBUG - Consulta de {query_type}: NO agregando servicios para ser directo y conciso")
+                log_debug(logger, "context", "🔧 DEBUG - Consulta de %s: NO agregando servicios para ser directo y conciso", query_type)
                 # No agregar servicios para mantener respuestas directas y sin información no solicitada
                 pass
             
             # Para otros tipos de consulta (general, etc.), incluir servicios básicos del hospedaje
             else:
-                logger.info(f"🔧 DEBUG - Consulta general: agregando servicios básicos del hospedaje")
+                log_debug(logger, "context", "🔧 DEBUG - Consulta general: agregando servicios básicos del hospedaje")
                 servicios_hospedaje = await backend_service.get_servicios_hospedaje(hospedaje_id)
                 context["servicios_hospedaje"] = [serv.dict() for serv in servicios_hospedaje]
                 
         except Exception as e:
-            logger.error(f"Error obteniendo servicios contextuales: {e}")
+            logger.error("Error obteniendo servicios contextuales: %s", e)
 
     async def _handle_servicio_especifico_context(
         self,
@@ -2108,10 +1794,10 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             # Extraer término de búsqueda del mensaje
             termino_busqueda = self._extraer_termino_servicio(message)
             if not termino_busqueda:
-                logger.warning(f"No se pudo extraer término de búsqueda del mensaje: {message}")
+                logger.warning("No se pudo extraer término de búsqueda del mensaje: %s", message)
                 return
             
-            logger.info(f"🔍 DEBUG - Término de búsqueda extraído: '{termino_busqueda}'")
+            log_debug(logger, "context", "🔍 DEBUG - Término de búsqueda extraído: '%s'", termino_busqueda)
             
             # Identificar habitación del contexto
             habitacion_especifica = self._identificar_habitacion_del_contexto(context)
@@ -2120,7 +1806,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 habitaciones = context.get("habitaciones", [])
                 if habitaciones:
                     habitacion_especifica = habitaciones[0]
-                    logger.info(f"🔍 DEBUG - Usando primera habitación disponible: {habitacion_especifica.get('nombre')}")
+                    log_debug(logger, "context", "🔍 DEBUG - Usando primera habitación disponible: %s", habitacion_especifica.get('nombre'))
                 else:
                     logger.warning("No se encontró habitación para la búsqueda")
                     return
@@ -2128,27 +1814,27 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             habitacion_id = habitacion_especifica.get("id")
             habitacion_nombre = habitacion_especifica.get("nombre", "")
             
-            logger.info(f"🔍 DEBUG - Buscando en habitación: {habitacion_nombre} ({habitacion_id})")
+            log_debug(logger, "context", "🔍 DEBUG - Buscando en habitación: %s (%s)", habitacion_nombre, habitacion_id)
             
             # BÚSQUEDA MÚLTIPLE - Habitación actual, otras habitaciones y hospedaje
             # 1. Buscar en habitación actual
             servicios_habitacion_actual = await backend_service.buscar_servicio_habitacion(habitacion_id, termino_busqueda)
-            logger.info(f"🔍 DEBUG - Servicios encontrados en habitación actual: {len(servicios_habitacion_actual)}")
+            log_debug(logger, "context", "🔍 DEBUG - Servicios encontrados en habitación actual: %s", len(servicios_habitacion_actual))
             
             # 2. Buscar en otras habitaciones del hospedaje (si no se encontró en la actual)
             servicios_otras_habitaciones = []
             if not servicios_habitacion_actual:
-                logger.info(f"🔍 DEBUG - No encontrado en habitación actual, buscando en otras habitaciones...")
+                log_debug(logger, "context", "🔍 DEBUG - No encontrado en habitación actual, buscando en otras habitaciones...")
                 servicios_otras_habitaciones = await self._buscar_en_otras_habitaciones(
                     context, hospedaje_id, habitacion_id, termino_busqueda
                 )
-                logger.info(f"🔍 DEBUG - Servicios encontrados en otras habitaciones: {len(servicios_otras_habitaciones)}")
+                log_debug(logger, "context", "🔍 DEBUG - Servicios encontrados en otras habitaciones: %s", len(servicios_otras_habitaciones))
             
             # 3. Buscar en hospedaje (solo si no se encontró en habitaciones)
             servicios_hospedaje = []
             if not servicios_habitacion_actual and not servicios_otras_habitaciones:
                 servicios_hospedaje = await backend_service.buscar_servicio_hospedaje(hospedaje_id, termino_busqueda)
-                logger.info(f"🔍 DEBUG - Servicios encontrados en hospedaje: {len(servicios_hospedaje)}")
+                log_debug(logger, "context", "🔍 DEBUG - Servicios encontrados en hospedaje: %s", len(servicios_hospedaje))
             
             # Estructurar contexto según los resultados
             context["busqueda_servicio_especifico"] = {
@@ -2167,10 +1853,10 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 )
             }
             
-            logger.info(f"🔍 DEBUG - Escenario determinado: {context['busqueda_servicio_especifico']['escenario']}")
+            log_debug(logger, "context", "🔍 DEBUG - Escenario determinado: %s", context['busqueda_servicio_especifico']['escenario'])
             
         except Exception as e:
-            logger.error(f"Error manejando búsqueda de servicio específico: {e}")
+            logger.error("Error manejando búsqueda de servicio específico: %s", e)
 
     def _extraer_termino_servicio(self, mensaje: str) -> Optional[str]:
         """Extrae el término del servicio a buscar del mensaje del usuario"""
@@ -2195,7 +1881,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             for servicio_principal, sinonimos in servicios_conocidos.items():
                 for sinonimo in sinonimos:
                     if sinonimo in mensaje_lower:
-                        logger.info(f"🔍 DEBUG - Coincidencia encontrada: '{sinonimo}' -> '{servicio_principal}'")
+                        log_debug(logger, "context", "🔍 DEBUG - Coincidencia encontrada: '%s' -> '%s'", sinonimo, servicio_principal)
                         return sinonimo  # Retornar el término específico encontrado
             
             # Si no encuentra coincidencias específicas, intentar extraer palabra clave genérica
@@ -2214,14 +1900,14 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 if match:
                     termino = match.group(1)
                     if len(termino) > 2:  # Evitar palabras muy cortas
-                        logger.info(f"🔍 DEBUG - Término genérico extraído: '{termino}'")
+                        log_debug(logger, "context", "🔍 DEBUG - Término genérico extraído: '%s'", termino)
                         return termino
             
-            logger.warning(f"No se pudo extraer término específico del mensaje: {mensaje}")
+            logger.warning("No se pudo extraer término específico del mensaje: %s", mensaje)
             return None
             
         except Exception as e:
-            logger.error(f"Error extrayendo término de servicio: {e}")
+            logger.error("Error extrayendo término de servicio: %s", e)
             return None
 
     async def _buscar_en_otras_habitaciones(
@@ -2242,7 +1928,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 hab_nombre = habitacion.get("nombre", "")
                 
                 if hab_id and hab_id != habitacion_actual_id:
-                    logger.info(f"🔍 DEBUG - Buscando en habitación: {hab_nombre} ({hab_id})")
+                    log_debug(logger, "context", "🔍 DEBUG - Buscando en habitación: %s (%s)", hab_nombre, hab_id)
                     servicios_encontrados = await backend_service.buscar_servicio_habitacion(hab_id, termino_busqueda)
                     
                     if servicios_encontrados:
@@ -2252,7 +1938,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                             "servicios_encontrados": servicios_encontrados,
                             "habitacion_completa": habitacion
                         })
-                        logger.info(f"🔍 DEBUG - ✅ Servicio encontrado en: {hab_nombre}")
+                        log_debug(logger, "context", "🔍 DEBUG - ✅ Servicio encontrado en: %s", hab_nombre)
             
             # Si hay fechas en el contexto, filtrar por disponibilidad
             if habitaciones_candidatas:
@@ -2261,7 +1947,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             return habitaciones_candidatas
             
         except Exception as e:
-            logger.error(f"Error buscando en otras habitaciones: {e}")
+            logger.error("Error buscando en otras habitaciones: %s", e)
             return []
 
     async def _filtrar_por_disponibilidad_si_hay_fechas(
@@ -2276,7 +1962,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             tiene_fechas = query_params.get("has_dates", False)
             
             if not tiene_fechas:
-                logger.info(f"🔍 DEBUG - No hay fechas en contexto, retornando todas las candidatas")
+                log_debug(logger, "context", "🔍 DEBUG - No hay fechas en contexto, retornando todas las candidatas")
                 return habitaciones_candidatas
             
             # Obtener fechas del contexto
@@ -2285,7 +1971,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             fecha_unica = query_params.get("single_date")
             
             if not (fecha_inicio and fecha_fin) and not fecha_unica:
-                logger.info(f"🔍 DEBUG - Fechas incompletas, retornando todas las candidatas")
+                log_debug(logger, "context", "🔍 DEBUG - Fechas incompletas, retornando todas las candidatas")
                 return habitaciones_candidatas
             
             # Si es fecha única, crear rango de una noche
@@ -2296,10 +1982,10 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                     fecha_obj = datetime.strptime(fecha_unica, "%Y-%m-%d")
                     fecha_fin = (fecha_obj + timedelta(days=1)).strftime("%Y-%m-%d")
                 except:
-                    logger.warning(f"Error parseando fecha única: {fecha_unica}")
+                    logger.warning("Error parseando fecha única: %s", fecha_unica)
                     return habitaciones_candidatas
             
-            logger.info(f"🔍 DEBUG - Filtrando habitaciones por disponibilidad: {fecha_inicio} a {fecha_fin}")
+            log_debug(logger, "context", "🔍 DEBUG - Filtrando habitaciones por disponibilidad: %s a %s", fecha_inicio, fecha_fin)
             
             # Verificar disponibilidad de cada habitación candidata
             habitaciones_disponibles = []
@@ -2318,18 +2004,18 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 for candidata in habitaciones_candidatas:
                     if candidata["habitacion_id"] in habitaciones_disponibles_ids:
                         habitaciones_disponibles.append(candidata)
-                        logger.info(f"🔍 DEBUG - ✅ Habitación {candidata['habitacion_nombre']} disponible para las fechas")
+                        log_debug(logger, "context", "🔍 DEBUG - ✅ Habitación %s disponible para las fechas", candidata['habitacion_nombre'])
                     else:
-                        logger.info(f"🔍 DEBUG - ❌ Habitación {candidata['habitacion_nombre']} NO disponible para las fechas")
+                        log_debug(logger, "context", "🔍 DEBUG - ❌ Habitación %s NO disponible para las fechas", candidata['habitacion_nombre'])
             else:
                 # Si no hay datos de disponibilidad previa, retornar todas (no consultar disponibilidad aquí)
-                logger.info(f"🔍 DEBUG - Sin datos de disponibilidad previa, retornando todas las candidatas")
+                log_debug(logger, "context", "🔍 DEBUG - Sin datos de disponibilidad previa, retornando todas las candidatas")
                 return habitaciones_candidatas
             
             return habitaciones_disponibles
             
         except Exception as e:
-            logger.error(f"Error filtrando por disponibilidad: {e}")
+            logger.error("Error filtrando por disponibilidad: %s", e)
             return habitaciones_candidatas
 
     def _determinar_escenario_respuesta_optimizado(
@@ -2352,19 +2038,19 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
         """Identifica habitación específica mencionada en el contexto conversacional"""
         try:
             habitaciones = context.get("habitaciones", [])
-            logger.info(f"🔍 DEBUG IDENTIFICACIÓN - Habitaciones disponibles: {[h.get('nombre') for h in habitaciones]}")
+            log_debug(logger, "rooms", "🔍 DEBUG IDENTIFICACIÓN - Habitaciones disponibles: %s", [h.get('nombre') for h in habitaciones])
             
             # 🆕 0. PRIMERO buscar en contexto de sesión (más confiable)
             session_context = context.get("session_context", {})
-            logger.info(f"🔍 DEBUG IDENTIFICACIÓN - Session context disponible: {'SÍ' if session_context else 'NO'}")
+            log_debug(logger, "rooms", "🔍 DEBUG IDENTIFICACIÓN - Session context disponible: %s", 'SÍ' if session_context else 'NO')
             
             if session_context:
                 previous_messages = session_context.get("previous_messages", [])
-                logger.info(f"🔍 DEBUG IDENTIFICACIÓN - Mensajes previos en session: {len(previous_messages)}")
+                log_debug(logger, "rooms", "🔍 DEBUG IDENTIFICACIÓN - Mensajes previos en session: %s", len(previous_messages))
                 
                 for i, msg in enumerate(reversed(previous_messages[-3:])):  # Últimos 3 mensajes
                     user_message = msg.get("user", "").lower()
-                    logger.info(f"🔍 DEBUG IDENTIFICACIÓN - Analizando mensaje {i}: '{user_message[:50]}...'")
+                    log_debug(logger, "rooms", "🔍 DEBUG IDENTIFICACIÓN - Analizando mensaje %s: '%s...'", i, user_message[:50])
                     
                     # Buscar expresiones de interés específico
                     interes_patterns = [
@@ -2385,24 +2071,24 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                         match = re.search(pattern, user_message, re.IGNORECASE)
                         if match:
                             habitacion_mencionada = match.group(1) if match.groups() else None
-                            logger.info(f"🔍 DEBUG IDENTIFICACIÓN - Pattern match: '{pattern}' → '{habitacion_mencionada}'")
+                            log_debug(logger, "rooms", "🔍 DEBUG IDENTIFICACIÓN - Pattern match: '%s' → '%s'", pattern, habitacion_mencionada)
                             
                             if habitacion_mencionada:
                                 # Buscar habitación por nombre
                                 for hab in habitaciones:
                                     hab_nombre = hab.get("nombre", "").lower()
-                                    logger.info(f"🔍 DEBUG IDENTIFICACIÓN - Comparando '{habitacion_mencionada.lower()}' con '{hab_nombre}'")
+                                    log_debug(logger, "rooms", "🔍 DEBUG IDENTIFICACIÓN - Comparando '%s' con '%s'", habitacion_mencionada.lower(), hab_nombre)
                                     if habitacion_mencionada.lower() in hab_nombre:
-                                        logger.info(f"✅ DEBUG IDENTIFICACIÓN - Habitación identificada por interés directo: {hab.get('nombre')}")
+                                        log_debug(logger, "rooms", "✅ DEBUG IDENTIFICACIÓN - Habitación identificada por interés directo: %s", hab.get('nombre'))
                                         return hab
                             else:
                                 # Para "esa suite", "esta suite", buscar en bot response anterior
                                 bot_response = msg.get("bot", "").lower()
-                                logger.info(f"🔍 DEBUG IDENTIFICACIÓN - Buscando referencia en bot response: '{bot_response[:50]}...'")
+                                log_debug(logger, "rooms", "🔍 DEBUG IDENTIFICACIÓN - Buscando referencia en bot response: '%s...'", bot_response[:50])
                                 for hab in habitaciones:
                                     hab_nombre = hab.get("nombre", "").lower()
                                     if hab_nombre and hab_nombre in bot_response:
-                                        logger.info(f"✅ DEBUG IDENTIFICACIÓN - Habitación identificada por referencia contextual: {hab.get('nombre')}")
+                                        log_debug(logger, "rooms", "✅ DEBUG IDENTIFICACIÓN - Habitación identificada por referencia contextual: %s", hab.get('nombre'))
                                         return hab
             
             # 1. Buscar en contexto del frontend - PRIORIZAR MENSAJES DEL USUARIO
@@ -2414,12 +2100,12 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 for msg in recent_messages:
                     if msg.get("role") == "user":
                         user_message = msg.get("message", "").lower()
-                        logger.info(f"🔍 DEBUG IDENTIFICACIÓN - Analizando mensaje del usuario: '{user_message[:50]}...'")
+                        log_debug(logger, "rooms", "🔍 DEBUG IDENTIFICACIÓN - Analizando mensaje del usuario: '%s...'", user_message[:50])
                         # Buscar expresiones de interés del usuario
                         for hab in habitaciones:
                             hab_nombre = hab.get("nombre", "").lower()
                             if hab_nombre and hab_nombre in user_message and ("interesa" in user_message or "quiero" in user_message or "elijo" in user_message or "reservar" in user_message or "quisiera" in user_message):
-                                logger.info(f"✅ DEBUG IDENTIFICACIÓN - Habitación identificada por ELECCIÓN DIRECTA del usuario: {hab.get('nombre')}")
+                                log_debug(logger, "rooms", "✅ DEBUG IDENTIFICACIÓN - Habitación identificada por ELECCIÓN DIRECTA del usuario: %s", hab.get('nombre'))
                                 return hab
                 
                 # SEGUNDO: Si no se encontró en mensajes del usuario, buscar en respuestas del bot
@@ -2430,7 +2116,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                         for hab in habitaciones:
                             hab_nombre = hab.get("nombre", "").lower()
                             if hab_nombre and hab_nombre in bot_response:
-                                logger.info(f"🔍 DEBUG - Habitación identificada del frontend (respuesta bot): {hab.get('nombre')}")
+                                log_debug(logger, "rooms", "🔍 DEBUG - Habitación identificada del frontend (respuesta bot): %s", hab.get('nombre'))
                                 return hab
             
             # 2. Buscar en contexto de sesión de BD
@@ -2442,26 +2128,26 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                     for hab in habitaciones:
                         hab_nombre = hab.get("nombre", "")
                         if last_habitacion.lower() in hab_nombre.lower():
-                            logger.info(f"🔍 DEBUG - Habitación identificada de BD: {hab_nombre}")
+                            log_debug(logger, "rooms", "🔍 DEBUG - Habitación identificada de BD: %s", hab_nombre)
                             return hab
             
             # 3. Buscar en parámetros de consulta (🎯 CRÍTICO - aquí debería estar)
             query_params = context.get("query_params", {})
             previous_habitacion = query_params.get("previous_habitacion")
-            logger.info(f"🔍 DEBUG IDENTIFICACIÓN - Query params: {query_params}")
-            logger.info(f"🔍 DEBUG IDENTIFICACIÓN - Previous habitacion: '{previous_habitacion}'")
+            log_debug(logger, "rooms", "🔍 DEBUG IDENTIFICACIÓN - Query params: %s", query_params)
+            log_debug(logger, "rooms", "🔍 DEBUG IDENTIFICACIÓN - Previous habitacion: '%s'", previous_habitacion)
             
             if previous_habitacion:
-                logger.info(f"🔍 DEBUG IDENTIFICACIÓN - Buscando '{previous_habitacion}' en habitaciones disponibles...")
+                log_debug(logger, "rooms", "🔍 DEBUG IDENTIFICACIÓN - Buscando '%s' en habitaciones disponibles...", previous_habitacion)
                 for hab in habitaciones:
                     hab_nombre = hab.get("nombre", "")
-                    logger.info(f"🔍 DEBUG IDENTIFICACIÓN - Comparando '{previous_habitacion.lower()}' con '{hab_nombre.lower()}'")
+                    log_debug(logger, "rooms", "🔍 DEBUG IDENTIFICACIÓN - Comparando '%s' con '%s'", previous_habitacion.lower(), hab_nombre.lower())
                     if previous_habitacion.lower() in hab_nombre.lower():
-                        logger.info(f"✅ DEBUG IDENTIFICACIÓN - Habitación identificada de parámetros: {hab_nombre}")
+                        log_debug(logger, "rooms", "✅ DEBUG IDENTIFICACIÓN - Habitación identificada de parámetros: %s", hab_nombre)
                         return hab
-                logger.warning(f"❌ DEBUG IDENTIFICACIÓN - No se encontró coincidencia para '{previous_habitacion}' en {[h.get('nombre') for h in habitaciones]}")
+                logger.warning("❌ DEBUG IDENTIFICACIÓN - No se encontró coincidencia para '%s' en %s", previous_habitacion, [h.get('nombre') for h in habitaciones])
             else:
-                logger.warning(f"❌ DEBUG IDENTIFICACIÓN - No hay 'previous_habitacion' en query_params")
+                logger.warning("❌ DEBUG IDENTIFICACIÓN - No hay 'previous_habitacion' en query_params")
             
             # 4. Buscar en disponibilidad real si hay una sola habitación disponible
             availability_real = context.get("availability_real", {})
@@ -2474,14 +2160,14 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                     hab_id = hab_disponible.get("id")
                     for hab in habitaciones:
                         if hab.get("id") == hab_id:
-                            logger.info(f"🔍 DEBUG - Habitación identificada por disponibilidad única: {hab.get('nombre')}")
+                            log_debug(logger, "rooms", "🔍 DEBUG - Habitación identificada por disponibilidad única: %s", hab.get('nombre'))
                             return hab
             
-            logger.info(f"🔍 DEBUG - No se pudo identificar habitación específica del contexto")
+            log_debug(logger, "rooms", "🔍 DEBUG - No se pudo identificar habitación específica del contexto")
             return None
             
         except Exception as e:
-            logger.error(f"Error identificando habitación del contexto: {e}")
+            logger.error("Error identificando habitación del contexto: %s", e)
             return None
 
     async def _handle_servicios_multiples_habitaciones(
@@ -2492,7 +2178,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
     ):
         """Maneja consultas sobre servicios de múltiples habitaciones"""
         try:
-            logger.info(f"🔧 DEBUG - Manejando consulta de servicios múltiples habitaciones")
+            log_debug(logger, "context", "🔧 DEBUG - Manejando consulta de servicios múltiples habitaciones")
             
             habitaciones = context.get("habitaciones", [])
             if not habitaciones:
@@ -2513,10 +2199,10 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                     }
                     
             context["servicios_multiples_habitaciones"] = servicios_por_habitacion
-            logger.info(f"🔧 DEBUG - Servicios obtenidos para {len(servicios_por_habitacion)} habitaciones")
+            log_debug(logger, "context", "🔧 DEBUG - Servicios obtenidos para %s habitaciones", len(servicios_por_habitacion))
             
         except Exception as e:
-            logger.error(f"Error manejando servicios múltiples habitaciones: {e}")
+            logger.error("Error manejando servicios múltiples habitaciones: %s", e)
 
     async def _handle_proceso_reserva(
         self,
@@ -2526,8 +2212,8 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
     ):
         """Maneja consultas sobre proceso de reserva generando URL de checkout"""
         try:
-            logger.info(f"🎯 DEBUG PROCESO_RESERVA - Iniciando manejo de proceso de reserva")
-            logger.info(f"🎯 DEBUG PROCESO_RESERVA - Mensaje: '{message}'")
+            log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Iniciando manejo de proceso de reserva")
+            log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Mensaje: '%s'", message)
             
             # 1. OBTENER INFORMACIÓN NECESARIA DEL CONTEXTO
             habitaciones = context.get("habitaciones", [])
@@ -2545,7 +2231,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 check_in = single_date
                 next_day = datetime.strptime(single_date, "%Y-%m-%d") + timedelta(days=1)
                 check_out = next_day.strftime("%Y-%m-%d")
-                logger.info(f"🎯 DEBUG PROCESO_RESERVA - Convertido single_date {single_date} a rango: {check_in} - {check_out}")
+                log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Convertido single_date %s a rango: %s - %s", single_date, check_in, check_out)
             
             # Si no hay fechas actuales, intentar obtener de sesión previa
             if not check_in or not check_out:
@@ -2554,36 +2240,36 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 if reserva_fechas.get('check_in') and reserva_fechas.get('check_out'):
                     check_in = reserva_fechas['check_in']
                     check_out = reserva_fechas['check_out']
-                    logger.info(f"🎯 DEBUG PROCESO_RESERVA - Usando fechas de reserva pendiente: {check_in} - {check_out}")
+                    log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Usando fechas de reserva pendiente: %s - %s", check_in, check_out)
                 else:
                     # Fallback: fechas generales de sesión
                     last_dates = session_context.get('last_dates', {})
                     check_in = last_dates.get('check_in')
                     check_out = last_dates.get('check_out')
                     if check_in and check_out:
-                        logger.info(f"🎯 DEBUG PROCESO_RESERVA - Usando fechas de sesión previa: {check_in} - {check_out}")
+                        log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Usando fechas de sesión previa: %s - %s", check_in, check_out)
             
             # 3. IDENTIFICAR HABITACIÓN ESPECÍFICA DEL CONTEXTO
             habitacion_elegida = self._identificar_habitacion_del_contexto(context)
             
             # Logging para debug
             if habitacion_elegida:
-                logger.info(f"🎯 DEBUG PROCESO_RESERVA - Habitación identificada del contexto conversacional: '{habitacion_elegida.get('nombre')}'")
+                log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Habitación identificada del contexto conversacional: '%s'", habitacion_elegida.get('nombre'))
             else:
-                logger.info(f"🎯 DEBUG PROCESO_RESERVA - No se identificó habitación del contexto conversacional")
+                log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - No se identificó habitación del contexto conversacional")
             
             # Si no se identificó habitación del contexto, buscar en query_params (frontend) como fallback
             if not habitacion_elegida:
                 habitacion_previa = query_params.get('previous_habitacion')
                 if habitacion_previa:
-                    logger.info(f"🎯 DEBUG PROCESO_RESERVA - Usando habitación del frontend como fallback: '{habitacion_previa}'")
+                    log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Usando habitación del frontend como fallback: '%s'", habitacion_previa)
                     habitacion_elegida = self._mapear_nombre_a_habitacion(habitacion_previa, habitaciones)
             
             # 🎯 MEMORIA CONVERSACIONAL: Si no hay habitación, buscar en sesión de proceso previo
             if not habitacion_elegida and session_context:
                 previous_habitacion_nombre = session_context.get('last_reserva_habitacion')
                 if previous_habitacion_nombre:
-                    logger.info(f"🎯 DEBUG PROCESO_RESERVA - Habitación de proceso previo: '{previous_habitacion_nombre}'")
+                    log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Habitación de proceso previo: '%s'", previous_habitacion_nombre)
                     habitacion_elegida = self._mapear_nombre_a_habitacion(previous_habitacion_nombre, habitaciones)
             
             # 4. OBTENER NÚMERO DE HUÉSPEDES (del mensaje del usuario O contexto conversacional)
@@ -2593,23 +2279,23 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             if not huespedes:
                 huespedes = self._extract_guest_count_from_context(context)
                 if huespedes:
-                    logger.info(f"🎯 DEBUG PROCESO_RESERVA - Huéspedes recuperados del contexto conversacional: {huespedes}")
+                    log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Huéspedes recuperados del contexto conversacional: %s", huespedes)
             
             # 🎯 MEMORIA CONVERSACIONAL: Como último recurso, buscar en contexto de sesión
             if not huespedes and session_context:
                 previous_guests = session_context.get('last_guests')
                 if previous_guests:
                     huespedes = previous_guests
-                    logger.info(f"🎯 DEBUG PROCESO_RESERVA - Huéspedes recuperados de sesión: {huespedes}")
+                    log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Huéspedes recuperados de sesión: %s", huespedes)
             
-            logger.info(f"🎯 DEBUG PROCESO_RESERVA - Estado actual:")
-            logger.info(f"  - Fechas: {check_in} - {check_out}")
-            logger.info(f"  - Habitación: {habitacion_elegida.get('nombre') if habitacion_elegida else 'No definida'}")
-            logger.info(f"  - Huéspedes: {huespedes}")
+            log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Estado actual:")
+            logger.info("  - Fechas: %s - %s", check_in, check_out)
+            logger.info("  - Habitación: %s", habitacion_elegida.get('nombre') if habitacion_elegida else 'No definida')
+            logger.info("  - Huéspedes: %s", huespedes)
             
             # 🎯 COMPLETAR AUTOMÁTICAMENTE SI TENEMOS TODO
             if check_in and check_out and habitacion_elegida and huespedes:
-                logger.info(f"🎯 DEBUG PROCESO_RESERVA - TODOS LOS DATOS DISPONIBLES - Generando URL automáticamente")
+                log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - TODOS LOS DATOS DISPONIBLES - Generando URL automáticamente")
                 
                 # Validar capacidad antes de proceder
                 habitacion_id = habitacion_elegida.get('id')
@@ -2634,8 +2320,8 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                         
                         # 🔄 CAMBIAR QUERY TYPE para usar prompt de capacidad excedida con habitación elegida
                         context["query_type_override"] = "capacidad_excedida_con_habitacion"
-                        logger.info(f"🎯 DEBUG PROCESO_RESERVA - Error: Capacidad excedida ({huespedes} > {capacidad_maxima})")
-                        logger.info(f"🔄 QUERY TYPE OVERRIDE - Cambiando a: capacidad_excedida_con_habitacion")
+                        log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Error: Capacidad excedida (%s > %s)", huespedes, capacidad_maxima)
+                        logger.info("🔄 QUERY TYPE OVERRIDE - Cambiando a: capacidad_excedida_con_habitacion")
                         return  # ← Salir también en caso de capacidad excedida
                     else:
                         # TODO PERFECTO - Generar URL
@@ -2683,7 +2369,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             elif not habitacion_elegida:
                 # CASO 2: Falta habitación específica
                 context["reserva_error"] = "No se ha seleccionado una habitación específica"
-                logger.info(f"🎯 DEBUG PROCESO_RESERVA - Error: Falta habitación específica")
+                log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Error: Falta habitación específica")
                 
             elif not check_in or not check_out:
                 # CASO 3: Faltan fechas
@@ -2693,7 +2379,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                         "id": habitacion_elegida.get('id')
                     }
                 context["reserva_error"] = "No se han especificado fechas para la reserva"
-                logger.info(f"🎯 DEBUG PROCESO_RESERVA - Error: Faltan fechas")
+                log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Error: Faltan fechas")
                 
             elif not huespedes:
                 # CASO 4: Faltan huéspedes (🔧 CORRECCIÓN: faltaba esta validación)
@@ -2708,37 +2394,37 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                         "check_in": check_in,
                         "check_out": check_out
                     }
-                logger.info(f"🎯 DEBUG PROCESO_RESERVA - Error: Faltan huéspedes (validación final)")
+                log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Error: Faltan huéspedes (validación final)")
                 
             else:
                 # CASO 6: Error general
                 context["reserva_error"] = "Error general en el procesamiento de la reserva"
-                logger.info(f"🎯 DEBUG PROCESO_RESERVA - Error general")
+                log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Error general")
             
             # 🆕 DETERMINAR CASO ESPECÍFICO - ERRORES PRIMERO, ÉXITO AL FINAL
             reserva_error = context.get("reserva_error", "")
             
             if reserva_error == "No se ha especificado la cantidad de huéspedes":
                 context["proceso_reserva_caso"] = "caso4"
-                logger.info(f"🎯 DEBUG PROCESO_RESERVA - Caso determinado: CASO4 (FALTAN HUÉSPEDES) ← CORRECTO")
+                log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Caso determinado: CASO4 (FALTAN HUÉSPEDES) ← CORRECTO")
             elif reserva_error == "No se ha seleccionado una habitación específica":
                 context["proceso_reserva_caso"] = "caso2"
-                logger.info(f"🎯 DEBUG PROCESO_RESERVA - Caso determinado: CASO2 (FALTA HABITACIÓN)")
+                log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Caso determinado: CASO2 (FALTA HABITACIÓN)")
             elif reserva_error == "No se han especificado fechas para la reserva":
                 context["proceso_reserva_caso"] = "caso3"
-                logger.info(f"🎯 DEBUG PROCESO_RESERVA - Caso determinado: CASO3 (FALTAN FECHAS)")
+                log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Caso determinado: CASO3 (FALTAN FECHAS)")
             elif "tiene capacidad máxima para" in reserva_error:
                 context["proceso_reserva_caso"] = "caso5"
-                logger.info(f"🎯 DEBUG PROCESO_RESERVA - Caso determinado: CASO5 (CAPACIDAD EXCEDIDA)")
+                log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Caso determinado: CASO5 (CAPACIDAD EXCEDIDA)")
             elif "reserva_info" in context and context["reserva_info"].get("checkout_url"):
                 context["proceso_reserva_caso"] = "caso1"
-                logger.info(f"🎯 DEBUG PROCESO_RESERVA - Caso determinado: CASO1 (TODO LISTO)")
+                log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Caso determinado: CASO1 (TODO LISTO)")
             else:
                 context["proceso_reserva_caso"] = "caso6"
-                logger.info(f"🎯 DEBUG PROCESO_RESERVA - Caso determinado: CASO6 (ERROR GENERAL) - Error: '{reserva_error}'")
+                log_debug(logger, "reserva", "🎯 DEBUG PROCESO_RESERVA - Caso determinado: CASO6 (ERROR GENERAL) - Error: '%s'", reserva_error)
             
         except Exception as e:
-            logger.error(f"Error manejando proceso de reserva: {e}")
+            logger.error("Error manejando proceso de reserva: %s", e)
             context["reserva_error"] = "Error interno procesando la reserva"
             context["proceso_reserva_caso"] = "caso6"  # 🆕 Fallback a caso general
 
@@ -2788,29 +2474,29 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                     (hospedaje_id, user_id, conversation_id, reserva_json)
                 )
                 
-                logger.info(f"🎯 MEMORIA - Contexto de reserva guardado: {reserva_data}")
+                logger.info("🎯 MEMORIA - Contexto de reserva guardado: %s", reserva_data)
                 
         except Exception as e:
-            logger.error(f"Error guardando contexto de reserva: {e}")
+            logger.error("Error guardando contexto de reserva: %s", e)
 
     def _mapear_nombre_a_habitacion(self, nombre_habitacion: str, habitaciones: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
         """Mapea el nombre de una habitación a su información completa"""
         try:
             nombre_lower = nombre_habitacion.lower().strip()
-            logger.info(f"🎯 DEBUG MAPEO - Buscando habitación: '{nombre_lower}'")
+            log_debug(logger, "rooms", "🎯 DEBUG MAPEO - Buscando habitación: '%s'", nombre_lower)
             
             # Búsqueda exacta primero
             for hab in habitaciones:
                 hab_nombre = hab.get("nombre", "").lower().strip()
                 if hab_nombre == nombre_lower:
-                    logger.info(f"🎯 DEBUG MAPEO - Match exacto: '{hab_nombre}' → ID: {hab.get('id')}")
+                    log_debug(logger, "rooms", "🎯 DEBUG MAPEO - Match exacto: '%s' → ID: %s", hab_nombre, hab.get('id'))
                     return hab
             
             # Búsqueda parcial (contiene)
             for hab in habitaciones:
                 hab_nombre = hab.get("nombre", "").lower().strip()
                 if nombre_lower in hab_nombre or hab_nombre in nombre_lower:
-                    logger.info(f"🎯 DEBUG MAPEO - Match parcial: '{hab_nombre}' → ID: {hab.get('id')}")
+                    log_debug(logger, "rooms", "🎯 DEBUG MAPEO - Match parcial: '%s' → ID: %s", hab_nombre, hab.get('id'))
                     return hab
             
             # Búsqueda por palabras clave (suite, habitación, etc.)
@@ -2822,14 +2508,14 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 # Si comparten al menos 2 palabras significativas
                 coincidencias = set(palabras_nombre) & set(palabras_hab)
                 if len(coincidencias) >= 2:
-                    logger.info(f"🎯 DEBUG MAPEO - Match por palabras: '{hab_nombre}' → ID: {hab.get('id')}")
+                    log_debug(logger, "rooms", "🎯 DEBUG MAPEO - Match por palabras: '%s' → ID: %s", hab_nombre, hab.get('id'))
                     return hab
             
-            logger.warning(f"🎯 DEBUG MAPEO - No se encontró habitación para: '{nombre_habitacion}'")
+            logger.warning("🎯 DEBUG MAPEO - No se encontró habitación para: '%s'", nombre_habitacion)
             return None
             
         except Exception as e:
-            logger.error(f"Error mapeando nombre de habitación: {e}")
+            logger.error("Error mapeando nombre de habitación: %s", e)
             return None
 
     def _generar_url_checkout(
@@ -2861,7 +2547,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             return checkout_url
             
         except Exception as e:
-            logger.error(f"Error generando URL de checkout: {e}")
+            logger.error("Error generando URL de checkout: %s", e)
             return f"{settings.frontend_url}/checkout"
 
     def _generar_url_checkout_multiple(
@@ -2896,7 +2582,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             return checkout_url
             
         except Exception as e:
-            logger.error(f"Error generando URL de checkout múltiple: {e}")
+            logger.error("Error generando URL de checkout múltiple: %s", e)
             return f"{settings.frontend_url}/checkout"
 
     def _calcular_habitaciones_necesarias(
@@ -2912,43 +2598,21 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             if not habitaciones_disponibles:
                 return 0, []
             
-            # Ordenar habitaciones por capacidad (las más grandes primero para optimizar)
-            habitaciones_ordenadas = sorted(
-                habitaciones_disponibles, 
-                key=lambda h: h.get("capacidad", 2), 
-                reverse=True
-            )
-            
-            habitaciones_seleccionadas = []
-            capacidad_acumulada = 0
-            
-            # Algoritmo greedy: tomar habitaciones hasta cubrir la capacidad necesaria
-            for habitacion in habitaciones_ordenadas:
-                if capacidad_acumulada >= guests:
-                    break
-                    
-                hab_capacidad = habitacion.get("capacidad", 2)
-                habitaciones_seleccionadas.append(habitacion)
-                capacidad_acumulada += hab_capacidad
-                
-                logger.info(f"🎯 DEBUG CÁLCULO - Agregada {habitacion.get('nombre')} (cap: {hab_capacidad}), total: {capacidad_acumulada}")
-            
-            # Verificar si se puede alojar a todos los huéspedes
-            if capacidad_acumulada < guests:
-                logger.warning(f"🎯 DEBUG CÁLCULO - No se puede alojar {guests} huéspedes (capacidad máxima: {capacidad_acumulada})")
+            # La mejor asignación: menos habitaciones, menos camas libres y menor precio
+            allocations = allocate_rooms(habitaciones_disponibles, guests, top_k=1)
+            if not allocations:
+                logger.warning("🎯 DEBUG CÁLCULO - No se puede alojar %s huéspedes (capacidad máxima: %s)", guests, sum(room_capacity(hab) for hab in habitaciones_disponibles))
                 return 0, []
             
-            # Verificar que no excedamos el número de habitaciones del hospedaje
-            max_habitaciones = len(habitaciones_disponibles)
-            if len(habitaciones_seleccionadas) > max_habitaciones:
-                logger.warning(f"🎯 DEBUG CÁLCULO - Se requieren más habitaciones ({len(habitaciones_seleccionadas)}) de las disponibles ({max_habitaciones})")
-                return 0, []
+            habitaciones_seleccionadas = allocations[0]["rooms"]
+            for habitacion in habitaciones_seleccionadas:
+                log_debug(logger, "reserva", "🎯 DEBUG CÁLCULO - Agregada %s (cap: %s)", habitacion.get('nombre'), habitacion.get('capacidad'))
             
-            logger.info(f"🎯 DEBUG CÁLCULO - Solución encontrada: {len(habitaciones_seleccionadas)} habitaciones para {guests} huéspedes")
+            log_debug(logger, "reserva", "🎯 DEBUG CÁLCULO - Solución encontrada: %s habitaciones para %s huéspedes", len(habitaciones_seleccionadas), guests)
             return len(habitaciones_seleccionadas), habitaciones_seleccionadas
             
         except Exception as e:
-            logger.error(f"Error calculando habitaciones necesarias: {e}")
+            logger.error("Error calculando habitaciones necesarias: %s", e)
             return 0, []
 
     async def _handle_reserva_multiple(
@@ -2959,8 +2623,8 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
     ):
         """Maneja solicitudes de reserva de múltiples habitaciones"""
         try:
-            logger.info(f"🎯 DEBUG RESERVA_MULTIPLE - Iniciando manejo de reserva múltiple")
-            logger.info(f"🎯 DEBUG RESERVA_MULTIPLE - Mensaje: '{message}'")
+            log_debug(logger, "reserva", "🎯 DEBUG RESERVA_MULTIPLE - Iniciando manejo de reserva múltiple")
+            log_debug(logger, "reserva", "🎯 DEBUG RESERVA_MULTIPLE - Mensaje: '%s'", message)
             
             # Obtener fechas del contexto
             query_params = context.get("query_params", {})
@@ -3019,7 +2683,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 habitaciones_info.append(hab_info)
                 capacidad_total += hab_info["capacidad"]
                 
-                logger.info(f"🎯 DEBUG RESERVA_MULTIPLE - Habitación seleccionada: {hab_info['nombre']} (capacidad: {hab_info['capacidad']})")
+                log_debug(logger, "reserva", "🎯 DEBUG RESERVA_MULTIPLE - Habitación seleccionada: %s (capacidad: %s)", hab_info['nombre'], hab_info['capacidad'])
             
             # Generar respuesta
             fecha_formateada_inicio = check_in.replace("-", "/")
@@ -3050,7 +2714,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             )
             
         except Exception as e:
-            logger.error(f"Error manejando reserva múltiple: {e}")
+            logger.error("Error manejando reserva múltiple: %s", e)
             context["response_text"] = "Ocurrió un error al generar las reservas múltiples. ¿Podés intentar nuevamente?"
 
     def _extract_guest_count_from_context(self, context: Dict[str, Any]) -> Optional[int]:
@@ -3059,25 +2723,25 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             # 1. Buscar en query_params primero
             query_params = context.get("query_params", {})
             if query_params.get("guests"):
-                logger.info(f"🔍 HUÉSPEDES CONTEXTO - Encontrados en query_params: {query_params['guests']}")
+                log_debug(logger, "guests", "🔍 HUÉSPEDES CONTEXTO - Encontrados en query_params: %s", query_params['guests'])
                 return query_params["guests"]
             
             # 2. Buscar en frontend_conversation (revisar todos los mensajes del usuario)
             frontend_conversation = context.get("frontend_conversation", {})
             if frontend_conversation:
                 recent_messages = frontend_conversation.get("recent_messages", [])
-                logger.info(f"🔍 HUÉSPEDES CONTEXTO - Revisando {len(recent_messages)} mensajes del historial")
+                log_debug(logger, "guests", "🔍 HUÉSPEDES CONTEXTO - Revisando %s mensajes del historial", len(recent_messages))
                 
                 # Revisar todos los mensajes del usuario de más reciente a más antiguo
                 for i, msg in enumerate(reversed(recent_messages)):
                     if msg.get("role") == "user":
                         user_message = msg.get("message", "").lower()
-                        logger.info(f"🔍 HUÉSPEDES CONTEXTO - Mensaje {i+1}: '{user_message[:50]}...'")
+                        log_debug(logger, "guests", "🔍 HUÉSPEDES CONTEXTO - Mensaje %s: '%s...'", i + 1, user_message[:50])
                         
                         # Usar la función existente para extraer huéspedes
                         guest_count = self._extract_guest_count(user_message)
                         if guest_count:
-                            logger.info(f"✅ HUÉSPEDES CONTEXTO - Encontrados: {guest_count} personas")
+                            log_debug(logger, "guests", "✅ HUÉSPEDES CONTEXTO - Encontrados: %s personas", guest_count)
                             return guest_count
                         
                         # También buscar patrones específicos adicionales
@@ -3094,14 +2758,14 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                             if match:
                                 num = int(match.group(1))
                                 if 1 <= num <= 20:  # Rango razonable
-                                    logger.info(f"✅ HUÉSPEDES CONTEXTO - Encontrados con patrón {pattern}: {num}")
+                                    log_debug(logger, "guests", "✅ HUÉSPEDES CONTEXTO - Encontrados con patrón %s: %s", pattern, num)
                                     return num
                 
-            logger.info("❌ HUÉSPEDES CONTEXTO - No encontrados en el historial")
+            log_debug(logger, "guests", "❌ HUÉSPEDES CONTEXTO - No encontrados en el historial")
             return None
             
         except Exception as e:
-            logger.error(f"❌ Error extrayendo huéspedes del contexto: {e}")
+            logger.error("❌ Error extrayendo huéspedes del contexto: %s", e)
             return None
 
     async def _save_reserva_context_multiple(
@@ -3149,10 +2813,10 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
                 (hospedaje_id, user_id, conversation_id, reserva_json)
             )
             
-            logger.info(f"🎯 MEMORIA - Contexto de reserva múltiple guardado: {reserva_data}")
+            logger.info("🎯 MEMORIA - Contexto de reserva múltiple guardado: %s", reserva_data)
             
         except Exception as e:
-            logger.error(f"Error guardando contexto de reserva múltiple: {e}")
+            logger.error("Error guardando contexto de reserva múltiple: %s", e)
 
     async def _analyze_capacity_requirements(self, message: str, context: Dict[str, Any], query_type: str) -> Dict[str, Any]:
         """Analiza si la consulta excede la capacidad de las habitaciones y maneja el caso"""
@@ -3180,7 +2844,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             if numero_huespedes <= capacidad_maxima:
                 return {"capacity_exceeded": False}
             
-            logger.info(f"🚨 CAPACIDAD EXCEDIDA - Huéspedes: {numero_huespedes}, Capacidad máxima: {capacidad_maxima}")
+            logger.info("🚨 CAPACIDAD EXCEDIDA - Huéspedes: %s, Capacidad máxima: %s", numero_huespedes, capacidad_maxima)
             
             # Detectar si mencionó habitación específica EN EL MENSAJE o YA TENÍA UNA ELEGIDA
             habitacion_especifica = self._extract_specific_room(message, habitaciones_disponibles)
@@ -3191,19 +2855,20 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             # Calcular habitaciones necesarias
             habitaciones_necesarias = (numero_huespedes + capacidad_maxima - 1) // capacidad_maxima  # Ceiling division
             
-            # Generar combinaciones posibles
-            combinaciones = self._generate_room_combinations(habitaciones_disponibles, numero_huespedes)
+            # Generar combinaciones posibles (con precio para las noches consultadas)
+            nights = nights_between(hospedaje_disp.get("fecha_inicio"), hospedaje_disp.get("fecha_fin"))
+            combinaciones = self._generate_room_combinations(habitaciones_disponibles, numero_huespedes, nights)
             
             # Determinar el tipo de consulta específico
             if habitacion_especifica:
                 new_query_type = "capacidad_excedida_especifica"
-                logger.info(f"🎯 CAPACIDAD EXCEDIDA - Habitación mencionada en mensaje: {habitacion_especifica}")
+                logger.info("🎯 CAPACIDAD EXCEDIDA - Habitación mencionada en mensaje: %s", habitacion_especifica)
             elif habitacion_elegida_contexto:
                 new_query_type = "capacidad_excedida_con_habitacion"
-                logger.info(f"🎯 CAPACIDAD EXCEDIDA - Habitación del contexto: {habitacion_elegida_contexto.get('nombre')}")
+                logger.info("🎯 CAPACIDAD EXCEDIDA - Habitación del contexto: %s", habitacion_elegida_contexto.get('nombre'))
             else:
                 new_query_type = "capacidad_excedida_general"
-                logger.info(f"🎯 CAPACIDAD EXCEDIDA - Consulta general sin habitación específica")
+                logger.info("🎯 CAPACIDAD EXCEDIDA - Consulta general sin habitación específica")
             
             # Contexto mejorado
             enhanced_context = {
@@ -3225,7 +2890,7 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
             }
             
         except Exception as e:
-            logger.error(f"Error analizando capacidad: {e}")
+            logger.error("Error analizando capacidad: %s", e)
             return {"capacity_exceeded": False}
     
     def _extract_guest_count(self, message: str) -> Optional[int]:
@@ -3261,37 +2926,37 @@ FECHA CONSULTADA: {context['error_fecha_pasada']['fecha_consultada']}"""
         
         return None
     
-    def _generate_room_combinations(self, habitaciones_disponibles: List[Dict], numero_huespedes: int) -> List[Dict]:
-        """Genera combinaciones posibles de habitaciones para alojar a todos los huéspedes"""
-        from itertools import combinations
-        
+    def _generate_room_combinations(self, habitaciones_disponibles: List[Dict], numero_huespedes: int, nights: int = 1) -> List[Dict]:
+        """Mejores combinaciones de habitaciones para alojar a todos los huéspedes (menos habitaciones, menos camas libres, menor precio)"""
         combinaciones_validas = []
-        
-        # Probar combinaciones de 2 habitaciones (más común)
-        if len(habitaciones_disponibles) >= 2:
-            for combo in combinations(habitaciones_disponibles, 2):
-                capacidad_total = sum(hab.get("capacidad", 2) for hab in combo)
-                if capacidad_total >= numero_huespedes:
-                    combinaciones_validas.append({
-                        "habitaciones": [hab.get("nombre") for hab in combo],
-                        "ids": [hab.get("id") for hab in combo],
-                        "capacidad_total": capacidad_total,
-                        "distribucion": f"{numero_huespedes // 2} personas en cada habitación" if numero_huespedes % 2 == 0 else f"{numero_huespedes // 2 + 1} en una, {numero_huespedes // 2} en otra"
-                    })
-        
-        # Si no hay combinaciones de 2, probar con todas las disponibles
-        if not combinaciones_validas and len(habitaciones_disponibles) >= 3:
-            capacidad_total = sum(hab.get("capacidad", 2) for hab in habitaciones_disponibles)
-            if capacidad_total >= numero_huespedes:
-                combinaciones_validas.append({
-                    "habitaciones": [hab.get("nombre") for hab in habitaciones_disponibles],
-                    "ids": [hab.get("id") for hab in habitaciones_disponibles],
-                    "capacidad_total": capacidad_total,
-                    "distribucion": f"Distribuir {numero_huespedes} personas en {len(habitaciones_disponibles)} habitaciones"
-                })
-        
+        for allocation in allocate_rooms(habitaciones_disponibles, numero_huespedes, nights):
+            distribucion = allocation["distribucion"]
+            combinaciones_validas.append({
+                "habitaciones": allocation["habitaciones"],
+                "ids": allocation["ids"],
+                "capacidad_total": allocation["capacidad_total"],
+                "precio_total": allocation["precio_total"],
+                "distribucion": (
+                    f"{distribucion[0]} personas en cada habitación" if len(set(distribucion)) == 1
+                    else " + ".join(str(personas) for personas in distribucion) + " personas"
+                )
+            })
         return combinaciones_validas
 
+    def get_metrics(self) -> Dict[str, Any]:
+        """Métricas internas del servicio de chat"""
+        return {
+            "llm": self.llm_gateway.metrics(),
+            "embedding_cache": embedding_cache.metrics(),
+            "ingestion": ingestion_jobs.metrics(),
+            "retrieval": self.knowledge_service.retrieval_metrics(),
+            "vector_index": vector_index.metrics(),
+            "vector_storage": vector_storage.metrics(),
+            "classifier": self.query_classifier.metrics(),
+            "room_allocator": allocator_metrics(),
+            "logging": logging_metrics()
+        }
+
     def _is_anonymous_user(self, user_id: str) -> bool:
         """Determina si el usuario es anónimo y no debe guardarse en BD"""
         return user_id in ["anonymous", "anónimo", ""] or user_id.startswith("temp_") or user_id.startswith("guest_")
\ No newline at end of file
@@ -0,0 +1,459 @@
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from ..core.config import settings
+from ..utils.tokens import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+# Prioridad base de cada sección (mayor = se conserva primero al recortar)
+SECTION_PRIORITIES = {
+    "error_fecha_pasada": 1000,
+    "reserva_info": 95,
+    "reserva_error": 95,
+    "hospedaje": 90,
+    "query_params": 85,
+    "capacidad": 85,
+    "availability": 80,
+    "pricing": 80,
+    "busqueda_servicio": 75,
+    "habitaciones": 70,
+    "monthly": 70,
+    "servicios_hospedaje": 60,
+    "servicios_habitaciones": 60,
+    "session": 50,
+    "pdf_info": 40,
+    "similar_queries": 30,
+    "sources": 20,
+}
+
+# Secciones principales según el tipo de consulta (prioridad y presupuesto extra)
+QUERY_TYPE_FOCUS = {
+    "disponibilidad": ("availability", "habitaciones"),
+    "precios": ("pricing", "habitaciones"),
+    "hospedaje_servicios": ("servicios_hospedaje",),
+    "habitacion_servicios": ("servicios_habitaciones",),
+    "servicios": ("servicios_hospedaje", "servicios_habitaciones"),
+    "servicio_especifico": ("busqueda_servicio",),
+    "servicios_multiples_habitaciones": ("servicios_habitaciones",),
+    "proceso_reserva": ("reserva_info", "reserva_error"),
+    "reserva_multiple": ("reserva_info", "availability"),
+    "capacidad_excedida_especifica": ("capacidad", "availability"),
+    "capacidad_excedida_general": ("capacidad", "availability"),
+    "capacidad_excedida_con_habitacion": ("capacidad", "availability"),
+    "general": ("pdf_info", "servicios_hospedaje"),
+}
+
+FOCUS_PRIORITY = 100
+
+# Tipos de consulta que necesitan la descripción larga del hospedaje
+DETAILED_HOSPEDAJE_TYPES = {"general", "ubicacion", "politicas", "contacto", "servicios", "hospedaje_servicios", "checkin"}
+
+# Tipos de consulta donde el precio base de las habitaciones aporta
+PRICE_RELEVANT_TYPES = {
+    "precios", "disponibilidad", "proceso_reserva", "reserva_multiple", "general",
+    "capacidad_excedida_especifica", "capacidad_excedida_general", "capacidad_excedida_con_habitacion",
+}
+
+# Parámetros de la consulta que no aportan al modelo
+QUERY_PARAMS_SKIP = {"original_message", "raw_numbers", "raw_dates"}
+
+TRUNCATION_MARK = " …[recortado]"
+
+# Por debajo de este presupuesto no vale la pena incluir una sección recortada
+MIN_SECTION_TOKENS = 24
+
+
+def _compact(data: Any) -> str:
+    """JSON compacto (sin indentación ni espacios)"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def _first(data: Dict[str, Any], *keys: str, default: Any = None) -> Any:
+    """Devuelve el primer valor presente entre claves camelCase / snake_case"""
+    for key in keys:
+        value = data.get(key)
+        if value not in (None, ""):
+            return value
+    return default
+
+
+def _shorten(text: str, limit: int) -> str:
+    return text[:limit] + "..." if len(text) > limit else text
+
+
+class ContextSerializer:
+    """Serializa el contexto del chat en secciones compactas con presupuesto de tokens.
+
+    Cada sección se arma con solo los campos útiles para el tipo de consulta, se
+    limita a un presupuesto propio y, si el total supera max_context_length, se
+    recortan primero las secciones de menor prioridad.
+    """
+
+    def __init__(self, total_budget: Optional[int] = None, section_budget: Optional[int] = None):
+        self.total_budget = total_budget or settings.max_context_length
+        self.section_budget = section_budget or settings.context_section_max_tokens
+
+    def serialize(self, context: Dict[str, Any], query_type: str = "general") -> str:
+        text, _ = self.serialize_with_breakdown(context, query_type)
+        return text
+
+    def serialize_with_breakdown(self, context: Dict[str, Any], query_type: str = "general") -> Tuple[str, Dict[str, int]]:
+        """Devuelve el contexto formateado y los tokens usados por sección"""
+        sections = self._build_sections(context, query_type)
+        focus = set(QUERY_TYPE_FOCUS.get(query_type, ()))
+        if context.get("query_params", {}).get("is_monthly_query"):
+            focus.add("monthly")
+
+        # 1. Presupuesto por sección
+        budgeted = []
+        for order, (name, text) in enumerate(sections):
+            priority = FOCUS_PRIORITY if name in focus else SECTION_PRIORITIES.get(name, 0)
+            priority = max(priority, SECTION_PRIORITIES.get(name, 0))
+            limit = self.section_budget * 2 if name in focus else self.section_budget
+            text, tokens = self._fit(text, limit)
+            budgeted.append([order, name, priority, text, tokens])
+
+        # 2. Presupuesto total: conservar primero las secciones de mayor prioridad
+        remaining = self.total_budget
+        kept = []
+        for entry in sorted(budgeted, key=lambda item: (-item[2], item[0])):
+            order, name, priority, text, tokens = entry
+            if tokens <= remaining:
+                kept.append(entry)
+                remaining -= tokens
+            elif remaining >= MIN_SECTION_TOKENS:
+                text, tokens = self._fit(text, remaining)
+                kept.append([order, name, priority, text, tokens])
+                remaining -= tokens
+            else:
+                logger.info(f"✂️ CONTEXTO - Sección '{name}' omitida por presupuesto ({tokens} tokens)")
+
+        kept.sort(key=lambda item: item[0])
+        breakdown = {name: tokens for _, name, _, _, tokens in kept}
+        total = sum(breakdown.values())
+        logger.info(
+            f"📏 CONTEXTO [{query_type}] - {total}/{self.total_budget} tokens: "
+            + ", ".join(f"{name}={tokens}" for name, tokens in breakdown.items())
+        )
+        return "\n\n".join(text for _, _, _, text, _ in kept), breakdown
+
+    def _fit(self, text: str, max_tokens: int) -> Tuple[str, int]:
+        """Recorta una sección a max_tokens (incluida la marca de recorte)"""
+        tokens = count_tokens(text)
+        if tokens <= max_tokens:
+            return text, tokens
+        mark_tokens = count_tokens(TRUNCATION_MARK)
+        truncated = truncate_to_tokens(text, max(max_tokens - mark_tokens, 0)) + TRUNCATION_MARK
+        return truncated, count_tokens(truncated)
+
+    def _build_sections(self, context: Dict[str, Any], query_type: str) -> List[Tuple[str, str]]:
+        """Arma las secciones en el orden en que se presentan al modelo"""
+        sections: List[Tuple[str, str]] = []
+
+        availability_real = context.get("availability_real", {})
+        hospedaje_disp = availability_real.get("hospedaje_disponibilidad", {})
+        hay_disponibilidad = hospedaje_disp.get("disponible", False)
+        hay_precios = context.get("pricing_real") is not None
+        mostrar_datos_positivos = hay_disponibilidad or hay_precios
+
+        # 1. INFORMACIÓN BÁSICA DEL HOSPEDAJE (filtrada según disponibilidad)
+        if "hospedaje" in context:
+            hospedaje = self._prune_hospedaje(context["hospedaje"], query_type, mostrar_datos_positivos)
+            sections.append(("hospedaje", f"HOSPEDAJE: {_compact(hospedaje)}"))
+
+        # 2. PARÁMETROS EXTRAÍDOS DE LA CONSULTA
+        params = context.get("query_params")
+        if params and (params.get('has_dates') or params.get('guests') or params.get('nights')):
+            pruned = {
+                key: value for key, value in params.items()
+                if key not in QUERY_PARAMS_SKIP and value not in (None, False, [], {}, "")
+            }
+            sections.append(("query_params", f"PARÁMETROS DE LA CONSULTA: {_compact(pruned)}"))
+
+        # 2.1. ERROR DE FECHA PASADA (TIENE PRIORIDAD ABSOLUTA)
+        if "error_fecha_pasada" in context:
+            sections.append(("error_fecha_pasada", f"⚠️ ERROR: FECHA PASADA - {_compact(context['error_fecha_pasada'])}"))
+            # Si hay error de fecha pasada, no agregar más información de disponibilidad/precios
+            return sections
+
+        # 3. HABITACIONES DEL HOSPEDAJE (FORMATO SIMPLIFICADO)
+        if "habitaciones" in context:
+            include_price = query_type in PRICE_RELEVANT_TYPES
+            sections.append(("habitaciones", self.format_habitaciones(context["habitaciones"], include_price)))
+
+        # 4. DISPONIBILIDAD REAL
+        # 🚨 CRITICAL: Solo agregar disponibilidad si NO hay información de reserva
+        if "availability_real" in context and "reserva_info" not in context:
+            sections.append(("availability", self.format_availability(context["availability_real"])))
+
+        # 4.1. CAPACIDAD EXCEDIDA (combinaciones de habitaciones)
+        if "capacidad_excedida" in context:
+            capacidad = dict(context["capacidad_excedida"])
+            capacidad["habitaciones_disponibles"] = [
+                {"nombre": hab.get("nombre"), "capacidad": hab.get("capacidad")}
+                for hab in capacidad.get("habitaciones_disponibles", [])
+            ]
+            capacidad["combinaciones_posibles"] = [
+                {key: value for key, value in combo.items() if key != "ids"}
+                for combo in capacidad.get("combinaciones_posibles", [])
+            ]
+            sections.append(("capacidad", f"👥 CAPACIDAD EXCEDIDA: {_compact(capacidad)}"))
+
+        # 5. PRECIOS ESPECÍFICOS (TIEMPO REAL DEL BACKEND)
+        if "pricing_real" in context:
+            pricing = self._prune_pricing(context["pricing_real"], query_type)
+            sections.append(("pricing", f"💰 PRECIOS ESPECÍFICOS (BACKEND): {_compact(pricing)}"))
+
+        # 5.1. DISPONIBILIDAD MENSUAL (TIEMPO REAL DEL BACKEND)
+        if "monthly_availability" in context:
+            sections.append(("monthly", f"📅 DISPONIBILIDAD MENSUAL (BACKEND): {_compact(context['monthly_availability'])}"))
+
+        # 6. SERVICIOS DEL HOSPEDAJE
+        if "servicios_hospedaje" in context:
+            servicios = self.format_servicios(context["servicios_hospedaje"])
+            sections.append(("servicios_hospedaje", f"🏨 SERVICIOS DEL HOSPEDAJE (BACKEND):\n{servicios}"))
+
+        # 7. SERVICIOS DE HABITACIONES (por nombre de habitación, no por ID)
+        if "servicios_habitaciones" in context:
+            nombres = {hab.get("id"): hab.get("nombre") for hab in context.get("habitaciones", [])}
+            lines = []
+            for hab_id, servicios in context["servicios_habitaciones"].items():
+                lines.append(f"{nombres.get(hab_id) or hab_id}:\n{self.format_servicios(servicios, indent='  ')}")
+            sections.append(("servicios_habitaciones", "🛏️ SERVICIOS POR HABITACIÓN (BACKEND):\n" + "\n".join(lines)))
+
+        # 8. CONTEXTO DE SESIÓN (CONVERSACIÓN PREVIA)
+        if "session_context" in context:
+            sections.append(("session", self._format_session(context["session_context"])))
+
+        # 9. BÚSQUEDA DE SERVICIO ESPECÍFICO
+        if "busqueda_servicio_especifico" in context:
+            sections.append(("busqueda_servicio", self._format_busqueda(context["busqueda_servicio_especifico"])))
+
+        # 10. INFORMACIÓN DE DOCUMENTOS PDF
+        if "pdf_info" in context:
+            sections.append(("pdf_info", f"📄 INFORMACIÓN DE DOCUMENTOS PDF: {context['pdf_info']}"))
+
+        # 11. CONSULTAS SIMILARES PREVIAS
+        if "similar_queries" in context:
+            sections.append(("similar_queries", f"🔍 CONSULTAS SIMILARES PREVIAS: {_compact(context['similar_queries'])}"))
+
+        # 12. INFORMACIÓN DE RESERVA (CRÍTICO PARA PROCESO_RESERVA)
+        if "reserva_info" in context:
+            sections.append(("reserva_info", f"🎯 RESERVA_INFO: {_compact(context['reserva_info'])}"))
+
+        if "reserva_error" in context:
+            sections.append(("reserva_error", f"❌ RESERVA_ERROR: {context['reserva_error']}"))
+
+        # 13. RESUMEN DE FUENTES DISPONIBLES
+        if "sources_summary" in context:
+            active_sources = [key.replace("has_", "") for key, value in context["sources_summary"].items() if value]
+            sections.append(("sources", f"📊 FUENTES DISPONIBLES: {', '.join(active_sources)}"))
+
+        return sections
+
+    def _prune_hospedaje(self, hospedaje: Dict[str, Any], query_type: str, mostrar_datos_positivos: bool) -> Dict[str, Any]:
+        """Conserva solo los campos del hospedaje útiles para el tipo de consulta"""
+        pruned = {
+            "nombre": _first(hospedaje, "nombre"),
+            "descripcion": _first(hospedaje, "descripcionCorta", "descripcion_corta"),
+            "direccion": _first(hospedaje, "direccion"),
+        }
+        if query_type in DETAILED_HOSPEDAJE_TYPES:
+            pruned["descripcion_larga"] = _first(hospedaje, "descripcionLarga", "descripcion_larga")
+        if query_type == "ubicacion":
+            pruned["latitud"] = hospedaje.get("latitud")
+            pruned["longitud"] = hospedaje.get("longitud")
+
+        # 🔧 Los datos de contacto solo se envían si NO hay disponibilidad ni precios
+        if not mostrar_datos_positivos:
+            pruned["telefono"] = _first(hospedaje, "telefonoContacto", "telefono_contacto")
+            pruned["mail"] = _first(hospedaje, "mailContacto", "mail_contacto")
+            pruned["responsable"] = _first(hospedaje, "responsable")
+
+        return {key: value for key, value in pruned.items() if value not in (None, "")}
+
+    def _prune_pricing(self, pricing_real: Dict[str, Any], query_type: str) -> Dict[str, Any]:
+        """Indexa los precios por nombre de habitación y descarta campos redundantes"""
+        pruned = {}
+        for hab_id, info in pricing_real.items():
+            if not isinstance(info, dict):
+                pruned[hab_id] = info
+                continue
+            precios = {}
+            for key, precio in info.get("precios", {}).items():
+                if isinstance(precio, dict):
+                    precio = {
+                        k: v for k, v in precio.items()
+                        if v not in (None, [], {}) and (k != "ajustes" or query_type == "precios")
+                    }
+                precios[key] = precio
+            pruned[info.get("habitacion_nombre") or hab_id] = precios
+        return pruned
+
+    def format_servicios(self, servicios: List[Dict[str, Any]], indent: str = "") -> str:
+        """Lista de servicios en una línea cada uno: nombre (extra): observaciones"""
+        if not servicios:
+            return f"{indent}• (sin servicios registrados)"
+        lines = []
+        for serv in servicios:
+            detalle = serv.get("servicio", {}) if isinstance(serv.get("servicio"), dict) else {}
+            nombre = detalle.get("nombre") or serv.get("nombre") or "Servicio"
+            line = f"{indent}• {nombre}"
+            precio_extra = serv.get("precioExtra")
+            try:
+                if precio_extra is not None and float(precio_extra) > 0:
+                    line += f" (extra ${precio_extra})"
+            except (ValueError, TypeError):
+                pass
+            descripcion = detalle.get("descripcion") or serv.get("descripcion")
+            if descripcion:
+                line += f": {_shorten(descripcion, 120)}"
+            if serv.get("observaciones"):
+                line += f" [{_shorten(serv['observaciones'], 80)}]"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def _format_session(self, session_data: Dict[str, Any]) -> str:
+        session_formatted = "💬 CONTEXTO DE LA CONVERSACIÓN:\n"
+
+        if session_data.get("last_dates"):
+            session_formatted += f"• Fechas de consulta anterior: {_compact(session_data['last_dates'])}\n"
+
+        if session_data.get("last_habitacion"):
+            session_formatted += f"• Habitación mencionada: {session_data['last_habitacion']}\n"
+
+        if session_data.get("last_availability"):
+            session_formatted += "• Disponibilidad confirmada previamente: Sí\n"
+        elif session_data.get("last_availability") is False:
+            session_formatted += "• Disponibilidad consultada previamente: No había lugar para esas fechas\n"
+
+        # Agregar últimos 2 mensajes para contexto
+        if session_data.get("previous_messages"):
+            session_formatted += "• Mensajes recientes:\n"
+            for i, msg in enumerate(session_data["previous_messages"][:2]):
+                session_formatted += f"  {i+1}. Usuario: '{msg['user']}' → Bot: '{msg['bot'][:100]}...'\n"
+
+        return session_formatted
+
+    def _format_busqueda(self, busqueda_data: Dict[str, Any]) -> str:
+        busqueda_formatted = "🔍 BÚSQUEDA DE SERVICIO ESPECÍFICO:\n"
+        busqueda_formatted += f"• Término buscado: '{busqueda_data['termino_buscado']}'\n"
+        busqueda_formatted += f"• Habitación consultada: {busqueda_data['habitacion_actual']['nombre']}\n"
+        busqueda_formatted += f"• Escenario: {busqueda_data['escenario']}\n"
+
+        # Servicios encontrados en habitación actual
+        if busqueda_data['habitacion_actual']['servicios_encontrados']:
+            busqueda_formatted += f"• 🛏️ SERVICIOS EN HABITACIÓN ACTUAL: {_compact(busqueda_data['habitacion_actual']['servicios_encontrados'])}\n"
+
+        # Servicios encontrados en otras habitaciones
+        if busqueda_data['otras_habitaciones']:
+            busqueda_formatted += "• 🏠 SERVICIOS EN OTRAS HABITACIONES:\n"
+            for habitacion in busqueda_data['otras_habitaciones']:
+                busqueda_formatted += f"  - {habitacion['habitacion_nombre']}: {_compact(habitacion['servicios_encontrados'])}\n"
+
+        # Servicios encontrados en hospedaje
+        if busqueda_data['hospedaje']['servicios_encontrados']:
+            busqueda_formatted += f"• 🏨 SERVICIOS EN HOSPEDAJE: {_compact(busqueda_data['hospedaje']['servicios_encontrados'])}\n"
+
+        return busqueda_formatted
+
+    def format_availability(self, availability_data: Dict[str, Any]) -> str:
+        """Formatea la información de disponibilidad de forma simple y clara"""
+        try:
+            hospedaje_disp = availability_data.get("hospedaje_disponibilidad", {})
+
+            if not hospedaje_disp:
+                return "❌ NO HAY INFORMACIÓN DE DISPONIBILIDAD"
+
+            disponible = hospedaje_disp.get("disponible", False)
+            fecha_inicio = hospedaje_disp.get("fecha_inicio")
+            fecha_fin = hospedaje_disp.get("fecha_fin")
+            habitaciones_count = hospedaje_disp.get("habitaciones_disponibles", 0)
+            detalle_habitaciones = hospedaje_disp.get("detalle_habitaciones", [])
+
+            if not disponible:
+                motivo = hospedaje_disp.get("motivo", "No especificado")
+                return f"❌ NO HAY DISPONIBILIDAD para {fecha_inicio} al {fecha_fin}\nMotivo: {motivo}"
+
+            # Formatear fechas en formato legible
+            if fecha_inicio == fecha_fin:
+                fecha_texto = f"para el {self.format_date_readable(fecha_inicio)}"
+            else:
+                fecha_texto = f"del {self.format_date_readable(fecha_inicio)} al {self.format_date_readable(fecha_fin)}"
+
+            # Construir respuesta positiva
+            result = f"✅ DISPONIBILIDAD CONFIRMADA {fecha_texto}\n"
+            result += f"• {habitaciones_count} habitación(es) disponible(s)\n"
+
+            # Agregar detalles de habitaciones disponibles
+            if detalle_habitaciones:
+                result += "\nHABITACIONES DISPONIBLES:\n"
+                for i, hab in enumerate(detalle_habitaciones, 1):
+                    nombre = hab.get("nombre", "Habitación sin nombre")
+                    descripcion = _first(hab, "descripcionCorta", "descripcion_corta", default="")
+                    capacidad = hab.get("capacidad", "")
+
+                    result += f"{i}. {nombre}"
+                    if capacidad:
+                        result += f" (capacidad: {capacidad} personas)"
+                    if descripcion:
+                        result += f"\n   • {_shorten(descripcion, 100)}"
+                    result += "\n"
+
+            return result
+
+        except Exception as e:
+            logger.error(f"Error formateando disponibilidad: {e}")
+            return "❌ ERROR AL PROCESAR INFORMACIÓN DE DISPONIBILIDAD"
+
+    def format_date_readable(self, date_str: str) -> str:
+        """Convierte fecha YYYY-MM-DD a formato legible DD/MM/YYYY"""
+        try:
+            if not date_str:
+                return "fecha no especificada"
+            date_obj = datetime.strptime(date_str, "%Y-%m-%d")
+            return date_obj.strftime("%d/%m/%Y")
+        except (ValueError, TypeError):
+            return date_str
+
+    def format_habitaciones(self, habitaciones: List[Dict[str, Any]], include_price: bool = True) -> str:
+        """Formatea la información de habitaciones de forma simple"""
+        try:
+            if not habitaciones:
+                return "❌ NO HAY HABITACIONES REGISTRADAS"
+
+            result = f"🏨 HABITACIONES DEL HOSPEDAJE ({len(habitaciones)} habitación(es)):\n"
+
+            for i, hab in enumerate(habitaciones, 1):
+                nombre = hab.get("nombre", f"Habitación {i}")
+                descripcion = _first(hab, "descripcionCorta", "descripcion_corta", default="")
+                capacidad = hab.get("capacidad", "")
+                precio_base = _first(hab, "precioBase", "precio_base", default="")
+
+                result += f"\n{i}. {nombre}"
+                if capacidad:
+                    result += f" (capacidad: {capacidad} personas)"
+                if include_price and precio_base:
+                    # Formatear precio base
+                    try:
+                        from ..services.backend_service import formatear_precio_argentino
+                        precio_formateado = formatear_precio_argentino(float(precio_base))
+                        result += f" - Precio base: {precio_formateado},00"
+                    except (ValueError, TypeError):
+                        result += f" - Precio base: {precio_base}"
+
+                if descripcion:
+                    result += f"\n   • {_shorten(descripcion, 150)}"
+                result += "\n"
+
+            return result
+
+        except Exception as e:
+            logger.error(f"Error formateando habitaciones: {e}")
+            return "❌ ERROR AL PROCESAR INFORMACIÓN DE HABITACIONES"
+
+
+# Instancia global del serializador de contexto
+context_serializer = ContextSerializer()
@@ -0,0 +1,232 @@
+import hashlib
+import json
+import logging
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+from ..core.config import settings
+from ..core.database import execute_vector_query, execute_vector_values
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    """sha256 del texto tal como se envía a la API de embeddings"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _parse_vector(value: Any) -> List[float]:
+    """pgvector devuelve el vector como texto '[0.1,0.2,...]' si no hay adaptador registrado"""
+    if isinstance(value, str):
+        return json.loads(value)
+    return list(value)
+
+
+class EmbeddingCache:
+    """Cache de embeddings en dos niveles: LRU en memoria + tabla embedding_cache en Postgres.
+
+    La clave es sha256(texto) + modelo, así las preguntas repetidas y los chunks
+    que no cambiaron entre reentrenamientos no se vuelven a vectorizar. En memoria
+    los vectores se guardan como array('f') para ocupar ~6 KB por entrada.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        retention_days: Optional[int] = None,
+        max_rows: Optional[int] = None
+    ):
+        self.max_entries = settings.embedding_cache_max_entries if max_entries is None else max_entries
+        self.retention_days = settings.embedding_cache_retention_days if retention_days is None else retention_days
+        self.max_rows = settings.embedding_cache_max_rows if max_rows is None else max_rows
+        self.persistent = settings.embedding_cache_persistent
+
+        self._memory: "OrderedDict[tuple, array]" = OrderedDict()
+        self._last_purge = time.monotonic()
+        self._counters = {
+            "memory_hits": 0,
+            "db_hits": 0,
+            "misses": 0,
+            "stored": 0,
+            "evicted": 0,
+            "purged": 0,
+            "db_errors": 0,
+        }
+
+    # ---------------------------------------------------------------------
+    # Nivel en memoria
+    # ---------------------------------------------------------------------
+
+    def _remember(self, key: tuple, embedding: Sequence[float]) -> None:
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = array("f", embedding)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evicted"] += 1
+
+    def _recall(self, key: tuple) -> Optional[List[float]]:
+        vector = self._memory.get(key)
+        if vector is None:
+            return None
+        self._memory.move_to_end(key)
+        return vector.tolist()
+
+    # ---------------------------------------------------------------------
+    # API pública
+    # ---------------------------------------------------------------------
+
+    async def get(self, text: str, model: Optional[str] = None) -> Optional[List[float]]:
+        """Embedding cacheado para un texto, o None si hay que generarlo"""
+        return (await self.get_many([text], model)).get(content_hash(text))
+
+    async def get_many(self, texts: Sequence[str], model: Optional[str] = None) -> Dict[str, List[float]]:
+        """Busca varios textos a la vez; devuelve {content_hash: embedding} con los encontrados"""
+        model = model or settings.embedding_model
+        found: Dict[str, List[float]] = {}
+        pending: List[str] = []
+        seen = set()
+
+        for text in texts:
+            digest = content_hash(text)
+            if digest in seen:
+                continue
+            seen.add(digest)
+            vector = self._recall((digest, model))
+            if vector is not None:
+                found[digest] = vector
+                self._counters["memory_hits"] += 1
+            else:
+                pending.append(digest)
+
+        if pending and self.persistent:
+            try:
+                # Marca el uso en la misma consulta para que la retención conserve lo vigente
+                rows = await execute_vector_query(
+                    """
+                    UPDATE embedding_cache
+                    SET hits = hits + 1, last_used_at = now()
+                    WHERE model = %s AND content_hash = ANY(%s)
+                    RETURNING content_hash, embedding::text
+                    """,
+                    [model, pending]
+                ) or []
+                for digest, embedding in rows:
+                    vector = _parse_vector(embedding)
+                    found[digest] = vector
+                    self._remember((digest, model), vector)
+                    self._counters["db_hits"] += 1
+            except Exception as e:
+                self._counters["db_errors"] += 1
+                logger.error(f"Error leyendo cache de embeddings: {e}")
+
+        self._counters["misses"] += sum(1 for digest in pending if digest not in found)
+        return found
+
+    async def put(self, text: str, embedding: List[float], model: Optional[str] = None) -> None:
+        await self.put_many({text: embedding}, model)
+
+    async def put_many(self, embeddings: Dict[str, List[float]], model: Optional[str] = None) -> None:
+        """Guarda {texto: embedding} en memoria y en Postgres"""
+        model = model or settings.embedding_model
+        rows = []
+        for text, embedding in embeddings.items():
+            if not embedding:
+                continue
+            digest = content_hash(text)
+            self._remember((digest, model), embedding)
+            rows.append((digest, model, list(embedding)))
+
+        if not rows or not self.persistent:
+            return
+
+        try:
+            await execute_vector_values(
+                """
+                INSERT INTO embedding_cache (content_hash, model, embedding)
+                VALUES %s
+                ON CONFLICT (content_hash, model)
+                DO UPDATE SET last_used_at = now()
+                """,
+                rows,
+                template="(%s, %s, %s::vector)"
+            )
+            self._counters["stored"] += len(rows)
+        except Exception as e:
+            self._counters["db_errors"] += 1
+            logger.error(f"Error guardando cache de embeddings: {e}")
+
+        await self.maybe_purge()
+
+    # ---------------------------------------------------------------------
+    # Retención
+    # ---------------------------------------------------------------------
+
+    async def maybe_purge(self) -> None:
+        """Ejecuta la retención como máximo una vez por intervalo"""
+        if time.monotonic() - self._last_purge < settings.embedding_cache_purge_interval:
+            return
+        await self.purge()
+
+    async def purge(self) -> int:
+        """Elimina entradas sin uso en retention_days y recorta la tabla a max_rows"""
+        self._last_purge = time.monotonic()
+        if not self.persistent:
+            return 0
+        try:
+            removed = await execute_vector_query(
+                """
+                DELETE FROM embedding_cache
+                WHERE last_used_at < now() - make_interval(days => %s)
+                RETURNING 1
+                """,
+                [self.retention_days]
+            ) or []
+            purged = len(removed)
+
+            if self.max_rows > 0:
+                overflow = await execute_vector_query(
+                    """
+                    DELETE FROM embedding_cache
+                    WHERE (content_hash, model) IN (
+                        SELECT content_hash, model FROM embedding_cache
+                        ORDER BY last_used_at DESC
+                        OFFSET %s
+                    )
+                    RETURNING 1
+                    """,
+                    [self.max_rows]
+                ) or []
+                purged += len(overflow)
+
+            if purged:
+                logger.info(f"🧹 Cache de embeddings - {purged} entradas eliminadas por retención")
+            self._counters["purged"] += purged
+            return purged
+        except Exception as e:
+            self._counters["db_errors"] += 1
+            logger.error(f"Error aplicando retención del cache de embeddings: {e}")
+            return 0
+
+    def clear_memory(self) -> None:
+        self._memory.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Tasa de aciertos por nivel y tamaño del LRU"""
+        hits = self._counters["memory_hits"] + self._counters["db_hits"]
+        lookups = hits + self._counters["misses"]
+        return {
+            "entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "persistent": self.persistent,
+            "retention_days": self.retention_days,
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            "memory_hit_rate": round(self._counters["memory_hits"] / lookups, 3) if lookups else 0.0,
+            **self._counters,
+        }
+
+
+# Instancia global del cache
+embedding_cache = EmbeddingCache()
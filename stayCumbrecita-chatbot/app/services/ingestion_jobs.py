@@ -0,0 +1,319 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from ..core.config import settings
+from ..core.database import execute_vector_query, execute_vector_query_one
+
+logger = logging.getLogger(__name__)
+
+# Proceso dueño de los jobs que encola esta instancia
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+# Cada cuánto los jobs activos de este proceso renuevan updated_at
+HEARTBEAT_SECONDS = 30
+# Un job activo sin heartbeat en este tiempo quedó huérfano (su proceso murió o se colgó)
+STALE_JOB_SECONDS = 3 * HEARTBEAT_SECONDS
+
+ACTIVE_STATUSES = ("queued", "running")
+
+JOB_COLUMNS = "id, hospedaje_id, kind, status, progress, error, created_at, started_at, finished_at"
+# Id del job activo más reciente de un hospedaje y tipo con heartbeat vigente (parámetros: hospedaje, kind, segundos)
+ACTIVE_JOB_QUERY = """
+    SELECT id FROM ingestion_jobs
+    WHERE hospedaje_id = %s AND kind = %s AND status IN ('queued', 'running')
+      AND updated_at > now() - make_interval(secs => %s)
+    ORDER BY created_at DESC
+    LIMIT 1
+"""
+
+# runner(hospedaje_id, progress) -> bool
+JobRunner = Callable[..., Awaitable[bool]]
+
+
+def _empty_progress() -> Dict[str, int]:
+    return {"documents_total": 0, "documents_done": 0, "chunks_total": 0, "chunks_done": 0}
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _is_orphaned(worker_id: Optional[str], idle_seconds: float) -> bool:
+    """Si un job activo quedó sin proceso que lo atienda.
+
+    Sin heartbeat reciente siempre lo está: en este mismo host el pid pudo
+    reutilizarse tras un reinicio del contenedor (otro worker, el supervisor
+    de uvicorn) o el proceso dueño puede seguir vivo pero colgado.
+    """
+    if not worker_id or idle_seconds > STALE_JOB_SECONDS:
+        return True
+    host, _, pid = worker_id.rpartition(":")
+    if host == socket.gethostname() and pid.isdigit():
+        return int(pid) == os.getpid() or not _pid_alive(int(pid))
+    return False
+
+
+def _row_to_job(row: tuple) -> Dict[str, Any]:
+    """Job a partir de una fila de ingestion_jobs (columnas de JOB_COLUMNS)"""
+    return {
+        "id": str(row[0]),
+        "hospedaje_id": str(row[1]),
+        "kind": row[2],
+        "status": row[3],
+        "progress": row[4] or _empty_progress(),
+        "error": row[5],
+        "created_at": row[6].isoformat() if row[6] else None,
+        "started_at": row[7].isoformat() if row[7] else None,
+        "finished_at": row[8].isoformat() if row[8] else None,
+    }
+
+
+class IngestionJobManager:
+    """Cola de jobs de ingesta/re-entrenamiento atendida por workers en segundo plano.
+
+    El endpoint de retrain solo encola y devuelve el id del job; los workers
+    ejecutan el runner configurado al iniciar la app y van registrando el avance
+    en memoria y en la tabla ingestion_jobs (para consultarlo desde cualquier proceso).
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        self.workers = workers or settings.ingestion_workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._runner: Optional[JobRunner] = None
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+
+    def start(self, runner: JobRunner) -> None:
+        """Lanza los workers (llamar desde el lifespan de la app)"""
+        self._runner = runner
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"ingestion-worker-{i}")
+            for i in range(self.workers)
+        ]
+        self._tasks.append(asyncio.create_task(self._heartbeat(), name="ingestion-heartbeat"))
+        logger.info(f"🏗️ Ingesta - {self.workers} worker(s) iniciados")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def recover_stale_jobs(self) -> None:
+        """Marca como fallidos los jobs que quedaron activos tras un reinicio.
+
+        Se consideran huérfanos los que dejaron de renovar su heartbeat y, sin
+        esperar a que venza, los jobs sin dueño registrado y los de un proceso
+        de este mismo host que ya no existe (o cuyo pid es el de este proceso,
+        que recién arranca).
+        """
+        try:
+            rows = await execute_vector_query(
+                """
+                SELECT id, worker_id, EXTRACT(EPOCH FROM now() - updated_at)
+                FROM ingestion_jobs
+                WHERE status IN ('queued', 'running')
+                """
+            )
+            orphaned = [str(row[0]) for row in rows if _is_orphaned(row[1], float(row[2] or 0))]
+            if not orphaned:
+                return
+            await execute_vector_query(
+                """
+                UPDATE ingestion_jobs
+                SET status = 'failed', error = 'Interrumpido por reinicio del servicio', finished_at = now(), updated_at = now()
+                WHERE id = ANY(%s::uuid[]) AND status IN ('queued', 'running')
+                """,
+                [orphaned]
+            )
+            logger.warning(f"🏗️ Ingesta - {len(orphaned)} job(s) interrumpidos por un reinicio marcados como fallidos")
+        except Exception as e:
+            logger.error(f"Error recuperando jobs de ingesta: {e}")
+
+    async def enqueue(self, hospedaje_id: str, kind: str = "retrain") -> Dict[str, Any]:
+        """Encola un job; si el hospedaje ya tiene uno activo (en este o en otro worker), devuelve ese"""
+        for job in self._jobs.values():
+            if job["hospedaje_id"] == hospedaje_id and job["kind"] == kind and job["status"] in ACTIVE_STATUSES:
+                logger.info(f"🏗️ Ingesta - Hospedaje {hospedaje_id} ya tiene el job {job['id']} en curso")
+                return job
+
+        if self._queue is None:
+            raise RuntimeError("Los workers de ingesta no fueron iniciados")
+
+        # Con varios workers el pedido anterior pudo haber caído en otro proceso
+        active = await self._find_active(hospedaje_id, kind)
+        if active:
+            logger.info(f"🏗️ Ingesta - Hospedaje {hospedaje_id} ya tiene el job {active['id']} en curso en otro worker")
+            return active
+
+        job = {
+            "id": str(uuid.uuid4()),
+            "hospedaje_id": hospedaje_id,
+            "kind": kind,
+            "status": "queued",
+            "progress": _empty_progress(),
+            "error": None,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "started_at": None,
+            "finished_at": None,
+        }
+
+        try:
+            # Chequeo e inserción en una sola sentencia: si otro worker lo registró recién, no se duplica
+            inserted = await execute_vector_query(
+                f"""
+                INSERT INTO ingestion_jobs (id, hospedaje_id, kind, status, progress, worker_id)
+                SELECT %s, %s, %s, %s, %s, %s
+                WHERE NOT EXISTS ({ACTIVE_JOB_QUERY})
+                RETURNING id
+                """,
+                [
+                    job["id"], hospedaje_id, kind, job["status"], json.dumps(job["progress"]), WORKER_ID,
+                    hospedaje_id, kind, STALE_JOB_SECONDS
+                ]
+            )
+            if not inserted:
+                active = await self._find_active(hospedaje_id, kind)
+                if active:
+                    logger.info(f"🏗️ Ingesta - Hospedaje {hospedaje_id} ya tiene el job {active['id']} en curso en otro worker")
+                    return active
+        except Exception as e:
+            logger.error(f"Error registrando job de ingesta: {e}")
+
+        self._jobs[job["id"]] = job
+        await self._queue.put(job["id"])
+        logger.info(f"🏗️ Ingesta - Job {job['id']} encolado para hospedaje {hospedaje_id} ({self._queue.qsize()} en cola)")
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Estado de un job (memoria del proceso o tabla ingestion_jobs)"""
+        job = self._jobs.get(job_id)
+        if job:
+            return job
+
+        try:
+            row = await execute_vector_query_one(f"SELECT {JOB_COLUMNS} FROM ingestion_jobs WHERE id = %s", [job_id])
+        except Exception as e:
+            logger.error(f"Error consultando job de ingesta: {e}")
+            return None
+
+        return _row_to_job(row) if row else None
+
+    async def _find_active(self, hospedaje_id: str, kind: str) -> Optional[Dict[str, Any]]:
+        """Job activo con heartbeat vigente, registrado por cualquier proceso (None si no hay o si falla la consulta)"""
+        try:
+            row = await execute_vector_query_one(
+                f"SELECT {JOB_COLUMNS} FROM ingestion_jobs WHERE id = ({ACTIVE_JOB_QUERY})",
+                [hospedaje_id, kind, STALE_JOB_SECONDS]
+            )
+        except Exception as e:
+            logger.error(f"Error buscando jobs de ingesta activos: {e}")
+            return None
+        return _row_to_job(row) if row else None
+
+    async def _persist(self, job: Dict[str, Any]) -> None:
+        try:
+            await execute_vector_query(
+                """
+                UPDATE ingestion_jobs
+                SET status = %s, progress = %s, error = %s,
+                    started_at = %s, finished_at = %s, updated_at = now()
+                WHERE id = %s
+                """,
+                [
+                    job["status"], json.dumps(job["progress"]), job["error"],
+                    job["started_at"], job["finished_at"], job["id"]
+                ]
+            )
+        except Exception as e:
+            logger.error(f"Error actualizando job de ingesta {job['id']}: {e}")
+
+    async def _heartbeat(self) -> None:
+        """Renueva updated_at de los jobs activos de este proceso (así otro host no los da por huérfanos)"""
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            active = [job_id for job_id, job in self._jobs.items() if job["status"] in ACTIVE_STATUSES]
+            if not active:
+                continue
+            try:
+                await execute_vector_query(
+                    "UPDATE ingestion_jobs SET updated_at = now() WHERE id = ANY(%s::uuid[])",
+                    [active]
+                )
+            except Exception as e:
+                logger.error(f"Error renovando heartbeat de jobs de ingesta: {e}")
+
+    async def _worker(self, worker_id: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(self._jobs[job_id])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error en worker de ingesta {worker_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        job["status"] = "running"
+        job["started_at"] = datetime.now(timezone.utc).isoformat()
+        await self._persist(job)
+
+        async def progress(**delta: int) -> None:
+            for key, value in delta.items():
+                job["progress"][key] = job["progress"].get(key, 0) + value
+            # Persistir al terminar cada documento (no por cada chunk)
+            if "documents_done" in delta or "documents_total" in delta:
+                await self._persist(job)
+
+        try:
+            success = await self._runner(job["hospedaje_id"], progress=progress)
+            job["status"] = "completed" if success else "failed"
+            if not success:
+                job["error"] = "El re-entrenamiento no pudo completarse; se conserva el conocimiento anterior"
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+            logger.error(f"Error ejecutando job de ingesta {job['id']}: {e}")
+        finally:
+            job["finished_at"] = datetime.now(timezone.utc).isoformat()
+            await self._persist(job)
+            self._forget_finished()
+
+        logger.info(
+            f"🏗️ Ingesta - Job {job['id']} {job['status']}: "
+            f"{job['progress']['documents_done']}/{job['progress']['documents_total']} documentos, "
+            f"{job['progress']['chunks_done']}/{job['progress']['chunks_total']} chunks"
+        )
+
+    def _forget_finished(self, keep: int = 100) -> None:
+        """Conserva en memoria solo los últimos jobs terminados (el resto queda en la tabla)"""
+        finished = [job_id for job_id, job in self._jobs.items() if job["status"] not in ACTIVE_STATUSES]
+        for job_id in finished[:-keep]:
+            self._jobs.pop(job_id, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        statuses: Dict[str, int] = {}
+        for job in self._jobs.values():
+            statuses[job["status"]] = statuses.get(job["status"], 0) + 1
+        return {
+            "workers": len(self._tasks),
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "jobs": statuses,
+        }
+
+
+# Instancia global del gestor de jobs
+ingestion_jobs = IngestionJobManager()
@@ -1,31 +1,150 @@
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
-from openai import AsyncOpenAI
-import httpx
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional
 from ..core.config import settings
-from ..core.database import execute_vector_query, execute_vector_query_one
-from ..services.pdf_processor import PDFProcessor
+from ..core.openai_client import create_openai_client
+from ..core.database import execute_vector_query, execute_vector_query_one, execute_vector_transaction
+from ..services.embedding_cache import embedding_cache, content_hash
+from ..services.vector_index import vector_index
+from ..services.vector_storage import vector_storage, normalize
 import json
 
 logger = logging.getLogger(__name__)
 
+# Callback de avance de ingesta: recibe incrementos (documents_done=1, chunks_total=N, ...)
+ProgressCallback = Callable[..., Awaitable[None]]
+
+CHUNK_UPSERT_QUERY = """
+INSERT INTO chatbot_knowledge 
+(hospedaje_id, document_id, chunk_index, content, content_hash, embedding, metadata, created_at)
+VALUES %s
+ON CONFLICT (hospedaje_id, document_id, chunk_index) 
+DO UPDATE SET 
+    content = EXCLUDED.content,
+    content_hash = EXCLUDED.content_hash,
+    embedding = EXCLUDED.embedding,
+    metadata = EXCLUDED.metadata,
+    updated_at = NOW()
+"""
+CHUNK_ROW_TEMPLATE = f"(%s, %s, %s, %s, %s, %s::{vector_storage.cast}, %s::jsonb, NOW())"
+
+DOCUMENT_UPSERT_QUERY = """
+INSERT INTO knowledge_documents (hospedaje_id, document_id, content_hash, chunk_count, source, updated_at)
+VALUES %s
+ON CONFLICT (hospedaje_id, document_id)
+DO UPDATE SET
+    content_hash = EXCLUDED.content_hash,
+    chunk_count = EXCLUDED.chunk_count,
+    source = EXCLUDED.source,
+    updated_at = NOW()
+"""
+DOCUMENT_ROW_TEMPLATE = "(%s, %s, %s, %s, %s, NOW())"
+
+# Constante de reciprocal rank fusion (valor habitual en la literatura)
+RRF_K = 60
+
+# Términos de búsqueda léxica: palabras de 2+ caracteres (sin signos que rompan to_tsquery)
+LEXICAL_TERM_PATTERN = re.compile(r"[0-9a-záéíóúñü]{2,}")
+MAX_LEXICAL_TERMS = 16
+
+
+def lexical_terms(query: str) -> List[str]:
+    """Palabras de la consulta para armar un to_tsquery con OR"""
+    terms: List[str] = []
+    for term in LEXICAL_TERM_PATTERN.findall((query or "").lower()):
+        if term not in terms:
+            terms.append(term)
+    return terms[:MAX_LEXICAL_TERMS]
+
 class KnowledgeService:
     def __init__(self):
-        self.openai_client = AsyncOpenAI(api_key=settings.openai_api_key)
-        self.pdf_processor = PDFProcessor()
+        self.openai_client = create_openai_client()
+        self._pdf_processor = None
+        # Límite de requests simultáneos a la API de embeddings
+        self._embedding_semaphore = asyncio.Semaphore(settings.embedding_max_concurrency)
+        self._retrieval_stats = {"lexical_fast_path": 0, "lexical_only": 0, "vector_only": 0, "hybrid": 0}
+        
+    @property
+    def pdf_processor(self):
+        """Procesador de PDFs (cloudinary y PyPDF2 se importan recién en la primera ingesta)"""
+        if self._pdf_processor is None:
+            from ..services.pdf_processor import PDFProcessor
+            self._pdf_processor = PDFProcessor()
+        return self._pdf_processor
         
     async def generate_embedding(self, text: str) -> List[float]:
-        """Genera embedding para un texto"""
+        """Genera embedding normalizado para un texto (reutilizando el cache si ya se calculó)"""
         try:
+            cached = await embedding_cache.get(text, vector_storage.embedding_key)
+            if cached:
+                return cached
+            
             response = await self.openai_client.embeddings.create(
                 model=settings.embedding_model,
-                input=text
+                input=text,
+                **vector_storage.request_options()
             )
-            return response.data[0].embedding
+            embedding = normalize(response.data[0].embedding)
+            await embedding_cache.put(text, embedding, vector_storage.embedding_key)
+            return embedding
         except Exception as e:
             logger.error(f"Error generando embedding: {e}")
             return []
     
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Genera embeddings para varios textos en lotes (la API acepta listas de inputs).
+        
+        Devuelve una lista alineada con texts; los que fallen quedan como [].
+        """
+        if not texts:
+            return []
+        
+        model = settings.embedding_model
+        cache_key = vector_storage.embedding_key
+        cached = await embedding_cache.get_many(texts, cache_key)
+        
+        # Textos únicos que no estaban en el cache
+        missing: List[str] = []
+        seen = set(cached)
+        for text in texts:
+            digest = content_hash(text)
+            if digest not in seen:
+                seen.add(digest)
+                missing.append(text)
+        
+        batch_size = max(1, settings.embedding_batch_size)
+        batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+        
+        async def embed_batch(batch: List[str]) -> Dict[str, List[float]]:
+            async with self._embedding_semaphore:
+                try:
+                    response = await self.openai_client.embeddings.create(
+                        model=model,
+                        input=batch,
+                        **vector_storage.request_options()
+                    )
+                    # La API devuelve los vectores con el índice del input correspondiente
+                    return {batch[item.index]: normalize(item.embedding) for item in response.data}
+                except Exception as e:
+                    logger.error(f"Error generando lote de {len(batch)} embeddings: {e}")
+                    return {}
+        
+        generated: Dict[str, List[float]] = {}
+        for result in await asyncio.gather(*(embed_batch(batch) for batch in batches)):
+            generated.update(result)
+        
+        if generated:
+            await embedding_cache.put_many(generated, cache_key)
+        
+        if missing:
+            logger.info(
+                f"🧮 Embeddings: {len(texts)} textos, {len(texts) - len(missing)} desde cache, "
+                f"{len(generated)}/{len(missing)} generados en {len(batches)} lotes"
+            )
+        
+        return [generated.get(text) or cached.get(content_hash(text)) or [] for text in texts]
+    
     async def search_similar_content(
         self, 
         hospedaje_id: str, 
@@ -34,54 +153,138 @@ class KnowledgeService:
     ) -> Optional[str]:
         """Busca contenido similar en los documentos del hospedaje"""
         try:
-            if limit is None:
-                limit = settings.max_chunks_per_query
-                
-            # Generar embedding de la consulta
-            query_embedding = await self.generate_embedding(query)
-            if not query_embedding:
-                return None
-            
-            # Buscar chunks similares
-            search_query = """
-            SELECT content, metadata, 
-                   1 - (embedding <=> %s::vector) as similarity
-            FROM chatbot_knowledge 
-            WHERE hospedaje_id = %s
-            AND 1 - (embedding <=> %s::vector) > %s
-            ORDER BY similarity DESC
-            LIMIT %s
-            """
-            
-            results = await execute_vector_query(search_query, [
-                query_embedding,
-                hospedaje_id,
-                settings.similarity_threshold,
-                limit
-            ])
-            
+            results = await self.search_chunks(hospedaje_id, query, limit)
             if not results:
                 return None
             
-            # Formatear resultados
-            formatted_content = []
-            for row in results:
-                content = row[0]
-                metadata = json.loads(row[1]) if row[1] else {}
-                similarity = row[2]
-                
-                formatted_content.append({
-                    "content": content,
-                    "source": metadata.get("source", "documento"),
-                    "similarity": similarity
-                })
-            
-            return self._format_search_results(formatted_content)
+            return self._format_search_results(results)
             
         except Exception as e:
             logger.error(f"Error buscando contenido similar: {e}")
             return None
     
+    async def search_chunks(
+        self,
+        hospedaje_id: str,
+        query: str,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Búsqueda híbrida: texto completo + vectores combinados con reciprocal rank fusion.
+        
+        Si la búsqueda léxica encuentra una coincidencia fuerte (ej: nombre de una
+        habitación o "check-out 10hs") se responde con ella sin generar el embedding.
+        """
+        if limit is None:
+            limit = settings.max_chunks_per_query
+        mode = settings.retrieval_mode
+        candidates = max(limit * 3, 10)
+        
+        lexical: List[Dict[str, Any]] = []
+        if mode in ("hybrid", "lexical"):
+            lexical = await self._lexical_search(hospedaje_id, query, candidates)
+            if mode == "lexical":
+                self._retrieval_stats["lexical_only"] += 1
+                return lexical[:limit]
+            if lexical and lexical[0]["lexical_rank"] >= settings.lexical_fast_threshold:
+                self._retrieval_stats["lexical_fast_path"] += 1
+                return lexical[:limit]
+        
+        vector = await self._vector_search(hospedaje_id, query, candidates)
+        if mode == "vector" or not lexical:
+            self._retrieval_stats["vector_only"] += 1
+            return vector[:limit]
+        
+        self._retrieval_stats["hybrid"] += 1
+        return self._reciprocal_rank_fusion([lexical, vector])[:limit]
+    
+    async def _lexical_search(self, hospedaje_id: str, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Búsqueda de texto completo (configuración 'spanish') sobre search_vector"""
+        terms = lexical_terms(query)
+        if not terms:
+            return []
+        
+        # OR de los términos: ts_rank_cd premia los chunks que tienen más términos y más cercanos
+        results = await execute_vector_query(
+            """
+            SELECT id, content, metadata,
+                   ts_rank_cd(search_vector, query, 32) AS rank
+            FROM chatbot_knowledge, to_tsquery('spanish', %s) AS query
+            WHERE hospedaje_id = %s
+            AND search_vector @@ query
+            ORDER BY rank DESC
+            LIMIT %s
+            """,
+            [" | ".join(terms), hospedaje_id, limit]
+        ) or []
+        
+        return [
+            {
+                **self._result_from_row(row),
+                "lexical_rank": float(row[3]),
+                "similarity": float(row[3]),
+            }
+            for row in results
+        ]
+    
+    async def _vector_search(self, hospedaje_id: str, query: str, limit: int) -> List[Dict[str, Any]]:
+        """Búsqueda por similitud coseno de embeddings (producto interno sobre vectores normalizados)"""
+        # Generar embedding de la consulta
+        query_embedding = await self.generate_embedding(query)
+        if not query_embedding:
+            return []
+        
+        # Índice en memoria (si está habilitado): sin ida y vuelta a la base
+        in_memory = await vector_index.search(hospedaje_id, query_embedding, limit, settings.similarity_threshold)
+        if in_memory is not None:
+            return in_memory
+        
+        # Ordenar por distancia permite usar el índice ivfflat; el umbral se aplica después
+        results = await execute_vector_query(
+            f"""
+            SELECT id, content, metadata,
+                   {vector_storage.similarity_sql()} AS similarity
+            FROM chatbot_knowledge 
+            WHERE hospedaje_id = %s
+            ORDER BY {vector_storage.order_sql()}
+            LIMIT %s
+            """,
+            [query_embedding, hospedaje_id, query_embedding, limit]
+        ) or []
+        
+        return [
+            {**self._result_from_row(row), "similarity": float(row[3])}
+            for row in results
+            if row[3] > settings.similarity_threshold
+        ]
+    
+    @staticmethod
+    def _result_from_row(row) -> Dict[str, Any]:
+        metadata = row[2] or {}
+        if isinstance(metadata, str):
+            metadata = json.loads(metadata)
+        return {
+            "id": str(row[0]),
+            "content": row[1],
+            "source": metadata.get("source", "documento"),
+        }
+    
+    @staticmethod
+    def _reciprocal_rank_fusion(rankings: List[List[Dict[str, Any]]], k: int = RRF_K) -> List[Dict[str, Any]]:
+        """Combina rankings sumando 1 / (k + posición) de cada chunk en cada lista"""
+        scores: Dict[str, float] = {}
+        merged: Dict[str, Dict[str, Any]] = {}
+        for ranking in rankings:
+            for position, result in enumerate(ranking, 1):
+                scores[result["id"]] = scores.get(result["id"], 0.0) + 1.0 / (k + position)
+                # Conservar la similitud vectorial si existe (es la más comparable entre consultas)
+                merged[result["id"]] = {**merged.get(result["id"], {}), **result}
+        
+        ordered = sorted(scores, key=scores.get, reverse=True)
+        return [{**merged[chunk_id], "rrf_score": scores[chunk_id]} for chunk_id in ordered]
+    
+    def retrieval_metrics(self) -> Dict[str, Any]:
+        return {"mode": settings.retrieval_mode, **self._retrieval_stats}
+    
     def _format_search_results(self, results: List[Dict[str, Any]]) -> str:
         """Formatea los resultados de búsqueda para el prompt"""
         formatted = []
@@ -96,32 +299,14 @@ class KnowledgeService:
         return "\n".join(formatted)
     
     async def process_hospedaje_documents(self, hospedaje_id: str) -> bool:
-        """Procesa todos los documentos de un hospedaje"""
-        try:
-            # Obtener documentos desde el backend
-            documents = await self._get_hospedaje_documents(hospedaje_id)
-            
-            if not documents:
-                logger.info(f"No se encontraron documentos para hospedaje {hospedaje_id}")
-                return True
-            
-            # Procesar cada documento
-            for doc in documents:
-                success = await self._process_single_document(hospedaje_id, doc)
-                if not success:
-                    logger.error(f"Error procesando documento {doc['id']}")
-                    return False
-            
-            logger.info(f"Procesados {len(documents)} documentos para hospedaje {hospedaje_id}")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error procesando documentos del hospedaje: {e}")
-            return False
+        """Procesa todos los documentos de un hospedaje (solo vectoriza lo que no está cargado)"""
+        return await self.retrain_hospedaje_knowledge(hospedaje_id)
     
-    async def _get_hospedaje_documents(self, hospedaje_id: str) -> List[Dict[str, Any]]:
-        """Obtiene los documentos de un hospedaje desde el backend"""
+    async def _get_hospedaje_documents(self, hospedaje_id: str) -> Optional[List[Dict[str, Any]]]:
+        """Obtiene los documentos de un hospedaje desde el backend (None si falla la consulta)"""
         try:
+            import httpx
+
             backend_url = settings.backend_url
             async with httpx.AsyncClient() as client:
                 response = await client.get(f"{backend_url}/chatbot/{hospedaje_id}/documents")
@@ -130,132 +315,221 @@ class KnowledgeService:
                     return response.json()
                 else:
                     logger.error(f"Error obteniendo documentos: {response.status_code}")
-                    return []
+                    return None
                     
         except Exception as e:
             logger.error(f"Error consultando documentos: {e}")
-            return []
+            return None
     
-    async def _process_single_document(
-        self, 
-        hospedaje_id: str, 
-        document: Dict[str, Any]
-    ) -> bool:
-        """Procesa un documento individual"""
-        try:
-            doc_id = document["id"]
-            doc_url = document["url"]
-            doc_name = document.get("nombre", "documento")
-            
-            # Verificar si ya fue procesado
-            if await self._is_document_processed(hospedaje_id, doc_id):
-                logger.info(f"Documento {doc_id} ya fue procesado")
-                return True
-            
-            # Descargar PDF a través del proxy del backend
-            text_content = await self.pdf_processor.extract_text_from_backend_proxy(doc_id)
-            if not text_content:
-                logger.error(f"No se pudo extraer texto del documento {doc_id}")
-                return False
-            
-            # Dividir en chunks
-            chunks = await self.pdf_processor.split_into_chunks(text_content)
-            
-            # Procesar cada chunk
-            for i, chunk in enumerate(chunks):
-                # Generar embedding
-                embedding = await self.generate_embedding(chunk)
-                
-                # ⚠️ TEMPORAL: Guardar chunk aunque falle el embedding
-                if not embedding:
-                    logger.warning(f"No se pudo generar embedding para chunk {i}, guardando sin embedding")
-                    embedding = [0.0] * 1536  # Vector vacío compatible con text-embedding-3-small
-                
-                # Guardar en base de datos
-                await self._save_chunk(
-                    hospedaje_id=hospedaje_id,
-                    document_id=doc_id,
-                    chunk_index=i,
-                    content=chunk,
-                    embedding=embedding,
-                    metadata={
-                        "source": doc_name,
-                        "document_id": doc_id,
-                        "chunk_index": i,
-                        "total_chunks": len(chunks)
-                    }
-                )
-            
-            logger.info(f"Procesado documento {doc_id} en {len(chunks)} chunks")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Error procesando documento individual: {e}")
-            return False
+    async def _get_stored_document_hashes(self, hospedaje_id: str) -> Dict[str, str]:
+        """Hash del contenido de cada documento ya procesado: {document_id: hash}"""
+        rows = await execute_vector_query(
+            "SELECT document_id, content_hash FROM knowledge_documents WHERE hospedaje_id = %s",
+            [hospedaje_id]
+        ) or []
+        return {document_id: doc_hash for document_id, doc_hash in rows}
     
-    async def _is_document_processed(self, hospedaje_id: str, document_id: str) -> bool:
-        """Verifica si un documento ya fue procesado"""
-        try:
-            query = """
-            SELECT COUNT(*) FROM chatbot_knowledge 
+    async def _get_stored_chunk_hashes(self, hospedaje_id: str, document_id: str) -> Dict[int, Optional[str]]:
+        """Hash de cada chunk guardado de un documento: {chunk_index: hash}"""
+        rows = await execute_vector_query(
+            """
+            SELECT chunk_index, content_hash FROM chatbot_knowledge
             WHERE hospedaje_id = %s AND document_id = %s
+            """,
+            [hospedaje_id, document_id]
+        ) or []
+        return {chunk_index: chunk_hash for chunk_index, chunk_hash in rows}
+    
+    async def _get_stored_embeddings(self, hospedaje_id: str, chunk_hashes: List[str]) -> Dict[str, List[float]]:
+        """Embeddings ya guardados para chunks con el mismo contenido (aunque cambien de posición)"""
+        if not chunk_hashes:
+            return {}
+        rows = await execute_vector_query(
             """
-            
-            result = await execute_vector_query_one(query, [hospedaje_id, document_id])
-            return result[0] > 0 if result else False
-            
-        except Exception as e:
-            logger.error(f"Error verificando documento procesado: {e}")
-            return False
+            SELECT DISTINCT ON (content_hash) content_hash, embedding::text
+            FROM chatbot_knowledge
+            WHERE hospedaje_id = %s AND content_hash = ANY(%s)
+            """,
+            [hospedaje_id, chunk_hashes]
+        ) or []
+        return {chunk_hash: json.loads(embedding) for chunk_hash, embedding in rows}
     
-    async def _save_chunk(
+    async def _diff_document(
         self,
         hospedaje_id: str,
-        document_id: str,
-        chunk_index: int,
-        content: str,
-        embedding: List[float],
-        metadata: Dict[str, Any]
-    ):
-        """Guarda un chunk en la base de datos"""
-        try:
-            query = """
-            INSERT INTO chatbot_knowledge 
-            (hospedaje_id, document_id, chunk_index, content, embedding, metadata, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, NOW())
-            ON CONFLICT (hospedaje_id, document_id, chunk_index) 
-            DO UPDATE SET 
-                content = EXCLUDED.content,
-                embedding = EXCLUDED.embedding,
-                metadata = EXCLUDED.metadata,
-                updated_at = NOW()
-            """
-            
-            await execute_vector_query(query, [
+        document: Dict[str, Any],
+        stored_hash: Optional[str],
+        progress: Optional[ProgressCallback] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Compara un documento con lo guardado y prepara solo los chunks nuevos o modificados"""
+        doc_id = document["id"]
+        doc_name = document.get("nombre", "documento")
+        
+        # Descargar PDF a través del proxy del backend
+        text_content = await self.pdf_processor.extract_text_from_backend_proxy(doc_id)
+        if not text_content:
+            logger.error(f"No se pudo extraer texto del documento {doc_id}")
+            return None
+        
+        # El hash incluye la configuración de chunking para re-dividir si cambia
+        doc_hash = content_hash(f"{self.pdf_processor.chunking_signature}\n{text_content}")
+        if doc_hash == stored_hash:
+            await self._report(progress, documents_done=1)
+            logger.info(f"Documento {doc_id} sin cambios")
+            return {"document_id": doc_id, "status": "unchanged"}
+        
+        # Dividir en chunks y comparar por posición
+        chunk_items = await self.pdf_processor.split_into_chunks_with_metadata(text_content)
+        chunks = [item["content"] for item in chunk_items]
+        chunk_hashes = [content_hash(chunk) for chunk in chunks]
+        stored_chunks = await self._get_stored_chunk_hashes(hospedaje_id, doc_id)
+        changed = [i for i, chunk_hash in enumerate(chunk_hashes) if stored_chunks.get(i) != chunk_hash]
+        await self._report(progress, chunks_total=len(changed))
+        
+        # Reutilizar embeddings de chunks con el mismo contenido; vectorizar el resto en lotes
+        reusable = await self._get_stored_embeddings(hospedaje_id, [chunk_hashes[i] for i in changed])
+        to_embed = [i for i in changed if chunk_hashes[i] not in reusable]
+        embedded = dict(zip(to_embed, await self.generate_embeddings([chunks[i] for i in to_embed])))
+        
+        rows = []
+        failed = []
+        for i in changed:
+            embedding = reusable.get(chunk_hashes[i]) or embedded.get(i)
+            chunk_hash = chunk_hashes[i]
+            # ⚠️ TEMPORAL: Guardar chunk aunque falle el embedding (sin hash, para reintentarlo)
+            if not embedding:
+                failed.append(i)
+                embedding = [0.0] * vector_storage.dimensions  # Vector vacío del tamaño de la columna
+                chunk_hash = None
+            rows.append((
                 hospedaje_id,
-                document_id,
-                chunk_index,
-                content,
+                doc_id,
+                i,
+                chunks[i],
+                chunk_hash,
                 embedding,
-                json.dumps(metadata)
-            ])
-            
-        except Exception as e:
-            logger.error(f"Error guardando chunk: {e}")
+                json.dumps({
+                    "source": doc_name,
+                    "document_id": doc_id,
+                    **chunk_items[i]["metadata"]
+                })
+            ))
+        if failed:
+            # Sin registrar el hash del documento: el próximo re-entrenamiento no lo da por
+            # "sin cambios" y vuelve a vectorizar los chunks guardados sin hash
+            logger.warning(f"No se pudo generar embedding para chunks {failed}, guardando sin embedding")
+        
+        await self._report(progress, documents_done=1, chunks_done=len(rows))
+        logger.info(
+            f"Documento {doc_id}: {len(chunks)} chunks, {len(changed)} modificados "
+            f"({len(to_embed)} vectorizados, {len(changed) - len(to_embed)} reutilizados)"
+        )
+        return {
+            "document_id": doc_id,
+            "status": "changed" if stored_hash else "added",
+            "rows": rows,
+            "document_row": None if failed else (hospedaje_id, doc_id, doc_hash, len(chunks), doc_name),
+            "chunk_count": len(chunks),
+            "chunks_failed": len(failed),
+            "chunks_embedded": len(to_embed),
+            "chunks_reused": len(changed) - len(to_embed),
+            "chunks_unchanged": len(chunks) - len(changed),
+            "chunks_deleted": sum(1 for index in stored_chunks if index >= len(chunks)),
+        }
     
-    async def retrain_hospedaje_knowledge(self, hospedaje_id: str) -> bool:
-        """Re-entrena el conocimiento de un hospedaje"""
+    @staticmethod
+    async def _report(progress: Optional[ProgressCallback], **delta: int):
+        """Informa avance al job de ingesta (si lo hay)"""
+        if progress:
+            try:
+                await progress(**delta)
+            except Exception as e:
+                logger.warning(f"No se pudo reportar progreso de ingesta: {e}")
+    
+    async def retrain_hospedaje_knowledge(
+        self,
+        hospedaje_id: str,
+        progress: Optional[ProgressCallback] = None
+    ) -> bool:
+        """Re-entrena el conocimiento de un hospedaje de forma incremental.
+        
+        Compara el hash de cada documento y de cada chunk con lo guardado: solo se
+        vectorizan los chunks nuevos o modificados y solo se borran los que ya no
+        existen. Todos los cambios se aplican en una sola transacción, así las
+        consultas ven el conocimiento anterior hasta el final y, si algo falla,
+        queda intacto.
+        """
         try:
-            # Eliminar conocimiento existente
-            await self._delete_hospedaje_knowledge(hospedaje_id)
+            documents = await self._get_hospedaje_documents(hospedaje_id)
+            if documents is None:
+                logger.error(f"Re-entrenamiento abortado: no se pudieron obtener los documentos de {hospedaje_id}")
+                return False
+            await self._report(progress, documents_total=len(documents))
             
-            # Re-procesar documentos
-            success = await self.process_hospedaje_documents(hospedaje_id)
+            stored_hashes = await self._get_stored_document_hashes(hospedaje_id)
+            semaphore = asyncio.Semaphore(settings.ingestion_max_concurrent_documents)
             
-            if success:
-                logger.info(f"Re-entrenamiento completado para hospedaje {hospedaje_id}")
+            async def diff(doc: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+                async with semaphore:
+                    try:
+                        return await self._diff_document(hospedaje_id, doc, stored_hashes.get(doc["id"]), progress)
+                    except Exception as e:
+                        logger.error(f"Error procesando documento {doc.get('id')}: {e}")
+                        return None
             
-            return success
+            plans = await asyncio.gather(*(diff(doc) for doc in documents))
+            failed = [doc["id"] for doc, plan in zip(documents, plans) if plan is None]
+            if failed:
+                logger.error(f"Re-entrenamiento abortado, documentos con error: {failed}. Se conserva el conocimiento actual")
+                return False
+            
+            document_ids = [doc["id"] for doc in documents]
+            changes = {
+                "documents_added": sum(1 for plan in plans if plan["status"] == "added"),
+                "documents_changed": sum(1 for plan in plans if plan["status"] == "changed"),
+                "documents_unchanged": sum(1 for plan in plans if plan["status"] == "unchanged"),
+                "documents_removed": sum(1 for document_id in stored_hashes if document_id not in document_ids),
+            }
+            for key in ("chunks_embedded", "chunks_reused", "chunks_unchanged", "chunks_deleted", "chunks_failed"):
+                changes[key] = sum(plan.get(key, 0) for plan in plans)
+            
+            # Documentos que ya no están en el backend (incluye chunks sin registro de hash)
+            steps = [
+                (
+                    "DELETE FROM chatbot_knowledge WHERE hospedaje_id = %s AND NOT (document_id = ANY(%s::varchar[]))",
+                    [hospedaje_id, document_ids]
+                ),
+                (
+                    "DELETE FROM knowledge_documents WHERE hospedaje_id = %s AND NOT (document_id = ANY(%s::varchar[]))",
+                    [hospedaje_id, document_ids]
+                ),
+            ]
+            
+            updated = [plan for plan in plans if plan["status"] != "unchanged"]
+            for plan in updated:
+                # Chunks sobrantes si el documento quedó más corto, y total actualizado en la metadata
+                steps.append((
+                    "DELETE FROM chatbot_knowledge WHERE hospedaje_id = %s AND document_id = %s AND chunk_index >= %s",
+                    [hospedaje_id, plan["document_id"], plan["chunk_count"]]
+                ))
+                steps.append((
+                    """
+                    UPDATE chatbot_knowledge
+                    SET metadata = jsonb_set(metadata, '{total_chunks}', to_jsonb(%s::int))
+                    WHERE hospedaje_id = %s AND document_id = %s
+                    """,
+                    [plan["chunk_count"], hospedaje_id, plan["document_id"]]
+                ))
+            steps.append((CHUNK_UPSERT_QUERY, [row for plan in updated for row in plan["rows"]], CHUNK_ROW_TEMPLATE))
+            document_rows = [plan["document_row"] for plan in updated if plan["document_row"]]
+            steps.append((DOCUMENT_UPSERT_QUERY, document_rows, DOCUMENT_ROW_TEMPLATE))
+            
+            await execute_vector_transaction(steps)
+            vector_index.invalidate(hospedaje_id)
+            await self._report(progress, **changes)
+            
+            logger.info(f"Re-entrenamiento completado para hospedaje {hospedaje_id}: {changes}")
+            return True
             
         except Exception as e:
             logger.error(f"Error re-entrenando conocimiento: {e}")
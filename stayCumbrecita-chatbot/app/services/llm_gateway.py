@@ -0,0 +1,182 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Prioridad por tipo de consulta (menor = se atiende antes)
+QUERY_TYPE_PRIORITY = {
+    "proceso_reserva": 0,
+    "reserva_multiple": 0,
+    "disponibilidad": 1,
+    "precios": 1,
+    "capacidad_excedida_especifica": 1,
+    "capacidad_excedida_general": 1,
+    "capacidad_excedida_con_habitacion": 1,
+    "general": 3,
+}
+DEFAULT_PRIORITY = 2
+
+FALLBACK_MESSAGE = (
+    "En este momento estamos recibiendo muchas consultas y no pude generar una respuesta a tiempo. "
+    "¿Podrías intentar nuevamente en unos segundos?"
+)
+
+
+class LLMQueueFullError(Exception):
+    """La cola de espera del gateway está llena"""
+
+
+class LLMGateway:
+    """Puerta de acceso única al LLM con límite de concurrencia.
+
+    Permite como máximo max_in_flight llamadas simultáneas; el resto espera en
+    una cola acotada ordenada por prioridad (las intenciones de reserva primero).
+    Cada llamada tiene un timeout y, si no se puede atender, se devuelve un
+    mensaje de fallback en lugar de propagar el error.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        max_in_flight: Optional[int] = None,
+        max_queue: Optional[int] = None,
+        call_timeout: Optional[float] = None,
+        queue_timeout: Optional[float] = None,
+        fallback_message: str = FALLBACK_MESSAGE
+    ):
+        self.client = client
+        self.max_in_flight = max_in_flight or settings.llm_max_in_flight
+        self.max_queue = settings.llm_max_queue if max_queue is None else max_queue
+        self.call_timeout = call_timeout or settings.llm_timeout
+        self.queue_timeout = queue_timeout or settings.llm_queue_timeout
+        self.fallback_message = fallback_message
+
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+
+        # Métricas
+        self._wait_times: Deque[float] = deque(maxlen=1000)
+        self._call_times: Deque[float] = deque(maxlen=1000)
+        self._counters = {
+            "requests": 0,
+            "completed": 0,
+            "timeouts": 0,
+            "queue_timeouts": 0,
+            "rejected": 0,
+            "errors": 0,
+        }
+        self._max_queue_depth = 0
+
+    @staticmethod
+    def priority_for(query_type: Optional[str]) -> int:
+        return QUERY_TYPE_PRIORITY.get(query_type or "general", DEFAULT_PRIORITY)
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    async def _acquire(self, priority: int) -> None:
+        """Obtiene un lugar para llamar al LLM (o espera en la cola por prioridad)"""
+        if self._in_flight < self.max_in_flight and not self.queue_depth:
+            self._in_flight += 1
+            return
+
+        if self.queue_depth >= self.max_queue:
+            raise LLMQueueFullError()
+
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+        self._max_queue_depth = max(self._max_queue_depth, self.queue_depth)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Si el lugar ya había sido asignado, cederlo al siguiente en la cola
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+
+    def _release(self) -> None:
+        """Libera un lugar, entregándolo directamente al próximo en la cola"""
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._in_flight -= 1
+
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        query_type: Optional[str] = None,
+        **kwargs: Any
+    ) -> str:
+        """Genera una respuesta respetando el límite de concurrencia y el timeout"""
+        self._counters["requests"] += 1
+        priority = self.priority_for(query_type)
+        queued_at = time.perf_counter()
+
+        try:
+            await asyncio.wait_for(self._acquire(priority), timeout=self.queue_timeout)
+        except LLMQueueFullError:
+            self._counters["rejected"] += 1
+            logger.warning(f"🚦 LLM - Cola llena ({self.max_queue}), respondiendo fallback para '{query_type}'")
+            return self.fallback_message
+        except asyncio.TimeoutError:
+            self._counters["queue_timeouts"] += 1
+            logger.warning(f"🚦 LLM - Espera en cola superó {self.queue_timeout}s para '{query_type}'")
+            return self.fallback_message
+
+        wait_time = time.perf_counter() - queued_at
+        self._wait_times.append(wait_time)
+        if wait_time > 0.5:
+            logger.info(f"🚦 LLM - '{query_type}' esperó {wait_time:.2f}s en cola (prioridad {priority})")
+
+        started_at = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                self.client.chat.completions.create(messages=messages, **kwargs),
+                timeout=self.call_timeout
+            )
+            self._counters["completed"] += 1
+            return response.choices[0].message.content or "No se pudo generar una respuesta."
+        except asyncio.TimeoutError:
+            self._counters["timeouts"] += 1
+            logger.warning(f"⏱️ LLM - Timeout de {self.call_timeout}s para '{query_type}'")
+            return self.fallback_message
+        except Exception as e:
+            self._counters["errors"] += 1
+            logger.error(f"Error llamando al LLM: {e}")
+            raise
+        finally:
+            self._call_times.append(time.perf_counter() - started_at)
+            self._release()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Profundidad de cola, concurrencia y tiempos de espera/llamada"""
+        def percentiles(values: Deque[float]) -> Dict[str, float]:
+            if not values:
+                return {"p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+            ordered = sorted(values)
+            return {
+                "p50_ms": round(ordered[len(ordered) // 2] * 1000, 1),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 1),
+                "max_ms": round(ordered[-1] * 1000, 1),
+            }
+
+        return {
+            "in_flight": self._in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "max_queue_depth_seen": self._max_queue_depth,
+            "wait": percentiles(self._wait_times),
+            "call": percentiles(self._call_times),
+            **self._counters,
+        }
@@ -0,0 +1,138 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, AsyncIterator, Callable, Optional, TypeVar
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PDFExtractionPool:
+    """Extrae texto de PDFs en un pool de procesos, fuera del event loop.
+
+    El documento se divide en tandas de páginas que se reparten entre los
+    workers; las páginas se devuelven en orden a medida que cada tanda termina.
+    Con workers=0 se usa el pool de hilos por defecto (útil en desarrollo).
+
+    Una tanda que ya está corriendo en un proceso no se puede cancelar: si un
+    documento supera el timeout se descarta el pool entero (terminando sus
+    procesos) y el siguiente uso crea uno nuevo. Con hilos la tanda sigue
+    corriendo hasta terminar.
+    """
+
+    def __init__(
+        self,
+        workers: Optional[int] = None,
+        pages_per_task: Optional[int] = None,
+        timeout: Optional[float] = None,
+        max_pages: Optional[int] = None
+    ):
+        self.workers = settings.pdf_extraction_workers if workers is None else workers
+        self.pages_per_task = max(1, pages_per_task or settings.pdf_pages_per_task)
+        self.timeout = timeout or settings.pdf_extraction_timeout
+        self.max_pages = max_pages or settings.pdf_max_pages
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.workers <= 0:
+            return None
+        if self._executor is None:
+            # spawn: los workers solo importan app.utils.pdf_text, no heredan el estado del servidor
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"📄 Pool de extracción de PDFs iniciado con {self.workers} procesos")
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args: Any) -> T:
+        """Ejecuta una función de app.utils.pdf_text en el pool"""
+        return await asyncio.get_running_loop().run_in_executor(self._get_executor(), func, *args)
+
+    async def iter_pages(self, path: str) -> AsyncIterator[str]:
+        """Texto limpio de cada página, en orden, a medida que se extrae"""
+        # PyPDF2 se importa con la primera extracción, no al arrancar el servidor
+        from ..utils.pdf_text import count_pages, extract_pages
+
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+
+        total = await loop.run_in_executor(executor, count_pages, path)
+        if total > self.max_pages:
+            logger.warning(f"📄 PDF con {total} páginas, se procesan solo las primeras {self.max_pages}")
+            total = self.max_pages
+
+        futures = [
+            loop.run_in_executor(executor, extract_pages, path, start, min(start + self.pages_per_task, total))
+            for start in range(0, total, self.pages_per_task)
+        ]
+        try:
+            for future in futures:
+                for _, text in await future:
+                    yield text
+        finally:
+            # Si se cortó antes (timeout o error), descartar las tandas pendientes
+            for future in futures:
+                future.cancel()
+
+    async def extract_text(self, path: str) -> Optional[str]:
+        """Texto completo del PDF, o None si supera el timeout por documento"""
+        # Un reintento si el pool se reinició por el timeout de otro documento
+        for attempt in range(2):
+            pages = []
+
+            async def collect():
+                async for text in self.iter_pages(path):
+                    if text:
+                        pages.append(text)
+
+            executor = self._get_executor()
+            try:
+                await asyncio.wait_for(collect(), timeout=self.timeout)
+                return "\n".join(pages)
+            except asyncio.TimeoutError:
+                if executor is not None:
+                    self._recycle(executor)
+                    logger.error(
+                        f"📄 Extracción de PDF superó {self.timeout}s ({len(pages)} páginas leídas); "
+                        f"se reinicia el pool para cortar las tandas en curso"
+                    )
+                else:
+                    logger.error(
+                        f"📄 Extracción de PDF superó {self.timeout}s ({len(pages)} páginas leídas); "
+                        f"las tandas en curso siguen en sus hilos hasta terminar"
+                    )
+                return None
+            except BrokenProcessPool:
+                if attempt:
+                    raise
+                logger.warning("📄 El pool de extracción se reinició durante la lectura; se reintenta el documento")
+
+        return None
+
+    def _recycle(self, executor: Executor) -> None:
+        """Descarta el pool terminando sus procesos (la única forma de cortar una tanda en curso)"""
+        if self._executor is not executor:
+            return
+        self._executor = None
+        # shutdown() deja _processes en None: tomarlos antes. Sin cancel_futures: al morir los
+        # procesos, las tandas pendientes de otros documentos fallan con BrokenProcessPool
+        # (y se reintentan) en lugar de cancelarse
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False)
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Instancia global del pool de extracción
+pdf_extraction_pool = PDFExtractionPool()
@@ -1,19 +1,34 @@
+import asyncio
 import logging
+import os
+import tempfile
 import httpx
-import io
-from typing import List, Optional, Dict, Any
-from PyPDF2 import PdfReader
+from typing import List, Optional, Dict, Any, Tuple
 import re
 import cloudinary
 from cloudinary.utils import cloudinary_url
 from ..core.config import settings
+from ..services.pdf_extraction import pdf_extraction_pool
+from ..utils.pdf_text import clean_text, read_info
+from ..utils.chunking import TokenChunker
 
 logger = logging.getLogger(__name__)
 
+# Versión del algoritmo de chunking (forma parte del hash de cada documento)
+CHUNKER_VERSION = "v1"
+
+# Tamaño de cada bloque leído durante la descarga en streaming
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
 class PDFProcessor:
     def __init__(self):
-        self.chunk_size = 1000  # Tamaño de chunk en caracteres
-        self.chunk_overlap = 200  # Solapamiento entre chunks
+        self.chunk_max_tokens = settings.chunk_max_tokens  # Tamaño máximo de chunk en tokens
+        self.chunk_overlap_sentences = settings.chunk_overlap_sentences  # Oraciones repetidas entre chunks
+        self.chunker = TokenChunker(
+            max_tokens=self.chunk_max_tokens,
+            overlap_sentences=self.chunk_overlap_sentences,
+            model=settings.embedding_model
+        )
         
         # Configurar Cloudinary para autenticación
         cloudinary.config(
@@ -22,6 +37,11 @@ class PDFProcessor:
             api_secret=settings.cloudinary_api_secret
         )
     
+    @property
+    def chunking_signature(self) -> str:
+        """Identifica la configuración de chunking (si cambia, hay que re-dividir los documentos)"""
+        return f"tokens:{CHUNKER_VERSION}:{self.chunk_max_tokens}:{self.chunk_overlap_sentences}"
+    
     def _extract_public_id_from_url(self, pdf_url: str) -> Optional[str]:
         """Extrae el public_id de una URL de Cloudinary"""
         try:
@@ -45,16 +65,17 @@ class PDFProcessor:
         
     async def extract_text_from_url(self, pdf_url: str) -> Optional[str]:
         """Extrae texto de un PDF desde una URL (Cloudinary) con autenticación"""
+        path = None
         try:
             # Primero, intentar descargar con la URL original (puede ser pública)
             async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(pdf_url)
+                path, status_code = await self._download_to_temp_file(client, pdf_url)
                 
                 # Si funciona, usar la URL original
-                if response.status_code == 200:
+                if path:
                     logger.info("PDF descargado exitosamente con URL original")
                 else:
-                    logger.info(f"URL original falló ({response.status_code}), intentando con autenticación...")
+                    logger.info(f"URL original falló ({status_code}), intentando con autenticación...")
                     
                     # Extraer public_id para generar URL autenticada
                     public_id = self._extract_public_id_from_url(pdf_url)
@@ -74,136 +95,151 @@ class PDFProcessor:
                     logger.info(f"URL autenticada generada: {auth_url[:100]}...")
                     
                     # Intentar con URL autenticada
-                    response = await client.get(auth_url)
+                    path, status_code = await self._download_to_temp_file(client, auth_url)
                     
-                    if response.status_code != 200:
-                        logger.error(f"Error descargando PDF con auth: {response.status_code}")
+                    if not path:
+                        logger.error(f"Error descargando PDF con auth: {status_code}")
                         return None
-                
-                # Leer PDF desde bytes
-                pdf_bytes = io.BytesIO(response.content)
-                reader = PdfReader(pdf_bytes)
-                
-                # Extraer texto de todas las páginas
-                text_content = []
-                for page in reader.pages:
-                    text_content.append(page.extract_text())
-                
-                full_text = "\n".join(text_content)
-                
-                # Limpiar texto
-                cleaned_text = self._clean_text(full_text)
-                
-                if not cleaned_text.strip():
-                    logger.warning("No se pudo extraer texto del PDF")
-                    return None
-                
-                logger.info(f"Texto extraído exitosamente: {len(cleaned_text)} caracteres")
-                return cleaned_text
+            
+            # Extraer y limpiar texto en el pool de procesos
+            cleaned_text = await pdf_extraction_pool.extract_text(path)
+            
+            if not cleaned_text or not cleaned_text.strip():
+                logger.warning("No se pudo extraer texto del PDF")
+                return None
+            
+            logger.info(f"Texto extraído exitosamente: {len(cleaned_text)} caracteres")
+            return cleaned_text
                 
         except Exception as e:
             logger.error(f"Error procesando PDF: {e}")
             return None
+        finally:
+            self._remove_temp_file(path)
     
     async def extract_text_from_backend_proxy(self, document_id: str) -> Optional[str]:
         """Extrae texto de un PDF usando el endpoint proxy del backend"""
+        path = None
         try:
             backend_url = f"{settings.backend_url}/chatbot/download/{document_id}"
             logger.info(f"Descargando PDF a través del backend: {backend_url}")
             
             async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(backend_url)
+                path, status_code = await self._download_to_temp_file(client, backend_url)
                 
-                if response.status_code != 200:
-                    logger.error(f"Error descargando PDF desde backend: {response.status_code}")
+                if not path:
+                    logger.error(f"Error descargando PDF desde backend: {status_code}")
                     return None
-                
-                # Leer PDF desde bytes
-                pdf_bytes = io.BytesIO(response.content)
-                reader = PdfReader(pdf_bytes)
-                
-                # Extraer texto de todas las páginas
-                text_content = []
-                for page in reader.pages:
-                    text_content.append(page.extract_text())
-                
-                full_text = "\n".join(text_content)
-                
-                # Limpiar texto
-                cleaned_text = self._clean_text(full_text)
-                
-                if not cleaned_text.strip():
-                    logger.warning("El PDF no contiene texto extraíble")
-                    return None
-                
-                logger.info(f"Texto extraído exitosamente: {len(cleaned_text)} caracteres")
-                return cleaned_text
+            
+            # Extraer y limpiar texto en el pool de procesos
+            cleaned_text = await pdf_extraction_pool.extract_text(path)
+            
+            if not cleaned_text or not cleaned_text.strip():
+                logger.warning("El PDF no contiene texto extraíble")
+                return None
+            
+            logger.info(f"Texto extraído exitosamente: {len(cleaned_text)} caracteres")
+            return cleaned_text
                 
         except Exception as e:
             logger.error(f"Error extrayendo texto del PDF via backend: {e}")
             return None
+        finally:
+            self._remove_temp_file(path)
     
-    def _clean_text(self, text: str) -> str:
-        """Limpia y normaliza el texto extraído"""
-        if not text:
-            return ""
+    async def _download_to_temp_file(self, client: httpx.AsyncClient, url: str) -> Tuple[Optional[str], int]:
+        """Descarga el PDF en streaming a un archivo temporal, cortando si supera el tamaño máximo.
         
-        # Remover caracteres de control y espacios extra
-        text = re.sub(r'\s+', ' ', text)
+        Devuelve (ruta, status_code); la ruta es None si la descarga no fue exitosa.
+        El llamador es responsable de borrar el archivo.
+        """
+        max_bytes = settings.pdf_max_download_mb * 1024 * 1024
         
-        # Remover caracteres especiales problemáticos
-        text = re.sub(r'[^\w\s\.,;:!?¡¿\-\(\)\[\]\"\'áéíóúñüÁÉÍÓÚÑÜ]', '', text)
-        
-        # Normalizar saltos de línea
-        text = re.sub(r'\n+', '\n', text)
-        
-        # Limpiar espacios al inicio y final
-        text = text.strip()
+        async with client.stream("GET", url) as response:
+            if response.status_code != 200:
+                return None, response.status_code
+            
+            declared_size = int(response.headers.get("content-length") or 0)
+            if declared_size > max_bytes:
+                logger.error(f"PDF de {declared_size} bytes supera el máximo de {settings.pdf_max_download_mb} MB")
+                return None, 413
+            
+            f = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+            size = 0
+            try:
+                async for chunk in response.aiter_bytes(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        logger.error(f"Descarga cortada: el PDF supera el máximo de {settings.pdf_max_download_mb} MB")
+                        f.close()
+                        self._remove_temp_file(f.name)
+                        return None, 413
+                    f.write(chunk)
+            except Exception:
+                f.close()
+                self._remove_temp_file(f.name)
+                raise
+            f.close()
         
-        return text
+        logger.info(f"PDF descargado a archivo temporal: {size} bytes")
+        return f.name, 200
+    
+    @staticmethod
+    def _remove_temp_file(path: Optional[str]):
+        if path:
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+    
+    def _clean_text(self, text: str) -> str:
+        """Limpia y normaliza el texto extraído"""
+        return clean_text(text)
     
     async def split_into_chunks(self, text: str) -> List[str]:
         """Divide el texto en chunks manejables"""
+        return [chunk["content"] for chunk in await self.split_into_chunks_with_metadata(text)]
+    
+    async def split_into_chunks_with_metadata(self, text: str) -> List[Dict[str, Any]]:
+        """Divide el texto en chunks por tokens respetando títulos y párrafos.
+        
+        Devuelve [{"content": str, "metadata": {...}}] con la metadata de get_chunk_metadata.
+        """
         if not text:
             return []
         
-        chunks = []
-        start = 0
+        # El conteo de tokens es CPU: se hace en un hilo para no frenar el event loop
+        chunks = await asyncio.to_thread(self.chunker.split, text)
         
-        while start < len(text):
-            # Determinar el final del chunk
-            end = start + self.chunk_size
-            
-            # Si no es el último chunk, buscar un punto de corte natural
-            if end < len(text):
-                # Buscar el último punto, salto de línea o espacio antes del límite
-                for separator in ['. ', '\n', ' ']:
-                    last_separator = text.rfind(separator, start, end)
-                    if last_separator != -1:
-                        end = last_separator + len(separator)
-                        break
-            
-            # Extraer chunk
-            chunk = text[start:end].strip()
-            
-            if chunk:
-                chunks.append(chunk)
-            
-            # Mover al siguiente chunk con solapamiento
-            start = end - self.chunk_overlap
-            
-            # Evitar chunks muy pequeños al final
-            if start >= len(text) - self.chunk_overlap:
-                break
+        result = [
+            {
+                "content": chunk["content"],
+                "metadata": self.get_chunk_metadata(
+                    chunk["content"], i, len(chunks),
+                    heading=chunk["heading"],
+                    token_count=chunk["token_count"]
+                )
+            }
+            for i, chunk in enumerate(chunks)
+        ]
         
-        logger.info(f"Texto dividido en {len(chunks)} chunks")
-        return chunks
+        logger.info(f"Texto dividido en {len(result)} chunks (máx {self.chunk_max_tokens} tokens)")
+        return result
     
-    def get_chunk_metadata(self, chunk: str, chunk_index: int, total_chunks: int) -> Dict[str, Any]:
+    def get_chunk_metadata(
+        self,
+        chunk: str,
+        chunk_index: int,
+        total_chunks: int,
+        heading: Optional[str] = None,
+        token_count: Optional[int] = None
+    ) -> Dict[str, Any]:
         """Genera metadata para un chunk"""
         return {
             "chunk_index": chunk_index,
             "total_chunks": total_chunks,
+            "heading": heading,
+            "token_count": token_count,
             "character_count": len(chunk),
             "word_count": len(chunk.split()),
             "has_numbers": bool(re.search(r'\d', chunk)),
@@ -240,28 +276,21 @@ class PDFProcessor:
         return 30  # 30 segundos por PDF
     
     async def get_pdf_info(self, pdf_url: str) -> Dict[str, Any]:
-        """Obtiene información básica del PDF"""
+        """Obtiene información básica del PDF (páginas y metadata, sin extraer texto)"""
+        path = None
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.get(pdf_url)
-                
-                if response.status_code != 200:
-                    return {}
-                
-                pdf_bytes = io.BytesIO(response.content)
-                reader = PdfReader(pdf_bytes)
-                
-                info = {
-                    "num_pages": len(reader.pages),
-                    "file_size_bytes": len(response.content),
-                    "title": reader.metadata.get('/Title', '') if reader.metadata else '',
-                    "author": reader.metadata.get('/Author', '') if reader.metadata else '',
-                    "subject": reader.metadata.get('/Subject', '') if reader.metadata else '',
-                    "creator": reader.metadata.get('/Creator', '') if reader.metadata else ''
-                }
-                
-                return info
+                path, _ = await self._download_to_temp_file(client, pdf_url)
+            
+            if not path:
+                return {}
+            
+            info = await pdf_extraction_pool.run(read_info, path)
+            info["file_size_bytes"] = os.path.getsize(path)
+            return info
                 
         except Exception as e:
             logger.error(f"Error obteniendo info del PDF: {e}")
-            return {} 
\ No newline at end of file
+            return {}
+        finally:
+            self._remove_temp_file(path)
@@ -0,0 +1,205 @@
+import logging
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from ..core.config import settings
+from ..utils.tokens import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Directorio absoluto de prompts (no depende del directorio de trabajo)
+PROMPTS_DIR = Path(__file__).resolve().parent.parent / "prompts"
+
+# Mapear tipos de consulta específicos a archivos de reglas
+RULES_MAPPING = {
+    "disponibilidad": "availability_rules",
+    "precios": "price_rules",
+    "hospedaje_servicios": "hospedaje_services_rules",
+    "habitacion_servicios": "habitacion_services_rules",
+    "servicio_especifico": "servicio_especifico_rules",
+    "metodos_pago": "metodos_pago_rules",
+    "servicios_multiples_habitaciones": "servicios_multiples_habitaciones_rules",
+    "capacidad_excedida_especifica": "capacidad_excedida_caso1",
+    "capacidad_excedida_general": "capacidad_excedida_caso2",
+    "capacidad_excedida_con_habitacion": "capacidad_excedida_con_habitacion_elegida",
+    # proceso_reserva NO en mapping - tiene lógica específica por caso
+}
+
+# Casos de proceso_reserva que genera ChatService._handle_proceso_reserva
+PROCESO_RESERVA_CASOS = ("caso1", "caso2", "caso3", "caso4", "caso5", "caso6")
+PROCESO_RESERVA_DEFAULT_CASO = "caso6"
+
+# Plantillas que el armado del prompt necesita siempre
+REQUIRED_TEMPLATES = (
+    "system_base",
+    "system_base_positive",
+    "fallback",
+    "error_fecha_pasada",
+    "data_fusion_rules",
+)
+
+
+class PromptRegistry:
+    """Registro en memoria de las plantillas de prompts.
+
+    Carga todos los .txt de app/prompts una sola vez, pre-arma los prompts de
+    sistema por tipo de consulta y valida que existan todos los casos
+    referenciados. En desarrollo recarga los archivos cuando cambia su mtime.
+    """
+
+    def __init__(
+        self,
+        prompts_dir: Optional[Path] = None,
+        hot_reload: Optional[bool] = None,
+        reload_interval: Optional[float] = None
+    ):
+        self.prompts_dir = Path(prompts_dir or PROMPTS_DIR).resolve()
+        self.hot_reload = settings.prompt_hot_reload if hot_reload is None else hot_reload
+        self.reload_interval = settings.prompt_reload_interval if reload_interval is None else reload_interval
+        self._templates: Dict[str, str] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._token_counts: Dict[str, int] = {}
+        self._assembled: Dict[Tuple[str, str, bool], Tuple[str, str]] = {}
+        self._errors: List[str] = []
+        self._loaded = False
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> List[str]:
+        """Lee todas las plantillas, las pre-arma y devuelve los errores de validación"""
+        with self._lock:
+            templates: Dict[str, str] = {}
+            mtimes: Dict[str, float] = {}
+            for path in sorted(self.prompts_dir.glob("*.txt")):
+                try:
+                    templates[path.stem] = path.read_text(encoding="utf-8")
+                    mtimes[path.stem] = path.stat().st_mtime
+                except OSError as e:
+                    logger.error(f"❌ No se pudo leer la plantilla {path.name}: {e}")
+
+            self._templates = templates
+            self._mtimes = mtimes
+            self._token_counts = {name: count_tokens(text) for name, text in templates.items()}
+            self._assembled = {}
+            self._errors = self._validate()
+            self._preassemble()
+            self._loaded = True
+            self._last_check = time.monotonic()
+
+        for error in self._errors:
+            logger.error(f"❌ Prompts: {error}")
+        logger.info(f"📝 {len(self._templates)} plantillas de prompts cargadas desde {self.prompts_dir}")
+        return list(self._errors)
+
+    def _validate(self) -> List[str]:
+        """Verifica que existan las plantillas y casos referenciados"""
+        errors = []
+        for name in REQUIRED_TEMPLATES:
+            if name not in self._templates:
+                errors.append(f"falta la plantilla requerida '{name}.txt'")
+        for caso in PROCESO_RESERVA_CASOS:
+            if f"proceso_reserva_{caso}" not in self._templates:
+                errors.append(f"falta la plantilla del caso 'proceso_reserva_{caso}.txt'")
+        for query_type, template_name in RULES_MAPPING.items():
+            if template_name not in self._templates:
+                errors.append(f"la plantilla '{template_name}.txt' (query_type '{query_type}') no existe")
+        return errors
+
+    def _preassemble(self) -> None:
+        """Arma de antemano los prompts de sistema de todos los tipos conocidos"""
+        query_types = set(RULES_MAPPING)
+        query_types.update(
+            name[:-len("_rules")] for name in self._templates if name.endswith("_rules")
+        )
+        for query_type in query_types:
+            for positive in (False, True):
+                self._assemble(query_type, "", positive)
+        for caso in PROCESO_RESERVA_CASOS:
+            self._assemble("proceso_reserva", caso, False)
+
+    def _maybe_reload(self) -> None:
+        """Recarga las plantillas si cambió algún archivo (solo con hot reload)"""
+        if not self._loaded:
+            self.load()
+            return
+        if not self.hot_reload:
+            return
+
+        now = time.monotonic()
+        if now - self._last_check < self.reload_interval:
+            return
+        self._last_check = now
+
+        try:
+            current = {path.stem: path.stat().st_mtime for path in self.prompts_dir.glob("*.txt")}
+        except OSError as e:
+            logger.warning(f"⚠️ No se pudieron revisar las plantillas de prompts: {e}")
+            return
+
+        if current != self._mtimes:
+            logger.info("🔄 Plantillas de prompts modificadas, recargando...")
+            self.load()
+
+    def get(self, name: str, default: str = "") -> str:
+        """Devuelve el texto de una plantilla por nombre (sin .txt)"""
+        self._maybe_reload()
+        return self._templates.get(name, default)
+
+    def has(self, name: str) -> bool:
+        self._maybe_reload()
+        return name in self._templates
+
+    def resolve_rules(self, query_type: str, caso: Optional[str] = None) -> str:
+        """Resuelve qué plantilla de reglas corresponde a un tipo de consulta"""
+        if query_type == "proceso_reserva":
+            specific = f"proceso_reserva_{caso or PROCESO_RESERVA_DEFAULT_CASO}"
+            if specific in self._templates:
+                return specific
+            logger.error(f"🎯 PROCESO_RESERVA - Plantilla {specific} no encontrada, usando {PROCESO_RESERVA_DEFAULT_CASO}")
+            default = f"proceso_reserva_{PROCESO_RESERVA_DEFAULT_CASO}"
+            return default if default in self._templates else "fallback"
+
+        direct = f"{query_type}_rules"
+        if direct in self._templates:
+            return direct
+
+        mapped = RULES_MAPPING.get(query_type)
+        if mapped and mapped in self._templates:
+            return mapped
+        return "fallback"
+
+    def _assemble(self, query_type: str, caso: str, positive: bool) -> Tuple[str, str]:
+        key = (query_type, caso, positive)
+        assembled = self._assembled.get(key)
+        if assembled is None:
+            base_name = "system_base_positive" if positive else "system_base"
+            rules_name = self.resolve_rules(query_type, caso)
+            system_prompt = self._templates.get(base_name, "")
+            rules = self._templates.get(rules_name)
+            if rules is not None:
+                system_prompt += f"\n\n{rules}"
+            assembled = (system_prompt, rules_name)
+            self._assembled[key] = assembled
+        return assembled
+
+    def system_prompt(self, query_type: str, caso: Optional[str] = None, positive: bool = False) -> Tuple[str, str]:
+        """Devuelve (prompt de sistema pre-armado, plantilla de reglas usada)"""
+        self._maybe_reload()
+        if query_type == "proceso_reserva":
+            # proceso_reserva siempre usa el prompt base con su caso específico
+            return self._assemble(query_type, caso or PROCESO_RESERVA_DEFAULT_CASO, False)
+        return self._assemble(query_type, "", positive)
+
+    def token_counts(self) -> Dict[str, int]:
+        """Cantidad de tokens por plantilla"""
+        self._maybe_reload()
+        return dict(self._token_counts)
+
+    @property
+    def errors(self) -> List[str]:
+        return list(self._errors)
+
+
+# Instancia global del registro de prompts
+prompt_registry = PromptRegistry()
@@ -1,10 +1,30 @@
 import logging
+import os
 import re
+from collections import OrderedDict
+from pathlib import Path
 from typing import Dict, List, Tuple, Any, Optional
 from ..core.config import settings
+from ..core.logging_config import log_debug
+from ..utils.pattern_matcher import PatternMatcher
+from ..utils.intent_model import IntentModel, numpy_available
 
 logger = logging.getLogger(__name__)
 
+# Palabras que eligen la fórmula de puntuación (dependen solo del mensaje, no de la categoría)
+PRICE_SCORE_KEYWORDS = ["precio", "costo", "tarifa", "cuanto", "cuánto", "valor", "importe", "sale", "abonar", "pagar"]
+SERVICE_SCORE_KEYWORDS = ["servicios", "comodidades", "amenities", "instalaciones", "facilidades"]
+RESERVA_SCORE_KEYWORDS = ["reservar", "reserva", "proceder", "confirmar", "asegurar", "apartar"]
+
+# Palabras que indican que el asistente ya respondió un tema (2 o más en un mismo mensaje)
+TOPIC_KEYWORDS = {
+    "disponibilidad": ["disponible", "disponibilidad", "habitaciones disponibles", "suites disponibles", "lugar", "libre"],
+    "precios": ["precio", "cuesta", "costo", "tarifa", "ARS", "$", "pesos", "importe"]
+}
+
+# Modelo entrenado por defecto (tools/train_intent_model.py)
+DEFAULT_INTENT_MODEL_PATH = Path(__file__).resolve().parent.parent / "intent_models" / "intent_model.npz"
+
 class QueryClassifier:
     def __init__(self):
         self.classification_patterns = {
@@ -264,33 +284,132 @@ class QueryClassifier:
                 r"horario|schedule|abierto|cerrado|disponible"
             ]
         }
+        
+        # Patrones compilados una sola vez, con prefiltro por palabras clave
+        self.matcher = PatternMatcher(self.classification_patterns)
+        
+        # Backend entrenado opcional; los patrones quedan como respaldo
+        self.intent_model = self._load_intent_model() if settings.query_classifier_backend == "model" else None
+        self._stats = {"model": 0, "model_low_confidence": 0}
+        
+        # Cache LRU de clasificaciones: (mensaje normalizado, huella del contexto) -> categoría
+        self._cache: "OrderedDict[Tuple[Any, ...], str]" = OrderedDict()
+        self._cache_max_entries = settings.classifier_cache_size
+        self._cache_stats = {"hits": 0, "misses": 0, "uncacheable": 0}
+    
+    def _load_intent_model(self) -> Optional[IntentModel]:
+        """Carga el modelo de intenciones entrenado (None si no está disponible)"""
+        path = settings.intent_model_path or str(DEFAULT_INTENT_MODEL_PATH)
+        if not numpy_available():
+            logger.warning("⚠️ QUERY_CLASSIFIER_BACKEND=model pero numpy no está instalado; se usan los patrones")
+            return None
+        if not os.path.exists(path):
+            logger.warning("⚠️ No existe el modelo de intenciones %s; se usan los patrones", path)
+            return None
+        try:
+            model = IntentModel.load(path)
+            logger.info(
+                "🤖 Modelo de intenciones cargado: %s categorías, exactitud de validación %s",
+                len(model.labels), model.metadata.get('validation', {}).get('accuracy', 'n/d')
+            )
+            return model
+        except Exception as e:
+            logger.error("Error cargando modelo de intenciones %s: %s", path, e)
+            return None
+    
+    def _model_scores(self, message: str, excluded_categories: List[str] = ()) -> Optional[Dict[str, float]]:
+        """Probabilidades del modelo entrenado por categoría, o None si no está seguro (se usan los patrones)"""
+        if self.intent_model is None:
+            return None
+        try:
+            probabilities = self.intent_model.predict_proba(message)
+        except Exception as e:
+            logger.error("Error clasificando con el modelo de intenciones: %s", e)
+            return None
+        
+        # Sin renormalizar: si lo más probable era una categoría omitida, la confianza del resto queda baja
+        for category in excluded_categories:
+            probabilities.pop(category, None)
+        if not probabilities:
+            return None
+        
+        category = max(probabilities, key=probabilities.get)
+        confidence = probabilities[category]
+        if confidence < settings.intent_model_min_confidence:
+            self._stats["model_low_confidence"] += 1
+            log_debug(logger, "classifier", "🤖 CLASIFICADOR - Modelo poco seguro ('%s' %.2f), usando patrones", category, confidence)
+            return None
+        
+        self._stats["model"] += 1
+        log_debug(logger, "classifier", "🤖 CLASIFICADOR - Modelo: '%s' (confianza %.2f)", category, confidence)
+        return probabilities
+    
+    def _classify_with_model(self, message: str, excluded_categories: List[str] = ()) -> Optional[str]:
+        """Categoría del modelo entrenado si supera la confianza mínima (None para usar los patrones)"""
+        probabilities = self._model_scores(message, excluded_categories)
+        if not probabilities:
+            return None
+        return max(probabilities, key=probabilities.get)
+    
+    def _cache_get(self, key: Tuple[Any, ...]) -> Optional[str]:
+        if self._cache_max_entries <= 0:
+            return None
+        category = self._cache.get(key)
+        if category is None:
+            self._cache_stats["misses"] += 1
+            return None
+        self._cache.move_to_end(key)
+        self._cache_stats["hits"] += 1
+        return category
+    
+    def _cache_put(self, key: Tuple[Any, ...], category: str) -> None:
+        if self._cache_max_entries <= 0:
+            return
+        self._cache[key] = category
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_max_entries:
+            self._cache.popitem(last=False)
+    
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self._cache_stats["hits"] + self._cache_stats["misses"]
+        return {
+            "backend": "model" if self.intent_model is not None else "regex",
+            "model_labels": len(self.intent_model.labels) if self.intent_model is not None else 0,
+            **self._stats,
+            "cache": {
+                "entries": len(self._cache),
+                "max_entries": self._cache_max_entries,
+                **self._cache_stats,
+                "hit_rate": round(self._cache_stats["hits"] / lookups, 4) if lookups else 0.0,
+            },
+        }
     
     def _has_answered_topic(self, conversation_history: List[Dict], topic: str) -> bool:
         """Detecta si ya se respondió un tema específico en la conversación"""
+        return topic in self._answered_topics(conversation_history, [topic])
+    
+    def _answered_topics(self, conversation_history: List[Dict], topics: Optional[List[str]] = None) -> set:
+        """Temas ya respondidos por el asistente, revisando cada mensaje una sola vez"""
         if not conversation_history:
-            return False
-            
-        # Buscar mensajes del bot que contengan respuestas sobre el tema
-        topic_keywords = {
-            "disponibilidad": ["disponible", "disponibilidad", "habitaciones disponibles", "suites disponibles", "lugar", "libre"],
-            "precios": ["precio", "cuesta", "costo", "tarifa", "ARS", "$", "pesos", "importe"]
-        }
+            return set()
         
-        keywords = topic_keywords.get(topic, [])
-        if not keywords:
-            return False
-            
+        pending = [topic for topic in (topics or TOPIC_KEYWORDS) if topic in TOPIC_KEYWORDS]
+        answered = set()
         for msg in conversation_history:
+            if not pending:
+                break
             # Solo revisar mensajes del asistente
             if msg.get("role") == "assistant" and msg.get("message"):
                 message_content = msg["message"].lower()
-                # Si encontramos 2 o más keywords del tema, consideramos que fue tratado
-                matches = sum(1 for keyword in keywords if keyword in message_content)
-                if matches >= 2:
-                    logger.info(f"🧠 DEBUG CONVERSACIONAL - Tema '{topic}' ya tratado en: '{msg['message'][:100]}...'")
-                    return True
+                for topic in list(pending):
+                    # Si encontramos 2 o más keywords del tema, consideramos que fue tratado
+                    matches = sum(1 for keyword in TOPIC_KEYWORDS[topic] if keyword in message_content)
+                    if matches >= 2:
+                        log_debug(logger, "classifier", "🧠 DEBUG CONVERSACIONAL - Tema '%s' ya tratado en: '%s...'", topic, msg['message'][:100])
+                        answered.add(topic)
+                        pending.remove(topic)
         
-        return False
+        return answered
     
     def _has_new_dates_in_message(self, message: str, previous_dates: Dict[str, Any]) -> bool:
         """Detecta si el mensaje contiene fechas nuevas diferentes a las ya tratadas"""
@@ -307,22 +426,20 @@ class QueryClassifier:
         has_dates_in_message = any(re.search(pattern, message_lower) for pattern in date_patterns)
         
         if not has_dates_in_message:
-            logger.info(f"🧠 DEBUG CONVERSACIONAL - No hay fechas nuevas en el mensaje")
+            log_debug(logger, "classifier", "🧠 DEBUG CONVERSACIONAL - No hay fechas nuevas en el mensaje")
             return False
             
         # Si hay fechas en el mensaje, asumir que son nuevas (simplificado)
-        logger.info(f"🧠 DEBUG CONVERSACIONAL - Detectadas fechas nuevas en el mensaje")
+        log_debug(logger, "classifier", "🧠 DEBUG CONVERSACIONAL - Detectadas fechas nuevas en el mensaje")
         return True
 
     async def classify_query(self, message: str, context: Optional[Dict[str, Any]] = None) -> str:
         """Clasifica una consulta en categorías predefinidas considerando el contexto conversacional"""
         try:
-            message_lower = message.lower()
-            
             # 🎯 DETECTAR SI RESPUESTA YA FUE INTERCEPTADA 
             query_params = context.get("query_params", {}) if context else {}
             if query_params.get("intercepted_guest_response"):
-                logger.info(f"🎯 CLASIFICADOR - Respuesta de huéspedes ya interceptada, forzando proceso_reserva")
+                log_debug(logger, "classifier", "🎯 CLASIFICADOR - Respuesta de huéspedes ya interceptada, forzando proceso_reserva")
                 return "proceso_reserva"
             
             # 🧠 MEMORIA CONVERSACIONAL - obtener historial para contexto
@@ -335,70 +452,108 @@ class QueryClassifier:
                 elif context.get("session_context", {}).get("recent_messages"):
                     conversation_history = context["session_context"]["recent_messages"]
             
-            # 🧠 CLASIFICACIÓN NORMAL
+            # Detectar temas ya tratados (una sola pasada por el historial)
+            answered_topics = self._answered_topics(conversation_history)
+            has_answered_availability = "disponibilidad" in answered_topics
+            has_answered_prices = "precios" in answered_topics
+            has_new_dates = self._has_new_dates_in_message(message, query_params)
+            
+            # ⚡ CACHE: mismo mensaje con el mismo contexto → misma categoría. La clave es el
+            # texto en minúsculas que ven los patrones: son sensibles a los acentos
+            # ("política" y "politica" pueden clasificarse distinto)
+            cache_key = (message.lower(), has_answered_availability, has_answered_prices, has_new_dates)
+            cached = self._cache_get(cache_key)
+            if cached is not None:
+                log_debug(logger, "classifier", "⚡ CLASIFICADOR - '%s' desde cache", cached)
+                return cached
+            
+            category, cacheable = self._classify_uncached(
+                message, context, has_answered_availability, has_answered_prices, has_new_dates
+            )
+            if cacheable:
+                self._cache_put(cache_key, category)
+            else:
+                self._cache_stats["uncacheable"] += 1
+            return category
             
-            # Detectar temas ya tratados
-            has_answered_availability = self._has_answered_topic(conversation_history, "disponibilidad")
-            has_answered_prices = self._has_answered_topic(conversation_history, "precios")
-            has_new_dates = self._has_new_dates_in_message(message, context.get("query_params", {}))
+        except Exception as e:
+            logger.error("Error clasificando consulta: %s", e)
+            return "general"
+    
+    def _classify_uncached(
+        self,
+        message: str,
+        context: Optional[Dict[str, Any]],
+        has_answered_availability: bool,
+        has_answered_prices: bool,
+        has_new_dates: bool
+    ) -> Tuple[str, bool]:
+        """Clasificación completa: (categoría, si se puede cachear).
+        
+        Las consultas ambiguas resueltas con el contexto de habitación no se
+        cachean: dependen de datos que no forman parte de la clave.
+        """
+        try:
+            message_lower = message.lower()
             
-            logger.info(f"🧠 DEBUG CONVERSACIONAL - Disponibilidad tratada: {has_answered_availability}")
-            logger.info(f"🧠 DEBUG CONVERSACIONAL - Precios tratados: {has_answered_prices}")
-            logger.info(f"🧠 DEBUG CONVERSACIONAL - Fechas nuevas: {has_new_dates}")
+            log_debug(logger, "classifier", "🧠 DEBUG CONVERSACIONAL - Disponibilidad tratada: %s", has_answered_availability)
+            log_debug(logger, "classifier", "🧠 DEBUG CONVERSACIONAL - Precios tratados: %s", has_answered_prices)
+            log_debug(logger, "classifier", "🧠 DEBUG CONVERSACIONAL - Fechas nuevas: %s", has_new_dates)
             
             # 🎯 APLICAR LÓGICA CONVERSACIONAL: Determinar categorías a omitir
             excluded_categories = []
             if has_answered_availability and not has_new_dates:
                 excluded_categories.append("disponibilidad")
-                logger.info(f"🧠 DEBUG CONVERSACIONAL - OMITIENDO categoría 'disponibilidad' (ya tratada)")
+                log_debug(logger, "classifier", "🧠 DEBUG CONVERSACIONAL - OMITIENDO categoría 'disponibilidad' (ya tratada)")
                 
             if has_answered_prices and not has_new_dates:
                 excluded_categories.append("precios")
-                logger.info(f"🧠 DEBUG CONVERSACIONAL - OMITIENDO categoría 'precios' (ya tratada)")
+                log_debug(logger, "classifier", "🧠 DEBUG CONVERSACIONAL - OMITIENDO categoría 'precios' (ya tratada)")
             
             # Si omitimos disponibilidad/precios, priorizar proceso_reserva
             should_prioritize_reserva = len(excluded_categories) > 0
+            reserva_basic_keywords = ["reservar", "reserva", "quiero", "me interesa", "proceder", "confirmar"]
+            has_reserva_words = any(keyword in message_lower for keyword in reserva_basic_keywords)
             if should_prioritize_reserva:
-                logger.info(f"🧠 DEBUG CONVERSACIONAL - PRIORIZANDO 'proceso_reserva' por contexto conversacional")
+                log_debug(logger, "classifier", "🧠 DEBUG CONVERSACIONAL - PRIORIZANDO 'proceso_reserva' por contexto conversacional")
                 
                 # 🎯 BOOST PARA PROCESO_RESERVA: Si hay palabras básicas de reserva, dar score alto
-                reserva_basic_keywords = ["reservar", "reserva", "quiero", "me interesa", "proceder", "confirmar"]
-                if any(keyword in message_lower for keyword in reserva_basic_keywords):
-                    logger.info(f"🧠 DEBUG CONVERSACIONAL - DETECTADAS palabras de reserva con contexto omitido → FORZANDO proceso_reserva")
+                if has_reserva_words:
+                    log_debug(logger, "classifier", "🧠 DEBUG CONVERSACIONAL - DETECTADAS palabras de reserva con contexto omitido → FORZANDO proceso_reserva")
+            
+            # 🤖 BACKEND ENTRENADO: con confianza suficiente sus probabilidades reemplazan a las
+            # puntuaciones de los patrones; los ajustes conversacionales de abajo se aplican igual
+            scores = self._model_scores(message, excluded_categories)
+            
+            # 🧠 CASO ESPECIAL: Si omitimos categorías y hay palabras de reserva pero sin scores de patrones
+            if should_prioritize_reserva and has_reserva_words:
+                pattern_scores = self._category_scores(message_lower, skip=excluded_categories)
+                if not pattern_scores:
+                    log_debug(logger, "classifier", "🧠 DEBUG CONVERSACIONAL - SIN SCORES pero con contexto omitido + palabras reserva → FORZANDO proceso_reserva")
+                    return "proceso_reserva", True
+                if scores is None:
+                    scores = pattern_scores
             
             # 🔧 PASO 1: Calcular puntuaciones para patrones explícitos (excluyendo categorías omitidas)
-            scores = {}
-            for category, patterns in self.classification_patterns.items():
-                # 🧠 OMITIR categorías ya tratadas
-                if category in excluded_categories:
-                    logger.info(f"🧠 DEBUG CONVERSACIONAL - SALTANDO categoría '{category}' (ya tratada)")
-                    continue
-                    
-                score = self._calculate_category_score(message_lower, patterns)
-                if score > 0:
-                    scores[category] = score
-                    logger.info(f"🔍 DEBUG - Categoría '{category}' score: {score}")
-            
-            # 🧠 CASO ESPECIAL: Si omitimos categorías y hay palabras de reserva pero sin scores
-            if not scores and should_prioritize_reserva:
-                reserva_basic_keywords = ["reservar", "reserva", "quiero", "me interesa", "proceder", "confirmar"]
-                if any(keyword in message_lower for keyword in reserva_basic_keywords):
-                    logger.info(f"🧠 DEBUG CONVERSACIONAL - SIN SCORES pero con contexto omitido + palabras reserva → FORZANDO proceso_reserva")
-                    return "proceso_reserva"
+            if scores is None:
+                for category in excluded_categories:
+                    log_debug(logger, "classifier", "🧠 DEBUG CONVERSACIONAL - SALTANDO categoría '%s' (ya tratada)", category)
+                scores = self._category_scores(message_lower, skip=excluded_categories)
+            for category, score in scores.items():
+                log_debug(logger, "classifier", "🔍 DEBUG - Categoría '%s' score: %s", category, score)
             
             # Si no hay puntuaciones, es consulta general
             if not scores:
-                logger.info(f"🔍 DEBUG - Sin scores, clasificando como general")
-                return "general"
+                log_debug(logger, "classifier", "🔍 DEBUG - Sin scores, clasificando como general")
+                return "general", True
             
             # 🧠 BOOST CONVERSACIONAL: Mejorar score de proceso_reserva si hay contexto omitido
             if should_prioritize_reserva and "proceso_reserva" in scores:
-                reserva_basic_keywords = ["reservar", "reserva", "quiero", "me interesa", "proceder", "confirmar"]
-                if any(keyword in message_lower for keyword in reserva_basic_keywords):
+                if has_reserva_words:
                     original_score = scores["proceso_reserva"]
                     # Boost significativo para ganar empates y competir
                     scores["proceso_reserva"] = min(original_score + 0.3, 1.0)
-                    logger.info(f"🧠 DEBUG CONVERSACIONAL - BOOST aplicado a proceso_reserva: {original_score:.3f} → {scores['proceso_reserva']:.3f}")
+                    log_debug(logger, "classifier", "🧠 DEBUG CONVERSACIONAL - BOOST aplicado a proceso_reserva: %.3f → %.3f", original_score, scores['proceso_reserva'])
             
             # Obtener categoría con mayor puntuación
             max_score = max(scores.values())
@@ -406,68 +561,90 @@ class QueryClassifier:
             
             # 🚨 RESOLVER EMPATES: proceso_reserva tiene PRIORIDAD ABSOLUTA
             if len(categories_with_max_score) > 1:
-                logger.info(f"🎯 DEBUG EMPATE - Categorías con score {max_score}: {categories_with_max_score}")
+                log_debug(logger, "classifier", "🎯 DEBUG EMPATE - Categorías con score %s: %s", max_score, categories_with_max_score)
                 
                 # Si proceso_reserva está entre las empatadas, priorizarla
                 if "proceso_reserva" in categories_with_max_score:
                     best_category = "proceso_reserva"
-                    logger.info(f"🎯 DEBUG EMPATE RESUELTO - Priorizando 'proceso_reserva' sobre: {[c for c in categories_with_max_score if c != 'proceso_reserva']}")
+                    log_debug(logger, "classifier", "🎯 DEBUG EMPATE RESUELTO - Priorizando 'proceso_reserva' sobre: %s", [c for c in categories_with_max_score if c != 'proceso_reserva'])
                 else:
                     best_category = categories_with_max_score[0]
             else:
                 best_category = categories_with_max_score[0]
                 
-            logger.info(f"🔍 DEBUG - Mejor categoría por patrones: '{best_category}' (score: {scores[best_category]})")
+            log_debug(logger, "classifier", "🔍 DEBUG - Mejor categoría por patrones: '%s' (score: %s)", best_category, scores[best_category])
             
             # 🔧 PASO 2: Verificar si hay clasificación EXPLÍCITA con umbral suficiente
             high_confidence_threshold = 0.4  # Umbral alto para clasificaciones explícitas
             
             # Para consultas de hospedaje_servicios o habitacion_servicios con alta confianza
             if best_category in ["hospedaje_servicios", "habitacion_servicios"] and scores[best_category] >= high_confidence_threshold:
-                logger.info(f"🔍 DEBUG - Clasificación EXPLÍCITA con alta confianza: {best_category}")
-                return best_category
+                log_debug(logger, "classifier", "🔍 DEBUG - Clasificación EXPLÍCITA con alta confianza: %s", best_category)
+                return best_category, True
             
             # Para consultas de precios con umbral más bajo
             if best_category == "precios" and scores[best_category] >= 0.15:
-                logger.info(f"🔍 DEBUG - Consulta clasificada como PRECIOS con score: {scores[best_category]}")
-                return best_category
+                log_debug(logger, "classifier", "🔍 DEBUG - Consulta clasificada como PRECIOS con score: %s", scores[best_category])
+                return best_category, True
             
             # Para otras categorías con umbral estándar
             if scores[best_category] >= 0.3:
-                logger.info(f"🔍 DEBUG - Clasificación por umbral estándar: {best_category}")
-                return best_category
+                log_debug(logger, "classifier", "🔍 DEBUG - Clasificación por umbral estándar: %s", best_category)
+                return best_category, True
             
             # 🔧 PASO 3: SOLO SI ES AMBIGUA, usar contexto para resolver
-            logger.info(f"🔍 DEBUG - Consulta ambigua (score bajo), analizando contexto...")
+            log_debug(logger, "classifier", "🔍 DEBUG - Consulta ambigua (score bajo), analizando contexto...")
             context_influenced_category = self._analyze_context_for_ambiguous_queries(message_lower, context)
             if context_influenced_category:
-                logger.info(f"🔍 DEBUG - Clasificación influenciada por contexto: {context_influenced_category}")
-                return context_influenced_category
+                log_debug(logger, "classifier", "🔍 DEBUG - Clasificación influenciada por contexto: %s", context_influenced_category)
+                return context_influenced_category, False
             
             # 🔧 PASO 4: Verificar palabras clave de precio como fallback
             price_keywords = ["precio", "costo", "tarifa", "cuanto", "cuánto", "valor", "importe", "sale", "abonar", "pagar", "cobran", "dinero"]
             if any(keyword in message_lower for keyword in price_keywords):
-                logger.info(f"🔍 DEBUG - Forzando clasificación como PRECIOS por palabras clave detectadas")
-                return "precios"
+                log_debug(logger, "classifier", "🔍 DEBUG - Forzando clasificación como PRECIOS por palabras clave detectadas")
+                return "precios", True
             
-            logger.info(f"🔍 DEBUG - Defaulteando a general")
-            return "general"
+            log_debug(logger, "classifier", "🔍 DEBUG - Defaulteando a general")
+            return "general", True
             
         except Exception as e:
-            logger.error(f"Error clasificando consulta: {e}")
-            return "general"
+            logger.error("Error clasificando consulta: %s", e)
+            return "general", False
     
-    def _calculate_category_score(self, message: str, patterns: List[str]) -> float:
-        """Calcula puntuación para una categoría específica"""
-        total_matches = 0
-        total_words = len(message.split())
-        unique_patterns_matched = 0
+    def _category_scores(self, message: str, skip: List[str] = ()) -> Dict[str, float]:
+        """Puntuación de cada categoría con coincidencias (una sola pasada del matcher)"""
+        counts = self.matcher.match_counts(message, skip=skip)
+        if not counts:
+            return {}
         
-        for pattern in patterns:
-            matches = re.findall(pattern, message, re.IGNORECASE)
-            if matches:
-                total_matches += len(matches)
-                unique_patterns_matched += 1
+        # La fórmula depende solo de las palabras del mensaje: se decide una vez
+        message_lower = message.lower()
+        has_price_keywords = any(keyword in message_lower for keyword in PRICE_SCORE_KEYWORDS)
+        has_service_keywords = any(keyword in message_lower for keyword in SERVICE_SCORE_KEYWORDS)
+        has_reserva_keywords = any(keyword in message_lower for keyword in RESERVA_SCORE_KEYWORDS)
+        
+        scores = {}
+        for category, (total_matches, unique_patterns_matched) in counts.items():
+            score = self._calculate_category_score(
+                message, total_matches, unique_patterns_matched,
+                has_price_keywords, has_service_keywords, has_reserva_keywords
+            )
+            if score > 0:
+                scores[category] = score
+        return scores
+    
+    def _calculate_category_score(
+        self,
+        message: str,
+        total_matches: int,
+        unique_patterns_matched: int,
+        has_price_keywords: bool,
+        has_service_keywords: bool,
+        has_reserva_keywords: bool
+    ) -> float:
+        """Calcula puntuación para una categoría específica a partir de sus coincidencias"""
+        total_words = len(message.split())
         
         # Normalizar por longitud del mensaje
         if total_words == 0:
@@ -475,7 +652,7 @@ class QueryClassifier:
         
         # 🆕 ALGORITMO MEJORADO PARA CONSULTAS DE PRECIOS
         # Para consultas de precios, usar un algoritmo menos estricto
-        if any(keyword in message.lower() for keyword in ["precio", "costo", "tarifa", "cuanto", "cuánto", "valor", "importe", "sale", "abonar", "pagar"]):
+        if has_price_keywords:
             # Para consultas de precios: Si encuentra palabras clave, dar puntuación alta
             if total_matches > 0:
                 # Puntuación base alta si hay matches de precio
@@ -486,12 +663,12 @@ class QueryClassifier:
                 length_adjustment = max(0.7, 1.0 - (total_words * 0.05))
                 
                 final_score = min((base_score + pattern_bonus) * length_adjustment, 1.0)
-                logger.info(f"🔍 DEBUG SCORE PRECIOS - Mensaje: '{message}' | Matches: {total_matches} | Patrones únicos: {unique_patterns_matched} | Score: {final_score}")
+                log_debug(logger, "classifier", "🔍 DEBUG SCORE PRECIOS - Mensaje: '%s' | Matches: %s | Patrones únicos: %s | Score: %s", message, total_matches, unique_patterns_matched, final_score)
                 return final_score
         
         # 🔧 ALGORITMO MEJORADO PARA CONSULTAS DE SERVICIOS
         # Para consultas de servicios: usar algoritmo menos penalizante por longitud
-        if any(service_keyword in message.lower() for service_keyword in ["servicios", "comodidades", "amenities", "instalaciones", "facilidades"]):
+        if has_service_keywords:
             if total_matches > 0:
                 # Puntuación base alta si hay matches de servicios
                 base_score = 0.6
@@ -501,12 +678,12 @@ class QueryClassifier:
                 length_adjustment = max(0.8, 1.0 - (total_words * 0.02))
                 
                 final_score = min((base_score + pattern_bonus) * length_adjustment, 1.0)
-                logger.info(f"🔍 DEBUG SCORE SERVICIOS - Mensaje: '{message}' | Matches: {total_matches} | Patrones únicos: {unique_patterns_matched} | Score: {final_score}")
+                log_debug(logger, "classifier", "🔍 DEBUG SCORE SERVICIOS - Mensaje: '%s' | Matches: %s | Patrones únicos: %s | Score: %s", message, total_matches, unique_patterns_matched, final_score)
                 return final_score
 
         # 🆕 ALGORITMO ESPECIAL PARA CONSULTAS DE PROCESO_RESERVA
         # Para consultas de proceso de reserva: dar puntuación alta cuando hay intención clara
-        if any(reserva_keyword in message.lower() for reserva_keyword in ["reservar", "reserva", "proceder", "confirmar", "asegurar", "apartar"]):
+        if has_reserva_keywords:
             if total_matches > 0:
                 # Puntuación base muy alta para reservas (intención crítica)
                 base_score = 0.7
@@ -516,7 +693,7 @@ class QueryClassifier:
                 length_adjustment = max(0.85, 1.0 - (total_words * 0.01))
                 
                 final_score = min((base_score + pattern_bonus) * length_adjustment, 1.0)
-                logger.info(f"🔍 DEBUG SCORE PROCESO_RESERVA - Mensaje: '{message}' | Matches: {total_matches} | Patrones únicos: {unique_patterns_matched} | Score: {final_score}")
+                log_debug(logger, "classifier", "🔍 DEBUG SCORE PROCESO_RESERVA - Mensaje: '%s' | Matches: %s | Patrones únicos: %s | Score: %s", message, total_matches, unique_patterns_matched, final_score)
                 return final_score
 
         # Para otras categorías: usar algoritmo original
@@ -540,11 +717,10 @@ class QueryClassifier:
             }
             
             # Clasificar categoría principal - remover await ya que no es async
-            scores = {}
-            for category, patterns in self.classification_patterns.items():
-                score = self._calculate_category_score(message_lower, patterns)
-                if score > 0:
-                    scores[category] = score
+            model_category = self._classify_with_model(message)
+            scores = {} if model_category else self._category_scores(message_lower)
+            if model_category:
+                intent["primary_category"] = model_category
             
             if scores:
                 best_category = max(scores.keys(), key=lambda x: scores[x])
@@ -559,7 +735,7 @@ class QueryClassifier:
             return intent
             
         except Exception as e:
-            logger.error(f"Error analizando intención: {e}")
+            logger.error("Error analizando intención: %s", e)
             return {"primary_category": "general", "subcategories": [], "entities": {}}
     
     def _extract_entities(self, message: str) -> Dict[str, List[str]]:
@@ -720,7 +896,7 @@ class QueryClassifier:
             # 🔧 EXCLUSIÓN CRÍTICA: Si es claramente una consulta de precio, NO aplicar lógica de servicios
             price_keywords = ["precio", "costo", "tarifa", "cuanto", "cuánto", "valor", "importe", "sale", "abonar", "pagar", "cobran", "dinero"]
             if any(keyword in message.lower() for keyword in price_keywords):
-                logger.info(f"🔍 DEBUG - Consulta contiene palabras clave de PRECIO, NO aplicando lógica de servicios contextuales")
+                log_debug(logger, "classifier", "🔍 DEBUG - Consulta contiene palabras clave de PRECIO, NO aplicando lógica de servicios contextuales")
                 return None  # Dejar que el clasificador normal maneje esto
             
             # Detectar consultas ambiguas de servicios (solo si NO es consulta de precio)
@@ -741,25 +917,25 @@ class QueryClassifier:
             if not is_ambiguous_service_query:
                 return None
             
-            logger.info(f"🔍 DEBUG - Consulta de servicios ambigua detectada: '{message}'")
+            log_debug(logger, "classifier", "🔍 DEBUG - Consulta de servicios ambigua detectada: '%s'", message)
             
             # 🔧 PRIORIDAD MÁXIMA: Revisar el contexto híbrido del frontend (más actualizado)
             current_query = context.get("currentQuery", {})
             if current_query:
                 habitacion_contexto = current_query.get("habitacion")
-                logger.info(f"🔍 DEBUG - Habitación en currentQuery: {habitacion_contexto}")
+                log_debug(logger, "classifier", "🔍 DEBUG - Habitación en currentQuery: %s", habitacion_contexto)
                 
                 # Si la habitación es explícitamente undefined/None, es consulta del hospedaje
                 if habitacion_contexto is None or habitacion_contexto == "undefined":
-                    logger.info(f"🔍 DEBUG - Contexto híbrido indica consulta GENERAL del hospedaje (habitación limpiada)")
+                    log_debug(logger, "classifier", "🔍 DEBUG - Contexto híbrido indica consulta GENERAL del hospedaje (habitación limpiada)")
                     return "hospedaje_servicios"
                 
                 # Si hay habitación específica, es consulta de habitación
                 if habitacion_contexto and habitacion_contexto != "undefined":
-                    logger.info(f"🔍 DEBUG - Contexto híbrido indica habitación específica: {habitacion_contexto}")
+                    log_debug(logger, "classifier", "🔍 DEBUG - Contexto híbrido indica habitación específica: %s", habitacion_contexto)
                     return "habitacion_servicios"
             else:
-                logger.info(f"🔍 DEBUG - No hay currentQuery en contexto, continuando con otras verificaciones")
+                log_debug(logger, "classifier", "🔍 DEBUG - No hay currentQuery en contexto, continuando con otras verificaciones")
             
             # 1. SOLO si no hay contexto híbrido, revisar contexto del frontend (mensajes recientes)
             frontend_conversation = context.get("frontend_conversation", {})
@@ -770,7 +946,7 @@ class QueryClassifier:
                         bot_response = msg.get("message", "").lower()
                         # Si mencionó habitaciones específicas, asumir que se refiere a habitación
                         if any(word in bot_response for word in ["suite", "habitación", "cuarto", "room"]):
-                            logger.info(f"🔍 DEBUG - Contexto frontend (sin híbrido) indica habitación específica")
+                            log_debug(logger, "classifier", "🔍 DEBUG - Contexto frontend (sin híbrido) indica habitación específica")
                             return "habitacion_servicios"
             
             # 2. Contexto de sesión de BD (solo si no hay información más reciente)
@@ -778,17 +954,17 @@ class QueryClassifier:
             if session_context:
                 # Si hay habitación mencionada en el contexto
                 if session_context.get("last_habitacion"):
-                    logger.info(f"🔍 DEBUG - Contexto BD indica habitación: {session_context.get('last_habitacion')}")
+                    log_debug(logger, "classifier", "🔍 DEBUG - Contexto BD indica habitación: %s", session_context.get('last_habitacion'))
                     return "habitacion_servicios"
                 
                 # Si hay disponibilidad confirmada, probablemente se refiere a esa habitación
                 if session_context.get("last_availability"):
-                    logger.info(f"🔍 DEBUG - Contexto BD indica disponibilidad previa confirmada")
+                    log_debug(logger, "classifier", "🔍 DEBUG - Contexto BD indica disponibilidad previa confirmada")
                     return "habitacion_servicios"
             
             # 3. Si hay información de habitación específica en el contexto
             if context.get("habitacion_especifica"):
-                logger.info(f"🔍 DEBUG - Hay habitación específica en contexto")
+                log_debug(logger, "classifier", "🔍 DEBUG - Hay habitación específica en contexto")
                 return "habitacion_servicios"
             
             # 4. Si hay disponibilidad real con una sola habitación
@@ -797,13 +973,13 @@ class QueryClassifier:
                 hospedaje_disp = availability_real.get("hospedaje_disponibilidad", {})
                 detalle_habitaciones = hospedaje_disp.get("detalle_habitaciones", [])
                 if len(detalle_habitaciones) == 1:
-                    logger.info(f"🔍 DEBUG - Una sola habitación disponible, asumir servicios de habitación")
+                    log_debug(logger, "classifier", "🔍 DEBUG - Una sola habitación disponible, asumir servicios de habitación")
                     return "habitacion_servicios"
             
             # 5. DEFAULT: Si no hay contexto específico, asumir hospedaje
-            logger.info(f"🔍 DEBUG - Sin contexto específico, defaultear a servicios del hospedaje")
+            log_debug(logger, "classifier", "🔍 DEBUG - Sin contexto específico, defaultear a servicios del hospedaje")
             return "hospedaje_servicios"
             
         except Exception as e:
-            logger.error(f"Error analizando contexto para consultas ambiguas: {e}")
+            logger.error("Error analizando contexto para consultas ambiguas: %s", e)
             return None 
\ No newline at end of file
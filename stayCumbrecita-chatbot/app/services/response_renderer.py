@@ -0,0 +1,313 @@
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from ..core.config import settings
+from ..services.backend_service import formatear_precio_argentino
+
+logger = logging.getLogger(__name__)
+
+# Frases por tono del chatbot (TonoChatbot)
+TONE_PHRASES: Dict[str, Dict[str, str]] = {
+    "formal": {
+        "summary": "Resumen de su reserva",
+        "offer": "le ofrecemos",
+        "positive": "Con gusto le informamos que",
+        "negative": "Lamentamos informarle que",
+        "ask_single": "¿Desea conocer el precio o los servicios de la habitación?",
+        "ask_multiple": "¿Desea conocer más detalles de alguna de estas opciones o proceder con la reserva?",
+        "ask_price": "¿Necesita algún otro detalle?",
+        "ask_capacity": "¿Cuál de las opciones prefiere? Podemos generar el enlace de reserva para la alternativa que elija.",
+        "contact": "Para consultar otras fechas o recibir avisos de cancelaciones puede comunicarse con",
+        "checkout_ready": "Su reserva está lista para ser confirmada:",
+        "checkout_guide": "El sistema lo guiará paso a paso para completar la reserva.",
+    },
+    "cordial": {
+        "summary": "Resumen de tu reserva",
+        "offer": "te ofrezco",
+        "positive": "¡Excelente!",
+        "negative": "Lamentablemente",
+        "ask_single": "¿Te interesa saber el precio o querés que te cuente sobre los servicios?",
+        "ask_multiple": "¿Te interesa saber más detalles sobre alguna de estas opciones o deseas proceder con la reserva?",
+        "ask_price": "¿Necesitás algún otro detalle?",
+        "ask_capacity": "¿Cuál opción te conviene más? ¡Te genero el enlace de reserva para lo que elijas!",
+        "contact": "Si querés consultar otras fechas o recibir aviso de cancelaciones, podés comunicarte con",
+        "checkout_ready": "¡Perfecto! Tienes todo listo para confirmar tu reserva:",
+        "checkout_guide": "El sistema te guiará paso a paso para completar tu reserva.",
+    },
+    "juvenil": {
+        "summary": "Resumen de tu reserva",
+        "offer": "te paso",
+        "positive": "¡Buenísimo!",
+        "negative": "Uh, qué lástima,",
+        "ask_single": "¿Querés saber cuánto sale o qué incluye?",
+        "ask_multiple": "¿Te copa alguna? ¡Contame y avanzamos con la reserva!",
+        "ask_price": "¿Te ayudo con algo más?",
+        "ask_capacity": "¿Cuál te copa más? ¡Te paso el link de reserva al toque!",
+        "contact": "Si querés probar otras fechas o que te avisemos si se libera algo, escribile a",
+        "checkout_ready": "¡Listo! Ya tenés todo para confirmar tu reserva:",
+        "checkout_guide": "El sistema te va guiando paso a paso para terminarla.",
+    },
+    "amigable": {
+        "summary": "Resumen de tu reserva",
+        "offer": "te ofrezco",
+        "positive": "¡Qué suerte!",
+        "negative": "Lamentablemente",
+        "ask_single": "¿Querés conocer el precio o que te cuente qué incluye la habitación?",
+        "ask_multiple": "¿Te gustaría saber más de alguna de estas opciones o avanzar con la reserva?",
+        "ask_price": "¿Necesitás algún otro detalle?",
+        "ask_capacity": "¿Qué opción te queda mejor? ¡Te preparo el enlace de reserva cuando me digas!",
+        "contact": "Si querés ver otras fechas o que te avisemos de cancelaciones, podés escribirle a",
+        "checkout_ready": "¡Perfecto! Ya está todo listo para confirmar tu reserva:",
+        "checkout_guide": "El sistema te guiará paso a paso para completar tu reserva.",
+    },
+    "corporativo": {
+        "summary": "Resumen de la reserva",
+        "offer": "le ofrecemos",
+        "positive": "Le confirmamos que",
+        "negative": "Le informamos que",
+        "ask_single": "¿Desea recibir la cotización o el detalle de servicios de la habitación?",
+        "ask_multiple": "¿Desea avanzar con alguna de estas opciones?",
+        "ask_price": "¿Requiere información adicional?",
+        "ask_capacity": "Indíquenos la opción elegida y generaremos el enlace de reserva correspondiente.",
+        "contact": "Para otras fechas o avisos de cancelación, contacte a",
+        "checkout_ready": "La reserva está lista para su confirmación:",
+        "checkout_guide": "El sistema lo guiará paso a paso para completar la reserva.",
+    },
+}
+
+DEFAULT_TONE = "cordial"
+
+# Tonos que se dirigen al usuario de "usted"
+FORMAL_TONES = {"formal", "corporativo"}
+
+
+def _format_date(date_str: Optional[str]) -> str:
+    """YYYY-MM-DD → DD/MM/YYYY"""
+    try:
+        return datetime.strptime(date_str, "%Y-%m-%d").strftime("%d/%m/%Y")
+    except (ValueError, TypeError):
+        return date_str or ""
+
+
+def _date_range_text(fecha_inicio: Optional[str], fecha_fin: Optional[str]) -> str:
+    if not fecha_fin or fecha_inicio == fecha_fin:
+        return f"para el {_format_date(fecha_inicio)}"
+    return f"del {_format_date(fecha_inicio)} al {_format_date(fecha_fin)}"
+
+
+def _precio_texto(valor: Any) -> Optional[str]:
+    try:
+        return formatear_precio_argentino(float(valor))
+    except (ValueError, TypeError):
+        return None
+
+
+class ResponseRenderer:
+    """Respuestas determinísticas para consultas que se resuelven solo con datos del backend.
+
+    Cada renderer recibe el contexto y devuelve el texto final, o None si no
+    tiene datos suficientes; en ese caso la respuesta la genera el LLM.
+    """
+
+    def __init__(self):
+        self._renderers: Dict[Tuple[str, Optional[str]], Callable[[Dict[str, Any], Dict[str, str], str], Optional[str]]] = {
+            ("disponibilidad", None): self._render_disponibilidad,
+            ("precios", None): self._render_precios,
+            ("proceso_reserva", "caso1"): self._render_checkout,
+            ("capacidad_excedida_general", None): self._render_capacidad_excedida,
+        }
+
+    def render(self, query_type: str, context: Dict[str, Any], tono: Any = None) -> Optional[str]:
+        """Devuelve la respuesta renderizada o None si corresponde usar el LLM"""
+        if not settings.deterministic_responses:
+            return None
+        if "error_fecha_pasada" in context:
+            return None
+
+        caso = context.get("proceso_reserva_caso") if query_type == "proceso_reserva" else None
+        renderer = self._renderers.get((query_type, caso))
+        if renderer is None:
+            return None
+
+        tone = getattr(tono, "value", tono) or DEFAULT_TONE
+        phrases = TONE_PHRASES.get(tone, TONE_PHRASES[DEFAULT_TONE])
+        try:
+            return renderer(context, phrases, tone)
+        except Exception as e:
+            logger.warning(f"⚠️ RENDER - Error renderizando {query_type}, se usará el LLM: {e}")
+            return None
+
+    def _render_disponibilidad(self, context: Dict[str, Any], phrases: Dict[str, str], tone: str) -> Optional[str]:
+        query_params = context.get("query_params", {})
+        if query_params.get("is_monthly_query") or "reserva_info" in context:
+            return None
+
+        hospedaje_disp = context.get("availability_real", {}).get("hospedaje_disponibilidad")
+        if not hospedaje_disp:
+            return None
+
+        fechas = _date_range_text(hospedaje_disp.get("fecha_inicio"), hospedaje_disp.get("fecha_fin"))
+
+        if not hospedaje_disp.get("disponible", False):
+            return self._render_sin_disponibilidad(context, phrases, fechas)
+
+        habitaciones = hospedaje_disp.get("detalle_habitaciones") or []
+        if not habitaciones:
+            return None
+
+        if len(habitaciones) == 1:
+            nombre = habitaciones[0].get("nombre", "la habitación")
+            if tone in FORMAL_TONES:
+                return f"{phrases['positive']} la {nombre} se encuentra disponible {fechas}. {phrases['ask_single']}"
+            return f"{phrases['positive']} Tenemos la {nombre} disponible {fechas}. {phrases['ask_single']}"
+
+        lines = []
+        if tone in FORMAL_TONES:
+            lines.append(f"{phrases['positive']} {fechas} contamos con disponibilidad en las siguientes habitaciones:")
+        else:
+            lines.append(f"{phrases['positive']} {fechas[0].upper()}{fechas[1:]} tenemos disponibilidad en estas habitaciones:")
+        for i, hab in enumerate(habitaciones, 1):
+            linea = f"\n{i}. **{hab.get('nombre', 'Habitación')}**"
+            if hab.get("capacidad"):
+                linea += f" (capacidad para {hab['capacidad']} personas)"
+            descripcion = hab.get("descripcionCorta") or hab.get("descripcion_corta")
+            if descripcion:
+                linea += f":\n   - {descripcion}"
+            lines.append(linea)
+        lines.append(f"\n{phrases['ask_multiple']}")
+        return "\n".join(lines)
+
+    def _render_sin_disponibilidad(self, context: Dict[str, Any], phrases: Dict[str, str], fechas: str) -> str:
+        hospedaje = context.get("hospedaje", {})
+        response = f"{phrases['negative']} no tenemos disponibilidad {fechas}."
+
+        contactos = [
+            hospedaje.get("telefonoContacto") or hospedaje.get("telefono_contacto"),
+            hospedaje.get("mailContacto") or hospedaje.get("mail_contacto"),
+        ]
+        contactos = [contacto for contacto in contactos if contacto]
+        if contactos:
+            responsable = hospedaje.get("responsable")
+            destinatario = f"{responsable} ({' / '.join(contactos)})" if responsable else " / ".join(contactos)
+            response += f" {phrases['contact']} {destinatario}."
+        return response
+
+    def _collect_precios(self, pricing_real: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Extrae (habitación, total, fechas) de pricing_real en orden de preferencia"""
+        cotizaciones = []
+        for info in pricing_real.values():
+            precios = info.get("precios", {})
+            for key in ("rango", "fecha_especifica", "check_in"):
+                precio = precios.get(key)
+                if precio and precio.get("precio_total") is not None:
+                    cotizaciones.append({
+                        "habitacion": info.get("habitacion_nombre"),
+                        "total": precio["precio_total"],
+                        "fecha_inicio": precio.get("fecha_inicio"),
+                        "fecha_fin": precio.get("fecha_fin"),
+                        "base": False,
+                    })
+                    break
+            else:
+                base = precios.get("base")
+                if base and base.get("precio_base") is not None:
+                    cotizaciones.append({
+                        "habitacion": info.get("habitacion_nombre"),
+                        "total": base["precio_base"],
+                        "base": True,
+                    })
+        return cotizaciones
+
+    def _render_precios(self, context: Dict[str, Any], phrases: Dict[str, str], tone: str) -> Optional[str]:
+        pricing_real = context.get("pricing_real")
+        if not pricing_real:
+            return None
+        # Si las fechas están ocupadas no se cotiza (lo explica el LLM)
+        hospedaje_disp = context.get("availability_real", {}).get("hospedaje_disponibilidad")
+        if hospedaje_disp and not hospedaje_disp.get("disponible", False):
+            return None
+
+        cotizaciones = self._collect_precios(pricing_real)
+        if not cotizaciones or any(not c["habitacion"] for c in cotizaciones):
+            return None
+        # No mezclar precios base con cotizaciones por fecha
+        if len({c["base"] for c in cotizaciones}) > 1:
+            return None
+
+        es_precio_base = cotizaciones[0]["base"]
+        if es_precio_base:
+            if len(cotizaciones) == 1:
+                c = cotizaciones[0]
+                return f"El precio base de la {c['habitacion']} es de {_precio_texto(c['total'])} por noche. {phrases['ask_price']}"
+            lines = ["Los precios base por noche son:\n"]
+            for c in cotizaciones:
+                lines.append(f"🏨 **{c['habitacion']}:** {_precio_texto(c['total'])} por noche")
+            lines.append(f"\n{phrases['ask_price']}")
+            return "\n".join(lines)
+
+        fechas = _date_range_text(cotizaciones[0]["fecha_inicio"], cotizaciones[0]["fecha_fin"])
+        if len(cotizaciones) == 1:
+            c = cotizaciones[0]
+            return f"El precio para la {c['habitacion']} {fechas} es de {_precio_texto(c['total'])} para la estadía completa. {phrases['ask_price']}"
+
+        lines = [f"Los precios {fechas} son:\n"]
+        for c in cotizaciones:
+            lines.append(f"🏨 **{c['habitacion']}:** {_precio_texto(c['total'])} para toda la estadía")
+        lines.append(f"\n{phrases['ask_price']}")
+        return "\n".join(lines)
+
+    def _render_checkout(self, context: Dict[str, Any], phrases: Dict[str, str], tone: str) -> Optional[str]:
+        reserva_info = context.get("reserva_info") or {}
+        required = ("habitacion_nombre", "fecha_inicio", "fecha_fin", "huespedes", "checkout_url")
+        if any(not reserva_info.get(key) for key in required):
+            return None
+
+        return (
+            f"{phrases['checkout_ready']}\n\n"
+            f"**📋 {phrases['summary']}:**\n"
+            f"- **Habitación:** {reserva_info['habitacion_nombre']}\n"
+            f"- **Fechas:** Del {_format_date(reserva_info['fecha_inicio'])} al {_format_date(reserva_info['fecha_fin'])}\n"
+            f"- **Huéspedes:** {reserva_info['huespedes']} personas\n\n"
+            f"{phrases['checkout_guide']}"
+            f"\n\n🔗 Este es el enlace para tu reserva:\n{reserva_info['checkout_url']}"
+        )
+
+    def _render_capacidad_excedida(self, context: Dict[str, Any], phrases: Dict[str, str], tone: str) -> Optional[str]:
+        capacidad = context.get("capacidad_excedida") or {}
+        combinaciones = capacidad.get("combinaciones_posibles") or []
+        if not combinaciones:
+            return None
+
+        numero_huespedes = capacidad.get("numero_huespedes")
+        capacidad_maxima = capacidad.get("capacidad_maxima_individual")
+        hospedaje_disp = context.get("availability_real", {}).get("hospedaje_disponibilidad", {})
+        fechas = _date_range_text(hospedaje_disp.get("fecha_inicio"), hospedaje_disp.get("fecha_fin"))
+
+        lines = [
+            f"¡Tenemos opciones disponibles para {numero_huespedes} personas {fechas}!\n",
+            f"Como nuestras habitaciones tienen capacidad máxima de {capacidad_maxima} personas cada una, "
+            f"{phrases['offer']} estas alternativas:\n",
+        ]
+        for combo in combinaciones[:3]:
+            cantidad = len(combo.get("habitaciones", []))
+            lines.append(f"🏠 **Para {numero_huespedes} personas - {cantidad} habitaciones:**")
+            linea = f"   • {' + '.join(combo.get('habitaciones', []))}"
+            if combo.get("distribucion"):
+                linea += f" ({combo['distribucion']})"
+            lines.append(linea)
+            if combo.get("precio_total"):
+                lines.append(f"   • Total: {_precio_texto(combo['precio_total'])} para toda la estadía")
+            lines.append("")
+
+        individuales = [hab.get("nombre") for hab in capacidad.get("habitaciones_disponibles", []) if hab.get("nombre")]
+        if individuales:
+            lines.append(f"🏠 **Para {capacidad_maxima} personas - 1 habitación:**")
+            lines.extend(f"   • {nombre}" for nombre in individuales)
+            lines.append("")
+
+        lines.append(phrases["ask_capacity"])
+        return "\n".join(lines)
+
+
+# Instancia global del renderer de respuestas
+response_renderer = ResponseRenderer()
@@ -0,0 +1,198 @@
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from ..core.config import settings
+from ..core.database import execute_vector_query
+from ..utils.lazy_import import LazyModule
+
+logger = logging.getLogger(__name__)
+
+# numpy solo se importa si VECTOR_INDEX_ENABLED=true
+np = LazyModule("numpy")
+
+
+class HospedajeIndex:
+    """Embeddings de un hospedaje en una matriz float32 contigua y normalizada"""
+
+    def __init__(self, rows: List[tuple]):
+        self.ids: List[str] = []
+        self.contents: List[str] = []
+        self.sources: List[str] = []
+        vectors = []
+        for chunk_id, content, metadata, embedding in rows:
+            if isinstance(metadata, str):
+                metadata = json.loads(metadata)
+            self.ids.append(str(chunk_id))
+            self.contents.append(content)
+            self.sources.append((metadata or {}).get("source", "documento"))
+            vectors.append(json.loads(embedding) if isinstance(embedding, str) else embedding)
+
+        if vectors:
+            matrix = np.ascontiguousarray(np.array(vectors, dtype=np.float32))
+        else:
+            matrix = np.zeros((0, settings.vector_dimensions), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        # Los chunks guardados con vector vacío quedan en cero (similitud 0)
+        norms[norms == 0] = 1.0
+        self.matrix = matrix / norms
+        self.loaded_at = time.monotonic()
+
+    @property
+    def nbytes(self) -> int:
+        return self.matrix.nbytes + sum(len(content) for content in self.contents)
+
+    def top_k(self, query: "np.ndarray", limit: int, threshold: float) -> List[Dict[str, Any]]:
+        if not self.ids:
+            return []
+        scores = self.matrix @ query
+        if len(scores) > limit:
+            candidates = np.argpartition(-scores, limit)[:limit]
+        else:
+            candidates = np.arange(len(scores))
+        ordered = candidates[np.argsort(-scores[candidates])]
+        return [
+            {
+                "id": self.ids[i],
+                "content": self.contents[i],
+                "source": self.sources[i],
+                "similarity": float(scores[i]),
+            }
+            for i in ordered
+            if scores[i] > threshold
+        ]
+
+
+class InMemoryVectorIndex:
+    """Índice vectorial en proceso, por hospedaje, con LRU acotado por memoria.
+
+    La primera búsqueda de un hospedaje carga todos sus chunks desde Postgres;
+    las siguientes se resuelven con un único producto matriz-vector en NumPy.
+    El re-entrenamiento invalida el hospedaje y ttl_seconds acota cuánto puede
+    quedar desactualizado un índice cargado por otro proceso.
+    """
+
+    def __init__(self, max_mb: Optional[int] = None, ttl_seconds: Optional[float] = None):
+        self.enabled = settings.vector_index_enabled and np.available()
+        self.max_bytes = (max_mb or settings.vector_index_max_mb) * 1024 * 1024
+        self.ttl_seconds = ttl_seconds or settings.vector_index_ttl
+        self._indexes: "OrderedDict[str, HospedajeIndex]" = OrderedDict()
+        self._loading: Dict[str, asyncio.Future] = {}
+        self._generation: Dict[str, int] = {}
+        # hits: índice ya en memoria; misses: hubo que cargarlo (o esperar la carga de otra búsqueda)
+        self._counters = {"hits": 0, "misses": 0, "loads": 0, "evictions": 0, "invalidations": 0}
+
+        if settings.vector_index_enabled and not self.enabled:
+            logger.warning("⚠️ VECTOR_INDEX_ENABLED=true pero numpy no está instalado; se usa Postgres")
+
+    async def search(
+        self,
+        hospedaje_id: str,
+        query_embedding: List[float],
+        limit: int,
+        threshold: float
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Top-k por similitud coseno, o None si el índice no está disponible"""
+        if not self.enabled:
+            return None
+
+        index = await self._get_index(hospedaje_id)
+        if index is None:
+            return None
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if query.shape[0] != index.matrix.shape[1] and index.ids:
+            logger.warning(f"⚠️ Dimensión de consulta {query.shape[0]} distinta del índice {index.matrix.shape[1]}")
+            return None
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        return index.top_k(query, limit, threshold)
+
+    async def _get_index(self, hospedaje_id: str) -> Optional[HospedajeIndex]:
+        index = self._indexes.get(hospedaje_id)
+        if index is not None and time.monotonic() - index.loaded_at < self.ttl_seconds:
+            self._indexes.move_to_end(hospedaje_id)
+            self._counters["hits"] += 1
+            return index
+
+        self._counters["misses"] += 1
+        # Una sola carga concurrente por hospedaje
+        pending = self._loading.get(hospedaje_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[hospedaje_id] = future
+        index = None
+        try:
+            index = await self._load(hospedaje_id)
+            return index
+        except Exception as e:
+            logger.error(f"Error cargando índice vectorial del hospedaje {hospedaje_id}: {e}")
+            return None
+        finally:
+            self._loading.pop(hospedaje_id, None)
+            # También si la carga se cancela (CancelledError): los que esperan usan Postgres
+            if not future.done():
+                future.set_result(index)
+
+    async def _load(self, hospedaje_id: str) -> HospedajeIndex:
+        generation = self._generation.get(hospedaje_id, 0)
+        started = time.perf_counter()
+        rows = await execute_vector_query(
+            """
+            SELECT id, content, metadata, embedding::text
+            FROM chatbot_knowledge
+            WHERE hospedaje_id = %s
+            ORDER BY document_id, chunk_index
+            """,
+            [hospedaje_id]
+        ) or []
+
+        # Parsear y normalizar fuera del event loop
+        index = await asyncio.to_thread(HospedajeIndex, rows)
+        self._counters["loads"] += 1
+        logger.info(
+            f"🧠 Índice vectorial de {hospedaje_id}: {len(index.ids)} chunks, "
+            f"{index.nbytes / 1024:.0f} KB en {(time.perf_counter() - started) * 1000:.0f}ms"
+        )
+
+        # Si se re-entrenó mientras cargaba, no guardar un índice viejo
+        if self._generation.get(hospedaje_id, 0) == generation:
+            self._indexes[hospedaje_id] = index
+            self._indexes.move_to_end(hospedaje_id)
+            self._evict()
+        return index
+
+    def _evict(self) -> None:
+        while len(self._indexes) > 1 and self.memory_bytes > self.max_bytes:
+            evicted, _ = self._indexes.popitem(last=False)
+            self._counters["evictions"] += 1
+            logger.info(f"🧠 Índice vectorial de {evicted} liberado por límite de memoria")
+
+    def invalidate(self, hospedaje_id: str) -> None:
+        """Descarta el índice de un hospedaje (llamar después de re-entrenarlo)"""
+        self._generation[hospedaje_id] = self._generation.get(hospedaje_id, 0) + 1
+        if self._indexes.pop(hospedaje_id, None) is not None:
+            self._counters["invalidations"] += 1
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(index.nbytes for index in self._indexes.values())
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "hospedajes": len(self._indexes),
+            "memory_mb": round(self.memory_bytes / 1024 / 1024, 2),
+            "max_mb": round(self.max_bytes / 1024 / 1024, 2),
+            **self._counters,
+        }
+
+
+# Instancia global del índice
+vector_index = InMemoryVectorIndex()
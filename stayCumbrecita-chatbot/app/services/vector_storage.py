@@ -0,0 +1,160 @@
+import logging
+import math
+from typing import Any, Dict, List, Optional
+from ..core.config import settings
+from ..core.database import execute_vector_query, execute_vector_query_one
+
+logger = logging.getLogger(__name__)
+
+STORAGE_MODES = ("full", "halfvec", "reduced")
+
+# Dimensión nativa de cada modelo (la que devuelve la API sin el parámetro dimensions)
+MODEL_DIMENSIONS = {
+    "text-embedding-3-small": 1536,
+    "text-embedding-3-large": 3072,
+    "text-embedding-ada-002": 1536,
+}
+
+# Modelos que aceptan el parámetro dimensions (los text-embedding-3)
+SHORTENABLE_MODELS = ("text-embedding-3-small", "text-embedding-3-large")
+
+INDEX_NAME = "idx_chatbot_knowledge_embedding"
+
+
+def normalize(vector: List[float]) -> List[float]:
+    """Vector con norma 1 (los vectores nulos se devuelven tal cual)"""
+    norm = math.sqrt(sum(value * value for value in vector))
+    if not norm:
+        return list(vector)
+    return [value / norm for value in vector]
+
+
+class VectorStorage:
+    """Formato de almacenamiento de los embeddings de chatbot_knowledge.
+
+    - full: vector(N) float32, el formato original.
+    - halfvec: halfvec(N) float16 (pgvector >= 0.7), la mitad de espacio.
+    - reduced: vector(D) con D < N pidiendo menos dimensiones a la API.
+
+    Los vectores se normalizan al escribirse, así el coseno es igual al producto
+    interno y las búsquedas usan <#> con el operator class *_ip_ops. Las bases con
+    el índice vector_cosine_ops anterior siguen usando <=> hasta migrarlas con
+    tools/migrate_embeddings.py.
+    """
+
+    def __init__(self, mode: Optional[str] = None, dimensions: Optional[int] = None, model: Optional[str] = None):
+        self.model = model or settings.embedding_model
+        self.mode = mode or settings.embedding_storage
+        if self.mode not in STORAGE_MODES:
+            logger.warning(f"⚠️ EMBEDDING_STORAGE={self.mode} no es válido, se usa 'full'")
+            self.mode = "full"
+
+        self.native_dimensions = MODEL_DIMENSIONS.get(self.model, settings.vector_dimensions)
+        self.dimensions = dimensions or settings.vector_dimensions
+        if self.dimensions != self.native_dimensions and self.model not in SHORTENABLE_MODELS:
+            logger.warning(f"⚠️ {self.model} no admite reducir dimensiones, se usan {self.native_dimensions}")
+            self.dimensions = self.native_dimensions
+        if self.mode == "reduced" and self.dimensions >= self.native_dimensions:
+            logger.warning(
+                f"⚠️ EMBEDDING_STORAGE=reduced con EMBEDDING_DIMENSIONS={self.dimensions}: "
+                f"no reduce nada (el modelo tiene {self.native_dimensions})"
+            )
+
+        # "ip" (producto interno) o "cosine" si la base todavía tiene el índice viejo
+        self.distance = "ip"
+        self.column_type_in_db: Optional[str] = None
+
+    @property
+    def vector_type(self) -> str:
+        return "halfvec" if self.mode == "halfvec" else "vector"
+
+    @property
+    def cast(self) -> str:
+        """Tipo de la columna embedding, ej: halfvec(1536) o vector(512)"""
+        return f"{self.vector_type}({self.dimensions})"
+
+    @property
+    def opclass(self) -> str:
+        return f"{self.vector_type}_ip_ops"
+
+    @property
+    def bytes_per_vector(self) -> int:
+        # 8 bytes de cabecera + 2 (half) o 4 (float) por dimensión
+        return 8 + self.dimensions * (2 if self.vector_type == "halfvec" else 4)
+
+    @property
+    def embedding_key(self) -> str:
+        """Clave del modelo en el cache de embeddings (incluye las dimensiones si se reducen)"""
+        if self.dimensions == self.native_dimensions:
+            return self.model
+        return f"{self.model}:{self.dimensions}"
+
+    def request_options(self) -> Dict[str, Any]:
+        """Parámetros extra de embeddings.create para pedir menos dimensiones"""
+        if self.dimensions == self.native_dimensions:
+            return {}
+        # extra_body: el cliente openai fijado en requirements no expone dimensions como argumento
+        return {"extra_body": {"dimensions": self.dimensions}}
+
+    def similarity_sql(self, column: str = "embedding") -> str:
+        """Expresión de similitud (mayor es mejor) contra un parámetro %s"""
+        if self.distance == "ip":
+            return f"-({column} <#> %s::{self.cast})"
+        return f"1 - ({column} <=> %s::{self.cast})"
+
+    def order_sql(self, column: str = "embedding") -> str:
+        """Expresión de distancia para ORDER BY (la que puede usar el índice)"""
+        operator = "<#>" if self.distance == "ip" else "<=>"
+        return f"{column} {operator} %s::{self.cast}"
+
+    async def verify_schema(self) -> bool:
+        """Compara la columna y el índice de la base con la configuración.
+
+        Ajusta el operador al índice existente y devuelve False si hace falta
+        correr la migración (el tipo de columna no coincide).
+        """
+        try:
+            column = await execute_vector_query_one(
+                """
+                SELECT format_type(atttypid, atttypmod)
+                FROM pg_attribute
+                WHERE attrelid = 'chatbot_knowledge'::regclass AND attname = 'embedding'
+                """
+            )
+            index = await execute_vector_query(
+                "SELECT indexdef FROM pg_indexes WHERE tablename = 'chatbot_knowledge' AND indexname = %s",
+                [INDEX_NAME]
+            ) or []
+        except Exception as e:
+            logger.error(f"Error verificando el almacenamiento de embeddings: {e}")
+            return False
+
+        self.column_type_in_db = column[0] if column else None
+        indexdef = index[0][0] if index else ""
+        self.distance = "cosine" if "cosine_ops" in indexdef else "ip"
+
+        if self.column_type_in_db != self.cast:
+            logger.warning(
+                f"⚠️ chatbot_knowledge.embedding es {self.column_type_in_db} pero la configuración pide {self.cast}; "
+                f"ejecutar tools/migrate_embeddings.py"
+            )
+            return False
+
+        logger.info(
+            f"🧮 Embeddings almacenados como {self.cast} "
+            f"({self.bytes_per_vector} bytes/vector, distancia {self.distance})"
+        )
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "type": self.cast,
+            "column_in_db": self.column_type_in_db,
+            "distance": self.distance,
+            "bytes_per_vector": self.bytes_per_vector,
+        }
+
+
+# Instancia global del formato de almacenamiento
+vector_storage = VectorStorage()
@@ -0,0 +1,158 @@
+"""
+División de texto en chunks por tokens respetando títulos, párrafos y oraciones.
+
+Pensado para el texto que devuelve pdf_text.clean_text (conserva los saltos de
+línea): se reconstruyen los párrafos, se detectan los títulos y se arman chunks
+de hasta max_tokens sin cortar oraciones, con solapamiento de N oraciones.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+from .tokens import count_tokens, truncate_to_tokens
+
+# Fin de oración seguido de espacio y comienzo de la siguiente
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+(?=[¿¡"\'(]?[A-ZÁÉÍÓÚÑÜ0-9])')
+_NUMBERED_HEADING = re.compile(r'^\d+(\.\d+)*[.)]?\s+\S')
+_LIST_ITEM = re.compile(r'^(-|\d+[.)])\s+')
+_TERMINAL_PUNCTUATION = ('.', '!', '?', ':', ';')
+
+MAX_HEADING_WORDS = 8
+
+
+def _is_heading(line: str, next_line: Optional[str], previous_closed: bool) -> bool:
+    """Heurística de títulos: líneas cortas sin puntuación final"""
+    words = line.split()
+    if not words or len(words) > MAX_HEADING_WORDS or line.endswith(('.', ',', ';')):
+        return False
+    if line.endswith(':') or _NUMBERED_HEADING.match(line):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    if letters and all(c.isupper() for c in letters) and len(letters) > 2:
+        return True
+    # Línea corta aislada entre un párrafo cerrado y otro que empieza en mayúscula
+    return (
+        previous_closed
+        and len(words) <= 6
+        and next_line is not None
+        and next_line[:1].isupper()
+    )
+
+
+def split_blocks(text: str) -> List[Tuple[str, str]]:
+    """Divide el texto en bloques ('heading' | 'paragraph', texto).
+
+    Las líneas de un mismo párrafo se vuelven a unir con espacios (el PDF corta
+    por ancho de página); un renglón que termina en puntuación seguido de otro en
+    mayúscula, una línea en blanco o un ítem de lista abren un párrafo nuevo.
+    """
+    blocks: List[Tuple[str, str]] = []
+    lines = [line.strip() for line in text.split("\n")]
+    paragraph: List[str] = []
+
+    def close_paragraph():
+        if paragraph:
+            blocks.append(("paragraph", " ".join(paragraph)))
+            paragraph.clear()
+
+    for i, line in enumerate(lines):
+        if not line:
+            close_paragraph()
+            continue
+
+        next_line = next((l for l in lines[i + 1:] if l), None)
+        previous_closed = not paragraph or paragraph[-1].endswith(_TERMINAL_PUNCTUATION)
+
+        if _is_heading(line, next_line, previous_closed):
+            close_paragraph()
+            blocks.append(("heading", line.rstrip(':')))
+            continue
+
+        if paragraph and (_LIST_ITEM.match(line) or (previous_closed and line[:1].isupper())):
+            close_paragraph()
+        paragraph.append(line)
+
+    close_paragraph()
+    return blocks
+
+
+def split_sentences(text: str) -> List[str]:
+    return [sentence.strip() for sentence in _SENTENCE_SPLIT.split(text) if sentence.strip()]
+
+
+class TokenChunker:
+    """Arma chunks de hasta max_tokens que no cruzan títulos ni cortan oraciones"""
+
+    def __init__(self, max_tokens: int, overlap_sentences: int = 1, model: Optional[str] = None):
+        self.max_tokens = max_tokens
+        self.overlap_sentences = max(0, overlap_sentences)
+        self.model = model
+
+    def _tokens(self, text: str) -> int:
+        return count_tokens(text, self.model) if self.model else count_tokens(text)
+
+    def _units(self, paragraph: str) -> List[str]:
+        """Párrafo completo si entra; si no, sus oraciones (recortando las que no entran)"""
+        if self._tokens(paragraph) <= self.max_tokens:
+            return [paragraph]
+        units = []
+        for sentence in split_sentences(paragraph):
+            while self._tokens(sentence) > self.max_tokens:
+                head = truncate_to_tokens(sentence, self.max_tokens)
+                # Cortar en el último espacio para no partir palabras
+                cut = head.rfind(" ")
+                head = head[:cut] if cut > len(head) // 2 else head
+                if not head.strip():
+                    break
+                units.append(head.strip())
+                sentence = sentence[len(head):].strip()
+            if sentence:
+                units.append(sentence)
+        return units
+
+    def split(self, text: str) -> List[Dict[str, Any]]:
+        """Devuelve [{"content", "heading", "token_count"}, ...]"""
+        chunks: List[Dict[str, Any]] = []
+        heading: Optional[str] = None
+        current: List[str] = []
+        current_tokens = 0
+
+        def emit():
+            nonlocal current, current_tokens
+            body = [unit for unit in current if unit != heading]
+            if body:
+                content = "\n".join(current)
+                chunks.append({"content": content, "heading": heading, "token_count": self._tokens(content)})
+            current, current_tokens = [], 0
+
+        def start_with_heading():
+            nonlocal current, current_tokens
+            if heading:
+                current = [heading]
+                current_tokens = self._tokens(heading)
+
+        for kind, block in split_blocks(text):
+            if kind == "heading":
+                emit()
+                heading = block
+                start_with_heading()
+                continue
+
+            for unit in self._units(block):
+                # +1 por el salto de línea que separa las unidades dentro del chunk
+                unit_tokens = self._tokens(unit) + 1
+                if current_tokens + unit_tokens > self.max_tokens and any(u != heading for u in current):
+                    # Solapamiento: últimas oraciones del chunk anterior
+                    previous = " ".join(u for u in current if u != heading)
+                    overlap = split_sentences(previous)[-self.overlap_sentences:] if self.overlap_sentences else []
+                    emit()
+                    start_with_heading()
+                    overlap_text = " ".join(overlap)
+                    overlap_tokens = self._tokens(overlap_text)
+                    if overlap and overlap_tokens + current_tokens + unit_tokens <= self.max_tokens:
+                        current.append(overlap_text)
+                        current_tokens += overlap_tokens
+                current.append(unit)
+                current_tokens += unit_tokens
+
+        emit()
+        return chunks
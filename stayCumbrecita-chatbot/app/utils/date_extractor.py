@@ -1,89 +1,490 @@
-import re
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, Tuple
+"""
+Extracción de fechas, meses consultados y cantidades (huéspedes, noches, etc.).
+
+El mensaje se tokeniza una sola vez (números, fechas numéricas, palabras sin
+acentos) y una gramática chica recorre los tokens de izquierda a derecha:
+
+    rangos      del 11 al 14 de julio · entre el 3 y el 5 · 10-12 de marzo
+                del 28 de diciembre al 2 de enero · 15/07 al 18/07/2026
+    días        el 15 · 11 de julio · 15/07/2026
+    relativas   hoy · mañana · pasado mañana · este finde · el viernes ·
+                el próximo sábado
+    meses       en julio · julio y agosto · este mes · el mes que viene
+    cantidades  4 personas · somos cuatro · 2 adultos y 1 niño · una pareja ·
+                3 noches · 2 habitaciones
+
+Convenciones: un mes sin año es del año en curso, un día sin mes es del mes en
+curso y "este finde" va del próximo viernes (hoy, si es viernes) al domingo.
+La fecha de referencia se puede inyectar (today) y el resultado se memoiza
+por (mensaje, fecha): el historial se re-analiza en cada turno.
+"""
+
 import logging
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import re
+
+from ..core.logging_config import log_debug
 
 logger = logging.getLogger(__name__)
 
+MONTHS = {
+    'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4, 'mayo': 5, 'junio': 6,
+    'julio': 7, 'agosto': 8, 'septiembre': 9, 'setiembre': 9, 'octubre': 10,
+    'noviembre': 11, 'diciembre': 12,
+}
+# Abreviaturas: solo se aceptan pegadas a un día ("11 de jul"), sueltas son ambiguas ("vista al mar")
+MONTH_ABBREVIATIONS = {
+    'ene': 1, 'feb': 2, 'mar': 3, 'abr': 4, 'may': 5, 'jun': 6, 'jul': 7,
+    'ago': 8, 'sep': 9, 'sept': 9, 'set': 9, 'oct': 10, 'nov': 11, 'dic': 12,
+}
+WEEKDAYS = {'lunes': 0, 'martes': 1, 'miercoles': 2, 'jueves': 3, 'viernes': 4, 'sabado': 5, 'domingo': 6}
+NUMBER_WORDS = {
+    'un': 1, 'una': 1, 'uno': 1, 'dos': 2, 'tres': 3, 'cuatro': 4, 'cinco': 5, 'seis': 6,
+    'siete': 7, 'ocho': 8, 'nueve': 9, 'diez': 10, 'once': 11, 'doce': 12,
+}
+# Sustantivo contado -> categoría de la cantidad
+COUNT_NOUNS = {
+    'persona': 'guests', 'personas': 'guests', 'huesped': 'guests', 'huespedes': 'guests', 'pax': 'guests',
+    'adulto': 'adults', 'adultos': 'adults',
+    'niño': 'children', 'niños': 'children', 'niña': 'children', 'niñas': 'children',
+    'menor': 'children', 'menores': 'children',
+    'noche': 'nights', 'noches': 'nights',
+    'dia': 'days', 'dias': 'days',
+    'habitacion': 'rooms', 'habitaciones': 'rooms',
+}
+RANGE_STARTERS = {'del', 'desde', 'entre'}
+RANGE_CONNECTORS = {'al', 'a', 'hasta', 'y', '-'}
+
+_ACCENTS = str.maketrans('áéíóúüàèìòù', 'aeiouuaeiou')
+_TOKEN_RE = re.compile(
+    r"(?P<date>\d{1,2}/\d{1,2}(?:/\d{2,4})?|\d{1,2}-\d{1,2}-\d{2,4})"
+    r"|(?P<num>\d+)"
+    r"|(?P<word>[a-zñ]+)"
+    r"|(?P<punct>[-,])"
+)
+
+CACHE_MAX_ENTRIES = 4096
+# Un rango con el primer día mayor se lee cruzando de mes solo si la estadía queda corta
+MAX_WRAPPED_NIGHTS = 15
+
+
+class Token(NamedTuple):
+    kind: str  # date | num | word | punct
+    text: str
+    start: int
+    end: int
+
+
+class ParsedMessage(NamedTuple):
+    """Resultado inmutable del análisis (se comparte entre llamadas a través del cache)"""
+    ranges: Tuple[Tuple[str, str], ...]
+    singles: Tuple[str, ...]
+    months: Tuple[str, ...]
+    counts: Tuple[Tuple[str, int, str], ...]  # (categoría, número, texto original)
+
+
+def tokenize(text: str) -> List[Token]:
+    folded = text.lower().translate(_ACCENTS)
+    return [Token(match.lastgroup, match.group(), match.start(), match.end()) for match in _TOKEN_RE.finditer(folded)]
+
+
+def _safe_date(year: int, month: int, day: int) -> Optional[date]:
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return None
+
+
+def _add_months(day: date, months: int) -> Tuple[int, int]:
+    index = day.year * 12 + day.month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def _wrap_or_swap(
+    begin: Optional[date],
+    finish: Optional[date],
+    year: int,
+    month: int,
+    days: Tuple[int, int]
+) -> Tuple[Optional[date], Optional[date]]:
+    """El rango que cruza de mes si dura hasta MAX_WRAPPED_NIGHTS; si no, los días ordenados en year/month
+
+    "del 28 al 3" son 6 noches; "del 25 al 20 de noviembre" serían 26, así que es del 20 al 25.
+    """
+    if not begin or not finish or (finish - begin).days <= MAX_WRAPPED_NIGHTS:
+        return begin, finish
+    low, high = sorted(days)
+    return _safe_date(year, month, low), _safe_date(year, month, high)
+
+
+def next_weekend(today: date) -> Tuple[date, date]:
+    """Próximo viernes (hoy, si es viernes) y el domingo siguiente"""
+    friday = today + timedelta(days=(4 - today.weekday()) % 7)
+    return friday, friday + timedelta(days=2)
+
+
+def next_weekday(today: date, weekday: int, strictly_after: bool) -> date:
+    days = (weekday - today.weekday()) % 7
+    if days == 0 and strictly_after:
+        days = 7
+    return today + timedelta(days=days)
+
+
+class _Parser:
+    """Recorrido único de los tokens; cada regla consume los tokens que reconoce"""
+
+    def __init__(self, tokens: List[Token], today: date, text: str):
+        self.tokens = tokens
+        self.today = today
+        self.text = text.lower()
+        self.ranges: List[Tuple[date, date]] = []
+        self.singles: List[date] = []
+        self.months: List[str] = []
+        self.counts: List[Tuple[str, int, str]] = []
+
+    # --- Acceso a tokens ---
+    def word(self, i: int) -> Optional[str]:
+        if 0 <= i < len(self.tokens) and self.tokens[i].kind in ('word', 'punct'):
+            return self.tokens[i].text
+        return None
+
+    def number(self, i: int) -> Optional[int]:
+        if 0 <= i < len(self.tokens) and self.tokens[i].kind == 'num':
+            return int(self.tokens[i].text)
+        return None
+
+    def original(self, i: int, j: int) -> str:
+        return self.text[self.tokens[i].start:self.tokens[j].end]
+
+    # --- Piezas de la gramática (devuelven (valor, índice siguiente) o None) ---
+    def day_number(self, i: int) -> Optional[Tuple[int, int]]:
+        """[el] N (día del mes)"""
+        if self.word(i) == 'el':
+            i += 1
+        day = self.number(i)
+        if day is None or not 1 <= day <= 31 or len(self.tokens[i].text) > 2:
+            return None
+        return day, i + 1
+
+    def month_suffix(self, i: int) -> Optional[Tuple[Tuple[int, Optional[int]], int]]:
+        """de MES [de AAAA] | MES [AAAA] -> ((mes, año), índice siguiente)"""
+        if self.word(i) == 'de':
+            i += 1
+        name = self.word(i)
+        month = MONTHS.get(name) or MONTH_ABBREVIATIONS.get(name)
+        if not month:
+            return None
+        i += 1
+        year = None
+        j = i + 1 if self.word(i) == 'de' else i
+        if self.number(j) is not None and len(self.tokens[j].text) == 4:
+            year, i = self.number(j), j + 1
+        return (month, year), i
+
+    def numeric_date(self, i: int) -> Optional[Tuple[date, int]]:
+        """DD/MM[/AA(AA)] o DD-MM-AA(AA)"""
+        if not (0 <= i < len(self.tokens) and self.tokens[i].kind == 'date'):
+            return None
+        parts = [int(part) for part in re.split(r'[/\-]', self.tokens[i].text)]
+        year = self.today.year
+        if len(parts) == 3:
+            year = parts[2] + 2000 if parts[2] < 100 else parts[2]
+        value = _safe_date(year, parts[1], parts[0])
+        return (value, i + 1) if value else None
+
+    def explicit_date(self, i: int) -> Optional[Tuple[date, int]]:
+        """DD/MM/AAAA o [el] N de MES [de AAAA]"""
+        numeric = self.numeric_date(i)
+        if numeric:
+            return numeric
+        day = self.day_number(i)
+        if not day:
+            return None
+        suffix = self.month_suffix(day[1])
+        if not suffix:
+            return None
+        (month, year), end = suffix
+        value = _safe_date(year or self.today.year, month, day[0])
+        return (value, end) if value else None
+
+    # --- Reglas ---
+    def parse(self) -> None:
+        i = 0
+        while i < len(self.tokens):
+            for rule in (self.rule_range, self.rule_explicit, self.rule_relative, self.rule_day,
+                         self.rule_count, self.rule_month):
+                consumed = rule(i)
+                if consumed:
+                    i = consumed
+                    break
+            else:
+                i += 1
+
+    def rule_range(self, i: int) -> Optional[int]:
+        """[del|desde|entre] inicio (al|a|hasta|y|-) fin
+
+        Si un extremo no trae mes y su día no deja un rango válido, es del mes
+        contiguo: "del 30 al 2 de marzo" empieza en febrero, "del 29 de marzo
+        al 2" termina en abril. Si así la estadía supera MAX_WRAPPED_NIGHTS, los
+        días se ordenan dentro del mismo mes ("del 25 al 20 de noviembre" es del
+        20 al 25). Nunca se registra un fin anterior o igual al inicio.
+        """
+        has_starter = self.word(i) in RANGE_STARTERS
+        start_index = i + 1 if has_starter else i
+
+        # Inicio con mes propio: "del 28 de diciembre al 2 de enero"
+        start = self.explicit_date(start_index)
+        if start:
+            connector = start[1]
+            if self.word(connector) not in RANGE_CONNECTORS - {'y'}:
+                return None
+            begin = start[0]
+            end = self.explicit_date(connector + 1)
+            if end:
+                finish, end_index = end
+                if finish <= begin and finish.year == begin.year and finish.month < begin.month:
+                    # "del 28 de diciembre al 2 de enero": el fin es del año siguiente
+                    finish = _safe_date(finish.year + 1, finish.month, finish.day) or finish
+            else:
+                end_day = self.day_number(connector + 1)
+                if not end_day:
+                    return None
+                # "del 28/12 al 3": el fin es del mes del inicio, o del siguiente si no queda después
+                year, month = begin.year, begin.month
+                if end_day[0] < begin.day:
+                    year, month = _add_months(begin, 1)
+                finish, end_index = _safe_date(year, month, end_day[0]), end_day[1]
+                if end_day[0] < begin.day:
+                    begin, finish = _wrap_or_swap(begin, finish, begin.year, begin.month, (begin.day, end_day[0]))
+            return self._add_range(begin, finish, end_index)
+
+        # Inicio sin mes: "del 11 al 14 de julio", "entre el 3 y el 5", "15 al 18"
+        first = self.day_number(start_index)
+        if not first:
+            return None
+        connector = first[1]
+        word = self.word(connector)
+        if word not in RANGE_CONNECTORS:
+            return None
+        second = self.day_number(connector + 1)
+        if not second or self.word(second[1]) in COUNT_NOUNS:
+            return None
+        suffix = self.month_suffix(second[1])
+        # Sin mes hace falta "del"/"desde"/"entre" o "al" ("de 10 a 12" suele ser un horario)
+        if not suffix and not (word == 'al' or has_starter):
+            return None
+
+        if suffix:
+            # El mes nombrado es el del fin: "del 30 al 2 de marzo" empieza en el mes anterior
+            (month, year), end_index = suffix
+            finish = _safe_date(year or self.today.year, month, second[0])
+            if not finish:
+                return None
+            start_year, start_month = finish.year, finish.month
+            if first[0] > second[0]:
+                start_year, start_month = _add_months(finish, -1)
+            begin = _safe_date(start_year, start_month, first[0])
+            if first[0] > second[0]:
+                begin, finish = _wrap_or_swap(begin, finish, finish.year, finish.month, (first[0], second[0]))
+        else:
+            # Sin mes: del mes en curso ("del 28 al 3" termina el mes siguiente)
+            end_index = second[1]
+            begin = _safe_date(self.today.year, self.today.month, first[0])
+            if not begin:
+                return None
+            year, month = begin.year, begin.month
+            if second[0] < first[0]:
+                year, month = _add_months(begin, 1)
+            finish = _safe_date(year, month, second[0])
+            if second[0] < first[0]:
+                begin, finish = _wrap_or_swap(begin, finish, begin.year, begin.month, (first[0], second[0]))
+        return self._add_range(begin, finish, end_index)
+
+    def _add_range(self, begin: Optional[date], finish: Optional[date], end_index: int) -> Optional[int]:
+        if not begin or not finish or finish <= begin:
+            return None
+        self.ranges.append((begin, finish))
+        return end_index
+
+    def rule_explicit(self, i: int) -> Optional[int]:
+        found = self.explicit_date(i)
+        if not found:
+            return None
+        self.singles.append(found[0])
+        return found[1]
+
+    def rule_relative(self, i: int) -> Optional[int]:
+        word = self.word(i)
+        following = self.word(i + 1)
+        if word == 'hoy':
+            self.singles.append(self.today)
+            return i + 1
+        if word == 'pasado' and following == 'mañana':
+            self.singles.append(self.today + timedelta(days=2))
+            return i + 2
+        if word == 'mañana' and self.word(i - 1) not in ('la', 'esta'):
+            # "por la mañana", "esta mañana" son momentos del día, no fechas
+            self.singles.append(self.today + timedelta(days=1))
+            return i + 1
+        # Prefijo común: el/este [próximo] ...
+        index = i + 1 if word in ('el', 'este') else i
+        strictly_after = False
+        if self.word(index) == 'proximo':
+            strictly_after, index = True, index + 1
+        if index == i and not strictly_after and self.word(i - 1) != 'para':
+            # Un día de la semana suelto ("abren los lunes") no es una fecha
+            return None
+
+        # este finde · este fin de semana · el próximo finde
+        if self.word(index) == 'finde':
+            end = index + 1
+        elif (self.word(index), self.word(index + 1), self.word(index + 2)) == ('fin', 'de', 'semana'):
+            end = index + 3
+        else:
+            end = None
+        if end is not None:
+            if (self.word(end), self.word(end + 1)) == ('que', 'viene'):
+                strictly_after, end = True, end + 2
+            friday, sunday = next_weekend(self.today)
+            if strictly_after and friday == self.today:
+                friday, sunday = friday + timedelta(days=7), sunday + timedelta(days=7)
+            self.ranges.append((friday, sunday))
+            return end
+
+        # el viernes · este sábado · el próximo lunes · el martes que viene
+        weekday = WEEKDAYS.get(self.word(index))
+        if weekday is None:
+            return None
+        end = index + 1
+        if (self.word(end), self.word(end + 1)) == ('que', 'viene'):
+            strictly_after, end = True, end + 2
+        self.singles.append(next_weekday(self.today, weekday, strictly_after))
+        return end
+
+    def rule_day(self, i: int) -> Optional[int]:
+        """el N / día N (día del mes en curso)"""
+        if self.word(i) not in ('el', 'dia'):
+            return None
+        day = self.number(i + 1)
+        if day is None or len(self.tokens[i + 1].text) > 2 or self.word(i + 2) in COUNT_NOUNS:
+            return None
+        if self.month_suffix(i + 2):
+            # "el 31 de febrero": si la fecha con su mes no existe, no es un día del mes en curso
+            return None
+        value = _safe_date(self.today.year, self.today.month, day)
+        if not value:
+            return None
+        self.singles.append(value)
+        return i + 2
+
+    def rule_count(self, i: int) -> Optional[int]:
+        """N sustantivo · somos N · una pareja"""
+        word = self.word(i)
+        if word == 'somos':
+            # "somos una pareja/familia": el artículo no es una cantidad
+            value = self.number(i + 1) or NUMBER_WORDS.get(self.word(i + 1), 1)
+            if value > 1 and self.word(i + 2) not in COUNT_NOUNS:
+                self.counts.append(('guests', value, self.original(i, i + 1)))
+                return i + 2
+            return None
+        if word == 'pareja':
+            self.counts.append(('couple', 2, self.original(i, i)))
+            return i + 1
+        value = self.number(i)
+        if value is None:
+            value = NUMBER_WORDS.get(word)
+        if value is None:
+            return None
+        category = COUNT_NOUNS.get(self.word(i + 1))
+        if not category:
+            return None
+        self.counts.append((category, value, self.original(i, i + 1)))
+        return i + 2
+
+    def rule_month(self, i: int) -> Optional[int]:
+        """Meses consultados sin día: en julio · julio y agosto · este mes · el mes que viene"""
+        word = self.word(i)
+        if word in ('este', 'esta') and self.word(i + 1) == 'mes':
+            self.months.append(f"{self.today.year}-{self.today.month:02d}")
+            return i + 2
+        if word == 'mes' and ((self.word(i + 1), self.word(i + 2)) == ('que', 'viene') or self.word(i - 1) == 'proximo'):
+            year, month = _add_months(self.today, 1)
+            self.months.append(f"{year}-{month:02d}")
+            return i + 3 if self.word(i + 1) == 'que' else i + 1
+        month = MONTHS.get(word)
+        if not month:
+            return None
+        year = self.today.year
+        end = i + 1
+        j = end + 1 if self.word(end) == 'de' else end
+        if self.number(j) is not None and len(self.tokens[j].text) == 4:
+            year, end = self.number(j), j + 1
+        self.months.append(f"{year}-{month:02d}")
+        return end
+
+    def result(self) -> ParsedMessage:
+        return ParsedMessage(
+            ranges=tuple((start.isoformat(), end.isoformat()) for start, end in self.ranges),
+            singles=tuple(day.isoformat() for day in self.singles),
+            months=tuple(self.months),
+            counts=tuple(self.counts),
+        )
+
+
+_cache: "OrderedDict[Tuple[str, date], ParsedMessage]" = OrderedDict()
+
+
+def parse_message(message: str, today: date) -> ParsedMessage:
+    """Analiza el mensaje respecto de `today` (memoizado por mensaje y fecha)"""
+    key = (message, today)
+    parsed = _cache.get(key)
+    if parsed is not None:
+        _cache.move_to_end(key)
+        return parsed
+    parser = _Parser(tokenize(message), today, message)
+    parser.parse()
+    parsed = parser.result()
+    _cache[key] = parsed
+    if len(_cache) > CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+    return parsed
+
+
 class DateExtractor:
-    def __init__(self):
-        # Patrones para extraer fechas - ORDENADOS DE MÁS ESPECÍFICO A MÁS GENERAL
-        self.date_patterns = [
-            # 🔥 PATRONES DE RANGOS PRIMERO (más específicos)
-            # del DD al DD de MMMM (ej: del 11 al 14 de julio)
-            (r'del\s+(\d{1,2})\s+al\s+(\d{1,2})\s+de\s+(\w+)', self._parse_range_month),
-            # DD/MM/YYYY o DD-MM-YYYY
-            (r'(\d{1,2})[/\-](\d{1,2})[/\-](\d{2,4})', self._parse_dmy),
-            # DD de MMMM (ej: 11 de julio, 14 de enero) - DESPUÉS de los rangos
-            (r'(\d{1,2})\s+de\s+(\w+)', self._parse_day_month),
-            # desde DD hasta DD de MMMM
-            (r'desde\s+(\d{1,2})\s+hasta\s+(\d{1,2})\s+de\s+(\w+)', self._parse_range_month),
-            # entre DD y DD de MMMM
-            (r'entre\s+(\d{1,2})\s+y\s+(\d{1,2})\s+de\s+(\w+)', self._parse_range_month),
-            # del DD al DD (sin mes - asumir mes actual)
-            (r'del\s+(\d{1,2})\s+al\s+(\d{1,2})(?!\s+de)', self._parse_range_current_month),
-            # desde DD hasta DD (sin mes - asumir mes actual)
-            (r'desde\s+(\d{1,2})\s+hasta\s+(\d{1,2})(?!\s+de)', self._parse_range_current_month),
-            # DD al DD (sin del/desde - asumir mes actual)
-            (r'(\d{1,2})\s+al\s+(\d{1,2})(?!\s+de)', self._parse_range_current_month),
-            # el DD (día específico - asumir mes actual) - Mejorado para evitar conflictos
-            (r'el\s+(\d{1,2})(?!\d)(?!\s+de\s+\w+)', self._parse_single_day_current_month),
-            # DD solo (día específico - asumir mes actual si no hay otro contexto)
-            # 🔧 MEJORADO: Excluir también cuando va seguido de personas/huéspedes/noches/días
-            (r'\b(\d{1,2})\b(?!\s*(?:de|al|/|\-|\d|personas?|huéspedes?|noches?|días?|habitaciones?))', self._parse_single_day_current_month),
-            # este mes
-            (r'este\s+mes', self._parse_current_month),
-            # este fin de semana / este finde
-            (r'este\s+(?:fin\s+de\s+semana|finde)', self._parse_this_weekend),
-        ]
-        
-        # Patrones para consultas mensuales
-        self.monthly_patterns = [
-            # "este mes"
-            (r'este\s+mes', self._parse_current_month_monthly),
-            # "en este mes", "para este mes"
-            (r'(?:en|para|durante)\s+este\s+mes', self._parse_current_month_monthly),
-            # "hay algo este mes"
-            (r'hay\s+(?:algo|alguna?\s+habitaci[óo]n)\s+este\s+mes', self._parse_current_month_monthly),
-            # "disponible este mes"
-            (r'disponible\s+este\s+mes', self._parse_current_month_monthly),
-            # "en julio", "para julio", "durante julio"
-            (r'(?:en|para|durante)\s+(\w+)', self._parse_single_month),
-            # "en el mes de julio"
-            (r'en\s+el\s+mes\s+de\s+(\w+)', self._parse_single_month),
-            # "hay algo en julio"
-            (r'hay\s+(?:algo|alguna?\s+habitaci[óo]n)\s+(?:en|para|durante)\s+(\w+)', self._parse_single_month),
-            # "disponible en julio"
-            (r'disponible\s+(?:en|para|durante)\s+(\w+)', self._parse_single_month),
-            # "julio y agosto" o "julio, agosto y septiembre"
-            (r'(\w+)(?:\s*,\s*(\w+))*\s+y\s+(\w+)', self._parse_multiple_months),
-        ]
-        
-        # Meses en español
-        self.months_es = {
-            'enero': 1, 'febrero': 2, 'marzo': 3, 'abril': 4,
-            'mayo': 5, 'junio': 6, 'julio': 7, 'agosto': 8,
-            'septiembre': 9, 'octubre': 10, 'noviembre': 11, 'diciembre': 12,
-            'ene': 1, 'feb': 2, 'mar': 3, 'abr': 4,
-            'may': 5, 'jun': 6, 'jul': 7, 'ago': 8,
-            'sep': 9, 'oct': 10, 'nov': 11, 'dic': 12
-        }
-        
-        # Patrones para extraer números (personas, noches, etc.)
-        self.number_patterns = [
-            (r'(\d+)\s*personas?', 'guests'),
-            (r'(\d+)\s*huéspedes?', 'guests'),
-            (r'(\d+)\s*noches?', 'nights'),
-            (r'(\d+)\s*días?', 'days'),
-            (r'(\d+)\s*habitaciones?', 'rooms'),
-        ]
-
-    def extract_date_info(self, message: str) -> Dict[str, Any]:
+    def __init__(self, today: Optional[Callable[[], date]] = None):
+        # Fecha de referencia inyectable (tests, benchmarks, reprocesar historial)
+        self.today = today or date.today
+
+    def _parse(self, message: str, today: Optional[date] = None) -> ParsedMessage:
+        return parse_message(message or "", today or self.today())
+
+    def extract_date_info(self, message: str, today: Optional[date] = None) -> Dict[str, Any]:
         """Extrae información de fechas del mensaje"""
-        message_lower = message.lower()
-        logger.info(f"🔍 DEBUG EXTRACT - Mensaje original: '{message}'")
-        logger.info(f"🔍 DEBUG EXTRACT - Mensaje lower: '{message_lower}'")
-        
+        return self._date_info(self._parse(message, today))
+
+    def extract_numbers(self, message: str, today: Optional[date] = None) -> Dict[str, Any]:
+        """Extrae números y cantidades del mensaje"""
+        return self._number_info(self._parse(message, today))
+
+    def extract_monthly_info(self, message: str, today: Optional[date] = None) -> Dict[str, Any]:
+        """Extrae información de consultas mensuales del mensaje"""
+        return self._monthly_info(self._parse(message, today))
+
+    def get_query_params(self, message: str, today: Optional[date] = None) -> Dict[str, Any]:
+        """Extrae todos los parámetros relevantes del mensaje (una sola pasada; dicts nuevos en cada llamada)"""
+        parsed = self._parse(message, today)
+        log_debug(logger, "dates", "🔍 DEBUG EXTRACT - '%s' -> %s", message, parsed)
+        return {
+            **self._date_info(parsed),
+            **self._number_info(parsed),
+            **self._monthly_info(parsed),
+            'original_message': message
+        }
+
+    @staticmethod
+    def _date_info(parsed: ParsedMessage) -> Dict[str, Any]:
         result = {
             'has_dates': False,
             'check_in': None,
@@ -92,66 +493,32 @@ class DateExtractor:
             'date_range': None,
             'raw_dates': []
         }
-        
-        try:
-            # 🔧 BUSCAR PATRONES CON PRIORIDAD - detener en el primer patrón que funcione
-            for pattern, parser in self.date_patterns:
-                matches = list(re.finditer(pattern, message_lower, re.IGNORECASE))
-                if matches:
-                    logger.info(f"🔍 DEBUG PATTERN - Patrón encontrado: {pattern}")
-                    pattern_dates = []
-                    for match in matches:
-                        parsed_dates = parser(match.groups())
-                        if parsed_dates:
-                            logger.info(f"🔍 DEBUG PATTERN - Fechas parseadas: {parsed_dates}")
-                            pattern_dates.extend(parsed_dates)
-                    
-                    if pattern_dates:
-                        result['raw_dates'].extend(pattern_dates)
-                        result['has_dates'] = True
-                        break  # Detener búsqueda después del primer patrón exitoso
-            
-            # Procesar fechas encontradas
-            if result['raw_dates']:
-                if len(result['raw_dates']) == 1:
-                    result['single_date'] = result['raw_dates'][0]
-                elif len(result['raw_dates']) == 2:
-                    # 🔧 ORDENAR las 2 fechas cronológicamente 
-                    sorted_dates = sorted(result['raw_dates'])
-                    result['check_in'] = sorted_dates[0]  # Fecha más temprana
-                    result['check_out'] = sorted_dates[1]  # Fecha más tardía
-                    result['date_range'] = {
-                        'start': sorted_dates[0],
-                        'end': sorted_dates[1]
-                    }
-                    logger.info(f"🔍 DEBUG FECHAS 2 - Original: {result['raw_dates']}, Ordenadas: {sorted_dates}")
-                elif len(result['raw_dates']) > 2:
-                    # 🔧 ORDENAR fechas cronológicamente para tomar check_in y check_out correctos
-                    unique_dates = list(set(result['raw_dates']))  # Eliminar duplicados
-                    unique_dates.sort()  # Ordenar cronológicamente
-                    
-                    logger.info(f"🔍 DEBUG FECHAS - Raw dates: {result['raw_dates']}")
-                    logger.info(f"🔍 DEBUG FECHAS - Unique sorted dates: {unique_dates}")
-                    
-                    if len(unique_dates) >= 2:
-                        result['check_in'] = unique_dates[0]  # Primera fecha (más temprana)
-                        result['check_out'] = unique_dates[1]  # Segunda fecha (más tardía) 
-                        result['date_range'] = {
-                            'start': unique_dates[0],
-                            'end': unique_dates[1]
-                        }
-                        logger.info(f"🔍 DEBUG FECHAS - Asignadas: check_in={unique_dates[0]}, check_out={unique_dates[1]}")
-                    else:
-                        result['single_date'] = unique_dates[0]
-                        logger.info(f"🔍 DEBUG FECHAS - Solo una fecha única: {unique_dates[0]}")
-        
-        except Exception as e:
-            logger.error(f"Error extrayendo fechas: {e}")
-        
+        if parsed.ranges:
+            # Un rango explícito manda: respeta su orden (puede cruzar de año)
+            check_in, check_out = parsed.ranges[0]
+            result['raw_dates'] = [date_str for date_range in parsed.ranges for date_str in date_range] + list(parsed.singles)
+            result.update({
+                'has_dates': True,
+                'check_in': check_in,
+                'check_out': check_out,
+                'date_range': {'start': check_in, 'end': check_out}
+            })
+            return result
+
+        if parsed.singles:
+            result['raw_dates'] = list(parsed.singles)
+            result['has_dates'] = True
+            unique_dates = sorted(set(parsed.singles))
+            if len(unique_dates) == 1:
+                result['single_date'] = unique_dates[0]
+            else:
+                # Varias fechas sueltas: la más temprana y la siguiente forman la estadía
+                result['check_in'], result['check_out'] = unique_dates[0], unique_dates[1]
+                result['date_range'] = {'start': unique_dates[0], 'end': unique_dates[1]}
         return result
 
-    def extract_numbers(self, message: str) -> Dict[str, Any]:
-        """Extrae números y cantidades del mensaje"""
+    @staticmethod
+    def _number_info(parsed: ParsedMessage) -> Dict[str, Any]:
         result = {
             'guests': None,
             'nights': None,
@@ -159,229 +526,36 @@ class DateExtractor:
             'rooms': None,
             'raw_numbers': []
         }
-        
-        try:
-            for pattern, category in self.number_patterns:
-                matches = re.finditer(pattern, message, re.IGNORECASE)
-                for match in matches:
-                    number = int(match.group(1))
-                    result[category] = number
-                    result['raw_numbers'].append({
-                        'number': number,
-                        'category': category,
-                        'original': match.group(0)
-                    })
-        
-        except Exception as e:
-            logger.error(f"Error extrayendo números: {e}")
-        
+        party: Dict[str, int] = {}
+        for category, number, original in parsed.counts:
+            if category in ('adults', 'children', 'couple'):
+                party[category] = number
+                category_name = 'guests'
+            else:
+                result[category] = number
+                category_name = category
+            result['raw_numbers'].append({'number': number, 'category': category_name, 'original': original})
+
+        # "2 adultos y 1 niño" suma; "una pareja" solo si no hay otra cantidad
+        if result['guests'] is None and (party.get('adults') or party.get('children')):
+            result['guests'] = party.get('adults', 0) + party.get('children', 0)
+        elif result['guests'] is None and party.get('couple'):
+            result['guests'] = 2
         return result
 
-    def _parse_dmy(self, groups: Tuple[str, ...]) -> List[str]:
-        """Parse DD/MM/YYYY format"""
-        try:
-            day, month, year = groups
-            if len(year) == 2:
-                year = f"20{year}"
-            
-            date_str = f"{year}-{month.zfill(2)}-{day.zfill(2)}"
-            datetime.strptime(date_str, "%Y-%m-%d")  # Validate
-            return [date_str]
-        except:
-            return []
-
-    def _parse_day_month(self, groups: Tuple[str, ...]) -> List[str]:
-        """Parse DD de MMMM format"""
-        try:
-            day, month_name = groups
-            month_num = self.months_es.get(month_name.lower())
-            if not month_num:
-                return []
-            
-            # Asumir año actual
-            current_year = datetime.now().year
-            date_str = f"{current_year}-{month_num:02d}-{int(day):02d}"
-            datetime.strptime(date_str, "%Y-%m-%d")  # Validate
-            return [date_str]
-        except:
-            return []
-
-    def _parse_range_month(self, groups: Tuple[str, ...]) -> List[str]:
-        """Parse del DD al DD de MMMM format"""
-        try:
-            start_day, end_day, month_name = groups
-            logger.info(f"🔍 DEBUG RANGE_MONTH - grupos: start_day={start_day}, end_day={end_day}, month_name={month_name}")
-            
-            month_num = self.months_es.get(month_name.lower())
-            if not month_num:
-                logger.info(f"🔍 DEBUG RANGE_MONTH - Mes no encontrado: {month_name}")
-                return []
-            
-            # Asumir año actual
-            current_year = datetime.now().year
-            start_date = f"{current_year}-{month_num:02d}-{int(start_day):02d}"
-            end_date = f"{current_year}-{month_num:02d}-{int(end_day):02d}"
-            
-            logger.info(f"🔍 DEBUG RANGE_MONTH - Fechas generadas: start_date={start_date}, end_date={end_date}")
-            
-            # Validate dates
-            datetime.strptime(start_date, "%Y-%m-%d")
-            datetime.strptime(end_date, "%Y-%m-%d")
-            
-            result = [start_date, end_date]
-            logger.info(f"🔍 DEBUG RANGE_MONTH - Resultado final: {result}")
-            return result
-        except Exception as e:
-            logger.error(f"🔍 DEBUG RANGE_MONTH - Error: {e}")
-            return []
-
-    def _parse_range_current_month(self, groups: Tuple[str, ...]) -> List[str]:
-        """Parse del DD al DD format (asumir mes actual)"""
-        try:
-            start_day, end_day = groups
-            
-            # Usar mes y año actual
-            current_date = datetime.now()
-            current_year = current_date.year
-            current_month = current_date.month
-            
-            start_date = f"{current_year}-{current_month:02d}-{int(start_day):02d}"
-            end_date = f"{current_year}-{current_month:02d}-{int(end_day):02d}"
-            
-            # Validate dates
-            datetime.strptime(start_date, "%Y-%m-%d")
-            datetime.strptime(end_date, "%Y-%m-%d")
-            
-            return [start_date, end_date]
-        except:
-            return []
-
-    def _parse_single_day_current_month(self, groups: Tuple[str, ...]) -> List[str]:
-        """Parse DD format (asumir mes actual)"""
-        try:
-            day = groups[0]
-            
-            # Usar mes y año actual
-            current_date = datetime.now()
-            current_year = current_date.year
-            current_month = current_date.month
-            
-            date_str = f"{current_year}-{current_month:02d}-{int(day):02d}"
-            datetime.strptime(date_str, "%Y-%m-%d")  # Validate
-            return [date_str]
-        except:
-            return []
-
-    def _parse_current_month(self, groups: Tuple[str, ...]) -> List[str]:
-        """Parse 'este mes' - marca como consulta mensual pero no retorna fechas específicas"""
-        # Este patrón se usa para identificar consultas mensuales,
-        # no para extraer fechas específicas
-        return []
-
-    def _parse_this_weekend(self, groups: Tuple[str, ...]) -> List[str]:
-        """Parse 'este fin de semana' - próximo viernes a domingo"""
-        try:
-            today = datetime.now()
-            
-            # Encontrar el próximo viernes
-            days_until_friday = (4 - today.weekday()) % 7  # 4 = viernes
-            if days_until_friday == 0 and today.weekday() == 4:  # Si hoy es viernes
-                days_until_friday = 0  # Usar este viernes
-            elif days_until_friday == 0:  # Si hoy no es viernes pero days_until es 0
-                days_until_friday = 7  # Próximo viernes
-            
-            friday = today + timedelta(days=days_until_friday)
-            sunday = friday + timedelta(days=2)  # Domingo
-            
-            friday_str = friday.strftime("%Y-%m-%d")
-            sunday_str = sunday.strftime("%Y-%m-%d")
-            
-            return [friday_str, sunday_str]
-        except:
-            return []
-
-    def _parse_current_month_monthly(self, groups: Tuple[str, ...]) -> List[str]:
-        """Parse 'este mes' para consultas mensuales"""
-        try:
-            current_date = datetime.now()
-            month_name = list(self.months_es.keys())[current_date.month - 1]  # Obtener nombre del mes actual
-            return [f"{current_date.year}-{current_date.month:02d}"]
-        except:
-            return []
-
-    def _parse_single_month(self, groups: Tuple[str, ...]) -> List[str]:
-        """Parsea un mes individual (ej: 'julio')"""
-        try:
-            month_name = groups[0]
-            month_num = self.months_es.get(month_name.lower())
-            if not month_num:
-                return []
-            
-            # Retornar información del mes
-            current_year = datetime.now().year
-            return [f"{current_year}-{month_num:02d}"]
-        except:
-            return []
-
-    def _parse_multiple_months(self, groups: Tuple[str, ...]) -> List[str]:
-        """Parsea múltiples meses (ej: 'julio y agosto', 'julio, agosto y septiembre')"""
-        try:
-            # Filtrar grupos no None y procesar cada mes
-            month_names = [group for group in groups if group]
-            months = []
-            
-            for month_name in month_names:
-                month_num = self.months_es.get(month_name.lower())
-                if month_num:
-                    current_year = datetime.now().year
-                    months.append(f"{current_year}-{month_num:02d}")
-            
-            return months
-        except:
-            return []
-
-    def extract_monthly_info(self, message: str) -> Dict[str, Any]:
-        """Extrae información de consultas mensuales del mensaje"""
-        message_lower = message.lower()
-        
+    @staticmethod
+    def _monthly_info(parsed: ParsedMessage) -> Dict[str, Any]:
         result = {
             'is_monthly_query': False,
             'single_month': None,
             'multiple_months': None,
             'months_list': []
         }
-        
-        try:
-            # Buscar patrones mensuales
-            for pattern, parser in self.monthly_patterns:
-                matches = re.finditer(pattern, message_lower, re.IGNORECASE)
-                for match in matches:
-                    parsed_months = parser(match.groups())
-                    if parsed_months:
-                        result['is_monthly_query'] = True
-                        result['months_list'].extend(parsed_months)
-            
-            # Procesar meses encontrados
-            if result['months_list']:
-                if len(result['months_list']) == 1:
-                    result['single_month'] = result['months_list'][0]
-                else:
-                    result['multiple_months'] = result['months_list']
-        
-        except Exception as e:
-            logger.error(f"Error extrayendo información mensual: {e}")
-        
+        if parsed.months:
+            result['is_monthly_query'] = True
+            result['months_list'] = list(parsed.months)
+            if len(parsed.months) == 1:
+                result['single_month'] = parsed.months[0]
+            else:
+                result['multiple_months'] = list(parsed.months)
         return result
-
-    def get_query_params(self, message: str) -> Dict[str, Any]:
-        """Extrae todos los parámetros relevantes del mensaje"""
-        date_info = self.extract_date_info(message)
-        number_info = self.extract_numbers(message)
-        monthly_info = self.extract_monthly_info(message)
-        
-        return {
-            **date_info,
-            **number_info,
-            **monthly_info,
-            'original_message': message
-        } 
\ No newline at end of file
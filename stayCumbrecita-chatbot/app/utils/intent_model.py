@@ -0,0 +1,262 @@
+"""
+Modelo lineal de intenciones sobre n-gramas de caracteres hasheados (NumPy).
+
+Cada mensaje se normaliza (minúsculas, sin acentos), se parte en n-gramas de
+caracteres y palabras, y cada n-grama se hashea (crc32, estable entre
+procesos) a una de n_features columnas. La clasificación es una regresión
+softmax: sumar las filas de la matriz de pesos de los n-gramas presentes (un
+único producto vector-matriz) y aplicar softmax con la temperatura calibrada
+en validación, así la confianza devuelta se corresponde con la tasa de acierto.
+
+Se entrena con tools/train_intent_model.py y se guarda en un .npz compacto
+(pesos en float16).
+"""
+
+import json
+import math
+import time
+import zlib
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from .lazy_import import LazyModule
+from .text_processing import normalize_text
+
+# numpy se importa en el primer uso (no se carga si el clasificador usa regex)
+np = LazyModule("numpy")
+
+DEFAULT_FEATURES = 2 ** 15
+CHAR_NGRAMS = (2, 3, 4)
+FORMAT_VERSION = 1
+
+
+def numpy_available() -> bool:
+    return np.available()
+
+
+def ngrams(text: str) -> List[str]:
+    """N-gramas de caracteres (con bordes de palabra) y palabras/bigramas de palabras"""
+    normalized = normalize_text(text)
+    padded = f" {normalized} "
+    grams = [
+        padded[i:i + n]
+        for n in CHAR_NGRAMS
+        for i in range(max(1, len(padded) - n + 1))
+    ]
+    words = normalized.split()
+    grams.extend(f"w:{word}" for word in words)
+    grams.extend(f"b:{first} {second}" for first, second in zip(words, words[1:]))
+    return grams
+
+
+def featurize(text: str, n_features: int) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Índices y valores (tf sublineal, norma L2 = 1) del vector disperso del texto"""
+    counts: Dict[int, int] = {}
+    for gram, count in Counter(ngrams(text)).items():
+        index = zlib.crc32(gram.encode("utf-8")) % n_features
+        counts[index] = counts.get(index, 0) + count
+
+    indices = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+    values = 1.0 + np.log(np.fromiter(counts.values(), dtype=np.float32, count=len(counts)))
+    values /= np.linalg.norm(values)
+    return indices, values.astype(np.float32)
+
+
+def featurize_many(texts: Sequence[str], n_features: int) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+    """Matriz dispersa en formato CSR: (indptr, indices, values)"""
+    indptr = [0]
+    all_indices = []
+    all_values = []
+    for text in texts:
+        indices, values = featurize(text, n_features)
+        all_indices.append(indices)
+        all_values.append(values)
+        indptr.append(indptr[-1] + len(indices))
+    return np.array(indptr, dtype=np.int64), np.concatenate(all_indices), np.concatenate(all_values)
+
+
+def _softmax(logits: "np.ndarray") -> "np.ndarray":
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class IntentModel:
+    """Regresión softmax sobre features hasheadas"""
+
+    def __init__(
+        self,
+        labels: List[str],
+        weights: "np.ndarray",
+        bias: "np.ndarray",
+        temperature: float = 1.0,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        self.labels = list(labels)
+        self.weights = np.ascontiguousarray(weights, dtype=np.float32)
+        self.bias = np.asarray(bias, dtype=np.float32)
+        self.temperature = temperature
+        self.metadata = metadata or {}
+
+    @property
+    def n_features(self) -> int:
+        return self.weights.shape[0]
+
+    def _batch_logits(self, indptr: "np.ndarray", indices: "np.ndarray", values: "np.ndarray") -> "np.ndarray":
+        contributions = self.weights[indices] * values[:, None]
+        # Todo texto tiene al menos un n-grama, así que reduceat no ve filas vacías
+        return np.add.reduceat(contributions, indptr[:-1], axis=0) + self.bias
+
+    def predict_proba(self, text: str) -> Dict[str, float]:
+        indices, values = featurize(text, self.n_features)
+        logits = values @ self.weights[indices] + self.bias
+        probabilities = _softmax(logits / self.temperature)
+        return {label: float(p) for label, p in zip(self.labels, probabilities)}
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        probabilities = self.predict_proba(text)
+        label = max(probabilities, key=probabilities.get)
+        return label, probabilities[label]
+
+    def probabilities_many(self, texts: Sequence[str]) -> "np.ndarray":
+        logits = self._batch_logits(*featurize_many(texts, self.n_features))
+        return _softmax(logits / self.temperature)
+
+    def save(self, path: str) -> None:
+        metadata = {
+            **self.metadata,
+            "format_version": FORMAT_VERSION,
+            "labels": self.labels,
+            "temperature": self.temperature,
+        }
+        with open(path, "wb") as f:
+            np.savez_compressed(
+                f,
+                weights=self.weights.astype(np.float16),
+                bias=self.bias,
+                metadata=np.array(json.dumps(metadata, ensure_ascii=False))
+            )
+
+    @classmethod
+    def load(cls, path: str) -> "IntentModel":
+        with np.load(path, allow_pickle=False) as data:
+            metadata = json.loads(str(data["metadata"]))
+            if metadata.get("format_version") != FORMAT_VERSION:
+                raise ValueError(f"Formato de modelo no soportado: {metadata.get('format_version')}")
+            return cls(
+                labels=metadata.pop("labels"),
+                weights=data["weights"],
+                bias=data["bias"],
+                temperature=metadata.pop("temperature", 1.0),
+                metadata=metadata
+            )
+
+
+def train(
+    texts: Sequence[str],
+    labels: Sequence[str],
+    n_features: int = DEFAULT_FEATURES,
+    epochs: int = 20,
+    learning_rate: float = 5.0,
+    l2: float = 1e-4,
+    batch_size: int = 32,
+    seed: int = 0
+) -> IntentModel:
+    """Entrena por descenso de gradiente estocástico (mini-lotes) con entropía cruzada"""
+    classes = sorted(set(labels))
+    class_index = {label: i for i, label in enumerate(classes)}
+    targets = np.array([class_index[label] for label in labels], dtype=np.int64)
+    rows = [featurize(text, n_features) for text in texts]
+
+    rng = np.random.default_rng(seed)
+    model = IntentModel(
+        labels=classes,
+        weights=np.zeros((n_features, len(classes)), dtype=np.float32),
+        bias=np.zeros(len(classes), dtype=np.float32)
+    )
+
+    started = time.perf_counter()
+    for epoch in range(epochs):
+        # Tasa de aprendizaje decreciente para estabilizar las últimas épocas
+        rate = learning_rate / math.sqrt(1.0 + epoch)
+        order = rng.permutation(len(rows))
+        for start in range(0, len(order), batch_size):
+            batch = order[start:start + batch_size]
+            lengths = np.array([len(rows[i][0]) for i in batch])
+            indices = np.concatenate([rows[i][0] for i in batch])
+            values = np.concatenate([rows[i][1] for i in batch])
+            indptr = np.concatenate([[0], np.cumsum(lengths)])
+
+            probabilities = _softmax(model._batch_logits(indptr, indices, values))
+            delta = probabilities
+            delta[np.arange(len(batch)), targets[batch]] -= 1.0
+            delta /= len(batch)
+
+            # Gradiente disperso: solo las filas de los n-gramas del lote (con decaimiento L2)
+            gradient = values[:, None] * np.repeat(delta, lengths, axis=0)
+            model.weights[indices] *= (1.0 - rate * l2)
+            np.add.at(model.weights, indices, -rate * gradient)
+            model.bias -= rate * delta.sum(axis=0)
+
+    model.metadata = {
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "training_examples": len(rows),
+        "training_seconds": round(time.perf_counter() - started, 2),
+        "epochs": epochs,
+    }
+    return model
+
+
+def calibrate_temperature(model: IntentModel, texts: Sequence[str], labels: Sequence[str]) -> float:
+    """Temperatura que minimiza la log-verosimilitud negativa en validación (búsqueda en grilla)"""
+    model.temperature = 1.0
+    logits = np.log(np.clip(model.probabilities_many(texts), 1e-12, 1.0))
+    class_index = {label: i for i, label in enumerate(model.labels)}
+    known = [i for i, label in enumerate(labels) if label in class_index]
+    if not known:
+        return 1.0
+    targets = np.array([class_index[labels[i]] for i in known])
+    logits = logits[known]
+
+    best_temperature, best_loss = 1.0, math.inf
+    for temperature in np.exp(np.linspace(math.log(0.05), math.log(10.0), 80)):
+        probabilities = _softmax(logits / temperature)
+        loss = -np.mean(np.log(np.clip(probabilities[np.arange(len(targets)), targets], 1e-12, 1.0)))
+        if loss < best_loss:
+            best_temperature, best_loss = float(temperature), float(loss)
+    model.temperature = best_temperature
+    return best_temperature
+
+
+def evaluate(model: IntentModel, texts: Sequence[str], labels: Sequence[str], bins: int = 10) -> Dict[str, Any]:
+    """Exactitud, precisión/recall por clase y error de calibración esperado (ECE)"""
+    if not texts:
+        return {"examples": 0}
+    probabilities = model.probabilities_many(texts)
+    predicted = [model.labels[i] for i in probabilities.argmax(axis=1)]
+    confidence = probabilities.max(axis=1)
+    correct = np.array([p == label for p, label in zip(predicted, labels)])
+
+    per_class = {}
+    for label in sorted(set(labels) | set(predicted)):
+        true_positive = sum(1 for p, t in zip(predicted, labels) if p == label and t == label)
+        predicted_count = sum(1 for p in predicted if p == label)
+        actual_count = sum(1 for t in labels if t == label)
+        per_class[label] = {
+            "precision": round(true_positive / predicted_count, 4) if predicted_count else 0.0,
+            "recall": round(true_positive / actual_count, 4) if actual_count else 0.0,
+            "support": actual_count,
+        }
+
+    ece = 0.0
+    edges = np.linspace(0.0, 1.0, bins + 1)
+    for low, high in zip(edges[:-1], edges[1:]):
+        in_bin = (confidence > low) & (confidence <= high)
+        if in_bin.any():
+            ece += in_bin.mean() * abs(correct[in_bin].mean() - confidence[in_bin].mean())
+
+    return {
+        "examples": len(texts),
+        "accuracy": round(float(correct.mean()), 4),
+        "expected_calibration_error": round(float(ece), 4),
+        "per_class": per_class,
+    }
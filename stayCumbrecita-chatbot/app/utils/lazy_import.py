@@ -0,0 +1,37 @@
+"""
+Importación diferida de dependencias opcionales y pesadas (ej: numpy).
+
+    np = LazyModule("numpy")
+    if np.available():      # importa recién acá
+        np.zeros(3)
+
+Así importar la aplicación no carga numpy si el índice vectorial y el
+modelo de intenciones están desactivados.
+"""
+
+import importlib
+from types import ModuleType
+from typing import Any, Optional
+
+
+class LazyModule:
+    """Módulo que se importa en el primer acceso a un atributo (o en available())"""
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module: Optional[ModuleType] = None
+        self._missing = False
+
+    def available(self) -> bool:
+        """True si el módulo está instalado (lo importa la primera vez)"""
+        if self._module is None and not self._missing:
+            try:
+                self._module = importlib.import_module(self._name)
+            except ImportError:
+                self._missing = True
+        return self._module is not None
+
+    def __getattr__(self, attr: str) -> Any:
+        if not self.available():
+            raise ImportError(f"{self._name} no está instalado")
+        return getattr(self._module, attr)
@@ -0,0 +1,249 @@
+"""
+Motor de patrones compilado para el clasificador de consultas.
+
+Se arma una sola vez a partir de {categoría: [patrones]}:
+
+- Cada patrón se compila y se le extrae un literal obligatorio por alternativa
+  (ej: "cuánto.*sale|cuanto.*sale" -> {"cuánto", "cuanto"}): si ninguno aparece
+  en el mensaje, el patrón no puede coincidir y no se evalúa.
+- Un autómata Aho-Corasick con todos esos literales recorre el mensaje una vez
+  y devuelve qué literales contiene, es decir, qué patrones son candidatos.
+- Cada categoría tiene además una alternación precompilada de sus patrones que,
+  cuando quedan muchos candidatos, descarta en una sola búsqueda las categorías
+  sin ninguna coincidencia.
+
+match_counts devuelve, por categoría, la cantidad de coincidencias y de
+patrones distintos que coincidieron, con los mismos valores que evaluar
+re.findall patrón por patrón.
+"""
+
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Cuantificadores que hacen opcional (o variable) al elemento anterior
+_OPTIONAL_QUANTIFIERS = ("*", "?", "{")
+
+
+def _skip_group(pattern: str, i: int, opening: str, closing: str) -> int:
+    """Índice siguiente al cierre del grupo o clase que abre en pattern[i]"""
+    depth = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+            continue
+        if char == "[" and opening == "(":
+            i = _skip_group(pattern, i, "[", "]")
+            continue
+        if char == opening:
+            depth += 1
+        elif char == closing:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    return i
+
+
+def split_alternatives(pattern: str) -> List[str]:
+    """Alternativas de primer nivel de un patrón (los | dentro de grupos no cortan)"""
+    branches = []
+    start = i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 2
+        elif char == "(":
+            i = _skip_group(pattern, i, "(", ")")
+        elif char == "[":
+            i = _skip_group(pattern, i, "[", "]")
+        elif char == "|":
+            branches.append(pattern[start:i])
+            start = i = i + 1
+        else:
+            i += 1
+    branches.append(pattern[start:])
+    return branches
+
+
+def literal_runs(branch: str) -> List[str]:
+    """Tramos de texto literal que toda coincidencia de la alternativa contiene.
+
+    Es conservador: grupos, clases, escapes como \\s y elementos opcionales
+    cortan el tramo en lugar de analizarse.
+    """
+    runs: List[str] = []
+    current: List[str] = []
+
+    def flush():
+        if current:
+            runs.append("".join(current))
+            current.clear()
+
+    i = 0
+    while i < len(branch):
+        char = branch[i]
+        token: Optional[str] = None
+        if char == "\\":
+            following = branch[i + 1:i + 2]
+            token = None if following.isalnum() else following
+            i += 2
+        elif char == "(":
+            i = _skip_group(branch, i, "(", ")")
+        elif char == "[":
+            i = _skip_group(branch, i, "[", "]")
+        elif char in ".^$":
+            i += 1
+        else:
+            token = char
+            i += 1
+
+        if i < len(branch) and branch[i] in _OPTIONAL_QUANTIFIERS:
+            # El elemento puede no aparecer: no es parte de un tramo obligatorio
+            if branch[i] == "{":
+                i = branch.find("}", i) + 1 or len(branch)
+            else:
+                i += 1
+            if i < len(branch) and branch[i] in "?+":
+                i += 1
+            flush()
+        elif i < len(branch) and branch[i] == "+":
+            # Aparece al menos una vez, pero lo que sigue ya no es contiguo
+            if token is not None:
+                current.append(token)
+            flush()
+            i += 1
+        elif token is None:
+            flush()
+        else:
+            current.append(token)
+
+    flush()
+    return runs
+
+
+def required_literals(pattern: str) -> Optional[Set[str]]:
+    """Literales tales que toda coincidencia del patrón contiene alguno (None si no se puede acotar)"""
+    literals = set()
+    for branch in split_alternatives(pattern):
+        runs = literal_runs(branch)
+        if not runs:
+            return None
+        literals.add(max(runs, key=len).lower())
+    return literals
+
+
+class KeywordAutomaton:
+    """Autómata Aho-Corasick: encuentra todas las palabras clave de un texto en una pasada"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[str, ...]] = [()]
+
+        for keyword in set(keywords):
+            if not keyword:
+                continue
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (keyword,)
+
+        # Enlaces de falla por niveles (BFS); cada estado hereda las salidas de su enlace
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+
+    def find(self, text: str) -> Set[str]:
+        found: Set[str] = set()
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class PatternMatcher:
+    """Cuenta coincidencias por categoría evaluando solo los patrones posibles"""
+
+    # Con pocos candidatos es más barato evaluarlos directamente que pasar por la alternación
+    gate_min_candidates = 8
+
+    def __init__(self, patterns: Dict[str, List[str]], flags: int = re.IGNORECASE):
+        self.categories = list(patterns)
+        self._compiled: Dict[str, List["re.Pattern[str]"]] = {}
+        self._gates: Dict[str, "re.Pattern[str]"] = {}
+        self._by_literal: Dict[str, List[Tuple[str, int]]] = {}
+        self._always: List[Tuple[str, int]] = []
+
+        for category, category_patterns in patterns.items():
+            self._compiled[category] = [re.compile(pattern, flags) for pattern in category_patterns]
+            self._gates[category] = re.compile("|".join(f"(?:{pattern})" for pattern in category_patterns), flags)
+            for index, pattern in enumerate(category_patterns):
+                literals = required_literals(pattern)
+                if literals is None:
+                    self._always.append((category, index))
+                    continue
+                for literal in literals:
+                    self._by_literal.setdefault(literal, []).append((category, index))
+
+        self._automaton = KeywordAutomaton(self._by_literal)
+
+    def candidates(self, message: str) -> Dict[str, Set[int]]:
+        """Patrones (por categoría) cuyo literal obligatorio aparece en el mensaje en minúsculas"""
+        candidates: Dict[str, Set[int]] = {}
+        for category, index in self._always:
+            candidates.setdefault(category, set()).add(index)
+        for literal in self._automaton.find(message):
+            for category, index in self._by_literal[literal]:
+                candidates.setdefault(category, set()).add(index)
+        return candidates
+
+    def match_counts(self, message: str, skip: Iterable[str] = ()) -> Dict[str, Tuple[int, int]]:
+        """{categoría: (coincidencias totales, patrones distintos)} de las categorías con alguna coincidencia.
+
+        message debe venir en minúsculas (los literales se buscan así).
+        """
+        candidates = self.candidates(message)
+        skipped = set(skip)
+        counts: Dict[str, Tuple[int, int]] = {}
+
+        for category in self.categories:
+            indexes = candidates.get(category)
+            if not indexes or category in skipped:
+                continue
+            # Una búsqueda con la alternación descarta la categoría sin evaluar patrón por patrón
+            if len(indexes) >= self.gate_min_candidates and not self._gates[category].search(message):
+                continue
+
+            total = unique = 0
+            compiled = self._compiled[category]
+            for index in sorted(indexes):
+                matches = sum(1 for _ in compiled[index].finditer(message))
+                if matches:
+                    total += matches
+                    unique += 1
+            if total:
+                counts[category] = (total, unique)
+
+        return counts
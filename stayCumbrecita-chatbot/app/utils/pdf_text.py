@@ -0,0 +1,61 @@
+"""
+Extracción de texto de PDFs pensada para correr en procesos del pool de extracción.
+
+Solo depende de PyPDF2 y re para que los workers arranquen livianos (no importa
+la configuración ni los servicios de la app).
+"""
+
+import re
+from typing import Any, Dict, List, Tuple
+from PyPDF2 import PdfReader
+
+
+def clean_text(text: str) -> str:
+    """Limpia y normaliza el texto extraído, conservando los saltos de línea"""
+    if not text:
+        return ""
+
+    # Unificar espacios y caracteres de control horizontales (sin tocar los saltos de línea)
+    text = re.sub(r'[^\S\n]+', ' ', text)
+
+    # Remover caracteres especiales problemáticos
+    text = re.sub(r'[^\w\s\.,;:!?¡¿\-\(\)\[\]\"\'$%@/+#&áéíóúñüÁÉÍÓÚÑÜ]', '', text)
+
+    # Quitar espacios al borde de cada línea y dejar como máximo una línea en blanco
+    text = re.sub(r' *\n *', '\n', text)
+    text = re.sub(r'\n{3,}', '\n\n', text)
+
+    # Limpiar espacios al inicio y final
+    text = text.strip()
+
+    return text
+
+
+def count_pages(path: str) -> int:
+    """Cantidad de páginas del PDF (solo lee la estructura, no extrae texto)"""
+    with open(path, "rb") as f:
+        return len(PdfReader(f).pages)
+
+
+def read_info(path: str) -> Dict[str, Any]:
+    """Páginas y metadata del PDF sin extraer el texto"""
+    with open(path, "rb") as f:
+        reader = PdfReader(f)
+        metadata = reader.metadata or {}
+        return {
+            "num_pages": len(reader.pages),
+            "title": str(metadata.get('/Title') or ''),
+            "author": str(metadata.get('/Author') or ''),
+            "subject": str(metadata.get('/Subject') or ''),
+            "creator": str(metadata.get('/Creator') or '')
+        }
+
+
+def extract_pages(path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """Extrae y limpia el texto de las páginas [start, end) del PDF en path"""
+    pages = []
+    with open(path, "rb") as f:
+        reader = PdfReader(f)
+        for number in range(start, min(end, len(reader.pages))):
+            pages.append((number, clean_text(reader.pages[number].extract_text() or "")))
+    return pages
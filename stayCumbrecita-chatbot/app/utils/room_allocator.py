@@ -0,0 +1,235 @@
+"""
+Asignación de habitaciones para grupos que no entran en una sola.
+
+Busca las combinaciones que alojan a todos los huéspedes ordenadas por
+(cantidad de habitaciones, camas sobrantes, precio total de la estadía) con
+branch and bound:
+
+- Las habitaciones iguales (misma capacidad y precio) se agrupan: elegir
+  "2 de las 6 dobles" es una sola rama, no quince.
+- Los grupos se recorren de mayor a menor capacidad y una combinación se cierra
+  apenas cubre a los huéspedes, así que nunca incluye habitaciones de más.
+- Una rama se poda si ni las habitaciones más grandes que quedan alcanzan o si
+  necesitaría más habitaciones que la peor opción ya encontrada.
+- Se arranca con la solución golosa (las más grandes primero), que ya usa la
+  mínima cantidad de habitaciones, y la búsqueda tiene un límite de tiempo: si
+  se agota, se devuelven las mejores opciones encontradas hasta ese momento.
+"""
+
+import logging
+import time
+from bisect import bisect_left
+from datetime import date
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Opciones con más habitaciones que la mínima necesaria que se siguen ofreciendo
+MAX_EXTRA_ROOMS = 1
+# Cada cuántos nodos se mira el reloj
+_CLOCK_EVERY = 256
+
+_stats = {"calls": 0, "timeouts": 0, "nodes": 0, "max_ms": 0.0}
+
+
+class _Timeout(Exception):
+    pass
+
+
+def room_capacity(habitacion: Dict[str, Any]) -> int:
+    try:
+        return max(int(habitacion.get("capacidad") or 2), 1)
+    except (TypeError, ValueError):
+        return 2
+
+
+def nightly_price(habitacion: Dict[str, Any]) -> Optional[float]:
+    """Precio por noche de la habitación (None si no se conoce)"""
+    precio = habitacion.get("precio")
+    for value in (
+        habitacion.get("precioBase"),
+        habitacion.get("precio_base"),
+        precio.get("precio_base") if isinstance(precio, dict) else None,
+    ):
+        try:
+            if value is not None and value != "":
+                return float(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+def nights_between(fecha_inicio: Optional[str], fecha_fin: Optional[str]) -> int:
+    """Noches entre dos fechas YYYY-MM-DD (1 si faltan o no son válidas)"""
+    try:
+        return max((date.fromisoformat(str(fecha_fin)[:10]) - date.fromisoformat(str(fecha_inicio)[:10])).days, 1)
+    except (TypeError, ValueError):
+        return 1
+
+
+def distribute_guests(guests: int, capacities: List[int]) -> List[int]:
+    """Reparte los huéspedes de forma pareja según la capacidad de cada habitación"""
+    assigned = [0] * len(capacities)
+    for _ in range(min(guests, sum(capacities))):
+        candidates = [i for i, capacity in enumerate(capacities) if assigned[i] < capacity]
+        room = min(candidates, key=lambda i: (assigned[i] / capacities[i], -capacities[i]))
+        assigned[room] += 1
+    return assigned
+
+
+def _unit_price(price: Optional[float]) -> float:
+    # Sin precio conocido la opción queda última entre las de igual tamaño
+    return price if price is not None else float("inf")
+
+
+class _Search:
+    def __init__(self, groups: List[Tuple[int, Optional[float], List[Dict[str, Any]]]], guests: int,
+                 top_k: int, deadline: float):
+        self.groups = groups
+        self.guests = guests
+        self.top_k = top_k
+        self.deadline = deadline
+        self.nodes = 0
+        self.results: List[Tuple[Tuple[int, int, float], Tuple[int, ...]]] = []
+        self.seen = set()
+
+        # Capacidades individuales (de mayor a menor) para acotar cuántas habitaciones faltan
+        flat = [capacity for capacity, _, rooms in groups for _ in rooms]
+        self.cumulative = [0] + list(accumulate(flat))
+        self.offsets = list(accumulate([0] + [len(rooms) for _, _, rooms in groups]))
+        self.max_rooms = len(flat)
+        # Por grupo: suma de los k precios más baratos desde ese grupo (cota del precio que falta)
+        self.cheapest: List[List[float]] = []
+        for group in range(len(groups)):
+            prices = sorted(_unit_price(price) for _, price, rooms in groups[group:] for _ in rooms)
+            self.cheapest.append([0.0] + list(accumulate(prices)))
+
+    def min_rooms(self, group: int, remaining: int) -> Optional[int]:
+        """Mínimo de habitaciones (desde el grupo dado) para cubrir `remaining`; None si no alcanzan"""
+        start = self.offsets[group]
+        target = self.cumulative[start] + remaining
+        if self.cumulative[-1] < target:
+            return None
+        return bisect_left(self.cumulative, target) - start
+
+    def record(self, count: int, capacity: int, price: float, taken: Tuple[int, ...]) -> None:
+        if taken in self.seen:
+            return
+        self.seen.add(taken)
+        self.results.append(((count, capacity - self.guests, price), taken))
+        self.results.sort()
+        del self.results[self.top_k:]
+
+    def bounded(self, group: int, count: int, needed: int, price: float) -> bool:
+        """Si ninguna combinación de esta rama puede mejorar la peor opción guardada"""
+        if count + needed > self.max_rooms:
+            return True
+        if len(self.results) < self.top_k:
+            return False
+        # Mejor caso: las habitaciones mínimas, sin camas sobrantes y las más baratas
+        best_case = (count + needed, 0, price + self.cheapest[group][needed])
+        return best_case >= self.results[-1][0]
+
+    def greedy(self) -> None:
+        taken, capacity, price, count = [], 0, 0.0, 0
+        for group_capacity, group_price, rooms in self.groups:
+            take = min(len(rooms), -(-max(self.guests - capacity, 0) // group_capacity))
+            taken.append(take)
+            capacity += take * group_capacity
+            price += take * _unit_price(group_price) if take else 0.0
+            count += take
+        if capacity >= self.guests:
+            self.record(count, capacity, price, tuple(taken))
+            self.max_rooms = min(self.max_rooms, count + MAX_EXTRA_ROOMS)
+
+    def search(self, group: int, count: int, capacity: int, price: float, taken: Tuple[int, ...]) -> None:
+        self.nodes += 1
+        if self.nodes % _CLOCK_EVERY == 0 and time.perf_counter() > self.deadline:
+            raise _Timeout()
+
+        remaining = self.guests - capacity
+        if remaining <= 0:
+            self.record(count, capacity, price, taken + (0,) * (len(self.groups) - group))
+            return
+        if group == len(self.groups):
+            return
+        needed = self.min_rooms(group, remaining)
+        if needed is None or self.bounded(group, count, needed, price):
+            return
+
+        group_capacity, group_price, rooms = self.groups[group]
+        unit_price = _unit_price(group_price)
+        most = min(len(rooms), -(-remaining // group_capacity), self.max_rooms - count)
+        for take in range(most, -1, -1):
+            self.search(group + 1, count + take, capacity + take * group_capacity,
+                        price + take * unit_price if take else price, taken + (take,))
+
+
+def allocate_rooms(
+    habitaciones: List[Dict[str, Any]],
+    guests: int,
+    nights: int = 1,
+    top_k: Optional[int] = None,
+    time_budget_ms: Optional[float] = None
+) -> List[Dict[str, Any]]:
+    """
+    Mejores combinaciones de habitaciones para `guests` huéspedes.
+
+    Cada opción: rooms (los dicts recibidos), ids, habitaciones (nombres),
+    numero_habitaciones, capacidad_total, sobrante, precio_total (None si
+    falta algún precio) y distribucion (huéspedes por habitación, en el mismo
+    orden).
+    """
+    top_k = top_k or settings.room_allocator_top_k
+    budget = settings.room_allocator_time_budget_ms if time_budget_ms is None else time_budget_ms
+    if not habitaciones or guests <= 0:
+        return []
+
+    started = time.perf_counter()
+    groups: Dict[Tuple[int, Optional[float]], List[Dict[str, Any]]] = {}
+    for habitacion in habitaciones:
+        groups.setdefault((room_capacity(habitacion), nightly_price(habitacion)), []).append(habitacion)
+    ordered = sorted(
+        ((capacity, price, rooms) for (capacity, price), rooms in groups.items()),
+        key=lambda group: (-group[0], group[1] if group[1] is not None else float("inf"))
+    )
+
+    search = _Search(ordered, guests, top_k, started + budget / 1000)
+    search.greedy()
+    timed_out = False
+    try:
+        search.search(0, 0, 0, 0.0, ())
+    except _Timeout:
+        timed_out = True
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    _stats["calls"] += 1
+    _stats["nodes"] += search.nodes
+    _stats["max_ms"] = max(_stats["max_ms"], round(elapsed_ms, 2))
+    if timed_out:
+        _stats["timeouts"] += 1
+        logger.warning("⏱️ Asignación de habitaciones cortada a los %.1f ms (%s habitaciones, %s huéspedes)",
+                       elapsed_ms, len(habitaciones), guests)
+
+    allocations = []
+    for (count, waste, price), taken in search.results:
+        rooms = [room for (_, _, group_rooms), take in zip(ordered, taken) for room in group_rooms[:take]]
+        capacities = [room_capacity(room) for room in rooms]
+        allocations.append({
+            "rooms": rooms,
+            "ids": [room.get("id") for room in rooms],
+            "habitaciones": [room.get("nombre") for room in rooms],
+            "numero_habitaciones": count,
+            "capacidad_total": sum(capacities),
+            "sobrante": waste,
+            "precio_total": round(price * max(nights, 1), 2) if price != float("inf") else None,
+            "distribucion": distribute_guests(guests, capacities),
+        })
+    return allocations
+
+
+def allocator_metrics() -> Dict[str, Any]:
+    return dict(_stats)
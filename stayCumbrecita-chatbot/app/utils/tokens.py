@@ -0,0 +1,73 @@
+import logging
+import re
+from functools import lru_cache
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+except ImportError:  # pragma: no cover - depende del entorno
+    tiktoken = None
+
+# Modelo de referencia para contar tokens del chat
+DEFAULT_TOKEN_MODEL = "gpt-3.5-turbo"
+
+# Aproximación cuando tiktoken no está disponible: palabras + signos sueltos
+_APPROX_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    """Obtiene (y cachea) el encoding de tiktoken para un modelo"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"⚠️ No se pudo cargar el encoding de tiktoken: {e}")
+        return None
+
+
+def count_tokens(text: Optional[str], model: str = DEFAULT_TOKEN_MODEL) -> int:
+    """Cuenta tokens localmente (tiktoken si está instalado, aproximación si no)"""
+    if not text:
+        return 0
+
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    # En español cada palabra larga suele partirse en más de un token
+    approx = 0
+    for token in _APPROX_TOKEN_PATTERN.findall(text):
+        approx += 1 + len(token) // 6
+    return approx
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = DEFAULT_TOKEN_MODEL) -> str:
+    """Recorta un texto para que no supere max_tokens"""
+    if max_tokens <= 0 or not text:
+        return ""
+
+    encoding = _get_encoding(model)
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[:max_tokens])
+
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    # Búsqueda binaria sobre la longitud en caracteres
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[:middle], model) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
@@ -0,0 +1,124 @@
+-- Esquema inicial (bases creadas antes de las migraciones versionadas: todo es idempotente)
+-- Los cambios de esquema nuevos van en un archivo nuevo (002_..., 003_...), nunca editando uno aplicado
+
+-- Extensiones necesarias
+CREATE EXTENSION IF NOT EXISTS "uuid-ossp";
+CREATE EXTENSION IF NOT EXISTS vector;
+
+-- Tabla para vectores de documentos PDF (renombrada para coincidir con el código)
+CREATE TABLE IF NOT EXISTS chatbot_knowledge (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    hospedaje_id UUID NOT NULL,
+    document_id VARCHAR(255) NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    content TEXT NOT NULL,
+    content_hash CHAR(64),
+    embedding vector(1536) NOT NULL,
+    metadata JSONB DEFAULT '{}',
+    created_at TIMESTAMPTZ DEFAULT now(),
+    updated_at TIMESTAMPTZ DEFAULT now(),
+    UNIQUE(hospedaje_id, document_id, chunk_index)
+);
+
+-- Hash por chunk para re-entrenamiento incremental (bases creadas antes de esta columna)
+ALTER TABLE chatbot_knowledge ADD COLUMN IF NOT EXISTS content_hash CHAR(64);
+
+-- Búsqueda de texto completo en español (se mantiene sola al insertar/actualizar)
+ALTER TABLE chatbot_knowledge ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (to_tsvector('spanish', coalesce(content, ''))) STORED;
+
+-- Hash del contenido de cada documento procesado
+CREATE TABLE IF NOT EXISTS knowledge_documents (
+    hospedaje_id UUID NOT NULL,
+    document_id VARCHAR(255) NOT NULL,
+    content_hash CHAR(64) NOT NULL,
+    chunk_count INTEGER NOT NULL DEFAULT 0,
+    source VARCHAR(255),
+    updated_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (hospedaje_id, document_id)
+);
+
+-- Tabla para historial de chat
+CREATE TABLE IF NOT EXISTS chat_history (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    hospedaje_id UUID NOT NULL,
+    user_id UUID NOT NULL,
+    session_id VARCHAR(255),
+    user_message TEXT NOT NULL,
+    bot_response TEXT NOT NULL,
+    sources_used JSONB DEFAULT '[]',
+    response_time FLOAT DEFAULT 0,
+    entities JSONB,
+    created_at TIMESTAMPTZ DEFAULT now()
+);
+
+-- Entidades extraídas al guardar cada mensaje (bases creadas antes de esta columna; NULL = fila anterior)
+ALTER TABLE chat_history ADD COLUMN IF NOT EXISTS entities JSONB;
+
+-- Tabla para sesiones y contexto de reservas pendientes
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    hospedaje_id UUID NOT NULL,
+    user_id UUID NOT NULL,
+    conversation_id VARCHAR(255) NOT NULL,
+    session_data JSONB DEFAULT '{}',
+    created_at TIMESTAMPTZ DEFAULT now(),
+    updated_at TIMESTAMPTZ DEFAULT now(),
+    UNIQUE(hospedaje_id, user_id, conversation_id)
+);
+
+-- Cache persistente de embeddings (clave: sha256 del texto + modelo)
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    content_hash CHAR(64) NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    embedding vector NOT NULL,
+    hits INTEGER DEFAULT 0,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    last_used_at TIMESTAMPTZ DEFAULT now(),
+    PRIMARY KEY (content_hash, model)
+);
+
+-- Jobs de ingesta / re-entrenamiento en segundo plano
+CREATE TABLE IF NOT EXISTS ingestion_jobs (
+    id UUID PRIMARY KEY,
+    hospedaje_id UUID NOT NULL,
+    kind VARCHAR(50) NOT NULL DEFAULT 'retrain',
+    status VARCHAR(20) NOT NULL DEFAULT 'queued',
+    progress JSONB DEFAULT '{}',
+    error TEXT,
+    created_at TIMESTAMPTZ DEFAULT now(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ DEFAULT now()
+);
+
+-- Índices para optimización
+CREATE INDEX IF NOT EXISTS idx_chatbot_knowledge_hospedaje ON chatbot_knowledge(hospedaje_id);
+-- Los embeddings se guardan normalizados: producto interno (<#>) equivale al coseno y es más barato.
+-- Para halfvec o menos dimensiones ver tools/migrate_embeddings.py (reemplaza columna e índice)
+CREATE INDEX IF NOT EXISTS idx_chatbot_knowledge_embedding ON chatbot_knowledge USING ivfflat (embedding vector_ip_ops);
+CREATE INDEX IF NOT EXISTS idx_chatbot_knowledge_document ON chatbot_knowledge(document_id);
+CREATE INDEX IF NOT EXISTS idx_chatbot_knowledge_content_hash ON chatbot_knowledge(hospedaje_id, content_hash);
+CREATE INDEX IF NOT EXISTS idx_chatbot_knowledge_search ON chatbot_knowledge USING gin (search_vector);
+CREATE INDEX IF NOT EXISTS idx_chat_history_hospedaje_user ON chat_history(hospedaje_id, user_id);
+CREATE INDEX IF NOT EXISTS idx_chat_history_session ON chat_history(session_id);
+CREATE INDEX IF NOT EXISTS idx_chat_history_created_at ON chat_history(created_at);
+-- Últimos mensajes de una conversación (contexto de sesión en cada turno)
+CREATE INDEX IF NOT EXISTS idx_chat_history_conversation ON chat_history(hospedaje_id, user_id, session_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_chat_sessions_lookup ON chat_sessions(hospedaje_id, user_id, conversation_id);
+CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated ON chat_sessions(updated_at);
+CREATE INDEX IF NOT EXISTS idx_embedding_cache_last_used ON embedding_cache(last_used_at);
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_hospedaje ON ingestion_jobs(hospedaje_id, created_at);
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_status ON ingestion_jobs(status);
+
+-- Comentarios para documentación
+COMMENT ON TABLE chatbot_knowledge IS 'Almacena chunks de PDFs vectorizados por hospedaje';
+COMMENT ON TABLE knowledge_documents IS 'Hash de contenido por documento para re-entrenar solo lo que cambió';
+COMMENT ON TABLE chat_history IS 'Historial completo de conversaciones del chatbot';
+COMMENT ON TABLE chat_sessions IS 'Contexto de sesiones y reservas pendientes para memoria conversacional';
+COMMENT ON TABLE ingestion_jobs IS 'Jobs de re-entrenamiento con estado y progreso (documentos y chunks procesados)';
+COMMENT ON TABLE embedding_cache IS 'Embeddings ya calculados para no volver a llamar a la API con el mismo texto';
+COMMENT ON COLUMN chat_history.sources_used IS 'Array JSON con las fuentes utilizadas: pdf, database, history, gpt';
+COMMENT ON COLUMN chat_history.response_time IS 'Tiempo de respuesta en segundos';
+COMMENT ON COLUMN chat_history.entities IS 'Entidades del mensaje: fechas y huéspedes (usuario); query_type, disponibilidad y habitación (bot)';
+COMMENT ON COLUMN chat_sessions.session_data IS 'Datos JSON con contexto de reserva: habitación, fechas, huéspedes'; 
\ No newline at end of file
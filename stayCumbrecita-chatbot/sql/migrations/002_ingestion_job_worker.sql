@@ -0,0 +1,7 @@
+-- Proceso dueño de cada job de ingesta (host:pid), para recuperar al arrancar los que
+-- quedaron en curso sin esperar a que venzan por tiempo
+ALTER TABLE ingestion_jobs ADD COLUMN IF NOT EXISTS worker_id VARCHAR(255);
+
+CREATE INDEX IF NOT EXISTS idx_ingestion_jobs_active ON ingestion_jobs(status) WHERE status IN ('queued', 'running');
+
+COMMENT ON COLUMN ingestion_jobs.worker_id IS 'Proceso que atiende el job (host:pid); updated_at hace de heartbeat mientras está activo';
@@ -0,0 +1,10 @@
+"""
+Configuración de pytest: los tests importan app.* desde la raíz del proyecto.
+
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
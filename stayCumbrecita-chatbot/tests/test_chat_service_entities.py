@@ -0,0 +1,82 @@
+"""Entidades guardadas con cada mensaje y su lectura desde el historial"""
+
+import json
+from datetime import date
+
+import pytest
+
+from app.services.chat_service import ChatService
+from app.utils.date_extractor import DateExtractor
+
+TODAY = date(2026, 10, 19)
+
+
+@pytest.fixture
+def service():
+    # Sin __init__: no hace falta cliente de OpenAI ni base para analizar entidades
+    service = ChatService.__new__(ChatService)
+    service.date_extractor = DateExtractor(today=lambda: TODAY)
+    return service
+
+
+def round_trip(service, message, role, query_type=None, availability=None):
+    """Entidades tal como vuelven de la columna JSON del historial"""
+    stored = json.dumps(service._message_entities(message, role, query_type, availability))
+    if role == "user":
+        return service._row_entities(message, None, stored)
+    return service._row_entities(None, message, stored)
+
+
+class TestMessageEntities:
+
+    def test_user_dates_and_guests(self, service):
+        entities = round_trip(service, "del 10 al 12 de diciembre para 4 personas", "user")
+        assert entities == {
+            "dates": {
+                "check_in": "2026-12-10",
+                "check_out": "2026-12-12",
+                "single_date": None,
+                "has_dates": True,
+            },
+            "guests": 4,
+        }
+
+    def test_user_without_entities(self, service):
+        assert round_trip(service, "hola, ¿cómo están?", "user") == {}
+
+    def test_assistant_available_with_habitacion(self, service):
+        entities = round_trip(
+            service, "¡Excelente! La Suite Taina está disponible", "assistant",
+            "disponibilidad", {"disponible": True}
+        )
+        assert entities == {"query_type": "disponibilidad", "availability": True, "habitacion": "Suite Taina"}
+
+    def test_assistant_not_available_keeps_no_habitacion(self, service):
+        entities = round_trip(
+            service, "Lo siento, no tenemos disponibilidad en la Suite Taina", "assistant",
+            "disponibilidad", {"disponible": False}
+        )
+        assert entities == {"query_type": "disponibilidad", "availability": False}
+
+    def test_assistant_without_consult_has_no_availability(self, service):
+        entities = round_trip(service, "La Suite Taina está disponible", "assistant", "general", None)
+        assert entities == {"query_type": "general"}
+
+
+class TestRowEntities:
+
+    def test_stored_dict_is_returned_as_is(self, service):
+        stored = {"availability": False}
+        assert service._row_entities("del 3 al 5 de julio", "No hay lugar", stored) is stored
+
+    def test_stored_empty_entities_are_not_reparsed(self, service):
+        assert service._row_entities("del 3 al 5 de julio", None, "{}") == {}
+
+    def test_legacy_row_only_reparses_user_message(self, service):
+        entities = service._row_entities("del 3 al 5 de julio", "La Suite Taina está disponible", None)
+        assert entities["dates"]["check_in"] == "2026-07-03"
+        assert entities["dates"]["check_out"] == "2026-07-05"
+        assert "availability" not in entities and "habitacion" not in entities
+
+    def test_legacy_row_without_user_message(self, service):
+        assert service._row_entities(None, "La Suite Taina está disponible", None) == {}
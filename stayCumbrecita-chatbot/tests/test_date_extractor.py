@@ -0,0 +1,109 @@
+"""Gramática de fechas del DateExtractor (con fecha de referencia fija)"""
+
+from datetime import date
+
+import pytest
+
+from app.utils.date_extractor import DateExtractor
+
+TODAY = date(2026, 10, 19)
+
+
+@pytest.fixture
+def extractor():
+    return DateExtractor(today=lambda: TODAY)
+
+
+def dates(params):
+    return params["check_in"], params["check_out"], params["single_date"]
+
+
+class TestRanges:
+
+    @pytest.mark.parametrize("message, expected", [
+        ("del 11 al 14 de julio", ("2026-07-11", "2026-07-14")),
+        ("entre el 3 y el 5", ("2026-10-03", "2026-10-05")),
+        ("10-12 de marzo", ("2026-03-10", "2026-03-12")),
+        ("15/07 al 18/07/2026", ("2026-07-15", "2026-07-18")),
+        ("del 10 al 12 de diciembre para 4 personas", ("2026-12-10", "2026-12-12")),
+    ])
+    def test_same_month(self, extractor, message, expected):
+        params = extractor.get_query_params(message)
+        assert params["has_dates"]
+        assert dates(params) == expected + (None,)
+
+    @pytest.mark.parametrize("message, expected", [
+        # El primer día es del mes anterior al nombrado
+        ("desde el 30 hasta el 2 de noviembre", ("2026-10-30", "2026-11-02")),
+        # El segundo día es del mes siguiente al nombrado
+        ("del 29 de marzo al 2", ("2026-03-29", "2026-04-02")),
+        # Sin mes: el segundo día cae en el mes siguiente al actual
+        ("del 28 al 3", ("2026-10-28", "2026-11-03")),
+        ("del 28/12 al 3", ("2026-12-28", "2027-01-03")),
+        # Cruce de año con los dos meses explícitos
+        ("del 28 de diciembre al 2 de enero", ("2026-12-28", "2027-01-02")),
+    ])
+    def test_cross_month(self, extractor, message, expected):
+        params = extractor.get_query_params(message)
+        assert dates(params) == expected + (None,)
+        assert params["date_range"] == {"start": expected[0], "end": expected[1]}
+
+    @pytest.mark.parametrize("message, expected", [
+        # Cruzar de mes daría 26 noches: son los días ordenados dentro del mes nombrado
+        ("del 25 al 20 de noviembre", ("2026-11-20", "2026-11-25")),
+        ("del 29 de marzo al 20", ("2026-03-20", "2026-03-29")),
+        ("del 25 al 10", ("2026-10-10", "2026-10-25")),
+        # 15 noches todavía cruzan de mes
+        ("del 16 al 1 de diciembre", ("2026-11-16", "2026-12-01")),
+    ])
+    def test_long_wrap_is_read_within_the_month(self, extractor, message, expected):
+        params = extractor.get_query_params(message)
+        assert dates(params) == expected + (None,)
+
+    @pytest.mark.parametrize("message", [
+        # 30 y 31 de febrero no existen: no se arma un rango que arranque ahí
+        "del 30 al 2 de marzo",
+        "del 31 al 2 de mayo",
+        # Mismo día: no es un rango
+        "del 5 al 5 de marzo",
+    ])
+    def test_impossible_ranges_are_not_ranges(self, extractor, message):
+        params = extractor.get_query_params(message)
+        assert params["check_in"] is None and params["check_out"] is None
+
+
+class TestDays:
+
+    def test_day_of_current_month(self, extractor):
+        assert dates(extractor.get_query_params("el 25")) == (None, None, "2026-10-25")
+
+    def test_day_with_month(self, extractor):
+        assert dates(extractor.get_query_params("llegamos el 11 de julio")) == (None, None, "2026-07-11")
+
+    @pytest.mark.parametrize("message", ["el 31 de febrero", "para el 30 de febrero"])
+    def test_impossible_day_is_rejected(self, extractor, message):
+        params = extractor.get_query_params(message)
+        assert not params["has_dates"]
+        assert dates(params) == (None, None, None)
+
+    def test_impossible_day_keeps_guests(self, extractor):
+        params = extractor.get_query_params("para el 31 de febrero somos 3")
+        assert params["single_date"] is None
+        assert params["guests"] == 3
+
+    def test_no_dates(self, extractor):
+        params = extractor.get_query_params("¿tienen wifi en las habitaciones?")
+        assert not params["has_dates"]
+        assert dates(params) == (None, None, None)
+
+
+class TestReferenceDate:
+
+    def test_today_argument_overrides_injected_date(self, extractor):
+        params = extractor.get_query_params("el 25", today=date(2027, 3, 1))
+        assert params["single_date"] == "2027-03-25"
+
+    def test_memoized_result_is_a_new_dict(self, extractor):
+        first = extractor.get_query_params("del 11 al 14 de julio")
+        first["check_in"] = "modificado"
+        assert extractor.get_query_params("del 11 al 14 de julio")["check_in"] == "2026-07-11"
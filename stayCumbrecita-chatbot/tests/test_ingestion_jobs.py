@@ -0,0 +1,118 @@
+"""Reglas de jobs huérfanos y deduplicación de jobs entre workers"""
+
+import asyncio
+import os
+import socket
+
+import pytest
+
+from app.services import ingestion_jobs as jobs_module
+from app.services.ingestion_jobs import STALE_JOB_SECONDS, IngestionJobManager, _is_orphaned
+
+HOST = socket.gethostname()
+FRESH = 5.0
+STALE = STALE_JOB_SECONDS + 1
+
+
+@pytest.fixture
+def pids(monkeypatch):
+    """Pids vivos de este host (el resto se considera muerto)"""
+    alive = {os.getpid()}
+    monkeypatch.setattr(jobs_module, "_pid_alive", lambda pid: pid in alive)
+    return alive
+
+
+class TestIsOrphaned:
+
+    def test_without_owner(self):
+        assert _is_orphaned(None, FRESH)
+        assert _is_orphaned("", FRESH)
+
+    def test_same_host_dead_pid(self, pids):
+        assert _is_orphaned(f"{HOST}:999999", FRESH)
+
+    def test_same_host_own_pid(self, pids):
+        # Este proceso recién arranca: un job a su nombre es de una vida anterior
+        assert _is_orphaned(f"{HOST}:{os.getpid()}", FRESH)
+
+    def test_same_host_live_pid_with_heartbeat(self, pids):
+        pids.add(4242)
+        assert not _is_orphaned(f"{HOST}:4242", FRESH)
+
+    def test_same_host_live_pid_without_heartbeat(self, pids):
+        # El pid pudo reutilizarse tras un reinicio o el worker se colgó
+        pids.add(4242)
+        assert _is_orphaned(f"{HOST}:4242", STALE)
+
+    def test_other_host(self, pids):
+        assert not _is_orphaned("otro-host:4242", FRESH)
+        assert _is_orphaned("otro-host:4242", STALE)
+
+
+class FakeJobsTable:
+    """ingestion_jobs en memoria: responde las consultas que hace el gestor"""
+
+    def __init__(self, active_row=None, insert_conflict_row=None):
+        self.active_row = active_row
+        self.insert_conflict_row = insert_conflict_row
+        self.inserted = []
+
+    async def query(self, query, params=None):
+        if query.strip().startswith("INSERT INTO ingestion_jobs"):
+            if self.insert_conflict_row:
+                # Otro worker registró el job entre la búsqueda y la inserción
+                self.active_row = self.insert_conflict_row
+                return []
+            self.inserted.append(params[0])
+            return [(params[0],)]
+        return None
+
+    async def query_one(self, query, params=None):
+        return self.active_row
+
+
+def job_row(job_id="job-de-otro-worker", status="running"):
+    return (job_id, "hospedaje-1", "retrain", status, None, None, None, None, None)
+
+
+def enqueue(monkeypatch, table, manager=None):
+    monkeypatch.setattr(jobs_module, "execute_vector_query", table.query)
+    monkeypatch.setattr(jobs_module, "execute_vector_query_one", table.query_one)
+    manager = manager or IngestionJobManager(workers=1)
+
+    async def run():
+        manager._queue = asyncio.Queue()
+        return await manager.enqueue("hospedaje-1")
+
+    return manager, asyncio.run(run())
+
+
+class TestEnqueue:
+
+    def test_new_job_is_registered_and_queued(self, monkeypatch):
+        table = FakeJobsTable()
+        manager, job = enqueue(monkeypatch, table)
+        assert table.inserted == [job["id"]]
+        assert job["status"] == "queued"
+        assert manager._queue.qsize() == 1
+
+    def test_active_job_in_another_worker_is_returned(self, monkeypatch):
+        table = FakeJobsTable(active_row=job_row())
+        manager, job = enqueue(monkeypatch, table)
+        assert job["id"] == "job-de-otro-worker"
+        assert table.inserted == []
+        assert manager._queue.qsize() == 0
+
+    def test_job_registered_concurrently_is_returned(self, monkeypatch):
+        table = FakeJobsTable(insert_conflict_row=job_row(status="queued"))
+        manager, job = enqueue(monkeypatch, table)
+        assert job["id"] == "job-de-otro-worker"
+        assert manager._queue.qsize() == 0
+        assert manager._jobs == {}
+
+    def test_active_job_in_this_worker_is_returned(self, monkeypatch):
+        table = FakeJobsTable()
+        manager, first = enqueue(monkeypatch, table)
+        _, second = enqueue(monkeypatch, table, manager)
+        assert second is first
+        assert table.inserted == [first["id"]]
@@ -0,0 +1,42 @@
+"""El formateo de los registros encolados ocurre en el hilo de escritura"""
+
+import json
+import logging
+import queue
+import sys
+
+from app.core.logging_config import DroppingQueueHandler, JsonFormatter
+
+
+def exception_record(args=("algo",)):
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        exc_info = sys.exc_info()
+    return logging.LogRecord("test", logging.ERROR, __file__, 1, "falló %s", args, exc_info)
+
+
+class TestDroppingQueueHandler:
+
+    def test_record_is_queued_unformatted(self):
+        handler = DroppingQueueHandler(queue.Queue())
+        handler.handle(exception_record())
+        queued = handler.queue.get_nowait()
+
+        assert queued.msg == "falló %s" and queued.args == ("algo",)
+        assert queued.exc_info is not None
+
+    def test_json_keeps_traceback_apart_from_message(self):
+        handler = DroppingQueueHandler(queue.Queue())
+        handler.handle(exception_record())
+        payload = json.loads(JsonFormatter().format(handler.queue.get_nowait()))
+
+        assert payload["msg"] == "falló algo"
+        assert "ZeroDivisionError" in payload["exc"]
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = DroppingQueueHandler(queue.Queue(maxsize=1))
+        for _ in range(3):
+            handler.handle(exception_record())
+        assert handler.queue.qsize() == 1
+        assert handler.dropped == 2
@@ -0,0 +1,168 @@
+"""Runner de migraciones versionadas contra una conexión psycopg2 simulada"""
+
+import pytest
+
+from app.core import migrations
+
+
+class FakeDatabase:
+    """Estado de la base: tabla schema_migrations, sentencias ejecutadas y locks tomados"""
+
+    def __init__(self, applied=None, fail_on=None):
+        self.table_exists = applied is not None
+        self.applied = dict(applied or {})
+        self.fail_on = fail_on
+        self.statements = []
+        self.locks = []
+        self.connections = 0
+
+    def connect(self, database_url):
+        self.connections += 1
+        return FakeConnection(self)
+
+
+class FakeConnection:
+
+    def __init__(self, database):
+        self.database = database
+        self.uncommitted = {}
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.database.applied.update(self.uncommitted)
+        self.uncommitted = {}
+
+    def rollback(self):
+        self.uncommitted = {}
+
+    def close(self):
+        self.closed = True
+
+
+class FakeCursor:
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.database = connection.database
+        self._result = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params=None):
+        database = self.database
+        database.statements.append(query.strip())
+        if "to_regclass" in query:
+            self._result = [(database.table_exists,)]
+        elif query.startswith("SELECT version, checksum"):
+            self._result = sorted(database.applied.items())
+        elif "pg_advisory_lock" in query:
+            database.locks.append("lock")
+        elif "pg_advisory_unlock" in query:
+            database.locks.append("unlock")
+        elif "CREATE TABLE IF NOT EXISTS schema_migrations" in query:
+            database.table_exists = True
+        elif query.startswith("INSERT INTO schema_migrations"):
+            version, _, checksum, _ = params
+            self.connection.uncommitted[version] = checksum
+        elif database.fail_on and database.fail_on in query:
+            raise RuntimeError("error de sintaxis")
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        return list(self._result)
+
+
+@pytest.fixture
+def migrations_dir(tmp_path):
+    (tmp_path / "001_init.sql").write_text("CREATE TABLE uno (id INT);", encoding="utf-8")
+    (tmp_path / "002_columna.sql").write_text("ALTER TABLE uno ADD COLUMN nombre TEXT;", encoding="utf-8")
+    (tmp_path / "README.txt").write_text("no es una migración", encoding="utf-8")
+    return tmp_path
+
+
+def run(monkeypatch, database, directory, **kwargs):
+    monkeypatch.setattr(migrations.psycopg2, "connect", database.connect)
+    return migrations.migrate(database_url="postgresql://test", directory=directory, **kwargs)
+
+
+class TestDiscover:
+
+    def test_ordered_by_version(self, migrations_dir):
+        found = migrations.discover(migrations_dir)
+        assert [(m.version, m.name) for m in found] == [(1, "init"), (2, "columna")]
+        assert all(len(m.checksum) == 64 for m in found)
+
+    def test_duplicate_version_fails(self, migrations_dir):
+        (migrations_dir / "002_otra.sql").write_text("SELECT 1;", encoding="utf-8")
+        with pytest.raises(ValueError):
+            migrations.discover(migrations_dir)
+
+    def test_repository_migrations_are_valid(self):
+        found = migrations.discover()
+        assert found and found[0].version == 1
+        assert len({m.version for m in found}) == len(found)
+
+
+class TestMigrate:
+
+    def test_fresh_database_applies_everything(self, monkeypatch, migrations_dir):
+        database = FakeDatabase()
+        status = run(monkeypatch, database, migrations_dir)
+
+        assert status["applied"] == ["001_init", "002_columna"]
+        assert status["current_version"] == status["latest_version"] == 2
+        assert status["pending"] == []
+        assert sorted(database.applied) == [1, 2]
+        assert database.locks == ["lock", "unlock"]
+
+    def test_up_to_date_takes_no_lock_and_runs_no_ddl(self, monkeypatch, migrations_dir):
+        checksums = {m.version: m.checksum for m in migrations.discover(migrations_dir)}
+        database = FakeDatabase(applied=checksums)
+        status = run(monkeypatch, database, migrations_dir)
+
+        assert status["applied"] == []
+        assert status["current_version"] == 2
+        assert database.locks == []
+        assert not any(s.startswith(("CREATE", "ALTER", "INSERT")) for s in database.statements)
+
+    def test_only_pending_are_applied(self, monkeypatch, migrations_dir):
+        first = migrations.discover(migrations_dir)[0]
+        database = FakeDatabase(applied={1: first.checksum})
+        status = run(monkeypatch, database, migrations_dir)
+
+        assert status["applied"] == ["002_columna"]
+        assert not any(s.startswith("CREATE TABLE uno") for s in database.statements)
+
+    def test_target_and_dry_run(self, monkeypatch, migrations_dir):
+        database = FakeDatabase()
+        status = run(monkeypatch, database, migrations_dir, dry_run=True)
+        assert status["pending"] == ["001_init", "002_columna"]
+        assert database.applied == {} and database.locks == []
+
+        status = run(monkeypatch, database, migrations_dir, target=1)
+        assert status["applied"] == ["001_init"]
+        assert sorted(database.applied) == [1]
+
+    def test_failed_migration_is_not_recorded(self, monkeypatch, migrations_dir):
+        database = FakeDatabase(fail_on="ALTER TABLE uno")
+        with pytest.raises(RuntimeError):
+            run(monkeypatch, database, migrations_dir)
+
+        # La primera quedó registrada, la que falló no, y el lock se liberó
+        assert sorted(database.applied) == [1]
+        assert database.locks == ["lock", "unlock"]
+
+    def test_changed_migration_is_not_reapplied(self, monkeypatch, migrations_dir):
+        database = FakeDatabase(applied={1: "0" * 64, 2: "0" * 64})
+        status = run(monkeypatch, database, migrations_dir)
+        assert status["applied"] == []
+        assert database.locks == []
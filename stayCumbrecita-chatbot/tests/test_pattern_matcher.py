@@ -0,0 +1,106 @@
+"""PatternMatcher da los mismos conteos que evaluar re.findall patrón por patrón"""
+
+import random
+import re
+
+import pytest
+
+from app.services.query_classifier import QueryClassifier
+from app.utils.pattern_matcher import KeywordAutomaton, PatternMatcher, required_literals
+
+MESSAGES = [
+    "hola, ¿tienen disponibilidad del 10 al 12 de diciembre?",
+    "¿cuánto sale la noche para 2 personas?",
+    "¿qué servicios tiene el hospedaje?",
+    "¿tienen wifi en las habitaciones?",
+    "¿cuál es el horario de check-in?",
+    "somos 5 personas, ¿tienen lugar este finde?",
+    "¿aceptan tarjeta de crédito?",
+    "quiero reservar la suite",
+    "cuales son los metodos de pago",
+    "quiero reservar ambas habitaciones",
+    "la suite taina para 6 personas",
+    "¿la habitación tiene jacuzzi?",
+    "donde queda? como llego en colectivo",
+    "aceptan mascotas? y niños",
+    "whatsapp del propietario",
+    "Check-Out a que hora",
+    "reservar 2 habitaciones para 4",
+    "TV y aire acondicionado?",
+    "precio por noche en USD",
+    "",
+    "   ",
+]
+
+
+def reference_counts(patterns, message):
+    """Conteos como los calculaba el clasificador antes del matcher: un re.findall por patrón"""
+    counts = {}
+    for category, category_patterns in patterns.items():
+        total = unique = 0
+        for pattern in category_patterns:
+            matches = len(re.findall(pattern, message, re.IGNORECASE))
+            if matches:
+                total += matches
+                unique += 1
+        if total:
+            counts[category] = (total, unique)
+    return counts
+
+
+@pytest.fixture(scope="module")
+def patterns():
+    return QueryClassifier().classification_patterns
+
+
+@pytest.fixture(scope="module")
+def messages():
+    # Mensajes reales más combinaciones al azar de sus palabras (reproducibles)
+    words = " ".join(MESSAGES).split() + ["cuesta", "ARS", "pileta", "spa", "hasta", "cómo", "pagar", "medios"]
+    rng = random.Random(41)
+    generated = [" ".join(rng.choice(words) for _ in range(rng.randint(1, 14))) for _ in range(1500)]
+    return [message.lower() for message in MESSAGES + generated]
+
+
+class TestPatternMatcher:
+
+    def test_same_counts_as_per_pattern_regex(self, patterns, messages):
+        matcher = PatternMatcher(patterns)
+        for message in messages:
+            assert matcher.match_counts(message) == reference_counts(patterns, message), message
+
+    def test_gate_does_not_change_counts(self, patterns, messages):
+        """Con la alternación siempre activa (o nunca) los conteos no cambian"""
+        always_gated = PatternMatcher(patterns)
+        always_gated.gate_min_candidates = 1
+        never_gated = PatternMatcher(patterns)
+        never_gated.gate_min_candidates = 10 ** 6
+        for message in messages:
+            assert always_gated.match_counts(message) == never_gated.match_counts(message), message
+
+    def test_skip_excludes_categories(self, patterns):
+        matcher = PatternMatcher(patterns)
+        message = "¿cuánto sale la noche para 2 personas?"
+        counts = matcher.match_counts(message)
+        assert counts
+        skipped = next(iter(counts))
+        assert skipped not in matcher.match_counts(message, skip=[skipped])
+
+    def test_required_literals_are_sound(self, patterns, messages):
+        """Si un patrón coincide, el mensaje contiene alguno de sus literales obligatorios"""
+        for category_patterns in patterns.values():
+            for pattern in category_patterns:
+                literals = required_literals(pattern)
+                if literals is None:
+                    continue
+                for message in messages:
+                    if re.search(pattern, message, re.IGNORECASE):
+                        assert any(literal in message for literal in literals), (pattern, message)
+
+    def test_required_literals(self):
+        assert required_literals(r"cuánto.*sale|cuanto.*sale") == {"cuánto", "cuanto"}
+        assert required_literals(r".*") is None
+
+    def test_keyword_automaton(self):
+        assert KeywordAutomaton(["he", "she", "his", "hers"]).find("ushers") == {"he", "she", "hers"}
+        assert KeywordAutomaton(["wifi"]).find("sin internet") == set()
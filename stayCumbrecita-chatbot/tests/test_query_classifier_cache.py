@@ -0,0 +1,92 @@
+"""El cache de clasificaciones devuelve lo mismo que clasificar sin cache"""
+
+import asyncio
+
+import pytest
+
+from app.services.query_classifier import QueryClassifier
+
+MESSAGES = [
+    "hola, ¿tienen disponibilidad del 10 al 12 de diciembre?",
+    "¿cuánto sale la noche para 2 personas?",
+    "¿Cuanto sale la noche para 2 personas?",
+    "¿qué servicios tiene el hospedaje?",
+    "¿QUÉ SERVICIOS TIENE EL HOSPEDAJE?",
+    "¿tienen wifi en las habitaciones?",
+    "quiero reservar la suite",
+    "quiero reservar ambas habitaciones",
+    "la suite taina para 6 personas",
+    "¿aceptan tarjeta de crédito?",
+    "¿aceptan tarjeta de credito?",
+    "donde queda? como llego",
+    "sí",
+    "dale, la reservo",
+    "hola",
+]
+
+CONTEXTS = [
+    {},
+    {"query_params": {"has_dates": True, "check_in": "2026-12-10", "check_out": "2026-12-12"}},
+    {"query_params": {"guests": 4}},
+    {"session_context": {"last_availability": True, "last_habitacion": "Suite Taina"}},
+    {"session_context": {"last_availability": False}},
+    {"frontend_conversation": {"messages_count": 3, "last_bot_message": "¿Querés reservar la Suite Taina?"}},
+    # Temas ya respondidos por el asistente (forman parte de la clave del cache)
+    {"frontend_conversation": {"recent_messages": [
+        {"role": "assistant", "message": "Tenemos la Suite Taina disponible y hay lugar para 4"},
+    ]}},
+    {"frontend_conversation": {"recent_messages": [
+        {"role": "assistant", "message": "El precio es ARS $50.000, la tarifa incluye desayuno"},
+    ]}},
+]
+
+
+def classify(classifier, message, context):
+    return asyncio.run(classifier.classify_query(message, dict(context)))
+
+
+@pytest.fixture
+def uncached():
+    classifier = QueryClassifier()
+    classifier._cache_max_entries = 0
+    return classifier
+
+
+class TestClassifierCache:
+
+    def test_cached_results_match_uncached(self, uncached):
+        cached = QueryClassifier()
+        expected = {
+            (message, i): classify(uncached, message, context)
+            for message in MESSAGES for i, context in enumerate(CONTEXTS)
+        }
+        # Dos pasadas: la segunda sale del cache
+        for _ in range(2):
+            for message in MESSAGES:
+                for i, context in enumerate(CONTEXTS):
+                    assert classify(cached, message, context) == expected[(message, i)], (message, context)
+        assert cached.metrics()["cache"]["hits"] > 0
+
+    def test_case_variants_share_entry_and_result(self, uncached):
+        cached = QueryClassifier()
+        first = classify(cached, "¿Qué servicios tiene el hospedaje?", {})
+        hits = cached.metrics()["cache"]["hits"]
+        assert classify(cached, "¿qué SERVICIOS tiene el hospedaje?", {}) == first
+        assert cached.metrics()["cache"]["hits"] == hits + 1
+        assert classify(uncached, "¿qué SERVICIOS tiene el hospedaje?", {}) == first
+
+    def test_answered_topics_change_the_key(self):
+        cached = QueryClassifier()
+        message = "¿tienen disponibilidad para el finde?"
+        classify(cached, message, {})
+        hits = cached.metrics()["cache"]["hits"]
+        classify(cached, message, CONTEXTS[-2])
+        # Con la disponibilidad ya respondida no se reutiliza la clasificación sin historial
+        assert cached.metrics()["cache"]["hits"] == hits
+
+    def test_cache_is_bounded(self):
+        cached = QueryClassifier()
+        cached._cache_max_entries = 4
+        for i in range(20):
+            classify(cached, f"mensaje número {i}", {})
+        assert len(cached._cache) <= 4
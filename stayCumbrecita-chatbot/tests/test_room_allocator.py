@@ -0,0 +1,97 @@
+"""allocate_rooms devuelve la misma mejor opción que una búsqueda exhaustiva"""
+
+import itertools
+import random
+
+import pytest
+
+from app.utils.room_allocator import allocate_rooms, distribute_guests, nightly_price, room_capacity
+
+NIGHTS = 2
+
+
+def brute_force_best(habitaciones, guests):
+    """(habitaciones, camas sobrantes, precio por noche) mínimo probando todas las combinaciones"""
+    best = None
+    for count in range(1, len(habitaciones) + 1):
+        for combination in itertools.combinations(habitaciones, count):
+            capacity = sum(room_capacity(room) for room in combination)
+            if capacity < guests:
+                continue
+            prices = [nightly_price(room) for room in combination]
+            price = sum(prices) if all(p is not None for p in prices) else float("inf")
+            key = (count, capacity - guests, price)
+            if best is None or key < best:
+                best = key
+        if best is not None:
+            return best
+    return None
+
+
+def option_key(option):
+    price = option["precio_total"] / NIGHTS if option["precio_total"] is not None else float("inf")
+    return option["numero_habitaciones"], option["sobrante"], price
+
+
+def random_rooms(rng, trial):
+    return [
+        {
+            "id": f"r{i}",
+            "nombre": f"Habitación {i}",
+            "capacidad": rng.choice([2, 2, 3, 4, 6]),
+            "precioBase": rng.choice([30000, 45000, 60000, None if trial % 7 == 0 else 50000]),
+        }
+        for i in range(rng.randint(1, 8))
+    ]
+
+
+class TestAllocateRooms:
+
+    def test_best_option_matches_brute_force(self):
+        rng = random.Random(48)
+        for trial in range(300):
+            habitaciones = random_rooms(rng, trial)
+            guests = rng.randint(1, 20)
+            options = allocate_rooms(habitaciones, guests, nights=NIGHTS, time_budget_ms=1000)
+            best = brute_force_best(habitaciones, guests)
+            if best is None:
+                assert options == []
+            else:
+                assert options, (habitaciones, guests)
+                assert option_key(options[0]) == pytest.approx(best), (habitaciones, guests)
+
+    def test_options_are_sorted_and_valid(self):
+        rng = random.Random(7)
+        for trial in range(100):
+            habitaciones = random_rooms(rng, trial)
+            guests = rng.randint(1, 15)
+            options = allocate_rooms(habitaciones, guests, nights=NIGHTS, top_k=5, time_budget_ms=1000)
+            keys = [option_key(option) for option in options]
+            assert keys == sorted(keys)
+            for option in options:
+                assert len(set(option["ids"])) == option["numero_habitaciones"]
+                assert option["capacidad_total"] >= guests
+                assert sum(option["distribucion"]) == guests
+
+    def test_no_options_without_capacity(self):
+        habitaciones = [{"id": "a", "nombre": "Doble", "capacidad": 2, "precioBase": 30000}]
+        assert allocate_rooms(habitaciones, 5) == []
+        assert allocate_rooms([], 2) == []
+        assert allocate_rooms(habitaciones, 0) == []
+
+    def test_price_is_per_stay(self):
+        habitaciones = [
+            {"id": "a", "nombre": "Suite", "capacidad": 4, "precioBase": "50000"},
+            {"id": "b", "nombre": "Doble", "capacidad": 2, "precioBase": 30000},
+            {"id": "c", "nombre": "Triple", "capacidad": 3},
+        ]
+        best = allocate_rooms(habitaciones, 6, nights=3)[0]
+        assert sorted(best["ids"]) == ["a", "b"]
+        assert best["precio_total"] == 240000
+        assert best["distribucion"] == [4, 2]
+
+
+def test_distribute_guests_is_even():
+    assert distribute_guests(5, [4, 2]) == [3, 2]
+    assert distribute_guests(4, [2, 2]) == [2, 2]
+    assert distribute_guests(10, [2, 2]) == [2, 2]
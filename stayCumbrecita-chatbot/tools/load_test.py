@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Prueba de carga del endpoint de chat.
+
+Pensado para correr contra el chatbot configurado con el stub local de
+OpenAI (tools/openai_stub.py) y obtener resultados reproducibles sin red.
+
+Uso:
+    python tools/load_test.py --url http://localhost:8000 --hospedaje-id <id> -n 500 -c 20
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import Dict, List
+
+import httpx
+
+DEFAULT_MESSAGES = [
+    "hola, ¿tienen disponibilidad del 10 al 12 de diciembre?",
+    "¿cuánto sale la noche para 2 personas?",
+    "¿qué servicios tiene el hospedaje?",
+    "¿tienen wifi en las habitaciones?",
+    "¿cuál es el horario de check-in?",
+    "somos 5 personas, ¿tienen lugar este finde?",
+    "¿aceptan tarjeta de crédito?",
+    "quiero reservar la suite",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run(args: argparse.Namespace) -> Dict[str, float]:
+    rng = random.Random(args.seed)
+    messages = DEFAULT_MESSAGES
+    if args.messages:
+        with open(args.messages, "r", encoding="utf-8") as f:
+            messages = [line.strip() for line in f if line.strip()]
+
+    latencies: List[float] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+        async def worker(worker_id: int):
+            nonlocal errors
+            while True:
+                try:
+                    i = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                payload = {
+                    "message": rng.choice(messages),
+                    "user_id": f"guest_load_{worker_id}",
+                    "token": f"load-{worker_id}-{i // 5}",
+                    "saveToHistory": False,
+                }
+                started = time.perf_counter()
+                try:
+                    response = await client.post(f"/chat/{args.hospedaje_id}", json=payload)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        started_at = time.perf_counter()
+        await asyncio.gather(*(worker(w) for w in range(args.concurrency)))
+        elapsed = time.perf_counter() - started_at
+
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_second": round(args.requests / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+    }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Prueba de carga del endpoint de chat")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--hospedaje-id", required=True)
+    parser.add_argument("-n", "--requests", type=int, default=200)
+    parser.add_argument("-c", "--concurrency", type=int, default=10)
+    parser.add_argument("--messages", help="Archivo con un mensaje por línea")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    result = asyncio.run(run(parse_args()))
+    print(json.dumps(result, indent=2))
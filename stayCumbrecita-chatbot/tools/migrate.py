@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Migraciones de esquema de sql/migrations (ver app/core/migrations.py).
+
+    (sin flags)   aplica las migraciones pendientes
+    --status      solo muestra la versión actual y las pendientes
+    --target N    aplica hasta la versión N inclusive
+
+Sirve para migrar en un paso de release y arrancar los workers con
+MIGRATIONS_ON_STARTUP=false; si dos procesos migran a la vez, el advisory lock
+hace que el segundo espere y no repita nada.
+
+Uso:
+    python tools/migrate.py --status
+    python tools/migrate.py
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.migrations import migrate  # noqa: E402
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    return migrate(database_url=args.database_url, target=args.target, dry_run=args.status)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Aplicar las migraciones de sql/migrations")
+    parser.add_argument("--status", action="store_true", help="Solo mostrar el estado, sin aplicar nada")
+    parser.add_argument("--target", type=int, help="Aplicar hasta esta versión inclusive")
+    parser.add_argument("--database-url", help="Por defecto la de la configuración (DB_HOST, DB_PORT, ...)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    result = run(parse_args())
+    print(json.dumps(result, indent=2, ensure_ascii=False))
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Migración del almacenamiento de embeddings de chatbot_knowledge.
+
+El formato destino se lee de la configuración (EMBEDDING_STORAGE y
+EMBEDDING_DIMENSIONS, ver app/services/vector_storage.py):
+
+    --measure   estima recall@k y tamaño del formato destino sobre una muestra
+                de los embeddings guardados, sin modificar nada (por defecto)
+    --apply     mide, convierte la columna y reconstruye el índice ivfflat con
+                el operator class de producto interno
+    --reembed   con --apply, vuelve a pedir los embeddings a la API en una
+                columna nueva (reanudable) en lugar de convertir los guardados;
+                necesario para pasar a más dimensiones
+
+Recortar un embedding de text-embedding-3 a sus primeras D componentes y
+normalizarlo equivale a pedirlo con dimensions=D, por eso reducir dimensiones
+o pasar a halfvec no requiere volver a vectorizar. Conviene detener los
+re-entrenamientos mientras corre y reiniciar el chatbot con la misma
+configuración al terminar.
+
+Uso:
+    EMBEDDING_STORAGE=halfvec python tools/migrate_embeddings.py --measure -k 10
+    EMBEDDING_STORAGE=reduced EMBEDDING_DIMENSIONS=512 python tools/migrate_embeddings.py --apply
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from typing import Any, Dict
+
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.config import settings  # noqa: E402
+from app.services.vector_storage import INDEX_NAME, VectorStorage  # noqa: E402
+
+MIGRATION_COLUMN = "embedding_migrated"
+
+
+def column_type(cursor) -> str:
+    cursor.execute(
+        """
+        SELECT format_type(atttypid, atttypmod)
+        FROM pg_attribute
+        WHERE attrelid = 'chatbot_knowledge'::regclass AND attname = 'embedding'
+        """
+    )
+    return cursor.fetchone()[0]
+
+
+def type_dimensions(type_name: str) -> int:
+    match = re.search(r"\((\d+)\)", type_name)
+    return int(match.group(1)) if match else 0
+
+
+def storage_sizes(cursor) -> Dict[str, Any]:
+    cursor.execute(
+        """
+        SELECT COUNT(*),
+               COALESCE(AVG(pg_column_size(embedding)), 0),
+               pg_total_relation_size('chatbot_knowledge'),
+               COALESCE(pg_relation_size(to_regclass(%s)), 0)
+        FROM chatbot_knowledge
+        """,
+        [INDEX_NAME]
+    )
+    rows, vector_bytes, table_bytes, index_bytes = cursor.fetchone()
+    return {
+        "rows": rows,
+        "bytes_per_vector": round(float(vector_bytes)),
+        "table_mb": round(table_bytes / 1024 / 1024, 2),
+        "index_mb": round(index_bytes / 1024 / 1024, 2),
+    }
+
+
+def to_target(matrix: np.ndarray, storage: VectorStorage) -> np.ndarray:
+    """Simula el formato destino: recorte de dimensiones, normalización y float16"""
+    target = matrix[:, :storage.dimensions]
+    norms = np.linalg.norm(target, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    target = target / norms
+    if storage.vector_type == "halfvec":
+        target = target.astype(np.float16).astype(np.float32)
+    return target
+
+
+def recall_at_k(reference: np.ndarray, candidate: np.ndarray, queries: int, k: int) -> float:
+    """Fracción del top-k exacto (float32, todas las dimensiones) que conserva el formato destino.
+
+    Los propios chunks de la muestra se usan como consultas (excluyéndose a sí mismos).
+    """
+    hits = 0
+    queries = min(queries, len(reference))
+    k = min(k, len(reference) - 1)
+    if queries == 0 or k <= 0:
+        return 1.0
+    for i in range(queries):
+        exact = reference @ reference[i]
+        approx = candidate @ candidate[i]
+        exact[i] = approx[i] = -np.inf
+        expected = set(np.argpartition(-exact, k)[:k].tolist())
+        found = set(np.argpartition(-approx, k)[:k].tolist())
+        hits += len(expected & found)
+    return hits / (queries * k)
+
+
+def measure(cursor, storage: VectorStorage, args: argparse.Namespace) -> Dict[str, Any]:
+    current = column_type(cursor)
+    sizes = storage_sizes(cursor)
+    result: Dict[str, Any] = {
+        "current": {"type": current, **sizes},
+        "target": {
+            "type": storage.cast,
+            "bytes_per_vector": storage.bytes_per_vector,
+            "estimated_vectors_mb": round(sizes["rows"] * storage.bytes_per_vector / 1024 / 1024, 2),
+        },
+    }
+    if sizes["bytes_per_vector"]:
+        result["target"]["reduction"] = round(sizes["bytes_per_vector"] / storage.bytes_per_vector, 2)
+
+    if storage.dimensions > type_dimensions(current):
+        result["recall"] = "no se puede estimar: el destino tiene más dimensiones que lo guardado"
+        return result
+
+    # Solo chunks con embedding real (los que fallaron se guardan como vector nulo)
+    cursor.execute(
+        """
+        SELECT embedding::text FROM chatbot_knowledge
+        WHERE content_hash IS NOT NULL
+        ORDER BY random() LIMIT %s
+        """,
+        [args.sample]
+    )
+    vectors = [json.loads(row[0]) for row in cursor.fetchall()]
+    if len(vectors) < 2:
+        result["recall"] = "muestra insuficiente"
+        return result
+
+    reference = np.array(vectors, dtype=np.float32)
+    norms = np.linalg.norm(reference, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    reference = reference / norms
+    candidate = to_target(reference, storage)
+
+    started = time.perf_counter()
+    result["recall"] = {
+        "sample": len(vectors),
+        "queries": min(args.queries, len(vectors)),
+        f"recall@{args.k}": round(recall_at_k(reference, candidate, args.queries, args.k), 4),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+    return result
+
+
+def index_lists(rows: int, requested: int) -> int:
+    # Recomendación de pgvector: filas / 1000 listas (mínimo 1)
+    return requested or max(1, min(1000, rows // 1000))
+
+
+def rebuild_index(cursor, storage: VectorStorage, lists: int) -> None:
+    cursor.execute(
+        f"CREATE INDEX {INDEX_NAME} ON chatbot_knowledge "
+        f"USING ivfflat (embedding {storage.opclass}) WITH (lists = {lists})"
+    )
+
+
+def convert_in_place(conn, storage: VectorStorage, lists: int) -> None:
+    """Convierte la columna con un único ALTER (recorte + normalización + tipo destino)"""
+    with conn.cursor() as cursor:
+        current = column_type(cursor)
+        current_dims = type_dimensions(current)
+        if storage.dimensions > current_dims:
+            raise SystemExit(f"❌ {current} tiene menos dimensiones que {storage.cast}: usar --reembed")
+
+        expression = "embedding::vector"
+        if storage.dimensions < current_dims:
+            expression = f"subvector(embedding::vector, 1, {storage.dimensions})"
+
+        print(f"🔧 Convirtiendo {current} -> {storage.cast} ...")
+        cursor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+        cursor.execute(
+            f"ALTER TABLE chatbot_knowledge ALTER COLUMN embedding "
+            f"TYPE {storage.cast} USING l2_normalize({expression})::{storage.cast}"
+        )
+        rebuild_index(cursor, storage, lists)
+    conn.commit()
+
+
+async def reembed(conn, storage: VectorStorage, lists: int, batch_size: int) -> None:
+    """Vuelve a vectorizar todos los chunks en una columna nueva y la intercambia al final"""
+    # Import diferido: el servicio levanta el cliente de OpenAI y el procesador de PDFs
+    from app.services.knowledge_service import KnowledgeService
+
+    service = KnowledgeService()
+    with conn.cursor() as cursor:
+        cursor.execute(f"ALTER TABLE chatbot_knowledge ADD COLUMN IF NOT EXISTS {MIGRATION_COLUMN} {storage.cast}")
+    conn.commit()
+
+    done = failed = 0
+    while True:
+        with conn.cursor() as cursor:
+            # Reanudable: solo los chunks que todavía no tienen el embedding nuevo
+            cursor.execute(
+                f"SELECT id, content FROM chatbot_knowledge WHERE {MIGRATION_COLUMN} IS NULL ORDER BY id LIMIT %s",
+                [batch_size]
+            )
+            rows = cursor.fetchall()
+        if not rows:
+            break
+
+        embeddings = await service.generate_embeddings([content for _, content in rows])
+        values = []
+        for (chunk_id, _), embedding in zip(rows, embeddings):
+            if not embedding:
+                failed += 1
+            # Los que fallan quedan como vector nulo y sin hash, para que el próximo retrain los reintente
+            values.append((str(chunk_id), embedding or [0.0] * storage.dimensions, bool(embedding)))
+
+        with conn.cursor() as cursor:
+            execute_values(
+                cursor,
+                f"""
+                UPDATE chatbot_knowledge AS c
+                SET {MIGRATION_COLUMN} = v.embedding,
+                    content_hash = CASE WHEN v.ok THEN c.content_hash ELSE NULL END
+                FROM (VALUES %s) AS v(id, embedding, ok)
+                WHERE c.id = v.id
+                """,
+                values,
+                template=f"(%s::uuid, %s::{storage.cast}, %s)"
+            )
+        conn.commit()
+        done += len(rows)
+        print(f"🧮 {done} chunks re-vectorizados ({failed} con error)")
+
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP INDEX IF EXISTS {INDEX_NAME}")
+        cursor.execute("ALTER TABLE chatbot_knowledge DROP COLUMN embedding")
+        cursor.execute(f"ALTER TABLE chatbot_knowledge RENAME COLUMN {MIGRATION_COLUMN} TO embedding")
+        cursor.execute("ALTER TABLE chatbot_knowledge ALTER COLUMN embedding SET NOT NULL")
+        rebuild_index(cursor, storage, lists)
+    conn.commit()
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    storage = VectorStorage()
+    conn = psycopg2.connect(settings.database_url)
+    try:
+        with conn.cursor() as cursor:
+            report = measure(cursor, storage, args)
+        conn.rollback()
+        if not args.apply:
+            return report
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+        lists = index_lists(report["current"]["rows"], args.lists)
+        started = time.perf_counter()
+        if args.reembed:
+            asyncio.run(reembed(conn, storage, lists, args.batch_size))
+        else:
+            convert_in_place(conn, storage, lists)
+
+        with conn.cursor() as cursor:
+            report["migrated"] = {
+                "type": column_type(cursor),
+                "index_lists": lists,
+                "seconds": round(time.perf_counter() - started, 1),
+                **storage_sizes(cursor),
+            }
+        print(f"✅ Migración completa; reiniciar el chatbot con EMBEDDING_STORAGE={storage.mode} "
+              f"EMBEDDING_DIMENSIONS={storage.dimensions}")
+        return report
+    finally:
+        conn.close()
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Migración del almacenamiento de embeddings")
+    parser.add_argument("--measure", action="store_true", help="Solo medir (por defecto)")
+    parser.add_argument("--apply", action="store_true", help="Convertir la columna y reconstruir el índice")
+    parser.add_argument("--reembed", action="store_true", help="Re-vectorizar con la API en lugar de convertir")
+    parser.add_argument("--sample", type=int, default=5000, help="Embeddings a muestrear para el recall")
+    parser.add_argument("--queries", type=int, default=200, help="Consultas (chunks de la muestra) a evaluar")
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--lists", type=int, default=0, help="Listas del índice ivfflat (0 = filas / 1000)")
+    parser.add_argument("--batch-size", type=int, default=500, help="Chunks por tanda al re-vectorizar")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    result = run(parse_args())
+    print(json.dumps(result, indent=2, ensure_ascii=False, default=str))
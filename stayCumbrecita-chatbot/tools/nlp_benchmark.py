@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+Benchmark de exactitud y velocidad del front-end de NLP del chatbot.
+
+Corre DateExtractor.get_query_params y QueryClassifier.classify_query (en ese
+orden y con el mismo contexto que arma el ChatService) sobre un corpus
+etiquetado y reporta:
+
+    - clasificador: exactitud, precisión/recall por categoría y confusiones
+      más frecuentes
+    - extractor: exactitud por campo (check_in, check_out, single_date,
+      guests) y de la extracción completa
+    - ambos: mensajes/segundo y latencia p50/p99 por llamada
+
+El corpus por defecto se genera con tools/nlp_corpus.py (reproducible para una
+misma semilla y fecha de referencia); con --corpus se usa un JSONL propio con
+los mismos campos (los que falten no se evalúan). La salida es JSON para poder
+comparar corridas; con --baseline se agregan las diferencias contra una
+corrida anterior.
+
+Las métricas principales son las de la partición "dev" del corpus (con la que
+se desarrollaron las reglas); las de "holdout" (redacciones que no se usaron
+para ajustarlas) van aparte, en "holdout". El extractor usa --today como fecha
+actual, la misma con la que se calculan las fechas esperadas.
+
+Uso:
+    python tools/nlp_benchmark.py --size 3000 --output bench.json
+    python tools/nlp_benchmark.py --baseline bench.json
+    python tools/nlp_benchmark.py --write-corpus corpus.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from nlp_corpus import generate  # noqa: E402
+
+DATE_FIELDS = ("check_in", "check_out", "single_date")
+FIELDS = DATE_FIELDS + ("guests",)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def throughput(latencies: List[float]) -> Dict[str, float]:
+    total = sum(latencies)
+    return {
+        "calls": len(latencies),
+        "messages_per_second": round(len(latencies) / total, 1) if total else 0.0,
+        "p50_us": round(percentile(latencies, 0.50) * 1e6, 1),
+        "p99_us": round(percentile(latencies, 0.99) * 1e6, 1),
+        "mean_us": round(total / len(latencies) * 1e6, 1) if latencies else 0.0,
+    }
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+async def measure(
+    examples: List[Dict[str, Any]],
+    repeat: int,
+    use_cache: bool,
+    today: Optional[date] = None
+) -> Tuple[list, list, list, list, Dict]:
+    from app.services.query_classifier import QueryClassifier
+    from app.utils.date_extractor import DateExtractor
+
+    # Misma fecha de referencia que el corpus (si no, --today solo mueve las fechas esperadas)
+    extractor = DateExtractor(today=(lambda: today) if today else None)
+    classifier = QueryClassifier()
+    if not use_cache:
+        classifier._cache_max_entries = 0
+
+    extract_latencies: List[float] = []
+    classify_latencies: List[float] = []
+    params_list: List[Dict[str, Any]] = []
+    intents: List[str] = []
+    for round_number in range(repeat):
+        for example in examples:
+            started = time.perf_counter()
+            params = extractor.get_query_params(example["message"])
+            extracted = time.perf_counter()
+            intent = await classifier.classify_query(example["message"], {"query_params": params})
+            classified = time.perf_counter()
+
+            extract_latencies.append(extracted - started)
+            classify_latencies.append(classified - extracted)
+            if round_number == 0:
+                params_list.append(params)
+                intents.append(intent)
+
+    return params_list, intents, extract_latencies, classify_latencies, classifier.metrics()
+
+
+def classifier_report(examples: List[Dict[str, Any]], intents: List[str]) -> Dict[str, Any]:
+    pairs = [(example["intent"], predicted) for example, predicted in zip(examples, intents) if example.get("intent")]
+    if not pairs:
+        return {"examples": 0}
+
+    per_category = {}
+    for label in sorted({expected for expected, _ in pairs} | {predicted for _, predicted in pairs}):
+        true_positive = sum(1 for expected, predicted in pairs if expected == label and predicted == label)
+        predicted_count = sum(1 for _, predicted in pairs if predicted == label)
+        support = sum(1 for expected, _ in pairs if expected == label)
+        per_category[label] = {
+            "precision": round(true_positive / predicted_count, 4) if predicted_count else 0.0,
+            "recall": round(true_positive / support, 4) if support else 0.0,
+            "support": support,
+        }
+
+    confusions = Counter(f"{expected} -> {predicted}" for expected, predicted in pairs if expected != predicted)
+    return {
+        "examples": len(pairs),
+        "accuracy": round(sum(1 for expected, predicted in pairs if expected == predicted) / len(pairs), 4),
+        "per_category": per_category,
+        "top_confusions": dict(confusions.most_common(10)),
+    }
+
+
+def extractor_report(examples: List[Dict[str, Any]], params_list: List[Dict[str, Any]]) -> Dict[str, Any]:
+    fields: Dict[str, Dict[str, Any]] = {}
+    for field in FIELDS:
+        labeled = [(example[field], params.get(field)) for example, params in zip(examples, params_list) if field in example]
+        if labeled:
+            correct = sum(1 for expected, extracted in labeled if expected == extracted)
+            fields[field] = {"accuracy": round(correct / len(labeled), 4), "support": len(labeled)}
+
+    # Extracción completa: todas las fechas y los huéspedes correctos a la vez
+    complete = [
+        all(example[field] == params.get(field) for field in FIELDS)
+        for example, params in zip(examples, params_list)
+        if all(field in example for field in FIELDS)
+    ]
+    with_dates = [
+        (example, params) for example, params in zip(examples, params_list)
+        if any(example.get(field) for field in DATE_FIELDS)
+    ]
+    without_dates = [
+        params for example, params in zip(examples, params_list)
+        if all(field in example and example[field] is None for field in DATE_FIELDS)
+    ]
+    return {
+        "fields": fields,
+        "exact_match": round(sum(complete) / len(complete), 4) if complete else None,
+        "dates_recall": round(
+            sum(1 for example, params in with_dates if all(example[f] == params.get(f) for f in DATE_FIELDS)) / len(with_dates), 4
+        ) if with_dates else None,
+        "dates_false_positive_rate": round(
+            sum(1 for params in without_dates if params.get("has_dates")) / len(without_dates), 4
+        ) if without_dates else None,
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any]) -> Dict[str, Any]:
+    """Diferencias (actual - base) de las métricas escalares principales"""
+    paths = [
+        ("classifier", "accuracy"),
+        ("classifier", "throughput", "messages_per_second"),
+        ("classifier", "throughput", "p50_us"),
+        ("classifier", "throughput", "p99_us"),
+        ("date_extractor", "exact_match"),
+        ("holdout", "classifier", "accuracy"),
+        ("holdout", "date_extractor", "exact_match"),
+        ("date_extractor", "throughput", "messages_per_second"),
+        ("date_extractor", "throughput", "p50_us"),
+        ("date_extractor", "throughput", "p99_us"),
+    ]
+    delta = {}
+    for path in paths:
+        current, previous = report, baseline
+        for key in path:
+            current = current.get(key) if isinstance(current, dict) else None
+            previous = previous.get(key) if isinstance(previous, dict) else None
+        if isinstance(current, (int, float)) and isinstance(previous, (int, float)):
+            delta[".".join(path)] = round(current - previous, 4)
+    return delta
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    today = date.fromisoformat(args.today) if args.today else date.today()
+    if args.corpus:
+        examples = load_corpus(args.corpus)
+        source = args.corpus
+    else:
+        holdout_size = args.size // 3 if args.holdout_size is None else args.holdout_size
+        examples = generate(args.size, args.seed, today) + generate(holdout_size, args.seed + 1, today, split="holdout")
+        source = (
+            f"nlp_corpus(size={args.size}, holdout={holdout_size}, seed={args.seed}, today={today.isoformat()})"
+        )
+
+    if args.write_corpus:
+        with open(args.write_corpus, "w", encoding="utf-8") as f:
+            for example in examples:
+                f.write(json.dumps(example, ensure_ascii=False) + "\n")
+        return {"corpus": {"examples": len(examples), "source": source, "written": args.write_corpus}}
+
+    params_list, intents, extract_latencies, classify_latencies, classifier_metrics = asyncio.run(
+        measure(examples, args.repeat, not args.no_cache, today)
+    )
+
+    # Métricas de exactitud por partición (los ejemplos sin "split" cuentan como dev)
+    dev = [i for i, example in enumerate(examples) if example.get("split", "dev") != "holdout"]
+    holdout = [i for i, example in enumerate(examples) if example.get("split") == "holdout"]
+
+    def subset(indices: List[int], values: List[Any]) -> List[Any]:
+        return [values[i] for i in indices]
+
+    report: Dict[str, Any] = {
+        "corpus": {
+            "examples": len(examples), "dev": len(dev), "holdout": len(holdout),
+            "source": source, "today": today.isoformat(), "repeat": args.repeat,
+        },
+        "classifier": {
+            **classifier_report(subset(dev, examples), subset(dev, intents)),
+            "backend": classifier_metrics["backend"],
+            "cache": classifier_metrics["cache"],
+            "throughput": throughput(classify_latencies),
+        },
+        "date_extractor": {
+            **extractor_report(subset(dev, examples), subset(dev, params_list)),
+            "throughput": throughput(extract_latencies),
+        },
+    }
+    if holdout:
+        report["holdout"] = {
+            "classifier": classifier_report(subset(holdout, examples), subset(holdout, intents)),
+            "date_extractor": extractor_report(subset(holdout, examples), subset(holdout, params_list)),
+        }
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            report["delta"] = compare(report, json.load(f))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark del clasificador y el extractor de fechas")
+    parser.add_argument("--corpus", help="JSONL etiquetado (por defecto se genera con nlp_corpus)")
+    parser.add_argument("--size", type=int, default=3000, help="Ejemplos del corpus generado")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--holdout-size", type=int, help="Ejemplos de la partición holdout (por defecto size/3; 0 = sin holdout)")
+    parser.add_argument("--today", help="Fecha de referencia del corpus y del extractor (YYYY-MM-DD)")
+    parser.add_argument("--repeat", type=int, default=1, help="Pasadas sobre el corpus para medir latencias")
+    parser.add_argument("--no-cache", action="store_true", help="Desactivar el cache de clasificaciones")
+    parser.add_argument("--output", help="Guardar el reporte JSON")
+    parser.add_argument("--baseline", help="Reporte JSON anterior contra el cual comparar")
+    parser.add_argument("--write-corpus", help="Solo escribir el corpus en JSONL y salir")
+    parser.add_argument("--log-level", default="WARNING", help="Nivel de logging durante la medición")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    logging.basicConfig(level=arguments.log_level)
+    logging.getLogger().setLevel(arguments.log_level)
+    result = run(arguments)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
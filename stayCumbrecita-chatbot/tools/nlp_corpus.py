@@ -0,0 +1,338 @@
+"""
+Corpus etiquetado de consultas para medir el clasificador y el extractor de fechas.
+
+Las consultas se arman combinando plantillas por categoría con expresiones de
+fechas y de cantidad de huéspedes, cada una con su valor esperado. Las fechas
+esperadas se calculan respecto de `today` con las convenciones del chatbot:
+un mes sin año es del año en curso, un rango sin mes es del mes en curso y
+"este fin de semana" va del próximo viernes (hoy, si es viernes) al domingo.
+
+Cada ejemplo:
+    {"message", "intent", "check_in", "check_out", "single_date", "guests", "split"}
+
+Hay dos particiones: "dev" (las plantillas con las que se desarrolló el
+extractor) y "holdout" (redacciones y expresiones de fechas distintas, entre
+ellas rangos que cruzan de mes, que no se usan para ajustar las reglas). La
+exactitud en dev mide regresiones; la de holdout, cuánto generaliza.
+
+El corpus describe lo que debería extraerse, no lo que se extrae: una
+expresión nueva se agrega acá antes de soportarla en el extractor.
+"""
+
+import random
+import unicodedata
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MONTHS = [
+    "enero", "febrero", "marzo", "abril", "mayo", "junio",
+    "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre"
+]
+MONTH_ABBREVIATIONS = ["ene", "feb", "mar", "abr", "may", "jun", "jul", "ago", "sep", "oct", "nov", "dic"]
+NUMBER_WORDS = {2: "dos", 3: "tres", 4: "cuatro", 5: "cinco", 6: "seis"}
+
+ROOMS = ["la suite", "la habitación doble", "la cabaña", "el departamento", "la suite Taina", "la habitación triple"]
+AMENITIES = ["wifi", "jacuzzi", "aire acondicionado", "estacionamiento", "desayuno", "cocina", "balcón", "tv"]
+CITIES = ["Córdoba", "Villa General Belgrano", "Buenos Aires", "Alta Gracia"]
+GREETINGS = ["", "", "", "hola, ", "buenas, ", "buen día, ", "hola! "]
+
+# Plantillas por categoría: {fechas} y {huespedes} se reemplazan por expresiones etiquetadas
+TEMPLATES: Dict[str, List[str]] = {
+    "precios": [
+        "¿cuánto cuesta {room}{fechas}?",
+        "¿qué precio tiene {room}{huespedes}?",
+        "precio por noche{fechas}",
+        "¿cuánto sale la noche{huespedes}?",
+        "¿me pasás las tarifas{fechas}?",
+        "¿cuál sería el costo{fechas}{huespedes}?",
+        "¿cuánto cobran por noche{huespedes}?",
+        "¿tienen algún descuento{fechas}?",
+    ],
+    "disponibilidad": [
+        "¿tienen disponibilidad{fechas}{huespedes}?",
+        "¿hay lugar{fechas}?",
+        "¿queda algo libre{fechas}{huespedes}?",
+        "¿tenés algo{fechas}{huespedes}?",
+        "¿está disponible {room}{fechas}?",
+    ],
+    "proceso_reserva": [
+        "quiero reservar {room}{fechas}",
+        "¿cómo hago para reservar{fechas}?",
+        "¿cómo puedo hacer una reserva{huespedes}?",
+        "me gustaría confirmar la reserva{fechas}",
+        "¿cuáles son los pasos para reservar?",
+    ],
+    "reserva_multiple": [
+        "quiero reservar las dos habitaciones{fechas}",
+        "¿puedo reservar ambas{fechas}?",
+        "me quedo con ambas habitaciones",
+    ],
+    "metodos_pago": [
+        "¿qué medios de pago aceptan?",
+        "¿cómo puedo pagar la estadía?",
+        "¿cuáles son las formas de pago?",
+        "¿aceptan tarjeta de crédito?",
+        "¿se puede pagar con transferencia?",
+    ],
+    "hospedaje_servicios": [
+        "¿qué servicios tiene el hospedaje?",
+        "¿con qué servicios cuenta el hotel?",
+        "¿qué comodidades tiene el lugar?",
+        "¿qué incluye la estadía?",
+    ],
+    "habitacion_servicios": [
+        "¿qué comodidades tiene {room}?",
+        "¿con qué cuenta {room}?",
+        "¿qué incluye la habitación?",
+    ],
+    "servicio_especifico": [
+        "¿{room} tiene {amenity}?",
+        "¿hay {amenity}?",
+        "¿el hospedaje tiene {amenity}?",
+    ],
+    "ubicacion": [
+        "¿dónde están ubicados?",
+        "¿cómo llego desde {city}?",
+        "¿a qué distancia están del centro?",
+        "¿cuál es la dirección?",
+    ],
+    "checkin": [
+        "¿a qué hora es el check-in?",
+        "¿cuál es el horario de check out?",
+        "¿hasta qué hora puedo llegar?",
+    ],
+    "politicas": [
+        "¿aceptan mascotas?",
+        "¿cuál es la política de cancelación?",
+        "¿se puede fumar en {room}?",
+        "¿pueden ir niños?",
+    ],
+    "contacto": [
+        "¿tienen un teléfono de contacto?",
+        "¿me pasás el whatsapp?",
+        "¿cómo me comunico con el dueño?",
+        "quiero hablar con el administrador",
+    ],
+    "general": [
+        "hola",
+        "buenas tardes",
+        "gracias!",
+        "perfecto, muchas gracias",
+        "ok",
+        "chau, hasta luego",
+    ],
+}
+
+# Redacciones de la partición holdout: no se usan para ajustar las reglas
+HOLDOUT_TEMPLATES: Dict[str, List[str]] = {
+    "precios": [
+        "¿qué valor tiene {room}{fechas}?",
+        "¿cuál es la tarifa{huespedes}{fechas}?",
+        "¿a cuánto está la noche{fechas}?",
+        "necesito saber el precio{fechas}{huespedes}",
+        "¿cuánto me saldría{fechas}{huespedes}?",
+    ],
+    "disponibilidad": [
+        "¿tienen lugar{fechas}{huespedes}?",
+        "¿está libre {room}{fechas}?",
+        "¿hay habitaciones disponibles{fechas}?",
+        "quería saber si hay disponibilidad{fechas}{huespedes}",
+    ],
+    "proceso_reserva": [
+        "quisiera reservar{fechas}{huespedes}",
+        "¿cómo reservo {room}{fechas}?",
+        "quiero hacer la reserva{fechas}",
+        "¿qué necesito para reservar?",
+    ],
+    "reserva_multiple": [
+        "quiero las dos habitaciones{fechas}",
+        "¿puedo reservar las dos{fechas}?",
+    ],
+    "metodos_pago": [
+        "¿aceptan mercado pago?",
+        "¿puedo pagar en efectivo?",
+        "¿qué formas de pago tienen?",
+    ],
+    "hospedaje_servicios": [
+        "¿qué servicios ofrecen?",
+        "¿qué tiene el complejo?",
+    ],
+    "habitacion_servicios": [
+        "¿qué trae {room}?",
+        "¿qué comodidades incluye {room}?",
+    ],
+    "servicio_especifico": [
+        "¿tienen {amenity}?",
+        "¿cuentan con {amenity}?",
+    ],
+    "ubicacion": [
+        "¿cómo se llega desde {city}?",
+        "¿dónde queda el hospedaje?",
+    ],
+    "checkin": [
+        "¿a partir de qué hora puedo entrar?",
+        "¿a qué hora hay que dejar la habitación?",
+    ],
+    "politicas": [
+        "¿se admiten mascotas?",
+        "¿qué pasa si cancelo?",
+    ],
+    "contacto": [
+        "¿tienen un número de teléfono?",
+        "¿cómo los contacto?",
+    ],
+    "general": [
+        "buen día",
+        "muchas gracias",
+        "dale, gracias",
+        "genial",
+    ],
+}
+
+# Peso relativo de cada categoría (las consultas de fechas y precios son las más frecuentes)
+CATEGORY_WEIGHTS = {
+    "precios": 4, "disponibilidad": 5, "proceso_reserva": 3, "reserva_multiple": 1,
+    "metodos_pago": 1, "hospedaje_servicios": 1, "habitacion_servicios": 1, "servicio_especifico": 2,
+    "ubicacion": 1, "checkin": 1, "politicas": 1, "contacto": 1, "general": 2,
+}
+
+DatePhrase = Tuple[str, Dict[str, Optional[str]]]
+
+
+def strip_accents(text: str) -> str:
+    return "".join(c for c in unicodedata.normalize("NFD", text) if unicodedata.category(c) != "Mn")
+
+
+def next_weekend(today: date) -> Tuple[date, date]:
+    friday = today + timedelta(days=(4 - today.weekday()) % 7)
+    return friday, friday + timedelta(days=2)
+
+
+def _range(start: date, end: date) -> Dict[str, Optional[str]]:
+    return {"check_in": start.isoformat(), "check_out": end.isoformat(), "single_date": None}
+
+
+def _single(day: date) -> Dict[str, Optional[str]]:
+    return {"check_in": None, "check_out": None, "single_date": day.isoformat()}
+
+
+def date_phrase(rng: random.Random, today: date) -> DatePhrase:
+    """Expresión de fechas y su valor esperado (a veces vacía: consulta sin fechas)"""
+    month = rng.randint(1, 12)
+    start_day = rng.randint(1, 24)
+    end_day = start_day + rng.randint(1, 4)
+    start, end = date(today.year, month, start_day), date(today.year, month, end_day)
+    this_month_start = date(today.year, today.month, start_day)
+    this_month_end = date(today.year, today.month, end_day)
+    month_name = MONTHS[month - 1]
+
+    builders: List[Callable[[], DatePhrase]] = [
+        lambda: ("", {"check_in": None, "check_out": None, "single_date": None}),
+        lambda: ("", {"check_in": None, "check_out": None, "single_date": None}),
+        lambda: (f" del {start_day} al {end_day} de {month_name}", _range(start, end)),
+        lambda: (f" del {start_day} al {end_day} de {MONTH_ABBREVIATIONS[month - 1]}", _range(start, end)),
+        lambda: (f" del {start_day}/{month}/{today.year} al {end_day}/{month}/{today.year}", _range(start, end)),
+        lambda: (f" desde el {start_day} hasta el {end_day} de {month_name}", _range(start, end)),
+        lambda: (f" entre el {start_day} y el {end_day} de {month_name}", _range(start, end)),
+        lambda: (f" para el {start_day} de {month_name}", _single(start)),
+        lambda: (f" del {start_day} al {end_day}", _range(this_month_start, this_month_end)),
+        lambda: (" este fin de semana", _range(*next_weekend(today))),
+        lambda: (" este finde", _range(*next_weekend(today))),
+    ]
+    return rng.choice(builders)()
+
+
+def holdout_date_phrase(rng: random.Random, today: date) -> DatePhrase:
+    """Expresiones de fechas de la partición holdout (incluye rangos que cruzan de mes)"""
+    month = rng.randint(2, 11)
+    start_day = rng.randint(25, 28)
+    end_day = rng.randint(1, 4)
+    # Rango que termina en `month` y empieza en el mes anterior, y uno que empieza en `month`
+    into_start, into_end = date(today.year, month - 1, start_day), date(today.year, month, end_day)
+    out_start, out_end = date(today.year, month, start_day), date(today.year, month + 1, end_day)
+    day = rng.randint(1, 20)
+    span = rng.randint(1, 5)
+    inside_start, inside_end = date(today.year, month, day), date(today.year, month, day + span)
+    month_name, next_month_name = MONTHS[month - 1], MONTHS[month]
+    previous_month_name = MONTHS[month - 2]
+
+    builders: List[Callable[[], DatePhrase]] = [
+        lambda: ("", {"check_in": None, "check_out": None, "single_date": None}),
+        lambda: ("", {"check_in": None, "check_out": None, "single_date": None}),
+        lambda: (f" del {start_day} al {end_day} de {month_name}", _range(into_start, into_end)),
+        lambda: (f" desde el {start_day} hasta el {end_day} de {month_name}", _range(into_start, into_end)),
+        lambda: (f" del {start_day} de {month_name} al {end_day}", _range(out_start, out_end)),
+        lambda: (f" del {start_day} de {previous_month_name} al {end_day} de {month_name}", _range(into_start, into_end)),
+        lambda: (f" del {start_day} de {month_name} al {end_day} de {next_month_name}", _range(out_start, out_end)),
+        lambda: (f" del {day} de {month_name} al {day + span}", _range(inside_start, inside_end)),
+        lambda: (f" entre el {day} de {month_name} y el {day + span} de {month_name}", _range(inside_start, inside_end)),
+        lambda: (f" para el {day}/{month}", _single(inside_start)),
+    ]
+    return rng.choice(builders)()
+
+
+def holdout_guests_phrase(rng: random.Random) -> Tuple[str, Optional[int]]:
+    guests = rng.randint(2, 6)
+    options = [
+        ("", None),
+        ("", None),
+        (f" para {guests} adultos", guests),
+        (f", vamos {guests} personas", guests),
+        (f" para {NUMBER_WORDS[guests]} huéspedes", guests),
+    ]
+    return rng.choice(options)
+
+
+def guests_phrase(rng: random.Random) -> Tuple[str, Optional[int]]:
+    """Expresión de cantidad de huéspedes y su valor esperado (a veces vacía)"""
+    guests = rng.randint(2, 6)
+    options = [
+        ("", None),
+        ("", None),
+        ("", None),
+        (f" para {guests} personas", guests),
+        (f", somos {guests} personas", guests),
+        (f" para {guests} huéspedes", guests),
+        (f" para {NUMBER_WORDS[guests]} personas", guests),
+        (", somos una pareja", 2),
+    ]
+    return rng.choice(options)
+
+
+def make_example(rng: random.Random, category: str, today: date, split: str = "dev") -> Dict[str, Any]:
+    holdout = split == "holdout"
+    template = rng.choice((HOLDOUT_TEMPLATES if holdout else TEMPLATES)[category])
+    dates_builder = holdout_date_phrase if holdout else date_phrase
+    guests_builder = holdout_guests_phrase if holdout else guests_phrase
+    dates, expected_dates = dates_builder(rng, today) if "{fechas}" in template else ("", None)
+    guests, expected_guests = guests_builder(rng) if "{huespedes}" in template else ("", None)
+
+    message = template.format(
+        fechas=dates,
+        huespedes=guests,
+        room=rng.choice(ROOMS),
+        amenity=rng.choice(AMENITIES),
+        city=rng.choice(CITIES),
+    )
+    if category != "general":
+        message = rng.choice(GREETINGS) + message
+    # Variaciones de escritura habituales en el chat
+    if rng.random() < 0.3:
+        message = strip_accents(message)
+    if rng.random() < 0.2:
+        message = message.replace("¿", "").replace("?", "")
+    if rng.random() < 0.2:
+        message = message[0].upper() + message[1:]
+
+    example: Dict[str, Any] = {"message": message, "intent": category, "guests": expected_guests, "split": split}
+    example.update(expected_dates or {"check_in": None, "check_out": None, "single_date": None})
+    return example
+
+
+def generate(size: int = 3000, seed: int = 42, today: Optional[date] = None, split: str = "dev") -> List[Dict[str, Any]]:
+    """Corpus reproducible: misma semilla, fecha de referencia y partición, mismos ejemplos"""
+    rng = random.Random(seed)
+    today = today or date.today()
+    categories = list(CATEGORY_WEIGHTS)
+    weights = [CATEGORY_WEIGHTS[category] for category in categories]
+    return [make_example(rng, rng.choices(categories, weights)[0], today, split) for _ in range(size)]
@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Servidor local compatible con la API de OpenAI para pruebas de carga sin red.
+
+Implementa /v1/chat/completions (con y sin streaming), /v1/embeddings y
+/v1/models con latencias configurables y embeddings determinísticos.
+
+Uso:
+    python tools/openai_stub.py --port 8100 --latency lognormal:400:0.4 --tokens-per-second 60
+    OPENAI_BASE_URL=http://localhost:8100/v1 uvicorn app.main:app
+
+Distribuciones de latencia (milisegundos):
+    fixed:MS | uniform:MIN:MAX | normal:MEDIA:DESVIO | lognormal:MEDIANA:SIGMA | exp:MEDIA
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+WORD_PATTERN = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+# Frases usadas para armar respuestas simuladas (determinísticas por mensaje)
+STUB_VOCABULARY = (
+    "¡Hola! Gracias por tu consulta. Tenemos habitaciones disponibles con vista a las sierras, "
+    "desayuno incluido, Wi-Fi y estacionamiento. El check-in es a partir de las 14 hs y el "
+    "check-out hasta las 10 hs. ¿Querés que te comparta los precios o el enlace de reserva?"
+).split()
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Convierte 'tipo:param1:param2' en una función que devuelve segundos"""
+    parts = spec.split(":")
+    kind, params = parts[0], [float(p) for p in parts[1:]]
+
+    if kind == "fixed":
+        return lambda rng: params[0] / 1000
+    if kind == "uniform":
+        return lambda rng: rng.uniform(params[0], params[1]) / 1000
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(params[0], params[1])) / 1000
+    if kind == "lognormal":
+        return lambda rng: rng.lognormvariate(math.log(params[0]), params[1]) / 1000
+    if kind == "exp":
+        return lambda rng: rng.expovariate(1 / params[0]) / 1000
+    raise ValueError(f"Distribución de latencia desconocida: {spec}")
+
+
+def count_tokens(text: str) -> int:
+    return len(WORD_PATTERN.findall(text or ""))
+
+
+def deterministic_embedding(text: str, model: str, dimensions: int) -> List[float]:
+    """Vector unitario derivado de sha256(modelo + texto)"""
+    seed = int.from_bytes(hashlib.sha256(f"{model}\x00{text}".encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dimensions)]
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def deterministic_completion(messages: List[Dict[str, Any]], max_tokens: int, completion_tokens: int) -> List[str]:
+    """Lista de tokens de respuesta derivada del último mensaje"""
+    last = messages[-1].get("content", "") if messages else ""
+    seed = int.from_bytes(hashlib.sha256(str(last).encode("utf-8")).digest()[:8], "big")
+    rng = random.Random(seed)
+    size = max(1, min(max_tokens, completion_tokens))
+    start = rng.randrange(len(STUB_VOCABULARY))
+    return [STUB_VOCABULARY[(start + i) % len(STUB_VOCABULARY)] for i in range(size)]
+
+
+def create_app(args: argparse.Namespace) -> FastAPI:
+    app = FastAPI(title="OpenAI stub", version="1.0.0")
+    rng = random.Random(args.seed)
+    chat_latency = parse_latency(args.latency)
+    embedding_latency = parse_latency(args.embedding_latency)
+    stats = {"chat": 0, "stream": 0, "embeddings": 0, "embedded_inputs": 0, "errors": 0}
+
+    def maybe_fail() -> Optional[JSONResponse]:
+        if args.error_rate and rng.random() < args.error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit simulado", "type": "rate_limit_error", "code": "rate_limit_exceeded"}}
+            )
+        return None
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [
+            {"id": model, "object": "model", "created": 0, "owned_by": "stub"}
+            for model in ("gpt-3.5-turbo", "text-embedding-3-small", "text-embedding-3-large")
+        ]}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        failure = maybe_fail()
+        if failure:
+            return failure
+
+        messages = body.get("messages", [])
+        model = body.get("model", "gpt-3.5-turbo")
+        max_tokens = int(body.get("max_tokens") or args.completion_tokens)
+        tokens = deterministic_completion(messages, max_tokens, args.completion_tokens)
+        prompt_tokens = sum(count_tokens(str(m.get("content", ""))) for m in messages)
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        token_delay = 1 / args.tokens_per_second if args.tokens_per_second > 0 else 0.0
+
+        # Tiempo hasta el primer token
+        await asyncio.sleep(chat_latency(rng))
+
+        if body.get("stream"):
+            stats["stream"] += 1
+
+            async def event_stream():
+                def chunk(delta: Dict[str, Any], finish_reason: Optional[str] = None) -> str:
+                    payload = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                    }
+                    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+                yield chunk({"role": "assistant", "content": ""})
+                for i, token in enumerate(tokens):
+                    if token_delay:
+                        await asyncio.sleep(token_delay)
+                    yield chunk({"content": token if i == 0 else f" {token}"})
+                yield chunk({}, "stop")
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+        stats["chat"] += 1
+        await asyncio.sleep(token_delay * len(tokens))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": len(tokens),
+                "total_tokens": prompt_tokens + len(tokens),
+            },
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        failure = maybe_fail()
+        if failure:
+            return failure
+
+        inputs = body.get("input", [])
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        model = body.get("model", "text-embedding-3-small")
+        dimensions = int(body.get("dimensions") or args.dimensions)
+
+        stats["embeddings"] += 1
+        stats["embedded_inputs"] += len(inputs)
+        await asyncio.sleep(embedding_latency(rng) + args.embedding_ms_per_input * len(inputs) / 1000)
+
+        data = [
+            {"object": "embedding", "index": i, "embedding": deterministic_embedding(str(text), model, dimensions)}
+            for i, text in enumerate(inputs)
+        ]
+        prompt_tokens = sum(count_tokens(str(text)) for text in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": model,
+            "usage": {"prompt_tokens": prompt_tokens, "total_tokens": prompt_tokens},
+        }
+
+    return app
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Stub local de la API de OpenAI")
+    parser.add_argument("--host", default=os.getenv("STUB_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("STUB_PORT", "8100")))
+    parser.add_argument("--latency", default=os.getenv("STUB_LATENCY", "lognormal:400:0.4"),
+                        help="Latencia hasta el primer token de chat (ms)")
+    parser.add_argument("--embedding-latency", default=os.getenv("STUB_EMBEDDING_LATENCY", "normal:60:15"),
+                        help="Latencia base de /v1/embeddings (ms)")
+    parser.add_argument("--embedding-ms-per-input", type=float, default=float(os.getenv("STUB_EMBEDDING_MS_PER_INPUT", "2")))
+    parser.add_argument("--tokens-per-second", type=float, default=float(os.getenv("STUB_TOKENS_PER_SECOND", "60")),
+                        help="Velocidad de generación de tokens (0 = instantáneo)")
+    parser.add_argument("--completion-tokens", type=int, default=int(os.getenv("STUB_COMPLETION_TOKENS", "80")))
+    parser.add_argument("--dimensions", type=int, default=int(os.getenv("STUB_DIMENSIONS", "1536")))
+    parser.add_argument("--error-rate", type=float, default=float(os.getenv("STUB_ERROR_RATE", "0")),
+                        help="Proporción de requests que responden 429")
+    parser.add_argument("--seed", type=int, default=int(os.getenv("STUB_SEED", "42")))
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    arguments = parse_args()
+    print(f"🧪 Stub de OpenAI en http://{arguments.host}:{arguments.port}/v1 (latencia {arguments.latency})")
+    uvicorn.run(create_app(arguments), host=arguments.host, port=arguments.port, log_level="warning")
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Benchmark del endpoint de historial con los dos perfiles de servicio.
+
+Levanta el servidor con app/serve.py dos veces sobre una aplicación que
+incluye el router real de chat, con get_user_history devolviendo una página
+sintética (sin base de datos), y mide requests/seg y latencias:
+
+    before   SERVING_PROFILE=default, sin gzip (el comportamiento anterior)
+    after    SERVING_PROFILE=performance (uvloop, httptools, orjson) + gzip
+
+Uso:
+    python tools/serving_benchmark.py -n 2000 -c 32 --limit 50
+    python tools/serving_benchmark.py --scenarios after --workers 2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TOOLS = os.path.dirname(os.path.abspath(__file__))
+
+SCENARIOS: Dict[str, Dict[str, str]] = {
+    "before": {"SERVING_PROFILE": "default", "HISTORY_GZIP_MIN_SIZE": "0"},
+    "after": {"SERVING_PROFILE": "performance", "HISTORY_GZIP_MIN_SIZE": os.getenv("HISTORY_GZIP_MIN_SIZE", "1024")},
+}
+
+USER_MESSAGE = "hola, ¿tienen disponibilidad del 10 al 12 de diciembre para 4 personas?"
+BOT_RESPONSE = (
+    "¡Hola! Sí, para el 10 al 12 de diciembre tenemos disponibles la Suite Bosque y dos "
+    "habitaciones dobles. Para 4 personas la opción más económica son las dos dobles, "
+    "con un total de $84.000 por las 2 noches. ¿Querés que te ayude con la reserva?"
+)
+
+
+def create_app():
+    """Aplicación del benchmark: router real de chat con un historial sintético en memoria"""
+    sys.path.insert(0, ROOT)
+    from fastapi import FastAPI
+    from app.models.chat import ChatHistoryResponse, ChatMessage
+    from app.routers import chat
+
+    async def fake_history(hospedaje_id: str, user_id: str, page: int = 1, limit: int = 20):
+        started = datetime(2025, 1, 1, 10, 0, 0)
+        messages: List[ChatMessage] = []
+        for i in range(limit):
+            timestamp = started + timedelta(minutes=i)
+            messages.append(ChatMessage(message=USER_MESSAGE, role="user", timestamp=timestamp, session_id="bench"))
+            messages.append(ChatMessage(message=BOT_RESPONSE, role="assistant", timestamp=timestamp, session_id="bench"))
+        return ChatHistoryResponse(messages=messages, total=limit * 10, page=page, limit=limit, hospedaje_id=hospedaje_id)
+
+    chat.chat_service.get_user_history = fake_history
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/chat")
+    return app
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def start_server(args: argparse.Namespace, scenario: str, log) -> subprocess.Popen:
+    env = dict(os.environ, **SCENARIOS[scenario])
+    env["PYTHONPATH"] = os.pathsep.join([ROOT, TOOLS, env.get("PYTHONPATH", "")])
+    env.setdefault("LOG_LEVEL", "WARNING")
+    command = [
+        sys.executable, "-m", "app.serve",
+        "--app", "serving_benchmark:create_app", "--factory",
+        "--host", "127.0.0.1", "--port", str(args.port),
+        "--workers", str(args.workers),
+    ]
+    return subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=log)
+
+
+async def wait_ready(client: httpx.AsyncClient, path: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get(path)).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"El servidor no respondió en {timeout:.0f}s")
+
+
+async def measure(args: argparse.Namespace) -> Dict[str, Any]:
+    path = f"/chat/bench-hospedaje/history/bench-user?limit={args.limit}"
+    latencies: List[float] = []
+    sizes: List[int] = []
+    errors = 0
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(args.requests):
+        queue.put_nowait(i)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    base_url = f"http://127.0.0.1:{args.port}"
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        await wait_ready(client, path, args.startup_timeout)
+        for _ in range(args.warmup):
+            await client.get(path)
+
+        async def worker():
+            nonlocal errors
+            while True:
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                started = time.perf_counter()
+                try:
+                    response = await client.get(path, headers={"Accept-Encoding": "gzip"})
+                    if response.status_code != 200:
+                        errors += 1
+                        continue
+                    # Bytes transferidos (comprimidos si el servidor usó gzip)
+                    sizes.append(int(response.headers.get("content-length", len(response.content))))
+                    latencies.append((time.perf_counter() - started) * 1000)
+                except httpx.HTTPError:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": args.requests,
+        "errors": errors,
+        "requests_per_sec": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "bytes_per_response": round(sum(sizes) / len(sizes)) if sizes else 0,
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    results: Dict[str, Any] = {"limit": args.limit, "concurrency": args.concurrency, "workers": args.workers}
+    for scenario in args.scenarios:
+        with tempfile.TemporaryFile() as log:
+            server = start_server(args, scenario, log)
+            try:
+                results[scenario] = asyncio.run(measure(args))
+            except RuntimeError:
+                log.seek(0)
+                print(log.read().decode("utf-8", "replace"), file=sys.stderr)
+                raise
+            finally:
+                server.terminate()
+                server.wait(timeout=15)
+
+    if "before" in results and "after" in results and results["before"]["requests_per_sec"]:
+        results["speedup"] = round(results["after"]["requests_per_sec"] / results["before"]["requests_per_sec"], 2)
+    return results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Requests/seg del historial con los perfiles de servicio")
+    parser.add_argument("-n", "--requests", type=int, default=2000)
+    parser.add_argument("-c", "--concurrency", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=50, help="Filas de historial por página")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--scenarios", type=lambda value: value.split(","), default=["before", "after"],
+                        help="before,after (separados por coma)")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(parse_args()), indent=2, ensure_ascii=False))
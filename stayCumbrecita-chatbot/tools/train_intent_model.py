@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Entrena el modelo de intenciones del clasificador de consultas.
+
+Entrada: exportaciones etiquetadas de chat_history en CSV o JSONL, con el
+mensaje en user_message (o message / text) y la categoría en label (o
+query_type / category / intent). Por ejemplo, para exportar los mensajes y
+etiquetarlos:
+
+    psql -c "\\copy (SELECT user_message, '' AS label FROM chat_history
+             WHERE user_message <> '') TO 'mensajes.csv' CSV HEADER"
+
+Se separa una parte para validación: con ella se calibra la temperatura (las
+confianzas pasan a corresponderse con la tasa de acierto) y se informa
+exactitud, precisión/recall por categoría, error de calibración y, con
+--compare-regex, la exactitud del clasificador por patrones sobre los mismos
+ejemplos.
+
+Uso:
+    python tools/train_intent_model.py --input mensajes.csv --compare-regex
+    QUERY_CLASSIFIER_BACKEND=model uvicorn app.main:app
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.intent_model import (  # noqa: E402
+    DEFAULT_FEATURES, calibrate_temperature, evaluate, train
+)
+
+DEFAULT_OUTPUT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app", "intent_models", "intent_model.npz"
+)
+TEXT_FIELDS = ("user_message", "message", "text")
+LABEL_FIELDS = ("label", "query_type", "category", "intent")
+
+
+def _field(record: Dict[str, Any], names: Tuple[str, ...]) -> str:
+    for name in names:
+        value = record.get(name)
+        if value:
+            return str(value).strip()
+    return ""
+
+
+def load_examples(paths: List[str]) -> List[Tuple[str, str]]:
+    """Pares (mensaje, categoría) sin repetidos; se descartan los que no tienen etiqueta"""
+    examples = []
+    seen = set()
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            if path.endswith(".jsonl"):
+                records = [json.loads(line) for line in f if line.strip()]
+            else:
+                records = list(csv.DictReader(f))
+        for record in records:
+            text, label = _field(record, TEXT_FIELDS), _field(record, LABEL_FIELDS)
+            if text and label and (text, label) not in seen:
+                seen.add((text, label))
+                examples.append((text, label))
+    return examples
+
+
+def split(examples: List[Tuple[str, str]], fraction: float, seed: int):
+    """Separación estratificada por categoría"""
+    rng = random.Random(seed)
+    by_label: Dict[str, List[Tuple[str, str]]] = {}
+    for example in examples:
+        by_label.setdefault(example[1], []).append(example)
+
+    training, validation = [], []
+    for items in by_label.values():
+        rng.shuffle(items)
+        cut = int(round(len(items) * fraction)) if len(items) > 1 else 0
+        validation.extend(items[:cut])
+        training.extend(items[cut:])
+    rng.shuffle(training)
+    return training, validation
+
+
+def regex_accuracy(examples: List[Tuple[str, str]]) -> float:
+    """Exactitud del clasificador por patrones (sin contexto conversacional)"""
+    from app.services.query_classifier import QueryClassifier
+
+    classifier = QueryClassifier()
+    classifier.intent_model = None
+
+    async def classify_all():
+        return [await classifier.classify_query(text, {"query_params": {}}) for text, _ in examples]
+
+    predicted = asyncio.run(classify_all())
+    return sum(1 for p, (_, label) in zip(predicted, examples) if p == label) / len(examples)
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    examples = load_examples(args.input)
+    counts: Dict[str, int] = {}
+    for _, label in examples:
+        counts[label] = counts.get(label, 0) + 1
+    rare = {label for label, count in counts.items() if count < args.min_examples}
+    if rare:
+        print(f"⚠️ Categorías descartadas por tener menos de {args.min_examples} ejemplos: {sorted(rare)}")
+        examples = [example for example in examples if example[1] not in rare]
+    if not examples:
+        raise SystemExit("❌ No hay ejemplos etiquetados")
+
+    training, validation = split(examples, args.valid_fraction, args.seed)
+    texts, labels = [t for t, _ in training], [l for _, l in training]
+    valid_texts, valid_labels = [t for t, _ in validation], [l for _, l in validation]
+
+    model = train(
+        texts, labels,
+        n_features=args.features,
+        epochs=args.epochs,
+        learning_rate=args.learning_rate,
+        l2=args.l2,
+        seed=args.seed
+    )
+
+    report: Dict[str, Any] = {
+        "examples": {"training": len(training), "validation": len(validation)},
+        "labels": model.labels,
+    }
+    if validation:
+        uncalibrated = evaluate(model, valid_texts, valid_labels)
+        report["temperature"] = round(calibrate_temperature(model, valid_texts, valid_labels), 3)
+        report["validation"] = evaluate(model, valid_texts, valid_labels)
+        report["validation"]["uncalibrated_ece"] = uncalibrated.get("expected_calibration_error")
+        if args.compare_regex:
+            report["validation"]["regex_accuracy"] = round(regex_accuracy(validation), 4)
+
+    started = time.perf_counter()
+    sample = valid_texts or texts
+    for text in sample:
+        model.predict(text)
+    report["microseconds_per_prediction"] = round((time.perf_counter() - started) / len(sample) * 1e6, 1)
+
+    model.metadata["validation"] = {
+        key: report.get("validation", {}).get(key)
+        for key in ("accuracy", "expected_calibration_error", "regex_accuracy")
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    model.save(args.output)
+    report["output"] = args.output
+    report["size_kb"] = round(os.path.getsize(args.output) / 1024, 1)
+    return report
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Entrenamiento del modelo de intenciones")
+    parser.add_argument("--input", action="append", required=True, help="CSV o JSONL etiquetado (repetible)")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--features", type=int, default=DEFAULT_FEATURES, help="Columnas del hashing de n-gramas")
+    parser.add_argument("--epochs", type=int, default=20)
+    parser.add_argument("--learning-rate", type=float, default=5.0)
+    parser.add_argument("--l2", type=float, default=1e-4)
+    parser.add_argument("--valid-fraction", type=float, default=0.2)
+    parser.add_argument("--min-examples", type=int, default=5, help="Mínimo de ejemplos por categoría")
+    parser.add_argument("--compare-regex", action="store_true", help="Medir también el clasificador por patrones")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    result = run(parse_args())
+    print(json.dumps(result, indent=2, ensure_ascii=False))